@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Measure how long it takes to load the main agent and its subagents at startup."""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from kimi_cli.agentspec import DEFAULT_AGENT_FILE, _spec_cache, load_agent_spec
+from kimi_cli.config import get_default_config
+from kimi_cli.session import Session
+from kimi_cli.soul.agent import _tool_cache, load_agent
+from kimi_cli.soul.approval import Approval
+from kimi_cli.soul.denwarenji import DenwaRenji
+from kimi_cli.soul.runtime import BuiltinSystemPromptArgs, Runtime
+from kimi_cli.soul.toolset import CustomToolset
+from kimi_cli.tools.task import Task
+from kimi_cli.utils.aiohttp import SharedClientSession
+
+
+def _make_runtime(work_dir: Path) -> Runtime:
+    # a fresh runtime, like the one created on every start or reload of the shell
+    return Runtime(
+        config=get_default_config(),
+        llm=None,
+        session=Session(id="bench", work_dir=work_dir, history_file=work_dir / "history.jsonl"),
+        builtin_args=BuiltinSystemPromptArgs(
+            KIMI_NOW="1970-01-01T00:00:00+00:00",
+            KIMI_WORK_DIR=work_dir,
+            KIMI_WORK_DIR_LS="",
+            KIMI_AGENTS_MD="",
+        ),
+        denwa_renji=DenwaRenji(),
+        approval=Approval(yolo=True),
+        global_exclude_tools=None,
+        http_session=SharedClientSession(),
+    )
+
+
+def _clear_caches() -> None:
+    _spec_cache.clear()
+    _tool_cache.clear()
+
+
+async def _startup(runtime: Runtime, *, eager: bool) -> Task:
+    agent = await load_agent(DEFAULT_AGENT_FILE, runtime, mcp_configs=[])
+    assert isinstance(agent.toolset, CustomToolset)
+    task = agent.toolset._tool_dict["Task"]
+    assert isinstance(task, Task)
+    if eager:
+        # what the Task tool used to do right after being built
+        for name in load_agent_spec(DEFAULT_AGENT_FILE).subagents:
+            await task._get_subagent(name)
+    return task
+
+
+async def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        work_dir = Path(tmpdir)
+
+        start = time.perf_counter()
+        await _startup(_make_runtime(work_dir), eager=False)
+        first_load = (time.perf_counter() - start) * 1000
+        print(f"first load in process, imports included: {first_load:.1f} ms")
+
+        async def uncached_eager() -> None:
+            _clear_caches()
+            await _startup(_make_runtime(work_dir), eager=True)
+
+        async def cached_lazy() -> None:
+            await _startup(_make_runtime(work_dir), eager=False)
+
+        print(f"{'startup':<44} {'best ms':>10}")
+        for name, fn in [
+            ("no caches, subagents loaded eagerly", uncached_eager),
+            ("spec cache, subagents loaded lazily", cached_lazy),
+        ]:
+            print(f"{name:<44} {await _time(fn, args.repeat):>10.1f}")
+
+        runtime = _make_runtime(work_dir)
+        task = await _startup(runtime, eager=False)
+
+        async def first_use_uncached() -> None:
+            _tool_cache.clear()
+            task._subagents.clear()
+            await task._get_subagent("coder")
+
+        async def first_use_cached() -> None:
+            # the main agent was loaded just before, within the same runtime
+            await load_agent(DEFAULT_AGENT_FILE, runtime, mcp_configs=[])
+            task._subagents.clear()
+            start = time.perf_counter()
+            await task._get_subagent("coder")
+            timings.append(time.perf_counter() - start)
+
+        timings: list[float] = []
+        print(f"{'first use of a subagent':<44} {'best ms':>10}")
+        print(f"{'tools built anew':<44} {await _time(first_use_uncached, args.repeat):>10.1f}")
+        await _time(first_use_cached, args.repeat)
+        print(f"{'tools shared with the main agent':<44} {min(timings) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Measure the per-command overhead of the Bash tool, a new shell per command vs a warm worker."""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+from kimi_cli.tools.bash import _stream_subprocess
+from kimi_cli.tools.bash.worker import ShellWorkerPool
+
+_COMMANDS = ["true", "echo hello", "pwd && ls / > /dev/null", "for i in 1 2 3; do echo $i; done"]
+
+
+def _discard(line: bytes) -> bool:
+    return True
+
+
+async def _measure(run: Callable[[str], Awaitable[int]], command: str, n: int) -> list[float]:
+    await run(command)  # warm up
+    latencies: list[float] = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await run(command)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    shell_pool = ShellWorkerPool(max_workers=1)
+
+    async def one_shot(command: str) -> int:
+        return await _stream_subprocess(command, _discard, _discard, 60)
+
+    async def warm(command: str) -> int:
+        worker = await shell_pool.acquire()
+        assert worker is not None, "bash is not installed"
+        try:
+            return await worker.run(command, _discard, _discard, 60)
+        finally:
+            shell_pool.release(worker)
+
+    try:
+        print(f"{args.runs} runs per command")
+        print(f"{'command':<36} {'shell':<9} {'p50 ms':>8} {'p95 ms':>8}")
+        for command in _COMMANDS:
+            for name, run in [("one-shot", one_shot), ("warm", warm)]:
+                latencies = await _measure(run, command, args.runs)
+                p50 = statistics.median(latencies) * 1000
+                p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+                print(f"{command:<36} {name:<9} {p50:>8.2f} {p95:>8.2f}")
+    finally:
+        await shell_pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Replay session histories through context compaction against a local fake chat provider."""
+
+import argparse
+import asyncio
+import copy
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Self
+
+from kosong.chat_provider import ThinkingEffort
+from kosong.chat_provider.mock import MockStreamedMessage
+from kosong.message import Message, TextPart
+from kosong.tooling import Tool
+
+from kimi_cli.llm import LLM
+from kimi_cli.soul.compaction import Compaction, get_compaction
+from kimi_cli.soul.kimisoul import RESERVED_TOKENS
+from kimi_cli.soul.storage import iter_history_records
+from kimi_cli.soul.tokens import TokenEstimator
+
+
+class _FakeChatProvider:
+    """Take time proportional to the request and answer with a summary of plausible size."""
+
+    name = "fake"
+
+    def __init__(self, estimator: TokenEstimator, seconds_per_input_token: float):
+        self._estimator = estimator
+        self._seconds_per_input_token = seconds_per_input_token
+        self.n_requests = 0
+        self.n_input_tokens = 0
+        self.max_input_tokens = 0
+
+    @property
+    def model_name(self) -> str:
+        return "fake"
+
+    async def generate(
+        self, system_prompt: str, tools: Sequence[Tool], history: Sequence[Message]
+    ) -> MockStreamedMessage:
+        n_tokens = self._estimator.estimate(history)
+        self.n_requests += 1
+        self.n_input_tokens += n_tokens
+        self.max_input_tokens = max(self.max_input_tokens, n_tokens)
+        await asyncio.sleep(n_tokens * self._seconds_per_input_token)
+        n_output_tokens = min(n_tokens // 10, 4000)
+        return MockStreamedMessage([TextPart(text="summary " * (n_output_tokens // 2))])
+
+    def with_thinking(self, effort: ThinkingEffort) -> Self:
+        return copy.copy(self)
+
+
+def _synthetic_history(n_turns: int) -> list[Message]:
+    messages: list[Message] = []
+    for i in range(n_turns):
+        messages.append(Message(role="user", content=f"task {i}: " + "please fix it " * 20))
+        for j in range(5):
+            messages.append(Message(role="assistant", content=f"step {j} of task {i} " * 10))
+            output = f"output line {j}\n" * (50 if j % 4 else 2000)
+            messages.append(Message(role="tool", content=output, tool_call_id=f"{i}-{j}"))
+        messages.append(Message(role="assistant", content=f"done with task {i} " * 20))
+    return messages
+
+
+def _load_history(path: Path) -> list[Message]:
+    return [record for record in iter_history_records(path) if isinstance(record, Message)]
+
+
+async def _replay(
+    name: str, messages: Sequence[Message], max_context_size: int, seconds_per_token: float
+):
+    estimator = TokenEstimator()
+    provider = _FakeChatProvider(estimator, seconds_per_token)
+    llm = LLM(chat_provider=provider, max_context_size=max_context_size, capabilities=set())  # pyright: ignore[reportArgumentType]
+    compaction: Compaction = get_compaction(name)  # pyright: ignore[reportArgumentType]
+
+    history: list[Message] = []
+    n_tokens = 0
+    latencies: list[float] = []
+    for message in messages:
+        history.append(message)
+        n_tokens += estimator.estimate([message])
+        if n_tokens + RESERVED_TOKENS < max_context_size:
+            continue
+        start = time.perf_counter()
+        history = list(await compaction.compact(history, llm))
+        latencies.append(time.perf_counter() - start)
+        n_tokens = estimator.estimate(history)
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] if latencies else 0.0
+    print(
+        f"{name:>7}  compactions {len(latencies):4}  requests {provider.n_requests:5}  "
+        f"input {provider.n_input_tokens / 1e6:7.2f}M tok  "
+        f"largest request {provider.max_input_tokens:8,} tok  "
+        f"latency p50 {p50:6.3f}s max {max(latencies, default=0.0):6.3f}s  "
+        f"final context {n_tokens:7,} tok"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "histories", type=Path, nargs="*", help="history files to replay, `.jsonl` or `.kpack`"
+    )
+    parser.add_argument("--turns", type=int, default=200, help="turns of the synthetic history")
+    parser.add_argument("--max-context-size", type=int, default=128_000)
+    parser.add_argument(
+        "--seconds-per-token",
+        type=float,
+        default=1e-6,
+        help="simulated latency of the fake chat provider per input token",
+    )
+    args = parser.parse_args()
+
+    histories = {path.name: _load_history(path) for path in args.histories} or {
+        f"synthetic ({args.turns} turns)": _synthetic_history(args.turns)
+    }
+    for label, messages in histories.items():
+        print(f"{label}: {len(messages):,} messages")
+        for name in ("simple", "tiered"):
+            await _replay(name, messages, args.max_context_size, args.seconds_per_token)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
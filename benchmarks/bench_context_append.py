@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Compare appending messages to a context history file: per-record open/close vs buffered."""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import aiofiles
+from kosong.message import Message
+
+from kimi_cli.soul.context import Context
+
+
+def _make_messages(n: int) -> list[Message]:
+    return [
+        Message(role="user" if i % 2 == 0 else "assistant", content=f"message {i} " + "x" * 200)
+        for i in range(n)
+    ]
+
+
+async def _legacy_append(path: Path, messages: list[Message]) -> None:
+    # what `Context.append_message` used to do for every single message
+    for message in messages:
+        async with aiofiles.open(path, "a", encoding="utf-8") as f:
+            await f.write(message.model_dump_json(exclude_none=True) + "\n")
+
+
+async def _buffered_append(
+    path: Path, messages: list[Message], records_per_step: int, fsync: str
+) -> None:
+    context = Context(path, fsync=fsync)  # pyright: ignore[reportArgumentType]
+    for i, message in enumerate(messages, 1):
+        await context.append_message(message)
+        if i % records_per_step == 0:
+            await context.flush()
+    await context.close()
+
+
+def _report(name: str, n: int, elapsed: float, path: Path) -> None:
+    size = path.stat().st_size
+    print(
+        f"{name:<28} {elapsed:8.3f}s  {n / elapsed:>10,.0f} msg/s  "
+        f"{size / elapsed / (1 << 20):7.1f} MiB/s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--messages", type=int, default=100_000)
+    parser.add_argument(
+        "--records-per-step", type=int, default=4, help="records appended between two flushes"
+    )
+    args = parser.parse_args()
+
+    messages = _make_messages(args.messages)
+    print(f"Appending {args.messages:,} messages, flushing every {args.records_per_step}")
+    with tempfile.TemporaryDirectory(prefix="kimi-bench-") as tmpdir:
+        legacy_path = Path(tmpdir) / "legacy.jsonl"
+        start = time.perf_counter()
+        await _legacy_append(legacy_path, messages)
+        _report(
+            "open/write/close per record", args.messages, time.perf_counter() - start, legacy_path
+        )
+
+        for fsync in ("never", "flush"):
+            path = Path(tmpdir) / f"buffered-{fsync}.jsonl"
+            start = time.perf_counter()
+            await _buffered_append(path, messages, args.records_per_step, fsync)
+            _report(f"buffered (fsync={fsync})", args.messages, time.perf_counter() - start, path)
+            assert path.read_bytes() == legacy_path.read_bytes()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
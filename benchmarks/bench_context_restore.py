@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Measure session restore latency on synthetic context history files."""
+
+import argparse
+import asyncio
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from kosong.message import Message
+
+from kimi_cli.soul.context import Context
+
+
+def _write_history(path: Path, n_lines: int) -> None:
+    # roughly what a real session looks like: one checkpoint and usage record per step
+    with open(path, "w", encoding="utf-8") as f:
+        checkpoint_id = 0
+        for i in range(n_lines):
+            match i % 5:
+                case 0:
+                    f.write(json.dumps({"role": "_checkpoint", "id": checkpoint_id}) + "\n")
+                    checkpoint_id += 1
+                case 1:
+                    message = Message(role="user", content=f"question {i} " + "q" * 100)
+                    f.write(message.model_dump_json(exclude_none=True) + "\n")
+                case 2:
+                    message = Message(role="assistant", content=f"answer {i} " + "a" * 300)
+                    f.write(message.model_dump_json(exclude_none=True) + "\n")
+                case 3:
+                    f.write(json.dumps({"role": "_usage", "token_count": i}) + "\n")
+                case _:
+                    message = Message(role="tool", content="o" * 500, tool_call_id=f"call_{i}")
+                    f.write(message.model_dump_json(exclude_none=True) + "\n")
+
+
+def _eager_restore(path: Path) -> list[Message]:
+    # what `Context.restore` used to do
+    history: list[Message] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            line_json = json.loads(line)
+            if line_json["role"] in ("_usage", "_checkpoint"):
+                continue
+            history.append(Message.model_validate(line_json))
+    return history
+
+
+async def _bench(path: Path) -> None:
+    start = time.perf_counter()
+    n_messages = len(_eager_restore(path))
+    eager = time.perf_counter() - start
+
+    context = Context(path)
+    start = time.perf_counter()
+    await context.restore()
+    lazy = time.perf_counter() - start
+    assert len(context.history) == n_messages
+    _ = context.history[-20:]
+    replay = time.perf_counter() - start
+    _ = list(context.history)
+    full = time.perf_counter() - start
+    await context.close()
+
+    print(
+        f"{path.stat().st_size / (1 << 20):9.1f} MiB  eager {eager:8.3f}s  lazy {lazy:8.3f}s  "
+        f"lazy+replay {replay:8.3f}s  lazy+all {full:8.3f}s"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--lines", type=int, nargs="+", default=[10_000, 100_000, 1_000_000], help="history sizes"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="kimi-bench-") as tmpdir:
+        for n_lines in args.lines:
+            path = Path(tmpdir) / f"history-{n_lines}.jsonl"
+            _write_history(path, n_lines)
+            print(f"{n_lines:>9,} lines", end="  ")
+            await _bench(path)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Measure event-loop stalls and repeat-fetch latency of FetchURL on local HTML fixtures."""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import trafilatura
+from aiohttp import web
+
+from kimi_cli.tools.web.fetch import FetchURL, Params
+from kimi_cli.utils.aiohttp import SharedClientSession, new_client_session
+from kimi_cli.utils.trafilatura import extract_in_pool
+
+
+def _make_page(n_paragraphs: int) -> str:
+    rows = "".join(
+        f"<tr><td>{i}</td><td>value {i}</td><td>{i * 7 % 13}</td></tr>" for i in range(20)
+    )
+    sections = "".join(
+        f"<h2>Section {i}</h2><p>Paragraph {i} of the article explains one more detail of the "
+        f"topic at hand, with enough words to look like real prose to the extractor.</p>"
+        + (f"<table>{rows}</table>" if i % 10 == 0 else "")
+        for i in range(n_paragraphs)
+    )
+    nav = "".join(f'<li><a href="/page{i}">Link {i}</a></li>' for i in range(100))
+    return (
+        f"<html><head><title>Fixture {n_paragraphs}</title></head><body>"
+        f"<nav><ul>{nav}</ul></nav><article>{sections}</article></body></html>"
+    )
+
+
+async def _start_server(pages: dict[str, str], cache_control: str) -> tuple[web.AppRunner, str]:
+    async def handle(request: web.Request) -> web.Response:
+        headers = {"ETag": '"v1"', "Cache-Control": cache_control}
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers=headers)
+        page = pages[request.match_info["name"]]
+        return web.Response(text=page, content_type="text/html", headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/{name}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+async def _inline_fetch(url: str) -> None:
+    # what the tool used to do: a new session, the whole body, extraction on the event loop
+    async with new_client_session() as session, session.get(url) as response:
+        html = await response.text()
+    trafilatura.extract(
+        html,
+        include_comments=True,
+        include_tables=True,
+        include_formatting=False,
+        output_format="txt",
+        with_metadata=True,
+    )
+
+
+async def _measure(fn: Callable[[], Awaitable[object]]) -> tuple[float, float]:
+    """Run `fn` along with a ticker, returning the wall time and the worst loop lag in ms."""
+    interval = 0.002
+    worst_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal worst_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            worst_lag = max(worst_lag, time.perf_counter() - start - interval)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await fn()
+    wall = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return wall * 1000, worst_lag * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    args = parser.parse_args()
+
+    pages = {f"p{n}": _make_page(n) for n in args.sizes}
+    http_session = SharedClientSession()
+    with tempfile.TemporaryDirectory() as tmpdir:
+        start = time.perf_counter()
+        await extract_in_pool("<html><body><p>warm up</p></body></html>")
+        print(f"extraction pool started in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        # first fetches, with extraction on the loop vs in the pool
+        runner, base_url = await _start_server(pages, "max-age=60")
+        tool = FetchURL(http_session, cache_dir=Path(tmpdir) / "fresh")
+        print(f"{'page':<8} {'KB':>6} {'fetch':<12} {'wall ms':>9} {'max lag ms':>11}")
+        for name, page in pages.items():
+            url = f"{base_url}/{name}"
+            for fetch, fn in [
+                ("inline", lambda url=url: _inline_fetch(url)),
+                ("pool", lambda url=url: tool(Params(url=url))),
+                ("cached", lambda url=url: tool(Params(url=url))),
+            ]:
+                wall, lag = await _measure(fn)
+                print(f"{name:<8} {len(page) >> 10:>6} {fetch:<12} {wall:>9.1f} {lag:>11.1f}")
+        await runner.cleanup()
+
+        # repeat fetches of pages that must be revalidated, served from the 304 and the
+        # extraction cache
+        runner, base_url = await _start_server(pages, "no-cache")
+        tool = FetchURL(http_session, cache_dir=Path(tmpdir) / "revalidated")
+        for name, page in pages.items():
+            url = f"{base_url}/{name}"
+            await tool(Params(url=url))
+            wall, lag = await _measure(lambda url=url: tool(Params(url=url)))
+            print(f"{name:<8} {len(page) >> 10:>6} {'revalidated':<12} {wall:>9.1f} {lag:>11.1f}")
+        await runner.cleanup()
+    await http_session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
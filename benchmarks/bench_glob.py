@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Compare the scandir walker of Glob with `Path.glob` on a repo with a large dependency tree."""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from kimi_cli.tools.file.glob import MAX_MATCHES, _glob
+
+
+def _make_tree(root: Path, n_sources: int, n_dependencies: int) -> None:
+    for i in range(n_sources):
+        directory = root / "src" / f"pkg{i % 20}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"module{i}.py").write_text("", encoding="utf-8")
+    for i in range(n_dependencies):
+        directory = root / "node_modules" / f"dep{i % 500}" / "lib" / f"part{i % 9}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"file{i}.js").write_text("", encoding="utf-8")
+    for i in range(n_dependencies // 4):
+        directory = root / "build" / f"out{i % 100}"
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / f"module{i}.py").write_text("", encoding="utf-8")
+
+
+def _pathlib_glob(root: Path, pattern: str, include_dirs: bool) -> tuple[int, list[str]]:
+    # what the tool used to do
+    matches = list(root.glob(pattern))
+    if not include_dirs:
+        matches = [p for p in matches if p.is_file()]
+    matches.sort()
+    return len(matches), [str(p.relative_to(root)) for p in matches[:MAX_MATCHES]]
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sources", type=int, default=2000)
+    parser.add_argument("--dependencies", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root, args.sources, args.dependencies)
+        print(f"tree: {args.sources} source files, {args.dependencies} dependency files")
+
+        cases = [
+            ("**/*.py, files only", "**/*.py", False),
+            ("src/**/*.py", "src/**/*.py", True),
+            ("node_modules/**/*.js", "node_modules/**/*.js", True),
+        ]
+        print(f"{'pattern':<24} {'engine':<10} {'best ms':>10} {'matches':>10}")
+        for name, pattern, include_dirs in cases:
+            n_old, _ = _pathlib_glob(root, pattern, include_dirs)
+            new = _glob(root, pattern, include_dirs, root)
+            n_new = f"{'>=' if not new.complete else ''}{new.n_matches}"
+            for engine, fn, n in [
+                ("pathlib", lambda p=pattern, d=include_dirs: _pathlib_glob(root, p, d), n_old),
+                ("scandir", lambda p=pattern, d=include_dirs: _glob(root, p, d, root), n_new),
+            ]:
+                best = _time(fn, args.repeat)
+                print(f"{name:<24} {engine:<10} {best:>10.1f} {n:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
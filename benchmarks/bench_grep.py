@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Measure event-loop lag and wall time of Grep on a large synthetic tree."""
+
+import argparse
+import asyncio
+import subprocess
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from kimi_cli.tools.file.grep import Grep, Params, _build_rg_args, _ensure_rg_path
+from kimi_cli.utils.aiohttp import SharedClientSession
+
+
+def _make_tree(root: Path, n_files: int, n_lines: int) -> None:
+    for i in range(n_files):
+        directory = root / f"pkg{i % 50}" / f"mod{i % 7}"
+        directory.mkdir(parents=True, exist_ok=True)
+        lines = [f"def function_{i}_{j}(value):  # TODO item {j}" for j in range(n_lines)]
+        (directory / f"file{i}.py").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+async def _blocking_grep(params: Params, http_session: SharedClientSession) -> None:
+    # what the tool used to do: a synchronous ripgrep run on the event loop, then `head_limit`
+    rg_path = await _ensure_rg_path(http_session)
+    args = [arg for arg in _build_rg_args(params) if arg != "--json"]
+    output = subprocess.run([rg_path, *args], capture_output=True, text=True).stdout
+    if params.head_limit is not None:
+        output = "\n".join(output.split("\n")[: params.head_limit])
+
+
+async def _measure(fn: Callable[[], Awaitable[None]]) -> tuple[float, float]:
+    """Run `fn` along with a ticker, returning the wall time and the worst loop lag in ms."""
+    interval = 0.005
+    worst_lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        nonlocal worst_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            worst_lag = max(worst_lag, time.perf_counter() - start - interval)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await fn()
+    wall = time.perf_counter() - start
+    done.set()
+    await ticker_task
+    return wall * 1000, worst_lag * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--lines", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        root = Path(tmpdir)
+        _make_tree(root, args.files, args.lines)
+        print(f"tree: {args.files} files x {args.lines} lines")
+        http_session = SharedClientSession()
+        grep = Grep(http_session)
+
+        cases = [
+            ("files_with_matches", Params(pattern="TODO", path=tmpdir)),
+            (
+                "content, head_limit=100",
+                Params(pattern="TODO", path=tmpdir, output_mode="content", head_limit=100),
+            ),
+            ("content, no limit", Params(pattern="TODO", path=tmpdir, output_mode="content")),
+        ]
+        print(f"{'case':<26} {'engine':<10} {'wall ms':>10} {'max lag ms':>12}")
+        for name, params in cases:
+            for engine, fn in [
+                ("blocking", lambda params=params: _blocking_grep(params, http_session)),
+                ("async", lambda params=params: grep(params)),
+            ]:
+                await fn()  # warm up the page cache
+                wall, lag = await _measure(fn)
+                print(f"{name:<26} {engine:<10} {wall:>10.1f} {lag:>12.1f}")
+        await http_session.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Compare disk size and restore speed of the JSONL and packed history formats."""
+
+import argparse
+import asyncio
+import base64
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from kosong.message import ContentPart, ImageURLPart, Message, TextPart
+
+from kimi_cli.soul.context import Context
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+
+
+async def _write_sessions(session_dir: Path, suffix: str, n_sessions: int, n_steps: int) -> None:
+    # the same screenshot and command output show up again and again across sessions,
+    # e.g. after reverting and retrying, or when several sessions work on the same project
+    images = [
+        "data:image/png;base64," + base64.b64encode(os.urandom(96 * 1024)).decode()
+        for _ in range(4)
+    ]
+    outputs = [
+        "\n".join(f"line {j}: build step {i} finished in {j * 7 % 97}ms" for j in range(500))
+        for i in range(8)
+    ]
+    for s in range(n_sessions):
+        context = Context(session_dir / f"session-{s}{suffix}")
+        for i in range(n_steps):
+            await context.checkpoint(add_user_message=False)
+            content: list[ContentPart] = [TextPart(text=f"step {i} of session {s}")]
+            if i % 10 == 0:
+                url = images[(s + i) % len(images)]
+                content.append(ImageURLPart(image_url=ImageURLPart.ImageURL(url=url)))
+            await context.append_message(
+                [
+                    Message(role="user", content=content),
+                    Message(role="assistant", content=f"answer {i} " + "a" * 300),
+                    Message(
+                        role="tool",
+                        content=outputs[(s * 3 + i) % len(outputs)],
+                        tool_call_id=f"call_{i}",
+                    ),
+                ]
+            )
+            await context.update_token_count(i * 100)
+        await context.close()
+
+
+async def _restore_all(session_dir: Path, suffix: str) -> float:
+    start = time.perf_counter()
+    for path in sorted(session_dir.glob(f"*{suffix}")):
+        context = Context(path)
+        await context.restore()
+        _ = list(context.history)
+        await context.close()
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=10, help="number of history files")
+    parser.add_argument("--steps", type=int, default=200, help="steps per history file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="kimi-bench-") as tmpdir:
+        for name, suffix in (("jsonl", ".jsonl"), ("packed", ".kpack")):
+            session_dir = Path(tmpdir) / name
+            session_dir.mkdir()
+            start = time.perf_counter()
+            await _write_sessions(session_dir, suffix, args.sessions, args.steps)
+            write = time.perf_counter() - start
+            restore = await _restore_all(session_dir, suffix)
+            print(
+                f"{name:>6}  disk {_dir_size(session_dir) / (1 << 20):8.1f} MiB  "
+                f"write {write:7.3f}s  restore+decode {restore:7.3f}s"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Measure HTTP request latency against a local server, a new session per request vs shared."""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+
+import aiohttp
+from aiohttp import web
+
+from kimi_cli.utils.aiohttp import SharedClientSession, new_client_session
+
+_BODY = "<html><body>" + "<p>Lorem ipsum dolor sit amet.</p>" * 200 + "</body></html>"
+
+
+async def _start_server(latency: float) -> tuple[web.AppRunner, str]:
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.Response(text=_BODY, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}/"
+
+
+async def _per_request(url: str) -> None:
+    # what the tools used to do
+    async with new_client_session() as session, session.get(url) as response:
+        await response.text()
+
+
+def _shared(http_session: SharedClientSession) -> Callable[[str], Awaitable[None]]:
+    async def get(url: str) -> None:
+        async with http_session.session.get(url) as response:
+            await response.text()
+
+    return get
+
+
+async def _sequential(get: Callable[[str], Awaitable[None]], url: str, n: int) -> list[float]:
+    latencies: list[float] = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await get(url)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def _concurrent(get: Callable[[str], Awaitable[None]], url: str, n: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(get(url) for _ in range(n)))
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="server think time")
+    args = parser.parse_args()
+
+    runner, url = await _start_server(args.latency_ms / 1000)
+    http_session = SharedClientSession()
+    try:
+        print(f"{args.requests} GETs of a {len(_BODY) >> 10} KB page from {url}")
+        print(f"{'client':<14} {'p50 ms':>8} {'p95 ms':>8} {'total ms':>10} {'concurrent ms':>14}")
+        for name, get in [("per request", _per_request), ("shared", _shared(http_session))]:
+            await get(url)  # warm up
+            latencies = await _sequential(get, url, args.requests)
+            try:
+                concurrent = f"{await _concurrent(get, url, args.requests) * 1000:.1f}"
+            except aiohttp.ClientError as e:
+                concurrent = type(e).__name__
+            p50 = statistics.median(latencies) * 1000
+            p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+            total = sum(latencies) * 1000
+            print(f"{name:<14} {p50:>8.2f} {p95:>8.2f} {total:>10.1f} {concurrent:>14}")
+    finally:
+        await http_session.close()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""Enumerate IDs on a local server, one `curl` shell command per ID vs one HttpRequest batch."""
+
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+
+from kimi_cli.soul.approval import Approval
+from kimi_cli.tools.web.http import BatchRange, HttpRequest, Params
+from kimi_cli.utils.aiohttp import SharedClientSession
+
+
+async def _start_server(latency: float) -> tuple[web.AppRunner, str]:
+    async def handle(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        item_id = int(request.match_info["id"])
+        if item_id % 50 != 0:
+            return web.Response(status=404, text="not found")
+        return web.Response(text=f"item {item_id}")
+
+    app = web.Application()
+    app.router.add_get("/items/{id}", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    return runner, f"http://{host}:{port}"
+
+
+async def _curl(url: str, n: int) -> float:
+    # what agents do today, one Bash tool call per request
+    start = time.perf_counter()
+    for item_id in range(1, n + 1):
+        process = await asyncio.create_subprocess_shell(
+            f"curl -s -o /dev/null -w '%{{http_code}}' {url}/items/{item_id}",
+            stdout=asyncio.subprocess.PIPE,
+        )
+        await process.communicate()
+    return time.perf_counter() - start
+
+
+async def _batch(url: str, n: int, concurrency: int) -> float:
+    http_session = SharedClientSession()
+    tool = HttpRequest(http_session, Approval(yolo=True))
+    try:
+        start = time.perf_counter()
+        await tool(
+            Params(
+                url=url + "/items/{{id}}",
+                batch_range=BatchRange(name="id", start=1, stop=n),
+                concurrency=concurrency,
+            )
+        )
+        return time.perf_counter() - start
+    finally:
+        await http_session.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="server think time")
+    args = parser.parse_args()
+
+    runner, url = await _start_server(args.latency_ms / 1000)
+    try:
+        print(f"{args.requests} IDs with {args.latency_ms:.0f} ms of server latency from {url}")
+        print(f"{'client':<24} {'total s':>8} {'req/s':>8}")
+        for name, elapsed in [
+            ("curl per request", await _curl(url, args.requests)),
+            (
+                f"HttpRequest batch x{args.concurrency}",
+                await _batch(url, args.requests, args.concurrency),
+            ),
+        ]:
+            print(f"{name:<24} {elapsed:>8.2f} {args.requests / elapsed:>8.0f}")
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Microbenchmarks of the markdown renderer, with and without its parse and highlight caches."""
+
+import argparse
+import io
+import time
+from collections.abc import Callable
+
+from rich.console import Console
+
+from kimi_cli.utils.rich import markdown
+from kimi_cli.utils.rich.markdown import Markdown
+
+_CODE = {
+    "python": """\
+def fib(n: int) -> int:
+    a, b = 0, 1
+    for _ in range(n):
+        a, b = b, a + b  # step {i}
+    return a
+""",
+    "rust": """\
+fn main() {{
+    let v: Vec<u32> = (0..{i}).map(|x| x * 2).collect();
+    println!("{{:?}}", v);
+}}
+""",
+    "javascript": """\
+export async function load(url) {{
+  const res = await fetch(url + "/{i}");
+  return res.ok ? res.json() : null;
+}}
+""",
+    "bash": """\
+for f in *.log; do
+  grep -c ERROR "$f" | tee -a summary-{i}.txt
+done
+""",
+}
+
+_PROSE = """\
+### Step {i}
+
+The change touches **several modules**, keeps the *public API* and adds `helper_{i}`.
+See [the docs](https://example.com/{i}) for the details of the configuration.
+
+- one point
+- another point, with `code`
+
+"""
+
+
+def _code_heavy(size: int) -> str:
+    parts: list[str] = []
+    i = 0
+    while sum(map(len, parts)) < size:
+        for lang, code in _CODE.items():
+            parts.append(f"Example {i} in {lang}:\n\n```{lang}\n{code.format(i=i)}```\n\n")
+        i += 1
+    return "".join(parts)
+
+
+def _prose(size: int) -> str:
+    parts: list[str] = []
+    i = 0
+    while sum(map(len, parts)) < size:
+        parts.append(_PROSE.format(i=i))
+        i += 1
+    return "".join(parts)
+
+
+def _clear_caches(*rendered: Markdown) -> None:
+    markdown._parse.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    markdown._highlight.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    markdown._get_lexer.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    for md in rendered:
+        md._rendered.clear()  # pyright: ignore[reportPrivateUsage]
+
+
+def _render(console: Console, text: str, width: int) -> None:
+    console.print(Markdown(text), width=width)
+
+
+def _time(fn: Callable[[int], None], repeat: int, clear: Callable[[], None], cached: bool) -> float:
+    """Milliseconds per call of `fn`, with warm caches or with cleared ones."""
+    clear()
+    fn(0)
+    elapsed = 0.0
+    for i in range(repeat):
+        if not cached:
+            clear()
+        start = time.perf_counter()
+        fn(i)
+        elapsed += time.perf_counter() - start
+    return elapsed / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=20_000, help="characters per document")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    console = Console(file=io.StringIO(), color_system="truecolor", force_terminal=True)
+    code = _code_heavy(args.size)
+    prose = _prose(args.size)
+    brief = "Edited `src/app.py`: **3** lines"
+    widths = [60, 80, 100, 120, 140]
+    # the same renderable printed again and again, like `Live` does on every refresh
+    live_markdown = Markdown(code)
+
+    cases: list[tuple[str, Callable[[int], None]]] = [
+        ("parse prose", lambda i: None if Markdown(prose) else None),
+        ("render tool brief", lambda i: _render(console, brief, 80)),
+        ("render prose", lambda i: _render(console, prose, 100)),
+        ("render code", lambda i: _render(console, code, 100)),
+        ("resize code", lambda i: _render(console, code, widths[i % len(widths)])),
+        ("refresh code", lambda i: console.print(live_markdown, width=100)),
+    ]
+    print(f"{len(code)} characters of code blocks, {len(prose)} of prose, {args.repeat} renders")
+    print(f"{'case':<18} {'uncached ms':>12} {'cached ms':>10} {'speedup':>8}")
+    for name, fn in cases:
+        uncached = _time(fn, args.repeat, lambda: _clear_caches(live_markdown), cached=False)
+        cached = _time(fn, args.repeat, lambda: _clear_caches(live_markdown), cached=True)
+        print(f"{name:<18} {uncached:>12.2f} {cached:>10.2f} {uncached / cached:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
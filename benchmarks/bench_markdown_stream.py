@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Render a long answer streamed token by token, as a whole at the end vs block by block."""
+
+import argparse
+import io
+import re
+import time
+from collections.abc import Iterator
+
+from rich.console import Console, RenderableType
+
+from kimi_cli.utils.rich.markdown import Markdown, MarkdownStream
+
+_SECTION = """\
+## Section {i}
+
+Some prose about the step, with `inline code`, **bold** and *emphasis*, long enough to wrap
+over a couple of lines in a typical terminal, and a [link](https://example.com/{i}).
+
+1. first item
+2. second item, which is a bit longer than the first one
+   - nested bullet
+
+```python
+def handler_{i}(request):
+    for item in request.items:
+        if item.ready:
+            yield item.value * {i}
+```
+
+| name | value |
+|------|-------|
+| a    | {i}   |
+| b    | {i}   |
+
+> A quote to close the section.
+
+"""
+
+
+def _answer(size: int) -> str:
+    parts: list[str] = []
+    total = 0
+    i = 0
+    while total < size:
+        parts.append(section := _SECTION.format(i=i))
+        total += len(section)
+        i += 1
+    return "".join(parts)
+
+
+def _tokens(text: str, token_size: int) -> Iterator[str]:
+    for i in range(0, len(text), token_size):
+        yield text[i : i + token_size]
+
+
+def _console() -> Console:
+    return Console(file=io.StringIO(), width=100, color_system="truecolor", force_terminal=True)
+
+
+def _output(console: Console) -> str:
+    assert isinstance(console.file, io.StringIO)
+    # hyperlinks get random IDs
+    return re.sub(r"id=\d+;", "", console.file.getvalue())
+
+
+def _run_whole(text: str, token_size: int) -> tuple[float, float, float, str]:
+    """Accumulate the text and render it once it is complete, as before the stream."""
+    console = _console()
+    worst = 0.0
+    start = time.perf_counter()
+    raw_text = ""
+    for token in _tokens(text, token_size):
+        token_start = time.perf_counter()
+        raw_text += token
+        worst = max(worst, time.perf_counter() - token_start)
+    final_start = time.perf_counter()
+    console.print(Markdown(raw_text))
+    end = time.perf_counter()
+    return end - start, worst, end - final_start, _output(console)
+
+
+def _run_stream(text: str, token_size: int) -> tuple[float, float, float, str]:
+    """Print every block once it is complete, and the last one at the end."""
+    console = _console()
+    worst = 0.0
+    start = time.perf_counter()
+    stream = MarkdownStream()
+    for token in _tokens(text, token_size):
+        token_start = time.perf_counter()
+        renderable: RenderableType | None = stream.append(token)
+        if renderable is not None:
+            console.print(renderable)
+        worst = max(worst, time.perf_counter() - token_start)
+    final_start = time.perf_counter()
+    if (renderable := stream.finish()) is not None:
+        console.print(renderable)
+    end = time.perf_counter()
+    return end - start, worst, end - final_start, _output(console)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000, help="characters of the answer")
+    parser.add_argument("--token-size", type=int, default=4, help="characters per token")
+    args = parser.parse_args()
+
+    text = _answer(args.size)
+    n_tokens = len(range(0, len(text), args.token_size))
+    print(f"{len(text)} characters in {n_tokens} tokens")
+    print(f"{'rendering':<16} {'total s':>8} {'worst token ms':>15} {'final stall ms':>15}")
+    outputs: list[str] = []
+    for name, run in [("whole at the end", _run_whole), ("block by block", _run_stream)]:
+        total, worst, final, output = run(text, args.token_size)
+        outputs.append(output)
+        print(f"{name:<16} {total:>8.2f} {worst * 1000:>15.1f} {final * 1000:>15.1f}")
+    print(f"same output: {'yes' if outputs[0] == outputs[1] else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Measure MCP tool discovery and call latency against local stdio servers."""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import fastmcp
+
+from kimi_cli.config import MCPConfig
+from kimi_cli.tools.mcp import close_mcp_connections, discover_mcp_tools, get_mcp_connection
+
+_SERVER = """\
+import sys
+import time
+
+from fastmcp import FastMCP
+
+# e.g. a package fetched by npx, or a remote handshake
+time.sleep(float(sys.argv[1]))
+
+server = FastMCP("bench")
+
+
+@server.tool
+def echo(text: str) -> str:
+    return text
+
+
+server.run(show_banner=False)
+"""
+
+
+async def _connect_per_call(config: dict, n_calls: int) -> list[float]:
+    # what MCPTool used to do
+    client = fastmcp.Client(config)
+    latencies: list[float] = []
+    for i in range(n_calls):
+        start = time.perf_counter()
+        async with client:
+            await client.call_tool("echo", {"text": str(i)}, timeout=20)
+        latencies.append(time.perf_counter() - start)
+    await client.close()
+    return latencies
+
+
+async def _pooled(config: dict, n_calls: int) -> tuple[float, list[float]]:
+    start = time.perf_counter()
+    connection = await get_mcp_connection(config, MCPConfig())
+    connect = time.perf_counter() - start
+    latencies: list[float] = []
+    for i in range(n_calls):
+        start = time.perf_counter()
+        await connection.call_tool("echo", {"text": str(i)})
+        latencies.append(time.perf_counter() - start)
+    return connect, latencies
+
+
+async def _pooled_concurrent(config: dict, n_calls: int) -> float:
+    connection = await get_mcp_connection(config, MCPConfig())
+    start = time.perf_counter()
+    await asyncio.gather(*(connection.call_tool("echo", {"text": str(i)}) for i in range(n_calls)))
+    return time.perf_counter() - start
+
+
+async def _discover_sequentially(configs: list[dict]) -> float:
+    # what startup used to do
+    start = time.perf_counter()
+    for config in configs:
+        connection = await get_mcp_connection(config, MCPConfig())
+        await connection.list_tools()
+    return time.perf_counter() - start
+
+
+async def _discover(configs: list[dict], manifest_dir: Path) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(discover_mcp_tools(config, MCPConfig(), manifest_dir=manifest_dir) for config in configs)
+    )
+    return time.perf_counter() - start
+
+
+def _row(name: str, latencies: list[float]) -> str:
+    p50 = statistics.median(latencies) * 1000
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000
+    return f"{name:<18} {p50:>10.2f} {p95:>10.2f} {sum(latencies) * 1000:>10.1f}"
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--servers", type=int, default=4, help="servers discovered at startup")
+    parser.add_argument(
+        "--startup-delay", type=float, default=1.0, help="seconds each server waits before serving"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        script = Path(tmpdir) / "server.py"
+        script.write_text(_SERVER)
+        config = {"mcpServers": {"bench": {"command": sys.executable, "args": [str(script), "0"]}}}
+
+        per_call = await _connect_per_call(config, args.calls)
+        try:
+            connect, pooled = await _pooled(config, args.calls)
+            concurrent = await _pooled_concurrent(config, args.calls)
+        finally:
+            await close_mcp_connections()
+
+        # distinct configurations, as each is one server
+        configs = [
+            {
+                "mcpServers": {
+                    f"bench{i}": {
+                        "command": sys.executable,
+                        "args": [str(script), str(args.startup_delay)],
+                    }
+                }
+            }
+            for i in range(args.servers)
+        ]
+        manifest_dir = Path(tmpdir) / "manifests"
+        timings: list[tuple[str, float]] = []
+        for name, discover in [
+            ("sequential", lambda: _discover_sequentially(configs)),
+            ("concurrent", lambda: _discover(configs, manifest_dir)),
+            ("manifest", lambda: _discover(configs, manifest_dir)),
+        ]:
+            try:
+                timings.append((name, await discover()))
+            finally:
+                await close_mcp_connections()
+
+        print(f"discovery of {args.servers} servers")
+        print(f"{'discovery':<18} {'total ms':>10}")
+        for name, elapsed in timings:
+            print(f"{name:<18} {elapsed * 1000:>10.1f}")
+        print()
+        print(f"{args.calls} calls of a trivial tool")
+        print(f"{'client':<18} {'p50 ms':>10} {'p95 ms':>10} {'total ms':>10}")
+        print(_row("connect per call", per_call))
+        print(_row("pooled", pooled))
+        print(f"pooled: {connect * 1000:.1f} ms to connect once")
+        print(f"pooled, concurrent: {concurrent * 1000:.1f} ms for all calls")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
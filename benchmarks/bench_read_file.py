@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Measure paging through a large log file with ReadFile, line iteration vs the line index."""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+import aiofiles
+
+from kimi_cli.tools.file.read import MAX_LINES, _line_indexes, _read_lines
+
+
+def _make_file(path: Path, size: int) -> int:
+    n_lines = 0
+    chunk = "".join(
+        f"2025-01-01T00:00:00.{i:06d}Z INFO worker-{i % 16} processed request {i} in 12ms\n"
+        for i in range(10_000)
+    ).encode()
+    with open(path, "wb") as f:
+        while f.tell() < size:
+            f.write(chunk)
+            n_lines += 10_000
+    return n_lines
+
+
+async def _iterate_lines(path: Path, line_offset: int, n_lines: int) -> list[str]:
+    # what the tool used to do
+    lines: list[str] = []
+    async with aiofiles.open(path, encoding="utf-8", errors="replace") as f:
+        current_line_no = 0
+        async for line in f:
+            current_line_no += 1
+            if current_line_no < line_offset:
+                continue
+            lines.append(line)
+            if len(lines) >= n_lines:
+                break
+    return lines
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--pages", type=int, default=20, help="pages read at spread offsets")
+    parser.add_argument(
+        "--iterate-max-line",
+        type=int,
+        default=100_000,
+        help="skip line iteration for pages starting after this line, as it takes minutes",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = Path(tmpdir) / "big.log"
+        n_lines = _make_file(path, args.size_mb << 20)
+        print(f"file: {path.stat().st_size >> 20} MB, {n_lines} lines")
+
+        offsets = sorted(
+            {1 + n_lines * i // args.pages for i in range(args.pages)} | {args.iterate_max_line}
+        )
+        print(f"{'line_offset':>12} {'iterate ms':>12} {'index ms':>10}")
+        for offset in offsets:
+            start = time.perf_counter()
+            lines = await asyncio.to_thread(_read_lines, path, offset, MAX_LINES)
+            indexed = (time.perf_counter() - start) * 1000
+            iterated = "-"
+            if offset <= args.iterate_max_line:
+                start = time.perf_counter()
+                assert await _iterate_lines(path, offset, MAX_LINES) == lines
+                iterated = f"{(time.perf_counter() - start) * 1000:.1f}"
+            print(f"{offset:>12} {iterated:>12} {indexed:>10.1f}")
+
+        # pages read again, once the index covers the whole file
+        start = time.perf_counter()
+        for offset in offsets:
+            await asyncio.to_thread(_read_lines, path, offset, MAX_LINES)
+        per_page = (time.perf_counter() - start) * 1000 / len(offsets)
+        print(f"indexed page, warm: {per_page:.2f} ms")
+
+        _line_indexes.clear()
+        start = time.perf_counter()
+        await asyncio.to_thread(_read_lines, path, n_lines - MAX_LINES, MAX_LINES)
+        print(f"last page, cold index: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
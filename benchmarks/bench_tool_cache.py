@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Replay a session of repeated ReadFile and Glob calls, with and without the result cache."""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from kosong.message import ToolCall
+from kosong.tooling import ToolResult
+
+from kimi_cli.soul.approval import Approval
+from kimi_cli.soul.runtime import BuiltinSystemPromptArgs
+from kimi_cli.soul.toolset import CustomToolset, ToolResultCache
+from kimi_cli.tools.file.glob import Glob
+from kimi_cli.tools.file.read import ReadFile
+from kimi_cli.tools.file.replace import StrReplaceFile
+
+
+def _make_tree(root: Path, n_files: int) -> list[Path]:
+    files: list[Path] = []
+    for i in range(n_files):
+        directory = root / "src" / f"pkg{i % 40}"
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"module{i}.py"
+        path.write_text("".join(f"def f{j}(): return {j}\n" for j in range(400)))
+        files.append(path)
+    return files
+
+
+def _session(files: list[Path], n_calls: int, write_every: int) -> list[tuple[str, dict]]:
+    # agents re-read the same few files and re-run the same searches between edits
+    rng = random.Random(0)
+    hot = files[:20]
+    calls: list[tuple[str, dict]] = []
+    for i in range(1, n_calls + 1):
+        if i % write_every == 0:
+            target = rng.choice(hot)
+            edit = {"old": "f0()", "new": "f0( )"}
+            calls.append(("StrReplaceFile", {"path": str(target), "edit": edit}))
+        elif rng.random() < 0.2:
+            calls.append(("Glob", {"pattern": rng.choice(["**/*.py", "src/pkg1*/*.py"])}))
+        else:
+            calls.append(("ReadFile", {"path": str(rng.choice(hot)), "line_offset": 1}))
+    return calls
+
+
+async def _replay(toolset: CustomToolset, calls: list[tuple[str, dict]]) -> float:
+    start = time.perf_counter()
+    for i, (name, arguments) in enumerate(calls):
+        tool_call = ToolCall(
+            id=str(i), function=ToolCall.FunctionBody(name=name, arguments=json.dumps(arguments))
+        )
+        result = toolset.handle(tool_call)
+        if not isinstance(result, ToolResult):
+            await result
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--write-every", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        work_dir = Path(tmpdir)
+        files = _make_tree(work_dir, args.files)
+        builtin_args = BuiltinSystemPromptArgs(
+            KIMI_NOW="1970-01-01T00:00:00+00:00",
+            KIMI_WORK_DIR=work_dir,
+            KIMI_WORK_DIR_LS="",
+            KIMI_AGENTS_MD="",
+        )
+        approval = Approval(yolo=True)
+        tools = [
+            ReadFile(builtin_args),
+            Glob(builtin_args),
+            StrReplaceFile(builtin_args, approval),
+        ]
+        calls = _session(files, args.calls, args.write_every)
+        print(f"session: {len(calls)} calls, an edit every {args.write_every} calls")
+
+        uncached = await _replay(CustomToolset(tools), calls)
+        cache = ToolResultCache()
+        cached = await _replay(CustomToolset(tools, result_cache=cache), calls)
+        stats = cache.stats
+        print(f"{'toolset':<12} {'total ms':>10}")
+        print(f"{'uncached':<12} {uncached * 1000:>10.1f}")
+        print(f"{'cached':<12} {cached * 1000:>10.1f}")
+        print(
+            f"hits {stats.hits}, misses {stats.misses}, invalidations {stats.invalidations}, "
+            f"{stats.saved_seconds * 1000:.1f} ms and {stats.saved_chars} chars served from cache"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Stream tiny text deltas through a wire to a JSON-writing consumer, with and without merging."""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+from kosong.message import TextPart
+
+from kimi_cli.wire import CAPACITY, COALESCE_WINDOW, Wire
+from kimi_cli.wire.message import ApprovalRequest, SubagentEvent, serialize_event
+
+
+async def _produce(wire: Wire, n: int, burst: int, subagents: int) -> None:
+    for i in range(n):
+        event = TextPart(text="tok ")
+        if subagents:
+            wire.soul_side.send(SubagentEvent(task_tool_call_id=str(i % subagents), event=event))
+        else:
+            wire.soul_side.send(event)
+        if i % burst == burst - 1:
+            # a model streams its tokens in bursts, one per network read
+            await asyncio.sleep(0)
+    wire.shutdown()
+
+
+async def _consume(wire: Wire, out: int) -> int:
+    received = 0
+    while True:
+        try:
+            msg = await wire.ui_side.receive()
+        except asyncio.QueueShutDown:
+            return received
+        assert not isinstance(msg, ApprovalRequest)
+        data = json.dumps(serialize_event(msg))
+        os.write(out, data.encode("utf-8") + b"\n")
+        received += 1
+        await asyncio.sleep(0)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--deltas", type=int, default=200_000)
+    parser.add_argument("--burst", type=int, default=16, help="deltas sent per event loop turn")
+    parser.add_argument("--subagents", type=int, default=0, help="interleave N subagent streams")
+    args = parser.parse_args()
+
+    out = os.open(os.devnull, os.O_WRONLY)
+    print(f"{args.deltas} deltas, {args.burst} per loop turn, {args.subagents} subagents")
+    print(f"{'wire':<12} {'received':>9} {'merged':>8} {'max depth':>10} {'total s':>8}")
+    for name, window, capacity in [
+        ("unmerged", 0.0, args.deltas + 1),
+        ("coalescing", COALESCE_WINDOW, CAPACITY),
+    ]:
+        wire = Wire(coalesce_window=window, capacity=capacity)
+        start = time.perf_counter()
+        _, received = await asyncio.gather(
+            _produce(wire, args.deltas, args.burst, args.subagents), _consume(wire, out)
+        )
+        elapsed = time.perf_counter() - start
+        stats = wire.stats
+        print(f"{name:<12} {received:>9} {stats.merged:>8} {stats.max_depth:>10} {elapsed:>8.2f}")
+    os.close(out)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
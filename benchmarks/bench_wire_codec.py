@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Throughput of wire server notifications over a pipe to a JSON-parsing client process."""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import socket
+import sys
+import tempfile
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from kosong.message import TextPart, ToolCall, ToolCallPart
+from kosong.tooling import ToolOk, ToolResult
+
+from kimi_cli.config import get_default_config
+from kimi_cli.session import Session
+from kimi_cli.soul.agent import Agent
+from kimi_cli.soul.context import Context
+from kimi_cli.soul.kimisoul import KimiSoul
+from kimi_cli.soul.runtime import Runtime
+from kimi_cli.soul.toolset import CustomToolset
+from kimi_cli.ui.wire import WireServer
+from kimi_cli.wire import message
+from kimi_cli.wire.message import Event, StepBegin, ToolOutputChunk, serialize_event
+
+# counts the events of the notifications it reads, one message or batch per line
+_CLIENT_SCRIPT = """
+import json, sys
+n = 0
+for line in sys.stdin.buffer:
+    batch = json.loads(line)
+    for payload in batch if isinstance(batch, list) else [batch]:
+        n += payload.get("method") == "event"
+print(n)
+"""
+
+
+def _events(n: int) -> Iterator[Event]:
+    """A stream that is mostly text deltas, with a tool call and its output now and then."""
+    for i in range(n):
+        match i % 100:
+            case 0:
+                yield StepBegin(n=i // 100 + 1)
+            case 90:
+                yield ToolCall(id=str(i), function=ToolCall.FunctionBody(name="Bash", arguments=""))
+            case 91 | 92 | 93:
+                yield ToolCallPart(arguments_part='{"command": "ls"}')
+            case 94 | 95 | 96 | 97 | 98:
+                yield ToolOutputChunk(tool_call_id=str(i - i % 100 + 90), text="file.txt\n")
+            case 99:
+                yield ToolResult(tool_call_id=str(i - 9), result=ToolOk(output="file.txt\n" * 5))
+            case _:
+                yield TextPart(text="tok ")
+
+
+@contextlib.contextmanager
+def _generic_serialization() -> Iterator[None]:
+    """Serialize every event by dumping its model, as before the pre-built serializers."""
+    serializers = dict(message._EVENT_SERIALIZERS)  # pyright: ignore[reportPrivateUsage]
+    message._EVENT_SERIALIZERS.clear()  # pyright: ignore[reportPrivateUsage]
+    try:
+        yield
+    finally:
+        message._EVENT_SERIALIZERS.update(serializers)  # pyright: ignore[reportPrivateUsage]
+
+
+async def _start_client() -> asyncio.subprocess.Process:
+    return await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-c",
+        _CLIENT_SCRIPT,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+
+async def _finish_client(client: asyncio.subprocess.Process) -> int:
+    stdout, _ = await client.communicate()
+    return int(stdout)
+
+
+async def _run_json_per_line(n: int, burst: int) -> int:
+    """The previous write loop: `json.dumps` and a drain for every message."""
+    client = await _start_client()
+    assert client.stdin is not None
+    with _generic_serialization():
+        for i, event in enumerate(_events(n)):
+            params = {**serialize_event(event), "session_id": "bench"}
+            payload = {"jsonrpc": "2.0", "method": "event", "params": params}
+            data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+            client.stdin.write(data.encode("utf-8") + b"\n")
+            await client.stdin.drain()
+            if i % burst == burst - 1:
+                await asyncio.sleep(0)
+    client.stdin.close()
+    return await _finish_client(client)
+
+
+async def _run_server(soul: KimiSoul, n: int, burst: int, batch_size: int, window: float) -> int:
+    client = await _start_client()
+    assert client.stdin is not None
+    server = WireServer(soul, session_id="bench", batch_size=batch_size, batch_window=window)
+    # the server reads requests from a socket that stays silent, and writes to the client's pipe
+    server_sock, silent_sock = socket.socketpair()
+    reader, _ = await asyncio.open_connection(sock=server_sock)
+    serve_task = asyncio.create_task(server.serve(reader, client.stdin))
+    for i, event in enumerate(_events(n)):
+        await server._send_event("bench", event)  # pyright: ignore[reportPrivateUsage]
+        if i % burst == burst - 1:
+            await asyncio.sleep(0)
+    silent_sock.close()  # let the server shut down once everything is written
+    await serve_task
+    return await _finish_client(client)
+
+
+async def _create_soul(share_dir: Path) -> KimiSoul:
+    session = Session(id="bench", work_dir=Path.cwd(), history_file=share_dir / "bench.jsonl")
+    runtime = await Runtime.create(get_default_config(), None, session, True, [], False)
+    agent = Agent(name="bench", system_prompt="", toolset=CustomToolset())
+    return KimiSoul(agent, runtime, context=Context(session.history_file))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--burst", type=int, default=16, help="events sent per event loop turn")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        soul = await _create_soul(Path(tmp))
+        print(f"{args.events} events, {args.burst} per loop turn")
+        print(f"{'transport':<28} {'received':>9} {'events/s':>10} {'total s':>8}")
+        modes = [
+            ("json, one per line", None),
+            ("codec, one per line", (1, 0.0)),
+            ("codec, batches of 64", (64, 0.0)),
+            ("codec, batches of 256, 2ms", (256, 0.002)),
+        ]
+        for name, batching in modes:
+            start = time.perf_counter()
+            if batching is None:
+                received = await _run_json_per_line(args.events, args.burst)
+            else:
+                received = await _run_server(soul, args.events, args.burst, *batching)
+            elapsed = time.perf_counter() - start
+            print(f"{name:<28} {received:>9} {received / elapsed:>10.0f} {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
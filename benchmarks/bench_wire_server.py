@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Drive concurrent sessions of one wire server through a scripted local chat provider."""
+
+import argparse
+import asyncio
+import copy
+import json
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import AsyncIterator, Sequence
+from pathlib import Path
+from typing import Any, Self
+
+from kosong.chat_provider import StreamedMessagePart, ThinkingEffort
+from kosong.chat_provider.mock import MockStreamedMessage
+from kosong.message import Message, TextPart
+from kosong.tooling import Tool
+
+from kimi_cli.agentspec import DEFAULT_AGENT_FILE
+from kimi_cli.app import KimiCLI
+from kimi_cli.config import get_default_config
+from kimi_cli.llm import LLM
+from kimi_cli.session import Session
+from kimi_cli.soul import Soul
+from kimi_cli.soul.agent import load_agent
+from kimi_cli.soul.context import Context
+from kimi_cli.soul.kimisoul import KimiSoul
+from kimi_cli.soul.runtime import Runtime
+from kimi_cli.ui.wire import WireServer
+
+
+class _ScriptedStreamedMessage(MockStreamedMessage):
+    def __init__(self, parts: list[StreamedMessagePart], latency: float, interval: float):
+        self._latency = latency
+        self._interval = interval
+        super().__init__(parts)
+
+    async def _to_stream(
+        self, message_parts: list[StreamedMessagePart]
+    ) -> AsyncIterator[StreamedMessagePart]:
+        await asyncio.sleep(self._latency)
+        for part in message_parts:
+            yield part
+            await asyncio.sleep(self._interval)
+
+
+class _ScriptedChatProvider:
+    """Answer every request after a fixed latency, streaming tokens at a fixed interval."""
+
+    name = "scripted"
+
+    def __init__(self, latency: float, tokens: int, interval: float):
+        self._latency = latency
+        self._tokens = tokens
+        self._interval = interval
+
+    @property
+    def model_name(self) -> str:
+        return "scripted"
+
+    async def generate(
+        self, system_prompt: str, tools: Sequence[Tool], history: Sequence[Message]
+    ) -> MockStreamedMessage:
+        parts: list[StreamedMessagePart] = [TextPart(text="tok ") for _ in range(self._tokens)]
+        return _ScriptedStreamedMessage(parts, self._latency, self._interval)
+
+    def with_thinking(self, effort: ThinkingEffort) -> Self:
+        return copy.copy(self)
+
+
+class _Client:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._responses: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self.n_events = 0
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        while line := await self._reader.readline():
+            payload = json.loads(line)
+            if payload.get("method") == "event":
+                self.n_events += 1
+            elif (future := self._responses.pop(payload.get("id"), None)) is not None:
+                future.set_result(payload)
+
+    async def request(self, method: str, **params: Any) -> dict[str, Any]:
+        self._next_id += 1
+        msg_id = str(self._next_id)
+        future = asyncio.get_running_loop().create_future()
+        self._responses[msg_id] = future
+        payload = {"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params}
+        self._writer.write(json.dumps(payload).encode() + b"\n")
+        return await future
+
+    async def close(self) -> None:
+        self._writer.close()
+        self._read_task.cancel()
+
+
+async def _create_app(llm: LLM, share_dir: Path) -> KimiCLI:
+    session = Session(id="main", work_dir=Path.cwd(), history_file=share_dir / "main.jsonl")
+    runtime = await Runtime.create(get_default_config(), llm, session, True, [], False)
+    agent = await load_agent(DEFAULT_AGENT_FILE, runtime, mcp_configs=[])
+    soul = KimiSoul(agent, runtime, context=Context(session.history_file))
+    return KimiCLI(soul, runtime, {}, _agent_file=DEFAULT_AGENT_FILE)
+
+
+async def _run_load(
+    app: KimiCLI, share_dir: Path, sessions: int, runs: int, cap: int
+) -> tuple[float, list[float], list[float], int]:
+    """Returns the wall time, the latencies of session/create and of the runs, and the events."""
+    opened = 0
+
+    async def open_session(session_id: str | None) -> tuple[str, Soul] | None:
+        nonlocal opened
+        opened += 1
+        session_id = f"s{opened}"
+        session = Session(
+            id=session_id, work_dir=Path.cwd(), history_file=share_dir / f"{session_id}.jsonl"
+        )
+        return session_id, await app.create_soul(session)
+
+    server = WireServer(app.soul, open_session=open_session, max_concurrent_runs=cap)
+    server_sock, client_sock = socket.socketpair()
+    serve_task = asyncio.create_task(server.serve(*await asyncio.open_connection(sock=server_sock)))
+    client = _Client(*await asyncio.open_connection(sock=client_sock))
+
+    create_latencies: list[float] = []
+    session_ids: list[str] = []
+    for _ in range(sessions):
+        start = time.perf_counter()
+        response = await client.request("session/create")
+        create_latencies.append(time.perf_counter() - start)
+        session_ids.append(response["result"]["session_id"])
+
+    run_latencies: list[float] = []
+
+    async def drive(session_id: str) -> None:
+        for i in range(runs):
+            start = time.perf_counter()
+            response = await client.request("run", input=f"task {i}", session_id=session_id)
+            assert response["result"] == {"status": "finished"}, response
+            run_latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(drive(session_id) for session_id in session_ids))
+    elapsed = time.perf_counter() - start
+
+    await client.close()
+    await serve_task
+    return elapsed, create_latencies, run_latencies, client.n_events
+
+
+def _process_startup() -> float:
+    """What a `kimi --wire` process per agent pays before serving, i.e. the imports."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", "import kimi_cli.app, kimi_cli.ui.wire"],
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--runs", type=int, default=4, help="runs per session, one after another")
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds to the first token")
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--interval", type=float, default=0.002, help="seconds between tokens")
+    args = parser.parse_args()
+
+    llm = LLM(
+        chat_provider=_ScriptedChatProvider(args.latency, args.tokens, args.interval),
+        max_context_size=200_000,
+        capabilities=set(),
+    )
+    startup = statistics.median(_process_startup() for _ in range(3))
+    print(f"process startup (imports only): {startup * 1000:.0f} ms per agent")
+    print(f"{args.sessions} sessions x {args.runs} runs, {args.latency}s + {args.tokens} tokens")
+    print(
+        f"{'max concurrent':>14} {'create p50 ms':>14} {'run p50 s':>10} {'run p95 s':>10}"
+        f" {'runs/s':>8} {'events':>8} {'total s':>8}"
+    )
+    for cap in sorted({1, max(args.sessions // 4, 1), args.sessions}):
+        with tempfile.TemporaryDirectory() as tmp:
+            app = await _create_app(llm, Path(tmp))
+            try:
+                elapsed, creates, runs, n_events = await _run_load(
+                    app, Path(tmp), args.sessions, args.runs, cap
+                )
+            finally:
+                await app.aclose()
+        create_p50 = statistics.median(creates) * 1000
+        run_p50 = statistics.median(runs)
+        run_p95 = statistics.quantiles(runs, n=20)[-1]
+        print(
+            f"{cap:>14} {create_p50:>14.1f} {run_p50:>10.2f} {run_p95:>10.2f}"
+            f" {len(runs) / elapsed:>8.1f} {n_events:>8} {elapsed:>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,3 +1,4 @@
+import copy
 from pathlib import Path
 from typing import Any, NamedTuple
 
@@ -51,12 +52,18 @@ class ResolvedAgentSpec(NamedTuple):
 def load_agent_spec(agent_file: Path) -> ResolvedAgentSpec:
     """
     Load agent specification from file.
+    Resolved specs are cached for the process, and re-read once any of their files changes.
 
     Raises:
         FileNotFoundError: If the agent spec file is not found.
         AgentSpecError: If the agent spec is not valid.
     """
-    agent_spec = _load_agent_spec(agent_file)
+    cached = _spec_cache.get(agent_file)
+    if cached is not None and _fingerprint(cached.files) == cached.fingerprint:
+        return copy.deepcopy(cached.spec)
+
+    files: list[Path] = []
+    agent_spec = _load_agent_spec(agent_file, files)
     assert agent_spec.extend is None, "agent extension should be recursively resolved"
     if agent_spec.name is None:
         raise AgentSpecError("Agent name is required")
@@ -64,7 +71,7 @@ def load_agent_spec(agent_file: Path) -> ResolvedAgentSpec:
         raise AgentSpecError("System prompt path is required")
     if agent_spec.tools is None:
         raise AgentSpecError("Tools are required")
-    return ResolvedAgentSpec(
+    resolved = ResolvedAgentSpec(
         name=agent_spec.name,
         system_prompt_path=agent_spec.system_prompt_path,
         system_prompt_args=agent_spec.system_prompt_args,
@@ -72,10 +79,35 @@ def load_agent_spec(agent_file: Path) -> ResolvedAgentSpec:
         exclude_tools=agent_spec.exclude_tools or [],
         subagents=agent_spec.subagents or {},
     )
+    if (fingerprint := _fingerprint(files)) is not None:
+        _spec_cache[agent_file] = _CachedSpec(files, fingerprint, copy.deepcopy(resolved))
+    return resolved
+
+
+class _CachedSpec(NamedTuple):
+    files: list[Path]
+    """The agent file and all the files it extends."""
+    fingerprint: list[tuple[int, int]]
+    spec: ResolvedAgentSpec
+
+
+_spec_cache: dict[Path, _CachedSpec] = {}
+"""
+Resolved specs of the process, to save parsing the same agent files again whenever an agent
+or subagent is loaded. An entry is valid as long as none of its files changed.
+"""
+
+
+def _fingerprint(files: list[Path]) -> list[tuple[int, int]] | None:
+    try:
+        return [(stat.st_mtime_ns, stat.st_size) for stat in (f.stat() for f in files)]
+    except OSError:
+        return None
 
 
-def _load_agent_spec(agent_file: Path) -> AgentSpec:
+def _load_agent_spec(agent_file: Path, files: list[Path]) -> AgentSpec:
     assert agent_file.is_file(), "expect agent file to exist"
+    files.append(agent_file)
     try:
         with open(agent_file, encoding="utf-8") as f:
             data: dict[str, Any] = yaml.safe_load(f)
@@ -97,7 +129,7 @@ def _load_agent_spec(agent_file: Path) -> AgentSpec:
             base_agent_file = DEFAULT_AGENT_FILE
         else:
             base_agent_file = agent_file.parent / agent_spec.extend
-        base_agent_spec = _load_agent_spec(base_agent_file)
+        base_agent_spec = _load_agent_spec(base_agent_file, files)
         if agent_spec.name is not None:
             base_agent_spec.name = agent_spec.name
         if agent_spec.system_prompt_path is not None:
@@ -1,9 +1,9 @@
 import contextlib
 import os
 import warnings
-from collections.abc import Generator
+from collections.abc import Generator, Sequence
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from pydantic import SecretStr
 
@@ -17,8 +17,12 @@ from kimi_cli.soul.agent import load_agent
 from kimi_cli.soul.context import Context
 from kimi_cli.soul.kimisoul import KimiSoul
 from kimi_cli.soul.runtime import Runtime
+from kimi_cli.soul.storage import JSONLStorage, get_history_file
 from kimi_cli.utils.logging import StreamToLogger, logger
 
+if TYPE_CHECKING:
+    from kimi_cli.tools.mcp import MCPDiscovery
+
 
 class KimiCLI:
     @staticmethod
@@ -83,13 +87,18 @@ class KimiCLI:
             logger.info("Using LLM model: {model}", model=model)
             llm = create_llm(provider, model, stream=stream, session_id=session.id)
 
+        history_file = get_history_file(session.history_file, config.history.format)
+        if history_file != session.history_file:
+            logger.info("Using history file: {history_file}", history_file=history_file)
+            session = session._replace(history_file=history_file)
+
         runtime = await Runtime.create(config, llm, session, yolo, global_exclude_tools,disable_curl_tip)
 
         if agent_file is None:
             agent_file = DEFAULT_AGENT_FILE
         agent = await load_agent(agent_file, runtime, mcp_configs=mcp_configs or [])
 
-        context = Context(session.history_file)
+        context = Context(session.history_file, fsync=config.history.fsync)
         await context.restore()
 
         soul = KimiSoul(
@@ -101,17 +110,60 @@ class KimiCLI:
             soul.set_thinking(thinking)
         except (LLMNotSet, LLMNotSupported) as e:
             logger.warning("Failed to enable thinking mode: {error}", error=e)
-        return KimiCLI(soul, runtime, env_overrides)
+        return KimiCLI(
+            soul,
+            runtime,
+            env_overrides,
+            agent.mcp_servers,
+            _agent_file=agent_file,
+            _mcp_configs=mcp_configs or [],
+        )
 
     def __init__(
         self,
         _soul: KimiSoul,
         _runtime: Runtime,
         _env_overrides: dict[str, str],
+        _mcp_servers: Sequence["MCPDiscovery"] = (),
+        *,
+        _agent_file: Path = DEFAULT_AGENT_FILE,
+        _mcp_configs: list[dict[str, Any]] | None = None,
     ) -> None:
         self._soul = _soul
         self._runtime = _runtime
         self._env_overrides = _env_overrides
+        self._mcp_servers = _mcp_servers
+        self._agent_file = _agent_file
+        self._mcp_configs = _mcp_configs or []
+
+    async def create_soul(self, session: Session) -> KimiSoul:
+        """
+        Create a soul for another session of the work directory, with the same agent. The LLM
+        connections are shared with this instance, the HTTP client session and the warm shells are
+        the session's own and released by `KimiSoul.close`.
+
+        Raises:
+            AgentSpecError(KimiCLIException): When the agent specification is invalid.
+        """
+        config = self._runtime.config
+        session = session._replace(
+            history_file=get_history_file(session.history_file, config.history.format)
+        )
+        runtime = self._runtime.for_session(session)
+        agent = await load_agent(self._agent_file, runtime, mcp_configs=self._mcp_configs)
+
+        context = Context(session.history_file, fsync=config.history.fsync)
+        await context.restore()
+
+        soul = KimiSoul(agent, runtime, context=context)
+        with contextlib.suppress(LLMNotSet, LLMNotSupported):
+            soul.set_thinking(self._soul.thinking)
+        return soul
+
+    async def aclose(self) -> None:
+        """Release the resources of the runtime, e.g. the HTTP connections."""
+        await self._runtime.close()
+
     @property
     def soul(self) -> KimiSoul:
         """Get the KimiSoul instance."""
@@ -174,6 +226,18 @@ class KimiCLI:
                     level=WelcomeInfoItem.Level.INFO,
                 )
             )
+        if self._mcp_servers:
+            welcome_info.append(
+                WelcomeInfoItem(
+                    name="MCP",
+                    value=", ".join(_format_mcp_discovery(d) for d in self._mcp_servers),
+                    level=(
+                        WelcomeInfoItem.Level.WARN
+                        if any(d.connection is None for d in self._mcp_servers)
+                        else WelcomeInfoItem.Level.INFO
+                    ),
+                )
+            )
         with self._app_env():
             app = ShellApp(self._soul, welcome_info=welcome_info,daemon=daemon)
             return await app.run(command)
@@ -186,6 +250,15 @@ class KimiCLI:
     ) -> bool:
         from kimi_cli.ui.print import PrintApp
 
+        history_file = self._runtime.session.history_file
+        if output_format == "stream-json" and history_file.suffix != JSONLStorage.suffix:
+            logger.error(
+                "Stream JSON output requires a JSONL history file: {history_file}",
+                history_file=history_file,
+            )
+            print("Stream JSON output requires the `jsonl` history format.")
+            return False
+
         with self._app_env():
             app = PrintApp(
                 self._soul,
@@ -199,12 +272,35 @@ class KimiCLI:
         from kimi_cli.ui.acp import ACPServer
 
         with self._app_env():
-            app = ACPServer(self._soul)
+            app = ACPServer(self._soul, text_window=self._runtime.config.wire.batch_window)
             return await app.run()
 
     async def run_wire_server(self) -> bool:
         from kimi_cli.ui.wire import WireServer
 
         with self._app_env():
-            server = WireServer(self._soul)
-            return await server.run()
\ No newline at end of file
+            server = WireServer(
+                self._soul,
+                session_id=self._runtime.session.id,
+                open_session=self._open_session,
+                max_concurrent_runs=self._runtime.config.wire.max_concurrent_runs,
+                batch_size=self._runtime.config.wire.batch_size,
+                batch_window=self._runtime.config.wire.batch_window,
+            )
+            return await server.run()
+
+    async def _open_session(self, session_id: str | None) -> tuple[str, KimiSoul] | None:
+        """Open a new session if `session_id` is `None`, else an existing one if there is one."""
+        work_dir = self._runtime.session.work_dir
+        if session_id is None:
+            session = Session.create(work_dir)
+        elif (session := Session.load(work_dir, session_id)) is None:
+            return None
+        return session.id, await self.create_soul(session)
+
+
+def _format_mcp_discovery(discovery: "MCPDiscovery") -> str:
+    if discovery.connection is None:
+        return f"{discovery.name} failed after {discovery.elapsed:.1f}s ({discovery.error})"
+    source = " (cached)" if discovery.source == "manifest" else ""
+    return f"{discovery.name} {len(discovery.tools)} tools in {discovery.elapsed:.2f}s{source}"
@@ -28,8 +28,9 @@ def _version_callback(value: bool) -> None:
         raise typer.Exit()
 
 
-@cli.command()
+@cli.callback(invoke_without_command=True)
 def kimi(
+    ctx: typer.Context,
     version: Annotated[
         bool,
         typer.Option(
@@ -218,6 +219,8 @@ def kimi(
 ):
     """Kimi, your next CLI agent."""
     del version  # handled in the callback
+    if ctx.invoked_subcommand is not None:
+        return
 
     from kimi_cli.app import KimiCLI
     from kimi_cli.session import Session
@@ -334,34 +337,44 @@ def kimi(
         raise typer.BadParameter(f"Invalid JSON: {e}", param_hint="--mcp-config") from e
 
     async def _run() -> bool:
-        instance = await KimiCLI.create(
-            session,
-            yolo=yolo or (ui == "print") or (ui == "daemon"),  # print mode implies yolo
-            stream=ui != "print",  # use non-streaming mode only for print UI
-            mcp_configs=mcp_configs,
-            model_name=model_name,
-            thinking=thinking,
-            agent_file=agent_file,
-            global_exclude_tools=exclude_tools or [],
-            disable_curl_tip=disable_curl_tip
-        )
-        match ui:
-            case "shell" | "daemon":
-                return await instance.run_shell_mode(command, ui == "daemon")
-            case "print":
-                return await instance.run_print_mode(
-                    input_format or "text",
-                    output_format or "text",
-                    command,
-                )
-            case "acp":
-                if command is not None:
-                    logger.warning("ACP server ignores command argument")
-                return await instance.run_acp_server()
-            case "wire":
-                if command is not None:
-                    logger.warning("Wire server ignores command argument")
-                return await instance.run_wire_server()
+        instance: KimiCLI | None = None
+        try:
+            instance = await KimiCLI.create(
+                session,
+                yolo=yolo or (ui == "print") or (ui == "daemon"),  # print mode implies yolo
+                stream=ui != "print",  # use non-streaming mode only for print UI
+                mcp_configs=mcp_configs,
+                model_name=model_name,
+                thinking=thinking,
+                agent_file=agent_file,
+                global_exclude_tools=exclude_tools or [],
+                disable_curl_tip=disable_curl_tip
+            )
+            match ui:
+                case "shell" | "daemon":
+                    return await instance.run_shell_mode(command, ui == "daemon")
+                case "print":
+                    return await instance.run_print_mode(
+                        input_format or "text",
+                        output_format or "text",
+                        command,
+                    )
+                case "acp":
+                    if command is not None:
+                        logger.warning("ACP server ignores command argument")
+                    return await instance.run_acp_server()
+                case "wire":
+                    if command is not None:
+                        logger.warning("Wire server ignores command argument")
+                    return await instance.run_wire_server()
+        finally:
+            if instance is not None:
+                await instance.aclose()
+            if mcp_configs:
+                from kimi_cli.tools.mcp import close_mcp_connections
+
+                # connections are bound to the event loop of this run
+                await close_mcp_connections()
 
     while True:
         try:
@@ -374,5 +387,55 @@ def kimi(
             continue
 
 
+history_cli = typer.Typer(help="Manage session history files.")
+cli.add_typer(history_cli, name="history")
+
+
+@history_cli.command("convert")
+def history_convert(
+    src: Annotated[
+        Path,
+        typer.Argument(
+            exists=True,
+            file_okay=True,
+            dir_okay=False,
+            readable=True,
+            help="History file to convert.",
+        ),
+    ],
+    dst: Annotated[
+        Path | None,
+        typer.Argument(
+            help=(
+                "Output file, whose suffix selects the format (`.jsonl` or `.kpack`). "
+                "Default: SRC in the other format."
+            ),
+        ),
+    ] = None,
+):
+    """Convert a history file between the JSONL and packed formats."""
+    import time
+
+    from kimi_cli.soul.storage import JSONLStorage, PackedStorage, convert_history
+
+    if dst is None:
+        suffix = PackedStorage.suffix if src.suffix == JSONLStorage.suffix else JSONLStorage.suffix
+        dst = src.with_suffix(suffix)
+    if dst.exists():
+        raise typer.BadParameter(f"{dst} already exists.", param_hint="DST")
+
+    start = time.perf_counter()
+    n_records = convert_history(src, dst)
+    elapsed = time.perf_counter() - start
+    typer.echo(
+        f"Converted {n_records} records in {elapsed:.2f}s: "
+        f"{src} ({src.stat().st_size:,} bytes) -> {dst} ({dst.stat().st_size:,} bytes)"
+    )
+
+
 if __name__ == "__main__":
+    import multiprocessing
+
+    # worker processes of frozen builds run this entry point too
+    multiprocessing.freeze_support()
     cli()
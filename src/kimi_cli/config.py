@@ -1,6 +1,6 @@
 import json
 from pathlib import Path
-from typing import Self
+from typing import Literal, Self
 
 from pydantic import (
     BaseModel,
@@ -54,6 +54,55 @@ class LoopControl(BaseModel):
     """Maximum number of steps in one run"""
     max_retries_per_step: int = 3
     """Maximum number of retries in one step"""
+    max_concurrent_subagents: int = Field(default=4, ge=1)
+    """Maximum number of subagents running at the same time"""
+    compaction: Literal["simple", "tiered"] = "tiered"
+    """Context compaction strategy, `simple` summarizes the whole history in one request"""
+
+
+class HistoryConfig(BaseModel):
+    """Session history storage configuration."""
+
+    format: Literal["jsonl", "packed"] = "jsonl"
+    """Storage format of new history files, existing sessions keep their own format"""
+    fsync: Literal["never", "flush", "always"] = "never"
+    """When to fsync the history file: never, once per step flush, or after every record"""
+
+
+class MCPConfig(BaseModel):
+    """MCP client configuration."""
+
+    tool_call_timeout: float | None = Field(default=20, gt=0)
+    """Seconds to wait for the result of an MCP tool call, no limit if null"""
+    health_check_interval: float = Field(default=60, ge=0)
+    """Seconds a connection may stay idle before it is pinged again before use"""
+    health_check_timeout: float = Field(default=5, gt=0)
+    """Seconds to wait for the answer to a ping before reconnecting"""
+    discovery_timeout: float = Field(default=10, gt=0)
+    """Seconds to wait for each server to list its tools at startup"""
+
+
+class BashConfig(BaseModel):
+    """Bash tool configuration."""
+
+    persistent: bool = False
+    """Run commands in warm shells that keep their state between commands, instead of a new
+    shell per command"""
+    max_workers: int = Field(default=4, ge=1)
+    """Warm shells kept at most, commands run in a new shell when all of them are busy"""
+
+
+class WireConfig(BaseModel):
+    """Wire and ACP server configuration."""
+
+    max_concurrent_runs: int = Field(default=4, ge=1)
+    """Runs executed at the same time across all sessions, further runs wait for a slot"""
+    batch_size: int = Field(default=1, ge=1)
+    """Messages written at most as one JSON-RPC batch by the wire server, 1 to write each message
+    on its own line"""
+    batch_window: float = Field(default=0, ge=0)
+    """Seconds to wait for more messages to join a batch, and for more text to join an ACP
+    message chunk"""
 
 
 class MoonshotSearchConfig(BaseModel):
@@ -82,17 +131,19 @@ class Config(BaseModel):
     """Main configuration structure."""
 
     default_model: str = Field(default="", description="Default model to use")
-    models: dict[str, LLMModel] = Field(
-        default_factory=dict, description="List of LLM models"
-    )
+    models: dict[str, LLMModel] = Field(default_factory=dict, description="List of LLM models")
     providers: dict[str, LLMProvider] = Field(
         default_factory=dict, description="List of LLM providers"
     )
-    loop_control: LoopControl = Field(
-        default_factory=LoopControl, description="Agent loop control"
+    loop_control: LoopControl = Field(default_factory=LoopControl, description="Agent loop control")
+    services: Services = Field(default_factory=Services, description="Services configuration")
+    history: HistoryConfig = Field(
+        default_factory=HistoryConfig, description="Session history storage configuration"
     )
-    services: Services = Field(
-        default_factory=Services, description="Services configuration"
+    mcp: MCPConfig = Field(default_factory=MCPConfig, description="MCP client configuration")
+    bash: BashConfig = Field(default_factory=BashConfig, description="Bash tool configuration")
+    wire: WireConfig = Field(
+        default_factory=WireConfig, description="Wire and ACP server configuration"
     )
 
     @model_validator(mode="after")
@@ -139,9 +190,7 @@ def load_config(config_file: Path | None = None) -> Config:
 
     if not config_file.exists():
         config = get_default_config()
-        logger.debug(
-            "No config file found, creating default config: {config}", config=config
-        )
+        logger.debug("No config file found, creating default config: {config}", config=config)
         with open(config_file, "w", encoding="utf-8") as f:
             f.write(config.model_dump_json(indent=2, exclude_none=True))
         return config
@@ -1,3 +1,4 @@
+import dataclasses
 import os
 from dataclasses import dataclass
 from typing import TYPE_CHECKING, Literal, cast, get_args
@@ -139,6 +140,19 @@ def create_llm(
     )
 
 
+def llm_for_session(llm: LLM, session_id: str) -> LLM:
+    """
+    Get the LLM of another session, whose chat provider is a copy of the one of `llm`, so that
+    both share the underlying client and its connection pool.
+    """
+    from kosong.chat_provider.kimi import Kimi
+
+    chat_provider = llm.chat_provider
+    if isinstance(chat_provider, Kimi):
+        chat_provider = chat_provider.with_generation_kwargs(prompt_cache_key=session_id)
+    return dataclasses.replace(llm, chat_provider=chat_provider)
+
+
 def _derive_capabilities(provider: "LLMProvider", model: "LLMModel") -> set[ModelCapability]:
     capabilities = model.capabilities or set()
     if provider.type != "kimi":
@@ -146,4 +160,4 @@ def _derive_capabilities(provider: "LLMProvider", model: "LLMModel") -> set[Mode
 
     if model.model == "kimi-for-coding" or "thinking" in model.model:
         capabilities.add("thinking")
-    return capabilities
\ No newline at end of file
+    return capabilities
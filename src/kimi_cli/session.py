@@ -3,6 +3,7 @@ from pathlib import Path
 from typing import NamedTuple
 
 from kimi_cli.metadata import WorkDirMeta, load_metadata, save_metadata
+from kimi_cli.soul.storage import JSONLStorage, PackedStorage
 from kimi_cli.utils.logging import logger
 
 
@@ -79,6 +80,37 @@ class Session(NamedTuple):
             history_file=history_file,
         )
 
+    @staticmethod
+    def load(work_dir: Path, session_id: str) -> "Session | None":
+        """Get a session of a work directory by its ID, if it has a history file."""
+        logger.debug(
+            "Loading session {session_id} for work directory: {work_dir}",
+            session_id=session_id,
+            work_dir=work_dir,
+        )
+
+        metadata = load_metadata()
+        work_dir_meta = next((wd for wd in metadata.work_dirs if wd.path == str(work_dir)), None)
+        if work_dir_meta is None:
+            logger.debug("Work directory never been used")
+            return None
+
+        sessions_dir = work_dir_meta.sessions_dir
+        # the history file may be in any format, see `get_history_file`, and other files of
+        # the session, like its cookie jar, do not make it one to load
+        if not any(
+            (sessions_dir / f"{session_id}{suffix}").is_file()
+            for suffix in (JSONLStorage.suffix, PackedStorage.suffix)
+        ):
+            logger.debug("Session not found: {session_id}", session_id=session_id)
+            return None
+
+        return Session(
+            id=session_id,
+            work_dir=work_dir,
+            history_file=sessions_dir / f"{session_id}.jsonl",
+        )
+
     def mark_as_last(self) -> None:
         """Mark this session as the last completed session for its work directory."""
         metadata = load_metadata()
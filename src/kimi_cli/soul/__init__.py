@@ -124,12 +124,18 @@ async def run_soul(
     soul_task = asyncio.create_task(soul.run(user_input))
 
     cancel_event_task = asyncio.create_task(cancel_event.wait())
-    await asyncio.wait(
-        [soul_task, cancel_event_task],
-        return_when=asyncio.FIRST_COMPLETED,
-    )
-
     try:
+        try:
+            await asyncio.wait(
+                [soul_task, cancel_event_task],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+        except asyncio.CancelledError:
+            # cancelled from outside, e.g. when the UI shuts down, stop the soul along with it
+            soul_task.cancel()
+            cancel_event_task.cancel()
+            raise
+
         if cancel_event.is_set():
             logger.debug("Cancelling the run task")
             soul_task.cancel()
@@ -1,21 +1,30 @@
+import asyncio
 import importlib
 import inspect
 import string
+from collections.abc import Sequence
 from pathlib import Path
-from typing import Any, NamedTuple
+from typing import TYPE_CHECKING, Any, NamedTuple
 
 from kosong.tooling import CallableTool, CallableTool2, Toolset
 
 from kimi_cli.agentspec import ResolvedAgentSpec, load_agent_spec
-from kimi_cli.config import Config
+from kimi_cli.config import Config, MCPConfig
 from kimi_cli.session import Session
 from kimi_cli.soul.approval import Approval
 from kimi_cli.soul.denwarenji import DenwaRenji
 from kimi_cli.soul.runtime import BuiltinSystemPromptArgs, Runtime
 from kimi_cli.soul.toolset import CustomToolset
 from kimi_cli.tools import SkipThisTool
+from kimi_cli.tools.bash.worker import ShellWorkerPool
+from kimi_cli.utils.aiohttp import SharedClientSession
 from kimi_cli.utils.logging import logger
 
+if TYPE_CHECKING:
+    import mcp
+
+    from kimi_cli.tools.mcp import MCPDiscovery
+
 
 class Agent(NamedTuple):
     """The loaded agent."""
@@ -23,6 +32,8 @@ class Agent(NamedTuple):
     name: str
     system_prompt: str
     toolset: Toolset
+    mcp_servers: Sequence["MCPDiscovery"] = ()
+    """How the tools of each MCP configuration were discovered."""
 
 
 async def load_agent(
@@ -55,7 +66,11 @@ async def load_agent(
         Session: runtime.session,
         DenwaRenji: runtime.denwa_renji,
         Approval: runtime.approval,
+        # an optional dependency is looked up by its annotation, including the `None`
+        ShellWorkerPool | None: runtime.shell_pool,
     }
+    if runtime.http_session is not None:
+        tool_deps[SharedClientSession] = runtime.http_session
     tools = agent_spec.tools
     combined_exclude_tools = set(agent_spec.exclude_tools or [])
     if runtime.global_exclude_tools:  # 从 runtime 获取全局排除工具
@@ -74,23 +89,26 @@ async def load_agent(
             )
         ]
     
-    toolset = CustomToolset()
+    toolset = CustomToolset(result_cache=runtime.tool_result_cache)
     bad_tools = _load_tools(toolset, tools, tool_deps)
     if bad_tools:
         raise ValueError(f"Invalid tools: {bad_tools}")
 
     assert isinstance(toolset, CustomToolset)
+    mcp_servers: list[MCPDiscovery] = []
     if mcp_configs:
-        await _load_mcp_tools(
+        mcp_servers = await _load_mcp_tools(
             toolset, 
             mcp_configs, 
-            exclude_tools=combined_exclude_tools  # 传递合并后的排除列表
+            exclude_tools=combined_exclude_tools,  # 传递合并后的排除列表
+            options=runtime.config.mcp,
         )
 
     return Agent(
         name=agent_spec.name,
         system_prompt=system_prompt,
         toolset=toolset,
+        mcp_servers=mcp_servers,
     )
 
 
@@ -114,7 +132,7 @@ type ToolType = CallableTool | CallableTool2[Any]
 def _load_tools(
     toolset: CustomToolset,
     tool_paths: list[str],
-    dependencies: dict[type[Any], Any],
+    dependencies: dict[Any, Any],
 ) -> list[str]:
     bad_tools: list[str] = []
     for tool_path in tool_paths:
@@ -133,7 +151,7 @@ def _load_tools(
     return bad_tools
 
 
-def _load_tool(tool_path: str, dependencies: dict[type[Any], Any]) -> ToolType | None:
+def _load_tool(tool_path: str, dependencies: dict[Any, Any]) -> ToolType | None:
     logger.debug("Loading tool: {tool_path}", tool_path=tool_path)
     module_name, class_name = tool_path.rsplit(":", 1)
     try:
@@ -150,9 +168,40 @@ def _load_tool(tool_path: str, dependencies: dict[type[Any], Any]) -> ToolType |
             break
         # all positional parameters should be dependencies to be injected
         if param.annotation not in dependencies:
+            if param.default is not inspect.Parameter.empty:
+                # an optional dependency that is not provided, keep the defaults from here on
+                break
             raise ValueError(f"Tool dependency not found: {param.annotation}")
         args.append(dependencies[param.annotation])
-    return cls(*args)
+
+    cached = _tool_cache.get(tool_path)
+    if (
+        cached is not None
+        and type(cached.tool) is cls
+        and len(cached.args) == len(args)
+        and all(a is b for a, b in zip(cached.args, args, strict=True))
+    ):
+        logger.debug("Reusing tool: {tool_path}", tool_path=tool_path)
+        return cached.tool
+    tool = cls(*args)
+    _tool_cache[tool_path] = _CachedTool(args, tool)
+    return tool
+
+
+class _CachedTool(NamedTuple):
+    args: list[Any]
+    tool: ToolType
+
+
+_tool_cache: dict[str, _CachedTool] = {}
+"""
+The last instance of each tool loaded in the process, along with its injected dependencies.
+
+Building a tool validates its parameter schema, which is most of the cost of loading an agent.
+Tools only keep what is injected into them, so an instance is shared by all agents loaded with
+the very same dependencies, e.g. the main agent and its subagents within a runtime. Tools
+depending on the `ResolvedAgentSpec` are never shared since every load gets a spec of its own.
+"""
 
 
 async def _load_mcp_tools(
@@ -160,32 +209,57 @@ async def _load_mcp_tools(
     mcp_configs: list[dict[str, Any]],
     *,
     exclude_tools: set[str],
-):
+    options: MCPConfig,
+) -> list["MCPDiscovery"]:
     """
     尝试加载 MCP 工具。如果连接失败，打印警告并继续。
     
-    不再抛出异常，而是记录警告日志。
+    不再抛出异常，而是记录警告日志。所有服务器并发发现，每个服务器有独立的超时。
     """
-    import fastmcp
+    from kimi_cli.tools.mcp import MCPConnection, MCPTool, discover_mcp_tools
+
+    registered: dict[MCPConnection[Any], list[MCPTool]] = {}
 
-    from kimi_cli.tools.mcp import MCPTool
+    def register(connection: MCPConnection[Any], tools: list["mcp.Tool"]):
+        nonlocal toolset
+        for tool in tools:
+            # honor exclude_tools for MCP tools by tool name
+            if tool.name in exclude_tools:
+                logger.info("Excluding MCP tool: {tool}", tool=tool.name)
+                continue
+            mcp_tool = MCPTool(tool, connection)
+            toolset += mcp_tool
+            registered.setdefault(connection, []).append(mcp_tool)
 
-    for mcp_config in mcp_configs:
+    def update(connection: MCPConnection[Any], tools: list["mcp.Tool"]):
+        """Replace the tools of a connection by the ones its server lists now."""
+        nonlocal toolset
+        names = {tool.name for tool in tools}
+        for mcp_tool in registered.pop(connection, []):
+            if mcp_tool.name not in names:
+                logger.info("Removing MCP tool no longer listed: {tool}", tool=mcp_tool.name)
+            toolset -= mcp_tool
+        register(connection, tools)
+
+    async def load(mcp_config: dict[str, Any]) -> "MCPDiscovery":
         logger.info("Loading MCP tools from: {mcp_config}", mcp_config=mcp_config)
-        try:
-            client = fastmcp.Client(mcp_config)
-            async with client:
-                for tool in await client.list_tools():
-                    # honor exclude_tools for MCP tools by tool name
-                    if tool.name in exclude_tools:
-                        logger.info("Excluding MCP tool: {tool}", tool=tool.name)
-                        continue
-                    toolset += MCPTool(tool, client)
-                logger.info("Successfully loaded MCP tools from: {mcp_config}", mcp_config=mcp_config)
-        except Exception as e:
+        discovery = await discover_mcp_tools(mcp_config, options, on_update=update)
+        if discovery.connection is None:
             print(
-                f"⚠️  Failed to connect to MCP server: {mcp_config}. Error: {e}. Continuing without MCP tools from this server."
+                f"⚠️  Failed to connect to MCP server: {mcp_config}. Error: {discovery.error}. Continuing without MCP tools from this server."
             )
             # 继续处理下一个 MCP 配置，不抛出异常
-            continue
-    return toolset
+            return discovery
+        # registered before the manifest is validated in the background
+        register(discovery.connection, discovery.tools)
+        logger.info(
+            "Successfully loaded {n} MCP tools from {name} ({source}) in {elapsed:.3f}s",
+            n=len(discovery.tools),
+            name=discovery.name,
+            source=discovery.source,
+            elapsed=discovery.elapsed,
+        )
+        return discovery
+
+    discoveries = await asyncio.gather(*(load(mcp_config) for mcp_config in mcp_configs))
+    return list(discoveries)
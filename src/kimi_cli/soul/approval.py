@@ -1,9 +1,16 @@
 import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 
 from kimi_cli.soul.toolset import get_current_tool_call_or_none
 from kimi_cli.utils.logging import logger
 from kimi_cli.wire.message import ApprovalRequest, ApprovalResponse
 
+_current_request_queue = ContextVar[asyncio.Queue[ApprovalRequest] | None](
+    "current_request_queue", default=None
+)
+
 
 class Approval:
     def __init__(self, yolo: bool = False):
@@ -12,9 +19,30 @@ class Approval:
         self._auto_approve_actions: set[str] = set()  # TODO: persist across sessions
         """Set of action names that should automatically be approved."""
 
+    @property
+    def yolo(self) -> bool:
+        return self._yolo
+
     def set_yolo(self, yolo: bool) -> None:
         self._yolo = yolo
 
+    @contextmanager
+    def routing(self) -> Iterator[None]:
+        """
+        Route the requests made in the current context to a queue of its own.
+        Intended to be used by the soul around a run, so that concurrent souls sharing this
+        object, like subagents, only fetch the requests of their own tool calls.
+        """
+        token = _current_request_queue.set(asyncio.Queue[ApprovalRequest]())
+        try:
+            yield
+        finally:
+            _current_request_queue.reset(token)
+
+    @property
+    def _queue(self) -> asyncio.Queue[ApprovalRequest]:
+        return _current_request_queue.get() or self._request_queue
+
     async def request(self, sender: str, action: str, description: str) -> bool:
         """
         Request approval for the given action. Intended to be called by tools.
@@ -49,7 +77,7 @@ class Approval:
             return True
 
         request = ApprovalRequest(tool_call.id, sender, action, description)
-        self._request_queue.put_nowait(request)
+        self._queue.put_nowait(request)
         response = await request.wait()
         logger.debug("Received approval response: {response}", response=response)
         match response:
@@ -65,4 +93,4 @@ class Approval:
         """
         Fetch an approval request from the queue. Intended to be called by the soul.
         """
-        return await self._request_queue.get()
+        return await self._queue.get()
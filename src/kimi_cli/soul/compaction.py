@@ -1,14 +1,23 @@
-from collections.abc import Sequence
+import asyncio
+import re
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from hashlib import sha256
 from string import Template
-from typing import TYPE_CHECKING, Protocol, runtime_checkable
+from typing import TYPE_CHECKING, Literal, NamedTuple, Protocol, runtime_checkable
 
 from kosong import generate
+from kosong.chat_provider import ChatProvider
 from kosong.message import ContentPart, Message, TextPart
 
 import kimi_cli.prompts as prompts
 from kimi_cli.llm import LLM
 from kimi_cli.soul.message import system
+from kimi_cli.soul.tokens import TokenEstimator
 from kimi_cli.utils.logging import logger
+from kimi_cli.utils.message import message_stringify
+
+type CompactionName = Literal["simple", "tiered"]
 
 
 @runtime_checkable
@@ -30,6 +39,9 @@ class Compaction(Protocol):
         ...
 
 
+COMPACTED_HEADER = "Previous context has been compacted. Here is the compaction output:"
+
+
 class SimpleCompaction(Compaction):
     MAX_PRESERVED_MESSAGES = 2
 
@@ -86,9 +98,7 @@ class SimpleCompaction(Compaction):
                 output=result.usage.output,
             )
 
-        content: list[ContentPart] = [
-            system("Previous context has been compacted. Here is the compaction output:")
-        ]
+        content: list[ContentPart] = [system(COMPACTED_HEADER)]
         compacted_msg = result.message
         content.extend(
             [TextPart(text=compacted_msg.content)]
@@ -100,7 +110,241 @@ class SimpleCompaction(Compaction):
         return compacted_messages
 
 
+class _Summary(NamedTuple):
+    tier: int
+    """0 for a summary of messages, n + 1 for a summary of tier n summaries."""
+    text: str
+
+
+_SUMMARY_TIER = re.compile(r"<system>Summary \(tier (\d+)\)</system>")
+
+
+class TieredCompaction(Compaction):
+    """
+    Compaction that summarizes the history in bounded chunks and keeps the summaries around.
+
+    The messages to compact are split at user messages into segments, which are packed into
+    chunks of at most `CHUNK_TOKENS` estimated tokens and summarized concurrently. Summaries
+    from earlier compactions are found at the head of the history and kept as they are, so each
+    compaction only summarizes what is new. When there are more than `FAN_IN` summaries of a
+    tier, the oldest of them are summarized again into one summary of the next tier, which keeps
+    the compacted context small however long the session grows.
+
+    Summaries are cached by the content they summarize, so retrying a failed compaction or
+    compacting again after a revert does not repeat the requests that already succeeded.
+    """
+
+    MAX_PRESERVED_MESSAGES = 2
+    CHUNK_TOKENS: int = 32_000
+    """Maximum estimated tokens of the content of one summarization request."""
+    SUMMARY_MAX_TOKENS = 4096
+    """Maximum output tokens of one summarization request."""
+    FAN_IN = 4
+    """Maximum number of summaries of the same tier before they are merged."""
+    MAX_CONCURRENT_REQUESTS = 4
+    CACHE_SIZE = 256
+
+    def __init__(self, token_estimator: TokenEstimator | None = None):
+        self._token_estimator = token_estimator or TokenEstimator()
+        self._cache: OrderedDict[str, str] = OrderedDict()
+
+    async def compact(self, messages: Sequence[Message], llm: LLM) -> Sequence[Message]:
+        history = list(messages)
+        preserve_start_index = _find_preserve_start(history, self.MAX_PRESERVED_MESSAGES)
+        if preserve_start_index is None:
+            return history
+        to_compact = history[:preserve_start_index]
+        to_preserve = history[preserve_start_index:]
+        if not to_compact:
+            return to_preserve
+
+        summaries: list[_Summary] = []
+        new_messages: list[Message] = []
+        for message in to_compact:
+            if (parsed := _parse_summaries(message)) is not None:
+                summaries.extend(parsed)
+            else:
+                new_messages.append(message)
+
+        chat_provider = _limit_output_tokens(llm.chat_provider, self.SUMMARY_MAX_TOKENS)
+        chunk_tokens = max(min(self.CHUNK_TOKENS, llm.max_context_size // 2), 1024)
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+
+        async def _summarize(context: str) -> str:
+            async with semaphore:
+                return await self._summarize(chat_provider, context)
+
+        chunks = self._chunk(new_messages, chunk_tokens)
+        max_chars = int(chunk_tokens * self._token_estimator.bytes_per_token)
+        # only a message larger than a chunk is alone in its chunk and gets truncated
+        texts = await asyncio.gather(
+            *(_summarize(_render_messages(chunk, max_chars)) for chunk in chunks)
+        )
+        summaries.extend(_Summary(0, text) for text in texts)
+        logger.debug(
+            "Summarized {n_messages} messages in {n_chunks} chunks",
+            n_messages=len(new_messages),
+            n_chunks=len(chunks),
+        )
+
+        summaries = await self._merge_tiers(summaries, _summarize)
+        content: list[ContentPart] = [system(COMPACTED_HEADER)]
+        for summary in summaries:
+            content.append(system(f"Summary (tier {summary.tier})"))
+            content.append(TextPart(text=summary.text))
+        return [Message(role="assistant", content=content), *to_preserve]
+
+    def _chunk(self, messages: Sequence[Message], chunk_tokens: int) -> list[list[Message]]:
+        """Pack the messages into chunks, splitting at user messages where possible."""
+        segments: list[list[Message]] = []
+        for message in messages:
+            if not segments or message.role == "user":
+                segments.append([])
+            segments[-1].append(message)
+
+        chunks: list[list[Message]] = []
+        current: list[Message] = []
+        n_current_tokens = 0
+        for segment in segments:
+            # a segment too large for a chunk is split between its messages
+            n_tokens = self._token_estimator.estimate(segment)
+            units = [segment] if n_tokens <= chunk_tokens else [[m] for m in segment]
+            for unit in units:
+                if len(units) > 1:
+                    n_tokens = self._token_estimator.estimate(unit)
+                if current and n_current_tokens + n_tokens > chunk_tokens:
+                    chunks.append(current)
+                    current, n_current_tokens = [], 0
+                current.extend(unit)
+                n_current_tokens += n_tokens
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def _merge_tiers(
+        self, summaries: list[_Summary], summarize: Callable[[str], Awaitable[str]]
+    ) -> list[_Summary]:
+        """Merge the oldest `FAN_IN` summaries of a tier while there are more than that."""
+        tier = 0
+        while True:
+            indexes = [i for i, summary in enumerate(summaries) if summary.tier == tier]
+            if not indexes:
+                if all(summary.tier < tier for summary in summaries):
+                    return summaries
+                tier += 1
+                continue
+            if len(indexes) <= self.FAN_IN:
+                tier += 1
+                continue
+            # tiers never increase from older to newer summaries, so these are adjacent
+            start, end = indexes[0], indexes[0] + self.FAN_IN
+            text = await summarize(_render_summaries(summaries[start:end]))
+            summaries[start:end] = [_Summary(tier + 1, text)]
+            logger.debug("Merged {n} summaries of tier {tier}", n=end - start, tier=tier)
+
+    async def _summarize(self, chat_provider: ChatProvider, context: str) -> str:
+        key = sha256(f"{chat_provider.model_name}\0{context}".encode()).hexdigest()
+        if (cached := self._cache.get(key)) is not None:
+            self._cache.move_to_end(key)
+            logger.debug("Reusing cached summary {key}", key=key[:12])
+            return cached
+
+        compact_prompt = Template(prompts.COMPACT).substitute(CONTEXT=context)
+        result = await generate(
+            chat_provider=chat_provider,
+            system_prompt="You are a helpful assistant that compacts conversation context.",
+            tools=[],
+            history=[Message(role="user", content=compact_prompt)],
+        )
+        if result.usage:
+            logger.debug(
+                "Compaction used {input} input tokens and {output} output tokens",
+                input=result.usage.input,
+                output=result.usage.output,
+            )
+        text = message_stringify(result.message)
+        self._cache[key] = text
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return text
+
+
+def _find_preserve_start(history: Sequence[Message], n_preserved: int) -> int | None:
+    """Find where the preserved tail of the history starts, or None if it is too short."""
+    n = 0
+    for index in range(len(history) - 1, -1, -1):
+        if history[index].role in {"user", "assistant"}:
+            n += 1
+            if n == n_preserved:
+                return index
+    return None
+
+
+def _parse_summaries(message: Message) -> list[_Summary] | None:
+    """Get the summaries in a message made by a compaction, or None for any other message."""
+    if message.role != "assistant" or isinstance(message.content, str) or not message.content:
+        return None
+    header, *parts = message.content
+    if not isinstance(header, TextPart) or header.text != f"<system>{COMPACTED_HEADER}</system>":
+        return None
+
+    summaries: list[_Summary] = []
+    for part in parts:
+        if not isinstance(part, TextPart):
+            continue
+        if m := _SUMMARY_TIER.fullmatch(part.text):
+            summaries.append(_Summary(int(m.group(1)), ""))
+        elif summaries:
+            summaries[-1] = summaries[-1]._replace(text=summaries[-1].text + part.text)
+        else:
+            # compacted by `SimpleCompaction`
+            summaries.append(_Summary(0, part.text))
+    return summaries
+
+
+def _render_messages(messages: Sequence[Message], max_chars: int) -> str:
+    parts: list[str] = []
+    for i, message in enumerate(messages):
+        content = message_stringify(message)
+        for tool_call in message.tool_calls or []:
+            content += f"\nTool call: {tool_call.function.name}({tool_call.function.arguments})"
+        if len(content) > max_chars:
+            half = max_chars // 2
+            n_omitted = len(content) - 2 * half
+            content = (
+                f"{content[:half]}\n[... {n_omitted} characters omitted ...]\n{content[-half:]}"
+            )
+        parts.append(f"## Message {i + 1}\nRole: {message.role}\nContent: {content}")
+    return "\n\n".join(parts)
+
+
+def _render_summaries(summaries: Sequence[_Summary]) -> str:
+    return "\n\n".join(
+        f"## Summary {i + 1} of earlier context\n{summary.text}"
+        for i, summary in enumerate(summaries)
+    )
+
+
+def _limit_output_tokens(chat_provider: ChatProvider, max_tokens: int) -> ChatProvider:
+    match chat_provider.name:
+        case "kimi" | "anthropic":
+            return chat_provider.with_generation_kwargs(max_tokens=max_tokens)  # pyright: ignore[reportAttributeAccessIssue]
+        case "openai-responses":
+            return chat_provider.with_generation_kwargs(max_output_tokens=max_tokens)  # pyright: ignore[reportAttributeAccessIssue]
+        case _:
+            return chat_provider
+
+
+def get_compaction(name: CompactionName) -> Compaction:
+    match name:
+        case "simple":
+            return SimpleCompaction()
+        case "tiered":
+            return TieredCompaction()
+
+
 if TYPE_CHECKING:
 
-    def type_check(simple: SimpleCompaction):
+    def type_check(simple: SimpleCompaction, tiered: TieredCompaction):
         _: Compaction = simple
+        _: Compaction = tiered
@@ -1,25 +1,224 @@
-import json
-from collections.abc import Sequence
+import asyncio
+import mmap
+import os
+from collections.abc import Callable, Sequence
 from pathlib import Path
+from typing import BinaryIO, Literal, NamedTuple, overload
 
-import aiofiles
-import aiofiles.os
 from kosong.message import Message
 
 from kimi_cli.soul.message import system
+from kimi_cli.soul.storage import HistoryStorage, Marker, get_history_storage
+from kimi_cli.soul.tokens import TokenEstimator
 from kimi_cli.utils.logging import logger
-from kimi_cli.utils.path import next_available_rotation
+
+type FsyncPolicy = Literal["never", "flush", "always"]
+"""
+When to `fsync` the history file:
+
+- `never`: leave it to the OS, records are still written out at every flush.
+- `flush`: fsync once per flush, i.e. once per step.
+- `always`: flush and fsync after every single record.
+"""
+
+
+class HistoryWriter:
+    """
+    Append-only writer for a context history file.
+
+    The file handle is kept open between writes and records are buffered in memory until
+    `flush` is called, so that all records produced by one step hit the disk in a single
+    write instead of one open/write/close round trip each.
+    """
+
+    MAX_PENDING_BYTES = 1 << 20
+    """Flush automatically once this many bytes are buffered."""
+
+    def __init__(self, path: Path, storage: HistoryStorage, *, fsync: FsyncPolicy = "never"):
+        self._path = path
+        self._storage = storage
+        self._fsync: FsyncPolicy = fsync
+        self._file: BinaryIO | None = None
+        self._pending: list[bytes] = []
+        self._n_pending_bytes = 0
+        self._size = path.stat().st_size if path.exists() else 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def size(self) -> int:
+        """Size of the file in bytes once all buffered records are flushed."""
+        return self._size
+
+    async def write(self, data: bytes) -> None:
+        """Buffer one record, encoded by the storage of the file."""
+        self._pending.append(data)
+        self._n_pending_bytes += len(data)
+        self._size += len(data)
+        if self._fsync == "always" or self._n_pending_bytes >= self.MAX_PENDING_BYTES:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write all buffered records to the file as one group."""
+        async with self._lock:
+            if not self._pending:
+                return
+            data = b"".join(self._pending)
+            self._pending.clear()
+            self._n_pending_bytes = 0
+            await asyncio.to_thread(self._write_sync, data)
+
+    async def truncate(self, size: int) -> None:
+        """Flush pending records, then cut the file down to `size` bytes."""
+        await self.flush()
+        async with self._lock:
+            assert size <= self._size, "Cannot truncate beyond the end of the file"
+            await asyncio.to_thread(self._truncate_sync, size)
+            self._size = size
+
+    async def close(self) -> None:
+        """Flush pending records and close the file handle. The writer can be reused after."""
+        await self.flush()
+        async with self._lock:
+            if self._file is not None:
+                file, self._file = self._file, None
+                await asyncio.to_thread(file.close)
+
+    def _open_sync(self) -> BinaryIO:
+        if self._file is None:
+            self._file = open(self._path, "ab")  # noqa: SIM115
+        return self._file
+
+    def _write_sync(self, data: bytes) -> None:
+        self._storage.persist(fsync=self._fsync != "never")
+        file = self._open_sync()
+        file.write(data)
+        file.flush()
+        if self._fsync != "never":
+            os.fsync(file.fileno())
+
+    def _truncate_sync(self, size: int) -> None:
+        file = self._open_sync()
+        file.truncate(size)
+        if self._fsync != "never":
+            os.fsync(file.fileno())
+
+
+type _Span = tuple[int, int]
+"""Start and end byte offsets of a message record that is not validated yet."""
+
+
+class _History(Sequence[Message]):
+    """
+    The message history of a context.
+
+    Messages restored from the file backend are kept as byte spans of a memory-mapped file
+    and only validated when they are first accessed.
+    """
+
+    def __init__(self, decode: Callable[[bytes], Message]):
+        self._items: list[Message | _Span] = []
+        self._buffer: mmap.mmap | bytes = b""
+        self._decode = decode
+        self._n_unparsed = 0
+
+    def load_spans(self, buffer: mmap.mmap, spans: list[_Span]):
+        """Load restored messages as unparsed spans of `buffer`, which is owned from now on."""
+        assert not self._items
+        self._items.extend(spans)
+        self._buffer = buffer
+        self._n_unparsed = len(spans)
+        self._release_if_parsed()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @overload
+    def __getitem__(self, index: int) -> Message: ...
+    @overload
+    def __getitem__(self, index: slice) -> list[Message]: ...
+    def __getitem__(self, index: int | slice) -> Message | list[Message]:
+        if isinstance(index, slice):
+            return [self._parse(i) for i in range(*index.indices(len(self._items)))]
+        if index < 0:
+            index += len(self._items)
+        if not 0 <= index < len(self._items):
+            raise IndexError("history index out of range")
+        return self._parse(index)
+
+    def extend(self, messages: Sequence[Message]):
+        self._items.extend(messages)
+
+    def truncate(self, n_messages: int):
+        """Drop all messages from position `n_messages` on, without parsing any of them."""
+        dropped = self._items[n_messages:]
+        del self._items[n_messages:]
+        self._n_unparsed -= sum(1 for item in dropped if isinstance(item, tuple))
+        if not self._release_if_parsed() and isinstance(self._buffer, mmap.mmap):
+            # the file is about to be truncated, which a live mapping may not survive
+            end = max(item[1] for item in self._items if isinstance(item, tuple))
+            buffer, self._buffer = self._buffer, self._buffer[:end]
+            buffer.close()
+
+    def _parse(self, index: int) -> Message:
+        item = self._items[index]
+        if isinstance(item, Message):
+            return item
+        start, end = item
+        message = self._decode(self._buffer[start:end])
+        self._items[index] = message
+        self._n_unparsed -= 1
+        self._release_if_parsed()
+        return message
+
+    def _release_if_parsed(self) -> bool:
+        if self._n_unparsed:
+            return False
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        self._buffer = b""
+        return True
+
+
+class _CheckpointMark(NamedTuple):
+    """Where a checkpoint sits in the context, so that reverting to it needs no re-parsing."""
+
+    offset: int
+    """Byte offset of the checkpoint record in the file backend."""
+    n_messages: int
+    """Length of the history when the checkpoint was made."""
+    token_count: int
+    """Token count when the checkpoint was made."""
 
 
 class Context:
-    def __init__(self, file_backend: Path):
+    def __init__(
+        self,
+        file_backend: Path,
+        *,
+        fsync: FsyncPolicy = "never",
+        storage: HistoryStorage | None = None,
+        token_estimator: TokenEstimator | None = None,
+    ):
         self._file_backend = file_backend
-        self._history: list[Message] = []
+        self._storage = storage or get_history_storage(file_backend)
+        self._writer = HistoryWriter(file_backend, self._storage, fsync=fsync)
+        self._history = _History(self._storage.decode_message)
         self._token_count: int = 0
-        self._next_checkpoint_id: int = 0
-        """The ID of the next checkpoint, starting from 0, incremented after each checkpoint."""
+        self._token_estimator = token_estimator or TokenEstimator()
+        self._last_usage: int | None = None
+        """The last token count reported by the LLM, if no revert happened since."""
+        self._unaccounted: list[Message] = []
+        """Messages appended since `_last_usage`, whose token counts are only estimated."""
+        self._checkpoints: list[_CheckpointMark] = []
+        """Index of checkpoints, the ID of a checkpoint is its position in this list."""
 
     async def restore(self) -> bool:
+        """
+        Restore the context from the file backend.
+
+        Messages are not validated here but lazily when they are first read from `history`,
+        so that the time to restore a session is mostly independent of its size.
+        """
         logger.debug("Restoring context from file: {file_backend}", file_backend=self._file_backend)
         if self._history:
             logger.error("The context storage is already modified")
@@ -31,41 +230,64 @@ class Context:
             logger.debug("Empty context file, skipping restoration")
             return False
 
-        async with aiofiles.open(self._file_backend, encoding="utf-8") as f:
-            async for line in f:
-                if not line.strip():
-                    continue
-                line_json = json.loads(line)
-                if line_json["role"] == "_usage":
-                    self._token_count = line_json["token_count"]
-                    continue
-                if line_json["role"] == "_checkpoint":
-                    self._next_checkpoint_id = line_json["id"] + 1
-                    continue
-                message = Message.model_validate(line_json)
-                self._history.append(message)
-
+        await asyncio.to_thread(self._scan_file_backend)
         return True
 
+    def _scan_file_backend(self):
+        """
+        Index the file backend without decoding messages.
+        Only the small `_checkpoint` and `_usage` markers are decoded to rebuild the token count
+        and the checkpoint index. Messages after the last usage are estimated from their encoded
+        size.
+        """
+        with open(self._file_backend, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        spans: list[_Span] = []
+        usage = 0
+        n_unaccounted_bytes = 0
+        for record in self._storage.scan(buffer):
+            match record.marker:
+                case None:
+                    spans.append((record.start, record.end))
+                    n_unaccounted_bytes += record.end - record.start
+                case Marker(role="_usage", value=token_count):
+                    usage = token_count
+                    n_unaccounted_bytes = 0
+                case Marker(role="_checkpoint"):
+                    # checkpoint IDs are sequential, the position in the index is the ID
+                    token_count = usage + self._token_estimator.estimate_bytes(n_unaccounted_bytes)
+                    self._checkpoints.append(_CheckpointMark(record.start, len(spans), token_count))
+        self._history.load_spans(buffer, spans)
+        self._token_count = usage + self._token_estimator.estimate_bytes(n_unaccounted_bytes)
+        if usage and not n_unaccounted_bytes:
+            self._last_usage = usage
+
     @property
     def history(self) -> Sequence[Message]:
         return self._history
 
     @property
     def token_count(self) -> int:
+        """
+        Token count of the history.
+        This is the last usage reported by the LLM plus an estimate for the messages appended
+        since, so it is never behind the actual content of the context.
+        """
         return self._token_count
 
     @property
     def n_checkpoints(self) -> int:
-        return self._next_checkpoint_id
+        return len(self._checkpoints)
+
+    def _mark_checkpoint(self, offset: int):
+        self._checkpoints.append(_CheckpointMark(offset, len(self._history), self._token_count))
 
     async def checkpoint(self, add_user_message: bool):
-        checkpoint_id = self._next_checkpoint_id
-        self._next_checkpoint_id += 1
+        checkpoint_id = len(self._checkpoints)
         logger.debug("Checkpointing, ID: {id}", id=checkpoint_id)
 
-        async with aiofiles.open(self._file_backend, "a", encoding="utf-8") as f:
-            await f.write(json.dumps({"role": "_checkpoint", "id": checkpoint_id}) + "\n")
+        self._mark_checkpoint(self._writer.size)
+        await self._writer.write(self._storage.encode_marker(Marker("_checkpoint", checkpoint_id)))
         if add_user_message:
             await self.append_message(
                 Message(role="user", content=[system(f"CHECKPOINT {checkpoint_id}")])
@@ -75,68 +297,68 @@ class Context:
         """
         Revert the context to the specified checkpoint.
         After this, the specified checkpoint and all subsequent content will be
-        removed from the context. File backend will be rotated.
+        removed from the context. File backend will be truncated in place.
+
+        This takes constant time regardless of the history length, as the position of every
+        checkpoint is indexed when it is made or restored.
 
         Args:
             checkpoint_id (int): The ID of the checkpoint to revert to. 0 is the first checkpoint.
 
         Raises:
             ValueError: When the checkpoint does not exist.
-            RuntimeError: When no available rotation path is found.
         """
 
         logger.debug("Reverting checkpoint, ID: {id}", id=checkpoint_id)
-        if checkpoint_id >= self._next_checkpoint_id:
+        if checkpoint_id >= len(self._checkpoints):
             logger.error("Checkpoint {checkpoint_id} does not exist", checkpoint_id=checkpoint_id)
             raise ValueError(f"Checkpoint {checkpoint_id} does not exist")
 
-        # rotate the history file
-        rotated_file_path = await next_available_rotation(self._file_backend)
-        if rotated_file_path is None:
-            logger.error("No available rotation path found")
-            raise RuntimeError("No available rotation path found")
-        await aiofiles.os.rename(self._file_backend, rotated_file_path)
+        mark = self._checkpoints[checkpoint_id]
+        await self._writer.truncate(mark.offset)
+        self._history.truncate(mark.n_messages)
+        del self._checkpoints[checkpoint_id:]
+        self._token_count = mark.token_count
+        self._last_usage = None
+        self._unaccounted.clear()
         logger.debug(
-            "Rotated history file: {rotated_file_path}", rotated_file_path=rotated_file_path
+            "Truncated history file to {offset} bytes, {n_messages} messages left",
+            offset=mark.offset,
+            n_messages=mark.n_messages,
         )
 
-        # restore the context until the specified checkpoint
-        self._history.clear()
-        self._token_count = 0
-        self._next_checkpoint_id = 0
-        async with (
-            aiofiles.open(rotated_file_path, encoding="utf-8") as old_file,
-            aiofiles.open(self._file_backend, "w", encoding="utf-8") as new_file,
-        ):
-            async for line in old_file:
-                if not line.strip():
-                    continue
-
-                line_json = json.loads(line)
-                if line_json["role"] == "_checkpoint" and line_json["id"] == checkpoint_id:
-                    break
-
-                await new_file.write(line)
-                if line_json["role"] == "_usage":
-                    self._token_count = line_json["token_count"]
-                elif line_json["role"] == "_checkpoint":
-                    self._next_checkpoint_id = line_json["id"] + 1
-                else:
-                    message = Message.model_validate(line_json)
-                    self._history.append(message)
-
     async def append_message(self, message: Message | Sequence[Message]):
         logger.debug("Appending message(s) to context: {message}", message=message)
         messages = message if isinstance(message, Sequence) else [message]
         self._history.extend(messages)
+        self._token_count += self._token_estimator.estimate(messages)
+        self._unaccounted.extend(messages)
 
-        async with aiofiles.open(self._file_backend, "a", encoding="utf-8") as f:
-            for message in messages:
-                await f.write(message.model_dump_json(exclude_none=True) + "\n")
+        for message in messages:
+            await self._writer.write(self._storage.encode_message(message))
 
     async def update_token_count(self, token_count: int):
-        logger.debug("Updating token count in context: {token_count}", token_count=token_count)
+        """Set the token count to the real usage reported by the LLM."""
+        logger.debug(
+            "Updating token count in context: {token_count}, estimated {estimated}",
+            token_count=token_count,
+            estimated=self._token_count,
+        )
+        if self._last_usage is not None and self._unaccounted:
+            self._token_estimator.calibrate(self._unaccounted, token_count - self._last_usage)
         self._token_count = token_count
+        self._last_usage = token_count
+        self._unaccounted.clear()
+
+        await self._writer.write(self._storage.encode_marker(Marker("_usage", token_count)))
+
+    async def flush(self):
+        """
+        Write all buffered records to the file backend.
+        Souls should call this at step boundaries.
+        """
+        await self._writer.flush()
 
-        async with aiofiles.open(self._file_backend, "a", encoding="utf-8") as f:
-            await f.write(json.dumps({"role": "_usage", "token_count": token_count}) + "\n")
+    async def close(self):
+        """Flush buffered records and release the file handle."""
+        await self._writer.close()
@@ -33,9 +33,10 @@ from kimi_cli.soul import (
     wire_send,
 )
 from kimi_cli.soul.agent import Agent
-from kimi_cli.soul.compaction import SimpleCompaction
+from kimi_cli.soul.compaction import get_compaction
 from kimi_cli.soul.context import Context
 from kimi_cli.soul.message import system, tool_result_to_messages
+from kimi_cli.soul.pruning import ToolOutputPruning
 from kimi_cli.soul.runtime import Runtime
 from kimi_cli.tools.dmail import NAME as SendDMail_NAME
 from kimi_cli.tools.utils import ToolRejectedError
@@ -81,7 +82,8 @@ class KimiSoul(Soul):
         self._approval = runtime.approval
         self._context = context
         self._loop_control = runtime.config.loop_control
-        self._compaction = SimpleCompaction()  # TODO: maybe configurable and composable
+        self._compaction = get_compaction(self._loop_control.compaction)
+        self._pruning = ToolOutputPruning()
         self._reserved_tokens = RESERVED_TOKENS
         if self._runtime.llm is not None:
             assert self._reserved_tokens <= self._runtime.llm.max_context_size
@@ -147,6 +149,11 @@ class KimiSoul(Soul):
             raise LLMNotSupported(self._runtime.llm, ["thinking"])
         self._thinking_effort = "high" if enabled else "off"
 
+    async def close(self) -> None:
+        """Release the history file of the context, and the HTTP connections and warm shells."""
+        await self._context.close()
+        await self._runtime.close()
+
     async def _checkpoint(self):
         await self._context.checkpoint(self._checkpoint_with_user_message)
 
@@ -164,7 +171,11 @@ class KimiSoul(Soul):
         await self._checkpoint()  # this creates the checkpoint 0 on first run
         await self._context.append_message(Message(role="user", content=user_input))
         logger.debug("Appended user message to context")
-        await self._agent_loop()
+        try:
+            with self._approval.routing():
+                await self._agent_loop()
+        finally:
+            await self._context.flush()
 
     async def _agent_loop(self):
         """The main agent loop for one run."""
@@ -178,20 +189,17 @@ class KimiSoul(Soul):
         step_no = 1
         while True:
             wire_send(StepBegin(step_no))
+            # requests are routed per run, so subagents running at the same time never steal
+            # each other's requests, see `Approval.routing`
             approval_task = asyncio.create_task(_pipe_approval_to_wire())
-            # FIXME: It's possible that a subagent's approval task steals approval request
-            # from the main agent. We must ensure that the Task tool will redirect them
-            # to the main wire. See `_SubWire` for more details. Later we need to figure
-            # out a better solution.
             try:
                 # compact the context if needed
-                if (
-                    self._context.token_count + self._reserved_tokens
-                    >= self._runtime.llm.max_context_size
-                ):
+                if self._needs_compaction():
                     logger.info("Context too long, compacting...")
                     wire_send(CompactionBegin())
-                    await self.compact_context()
+                    # pruning often frees enough tokens to skip the LLM call
+                    if not await self.prune_context() or self._needs_compaction():
+                        await self.compact_context()
                     wire_send(CompactionEnd())
 
                 logger.debug("Beginning step {step_no}", step_no=step_no)
@@ -355,6 +363,11 @@ class KimiSoul(Soul):
                 )
                 await self._context.append_message(msg)
 
+        # one step, one write to the file backend
+        await self._context.flush()
+        # the token count now includes the estimated tool results
+        wire_send(StatusUpdate(status=self.status))
+
     def _is_similar_to_last_command(self, current_cmd: str) -> bool:
         """
         检查当前命令是否与最近一个命令相似（连续重复检测）。
@@ -450,6 +463,29 @@ class KimiSoul(Soul):
                 self._similar_pattern_count = 0
         return messages
 
+    def _needs_compaction(self) -> bool:
+        assert self._runtime.llm is not None
+        return (
+            self._context.token_count + self._reserved_tokens >= self._runtime.llm.max_context_size
+        )
+
+    async def prune_context(self) -> bool:
+        """
+        Prune stale tool outputs from the context, without calling the LLM.
+
+        Returns:
+            bool: Whether anything was pruned.
+        """
+        pruned = self._pruning.prune(self._context.history)
+        if not pruned.elided:
+            return False
+        await self._context.revert_to(0)
+        await self._checkpoint()
+        await self._context.append_message(pruned.messages)
+        await self._context.flush()
+        wire_send(StatusUpdate(status=self.status, tokens_pruned=pruned.tokens_saved))
+        return True
+
     async def compact_context(self) -> None:
         """
         Compact the context.
@@ -477,6 +513,7 @@ class KimiSoul(Soul):
         await self._context.revert_to(0)
         await self._checkpoint()
         await self._context.append_message(compacted_messages)
+        await self._context.flush()
 
     @staticmethod
     def _is_retryable_error(exception: BaseException) -> bool:
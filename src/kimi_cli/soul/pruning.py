@@ -0,0 +1,112 @@
+from collections.abc import Sequence
+from hashlib import sha256
+from typing import NamedTuple
+
+from kosong.message import ContentPart, Message, TextPart
+
+from kimi_cli.soul.message import system
+from kimi_cli.soul.tokens import TokenEstimator
+from kimi_cli.utils.logging import logger
+
+
+class ElidedOutput(NamedTuple):
+    """A tool output replaced by an excerpt."""
+
+    tool_call_id: str | None
+    sha256: str
+    """SHA-256 of the original output, whose first 16 digits are shown in the excerpt."""
+    n_chars: int
+    """Length of the original output."""
+
+
+class PruneResult(NamedTuple):
+    messages: list[Message]
+    elided: list[ElidedOutput]
+    tokens_saved: int
+    """Estimated number of tokens freed."""
+
+
+class ToolOutputPruning:
+    """
+    Replace stale tool outputs with excerpts, without calling the LLM.
+
+    Outputs of the last `KEEP_RECENT_STEPS` steps are kept as they are. Older text outputs
+    longer than `MIN_PRUNE_CHARS` are cut down to their head and tail, along with their length
+    and hash so that the agent knows what is missing, and older media parts are dropped.
+    Pruning is deterministic and pruning an already pruned history changes nothing.
+    """
+
+    KEEP_RECENT_STEPS = 3
+    MIN_PRUNE_CHARS = 2048
+    EXCERPT_CHARS = 512
+    """Characters kept from both the head and the tail of a pruned output."""
+
+    def __init__(self, token_estimator: TokenEstimator | None = None):
+        self._token_estimator = token_estimator or TokenEstimator()
+
+    def prune(self, messages: Sequence[Message]) -> PruneResult:
+        history = list(messages)
+
+        # every step starts with an assistant message, followed by the results of its tool calls
+        n_steps = 0
+        stale_end = 0
+        for index in range(len(history) - 1, -1, -1):
+            if history[index].role == "assistant":
+                n_steps += 1
+                if n_steps == self.KEEP_RECENT_STEPS:
+                    stale_end = index
+                    break
+
+        elided: list[ElidedOutput] = []
+        tokens_saved = 0
+        for index in range(stale_end):
+            message = history[index]
+            if message.role != "tool":
+                continue
+            pruned = self._prune_message(message, elided)
+            if pruned is not message:
+                history[index] = pruned
+                tokens_saved += self._token_estimator.estimate([message])
+                tokens_saved -= self._token_estimator.estimate([pruned])
+
+        if elided:
+            logger.info(
+                "Pruned {n} stale tool outputs, saving about {tokens} tokens",
+                n=len(elided),
+                tokens=tokens_saved,
+            )
+        return PruneResult(history, elided, tokens_saved)
+
+    def _prune_message(self, message: Message, elided: list[ElidedOutput]) -> Message:
+        if isinstance(message.content, str):
+            if len(message.content) < self.MIN_PRUNE_CHARS:
+                return message
+            return message.model_copy(
+                update={"content": self._excerpt(message.tool_call_id, message.content, elided)}
+            )
+
+        content: list[ContentPart] = []
+        changed = False
+        for part in message.content:
+            if isinstance(part, TextPart):
+                if len(part.text) >= self.MIN_PRUNE_CHARS:
+                    part = TextPart(text=self._excerpt(message.tool_call_id, part.text, elided))
+                    changed = True
+            else:
+                part = system(f"{part.type} from an earlier step elided")
+                changed = True
+            content.append(part)
+        if not changed:
+            return message
+        return message.model_copy(update={"content": content})
+
+    def _excerpt(self, tool_call_id: str | None, text: str, elided: list[ElidedOutput]) -> str:
+        digest = sha256(text.encode("utf-8")).hexdigest()
+        elided.append(ElidedOutput(tool_call_id, digest, len(text)))
+        n_elided = len(text) - 2 * self.EXCERPT_CHARS
+        return (
+            f"<system>Output of an earlier step pruned to its head and tail: {len(text)} "
+            f"characters, sha256 {digest[:16]}.</system>\n"
+            f"{text[: self.EXCERPT_CHARS]}\n[... {n_elided} characters elided ...]\n"
+            f"{text[-self.EXCERPT_CHARS :]}"
+        )
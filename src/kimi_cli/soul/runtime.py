@@ -1,4 +1,5 @@
 import asyncio
+import platform
 import subprocess
 import sys
 from datetime import datetime
@@ -6,10 +7,13 @@ from pathlib import Path
 from typing import NamedTuple
 
 from kimi_cli.config import Config
-from kimi_cli.llm import LLM
+from kimi_cli.llm import LLM, llm_for_session
 from kimi_cli.session import Session
 from kimi_cli.soul.approval import Approval
 from kimi_cli.soul.denwarenji import DenwaRenji
+from kimi_cli.soul.toolset import ToolResultCache
+from kimi_cli.tools.bash.worker import ShellWorkerPool
+from kimi_cli.utils.aiohttp import SharedClientSession
 from kimi_cli.utils.logging import logger
 
 
@@ -70,6 +74,12 @@ class Runtime(NamedTuple):
     approval: Approval
     global_exclude_tools: list[str] | None = None,
     disable_curl_tip: bool = False,
+    tool_result_cache: ToolResultCache | None = None
+    """Results of pure tools shared by all agents of the session, not cached if `None`."""
+    http_session: SharedClientSession | None = None
+    """HTTP client session shared by the tools, tools making HTTP requests cannot load if `None`."""
+    shell_pool: ShellWorkerPool | None = None
+    """Warm shells of the Bash tool, commands run in a new shell each if `None`."""
 
     @staticmethod
     async def create(
@@ -98,5 +108,45 @@ class Runtime(NamedTuple):
             denwa_renji=DenwaRenji(),
             approval=Approval(yolo=yolo),
             global_exclude_tools=global_exclude_tools or [], 
-            disable_curl_tip=disable_curl_tip
+            disable_curl_tip=disable_curl_tip,
+            tool_result_cache=ToolResultCache(),
+            http_session=SharedClientSession(
+                cookie_file=session.history_file.with_suffix(".cookies")
+            ),
+            shell_pool=(
+                ShellWorkerPool(config.bash.max_workers)
+                if config.bash.persistent and platform.system() != "Windows"
+                else None
+            ),
         )
+
+    def for_session(self, session: Session) -> "Runtime":
+        """
+        Get the runtime of another session of the same work directory. The LLM connections are
+        shared, while the session gets an HTTP client session with a cookie jar of its own, warm
+        shells of its own and the rest of the per-session state.
+        """
+        return self._replace(
+            llm=llm_for_session(self.llm, session.id) if self.llm is not None else None,
+            session=session,
+            denwa_renji=DenwaRenji(),
+            approval=Approval(yolo=self.approval.yolo),
+            tool_result_cache=ToolResultCache() if self.tool_result_cache is not None else None,
+            http_session=(
+                SharedClientSession(cookie_file=session.history_file.with_suffix(".cookies"))
+                if self.http_session is not None
+                else None
+            ),
+            shell_pool=(
+                ShellWorkerPool(self.config.bash.max_workers)
+                if self.shell_pool is not None
+                else None
+            ),
+        )
+
+    async def close(self) -> None:
+        """Release the HTTP connections and the warm shells, they are reopened on use."""
+        if self.http_session is not None:
+            await self.http_session.close()
+        if self.shell_pool is not None:
+            await self.shell_pool.close()
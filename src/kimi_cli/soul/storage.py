@@ -0,0 +1,306 @@
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Literal, NamedTuple
+
+from kosong.message import Message
+
+type HistoryFormat = Literal["jsonl", "packed"]
+
+type Buffer = bytes | mmap.mmap
+"""The content of a history file, read into memory or memory-mapped."""
+
+
+class Marker(NamedTuple):
+    """A bookkeeping record in the history file, which is not a message."""
+
+    role: Literal["_checkpoint", "_usage"]
+    value: int
+    """The checkpoint ID for `_checkpoint`, or the token count for `_usage`."""
+
+    def to_json(self) -> str:
+        key = "id" if self.role == "_checkpoint" else "token_count"
+        return json.dumps({"role": self.role, key: self.value})
+
+    @staticmethod
+    def from_json(data: str | bytes) -> "Marker":
+        record = json.loads(data)
+        if record["role"] == "_checkpoint":
+            return Marker("_checkpoint", record["id"])
+        return Marker("_usage", record["token_count"])
+
+
+class Record(NamedTuple):
+    """A record found when scanning a history file."""
+
+    start: int
+    """Byte offset of the record in the file."""
+    end: int
+    """Byte offset right after the record, excluding any record separator."""
+    marker: Marker | None
+    """The decoded marker, or None for a message which is left undecoded."""
+
+
+class HistoryStorage(ABC):
+    """The on-disk layout of records in a context history file."""
+
+    suffix: str
+    """File suffix of history files in this format."""
+
+    @abstractmethod
+    def encode_message(self, message: Message) -> bytes:
+        """Encode a message into bytes to be appended to the file."""
+        ...
+
+    @abstractmethod
+    def encode_marker(self, marker: Marker) -> bytes:
+        """Encode a marker into bytes to be appended to the file."""
+        ...
+
+    @abstractmethod
+    def scan(self, buffer: Buffer) -> Iterator[Record]:
+        """Locate all records in the content of a history file, decoding only markers."""
+        ...
+
+    @abstractmethod
+    def decode_message(self, data: bytes) -> Message:
+        """Decode a message from `buffer[record.start:record.end]`."""
+        ...
+
+    def persist(self, *, fsync: bool) -> None:  # noqa: B027
+        """
+        Write out any side data referenced by encoded records.
+        Called from the writer thread right before encoded records are written.
+        """
+        pass
+
+
+_MARKER_PREFIX = b'{"role": "_'
+_MARKER_RECORD = re.compile(rb'\{"role": "(_checkpoint|_usage)", "(?:id|token_count)": (\d+)\}')
+_NEWLINE = re.compile(b"\n")
+
+
+class JSONLStorage(HistoryStorage):
+    """One JSON object per line, as readable by any JSON lines tooling."""
+
+    suffix = ".jsonl"
+
+    def encode_message(self, message: Message) -> bytes:
+        return (message.model_dump_json(exclude_none=True) + "\n").encode("utf-8")
+
+    def encode_marker(self, marker: Marker) -> bytes:
+        return (marker.to_json() + "\n").encode("utf-8")
+
+    def scan(self, buffer: Buffer) -> Iterator[Record]:
+        size = len(buffer)
+
+        # markers are written by `json.dumps` with the role first, and the quotes of this
+        # prefix would be escaped if it appeared inside a message
+        marker_starts: set[int] = set()
+        pos = buffer.find(_MARKER_PREFIX)
+        while pos != -1:
+            marker_starts.add(pos)
+            pos = buffer.find(_MARKER_PREFIX, pos + len(_MARKER_PREFIX))
+        line_ends = [m.start() for m in _NEWLINE.finditer(buffer)]
+        if not line_ends or line_ends[-1] != size - 1:
+            line_ends.append(size)
+
+        start = 0
+        for end in line_ends:
+            if start in marker_starts:
+                if m := _MARKER_RECORD.match(buffer, start, end):
+                    marker = Marker(m.group(1).decode(), int(m.group(2)))  # pyright: ignore[reportArgumentType]
+                else:
+                    marker = Marker.from_json(buffer[start:end])
+                yield Record(start, end, marker)
+            elif end - start > 2 or buffer[start:end].strip():
+                yield Record(start, end, None)
+            start = end + 1
+
+    def decode_message(self, data: bytes) -> Message:
+        return Message.model_validate_json(data)
+
+
+class PackedStorage(HistoryStorage):
+    """
+    Length-prefixed binary records with compressed payloads.
+
+    Each record is a frame of `<payload length: u32 BE><kind: u8><payload>`. Message payloads
+    are compact JSON, zlib-compressed when that pays off. Strings of at least
+    `BLOB_MIN_SIZE` characters, like base64 images or long command outputs, are moved to a
+    content-addressed blob store next to the history file, so the same part is stored only
+    once across all history files of a work directory.
+    """
+
+    suffix = ".kpack"
+
+    BLOB_MIN_SIZE = 4096
+    COMPRESS_MIN_SIZE = 256
+
+    _HEADER = struct.Struct(">IB")
+    _KIND_MARKER = 0
+    _KIND_MESSAGE = 1
+    _KIND_MESSAGE_ZLIB = 2
+
+    def __init__(self, blobs_dir: Path):
+        self._blobs_dir = blobs_dir
+        self._pending_blobs: dict[str, str] = {}
+        # messages are encoded on the event loop while `persist` runs in the writer thread
+        self._pending_lock = threading.Lock()
+
+    def encode_message(self, message: Message) -> bytes:
+        data = message.model_dump(mode="json", exclude_none=True)
+        blobs: dict[str, str] = {}
+        data = _extract_blobs(data, self.BLOB_MIN_SIZE, blobs)
+        if blobs:
+            with self._pending_lock:
+                self._pending_blobs.update(blobs)
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        kind = self._KIND_MESSAGE
+        if len(payload) >= self.COMPRESS_MIN_SIZE:
+            compressed = zlib.compress(payload)
+            if len(compressed) < len(payload):
+                payload, kind = compressed, self._KIND_MESSAGE_ZLIB
+        return self._HEADER.pack(len(payload), kind) + payload
+
+    def encode_marker(self, marker: Marker) -> bytes:
+        payload = marker.to_json().encode("utf-8")
+        return self._HEADER.pack(len(payload), self._KIND_MARKER) + payload
+
+    def scan(self, buffer: Buffer) -> Iterator[Record]:
+        size = len(buffer)
+        header_size = self._HEADER.size
+        start = 0
+        while start + header_size <= size:
+            length, kind = self._HEADER.unpack_from(buffer, start)
+            end = start + header_size + length
+            if end > size:
+                break  # torn write at the end of the file
+            if kind == self._KIND_MARKER:
+                yield Record(start, end, Marker.from_json(buffer[start + header_size : end]))
+            else:
+                yield Record(start, end, None)
+            start = end
+
+    def decode_message(self, data: bytes) -> Message:
+        _, kind = self._HEADER.unpack_from(data)
+        payload = data[self._HEADER.size :]
+        if kind == self._KIND_MESSAGE_ZLIB:
+            payload = zlib.decompress(payload)
+        return Message.model_validate(_resolve_blobs(json.loads(payload), self._blobs_dir))
+
+    def persist(self, *, fsync: bool) -> None:
+        with self._pending_lock:
+            blobs, self._pending_blobs = self._pending_blobs, {}
+        if not blobs:
+            return
+        self._blobs_dir.mkdir(parents=True, exist_ok=True)
+        for digest, text in blobs.items():
+            path = self._blobs_dir / digest
+            if path.exists():
+                continue
+            tmp_path = path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(zlib.compress(text.encode("utf-8")))
+                if fsync:
+                    os.fsync(f.fileno())
+            tmp_path.replace(path)
+
+
+def _extract_blobs(value: Any, min_size: int, blobs: dict[str, str]) -> Any:
+    match value:
+        case str() if len(value) >= min_size:
+            digest = sha256(value.encode("utf-8")).hexdigest()
+            blobs[digest] = value
+            return {"$blob": digest}
+        case dict():
+            return {k: _extract_blobs(v, min_size, blobs) for k, v in value.items()}  # pyright: ignore[reportUnknownVariableType]
+        case list():
+            return [_extract_blobs(v, min_size, blobs) for v in value]  # pyright: ignore[reportUnknownVariableType]
+        case _:
+            return value
+
+
+def _resolve_blobs(value: Any, blobs_dir: Path) -> Any:
+    match value:
+        case {"$blob": str(digest)} if len(value) == 1:  # pyright: ignore[reportUnknownArgumentType]
+            return _read_blob(blobs_dir / digest)
+        case dict():
+            return {k: _resolve_blobs(v, blobs_dir) for k, v in value.items()}  # pyright: ignore[reportUnknownVariableType]
+        case list():
+            return [_resolve_blobs(v, blobs_dir) for v in value]  # pyright: ignore[reportUnknownVariableType]
+        case _:
+            return value
+
+
+@lru_cache(maxsize=32)
+def _read_blob(path: Path) -> str:
+    # blobs are content-addressed, so they never change once written
+    return zlib.decompress(path.read_bytes()).decode("utf-8")
+
+
+_SUFFIXES: dict[HistoryFormat, str] = {
+    "jsonl": JSONLStorage.suffix,
+    "packed": PackedStorage.suffix,
+}
+
+
+def get_history_storage(path: Path) -> HistoryStorage:
+    """Get the storage for a history file, by its suffix."""
+    if path.suffix == PackedStorage.suffix:
+        return PackedStorage(path.parent / "blobs")
+    return JSONLStorage()
+
+
+def get_history_file(path: Path, history_format: HistoryFormat) -> Path:
+    """
+    Get the history file for `path` in the given format.
+    An existing, non-empty history file in any format takes precedence, so that sessions
+    keep the format they were created with.
+    """
+    for suffix in _SUFFIXES.values():
+        candidate = path.with_suffix(suffix)
+        if candidate.exists() and candidate.stat().st_size > 0:
+            return candidate
+    return path.with_suffix(_SUFFIXES[history_format])
+
+
+def iter_history_records(path: Path) -> Iterator[Message | Marker]:
+    """Read all records of a history file in order, whatever its format."""
+    storage = get_history_storage(path)
+    buffer = path.read_bytes()
+    for record in storage.scan(buffer):
+        if record.marker is not None:
+            yield record.marker
+        else:
+            yield storage.decode_message(buffer[record.start : record.end])
+
+
+def convert_history(src: Path, dst: Path) -> int:
+    """
+    Convert a history file to the format given by the suffix of `dst`.
+
+    Returns:
+        int: The number of records converted.
+    """
+    storage = get_history_storage(dst)
+    n_records = 0
+    with open(dst, "wb") as f:
+        for record in iter_history_records(src):
+            if isinstance(record, Marker):
+                data = storage.encode_marker(record)
+            else:
+                data = storage.encode_message(record)
+            storage.persist(fsync=False)
+            f.write(data)
+            n_records += 1
+    return n_records
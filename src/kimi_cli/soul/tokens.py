@@ -0,0 +1,97 @@
+import math
+from collections.abc import Sequence
+
+from kosong.message import AudioURLPart, ImageURLPart, Message, TextPart, ThinkPart
+
+from kimi_cli.utils.logging import logger
+
+
+class TokenEstimator:
+    """
+    Estimate the token count of messages locally, from the UTF-8 size of their content.
+
+    How many bytes make a token depends on the tokenizer of the model and on the language of the
+    content, so the ratio starts from a conservative default and is calibrated against the real
+    usage reported by the LLM.
+    """
+
+    DEFAULT_BYTES_PER_TOKEN = 3.5
+    MIN_BYTES_PER_TOKEN = 1.0
+    MAX_BYTES_PER_TOKEN = 8.0
+    MESSAGE_OVERHEAD = 4
+    """Tokens taken by the role and the separators of a message."""
+    MEDIA_TOKENS = 1024
+    """Tokens assumed for an image or audio part, whose size says little about its cost."""
+    CALIBRATION_MIN_BYTES = 1024
+    """Samples with less text than this are too noisy to calibrate against."""
+    SMOOTHING = 0.5
+    """Weight of a new sample in the moving average of the ratio."""
+
+    def __init__(self, bytes_per_token: float = DEFAULT_BYTES_PER_TOKEN):
+        self._bytes_per_token = bytes_per_token
+
+    @property
+    def bytes_per_token(self) -> float:
+        return self._bytes_per_token
+
+    def estimate(self, messages: Sequence[Message]) -> int:
+        """Estimate the number of tokens the messages add to a request."""
+        n_bytes, n_fixed_tokens = _measure(messages)
+        return n_fixed_tokens + self.estimate_bytes(n_bytes)
+
+    def estimate_bytes(self, n_bytes: int) -> int:
+        """Estimate the number of tokens of `n_bytes` bytes of text."""
+        return math.ceil(n_bytes / self._bytes_per_token)
+
+    def calibrate(self, messages: Sequence[Message], n_tokens: int):
+        """
+        Adjust the ratio to the real number of tokens the messages took.
+
+        Args:
+            messages (Sequence[Message]): Messages added to the context between two usages.
+            n_tokens (int): The difference between the two usages.
+        """
+        n_bytes, n_fixed_tokens = _measure(messages)
+        n_text_tokens = n_tokens - n_fixed_tokens
+        if n_bytes < self.CALIBRATION_MIN_BYTES or n_text_tokens <= 0:
+            return
+        observed = min(
+            max(n_bytes / n_text_tokens, self.MIN_BYTES_PER_TOKEN), self.MAX_BYTES_PER_TOKEN
+        )
+        self._bytes_per_token += (observed - self._bytes_per_token) * self.SMOOTHING
+        logger.debug(
+            "Calibrated token estimator: observed {observed:.2f}, now {ratio:.2f} bytes per token",
+            observed=observed,
+            ratio=self._bytes_per_token,
+        )
+
+
+def _measure(messages: Sequence[Message]) -> tuple[int, int]:
+    """Get the bytes of text and the fixed tokens of the messages."""
+    n_bytes = 0
+    n_fixed_tokens = 0
+    for message in messages:
+        n_fixed_tokens += TokenEstimator.MESSAGE_OVERHEAD
+        if isinstance(message.content, str):
+            n_bytes += _utf8_size(message.content)
+        else:
+            for part in message.content:
+                match part:
+                    case TextPart(text=text):
+                        n_bytes += _utf8_size(text)
+                    case ThinkPart(think=think, encrypted=encrypted):
+                        n_bytes += _utf8_size(think) + len(encrypted or "")
+                    case ImageURLPart() | AudioURLPart():
+                        n_fixed_tokens += TokenEstimator.MEDIA_TOKENS
+                    case _:
+                        n_bytes += len(part.model_dump_json())
+        for tool_call in message.tool_calls or []:
+            n_bytes += _utf8_size(tool_call.function.name)
+            n_bytes += _utf8_size(tool_call.function.arguments or "")
+    return n_bytes, n_fixed_tokens
+
+
+def _utf8_size(text: str) -> int:
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-8"))
@@ -1,9 +1,21 @@
+import asyncio
+import json
+import os
+import stat
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
 from contextvars import ContextVar
-from typing import override
+from pathlib import Path
+from typing import Any, NamedTuple, Protocol, Self, override, runtime_checkable
 
 from kosong.message import ToolCall
-from kosong.tooling import HandleResult
-from kosong.tooling.simple import SimpleToolset
+from kosong.tooling import CallableTool2, HandleResult, ToolOk, ToolResult
+from kosong.tooling.error import ToolParseError, ToolRuntimeError
+from kosong.tooling.simple import SimpleToolset, ToolType
+from pydantic import ValidationError
+
+from kimi_cli.utils.logging import logger
 
 current_tool_call = ContextVar[ToolCall | None]("current_tool_call", default=None)
 
@@ -16,11 +28,227 @@ def get_current_tool_call_or_none() -> ToolCall | None:
     return current_tool_call.get()
 
 
+@runtime_checkable
+class PureTool(Protocol):
+    """
+    A tool whose result only depends on its parameters and on the files and directories it
+    reads, so that its results can be cached.
+    """
+
+    def cache_paths(self, params: Any) -> Sequence[Path] | None:
+        """The files and directories the result depends on, or `None` not to cache the call."""
+        ...
+
+
+type _Fingerprint = tuple[tuple[int, int, int, bool] | None, ...]
+"""Inode, size, mtime and whether it is a directory, of each path, or `None` if missing."""
+
+
+class _CacheEntry(NamedTuple):
+    fingerprint: _Fingerprint
+    result: ToolOk
+    created_at: float
+    elapsed: float
+    """Seconds the tool took to produce the result."""
+
+
+class ToolResultCacheStats(NamedTuple):
+    hits: int
+    misses: int
+    invalidations: int
+    saved_seconds: float
+    """Time the cached calls took when they were run."""
+    saved_chars: int
+    """Characters of output served from the cache."""
+
+
+class ToolResultCache:
+    """
+    Results of pure tools, shared by the toolsets of a session.
+
+    An entry is reused while the stat fingerprint of the paths it depends on is unchanged. A
+    directory's fingerprint only changes with its direct entries, so entries that depend on a
+    directory also expire after `MAX_DIRECTORY_AGE` seconds. Any call to a tool that is not pure
+    may write files and invalidates the whole cache.
+    """
+
+    MAX_ENTRIES = 256
+    MAX_DIRECTORY_AGE = 30.0
+
+    def __init__(self):
+        self._entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+        self._generation = 0
+        self._n_writing = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._saved_seconds = 0.0
+        self._saved_chars = 0
+
+    @property
+    def stats(self) -> ToolResultCacheStats:
+        return ToolResultCacheStats(
+            self._hits, self._misses, self._invalidations, self._saved_seconds, self._saved_chars
+        )
+
+    @property
+    def generation(self) -> int:
+        """Incremented on every invalidation."""
+        return self._generation
+
+    def get(self, key: tuple[str, str], fingerprint: _Fingerprint) -> ToolOk | None:
+        entry = self._entries.get(key)
+        if (
+            entry is None
+            or self._n_writing > 0
+            or entry.fingerprint != fingerprint
+            or (
+                any(path_stat is not None and path_stat[3] for path_stat in fingerprint)
+                and time.monotonic() - entry.created_at > self.MAX_DIRECTORY_AGE
+            )
+        ):
+            self._misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._hits += 1
+        self._saved_seconds += entry.elapsed
+        if isinstance(entry.result.output, str):
+            self._saved_chars += len(entry.result.output)
+        logger.debug(
+            "Tool result cache hit for {tool}, {hits} hits and {misses} misses so far, "
+            "{saved:.3f}s saved",
+            tool=key[0],
+            hits=self._hits,
+            misses=self._misses,
+            saved=self._saved_seconds,
+        )
+        return entry.result
+
+    def put(
+        self,
+        key: tuple[str, str],
+        fingerprint: _Fingerprint,
+        result: ToolOk,
+        *,
+        generation: int,
+        elapsed: float,
+    ):
+        """Store a result, unless the cache was invalidated since the call started."""
+        if generation != self._generation or self._n_writing > 0:
+            return
+        self._entries[key] = _CacheEntry(fingerprint, result, time.monotonic(), elapsed)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def begin_write(self):
+        """Invalidate the cache and stop using it until the matching `end_write`."""
+        self._n_writing += 1
+        self._invalidate()
+
+    def end_write(self):
+        self._n_writing -= 1
+        self._invalidate()
+
+    def _invalidate(self):
+        self._generation += 1
+        if self._entries:
+            self._invalidations += 1
+            self._entries.clear()
+
+
+def _fingerprint(paths: Iterable[Path]) -> _Fingerprint:
+    stats: list[tuple[int, int, int, bool] | None] = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            stats.append(None)
+            continue
+        stats.append((st.st_ino, st.st_size, st.st_mtime_ns, stat.S_ISDIR(st.st_mode)))
+    return tuple(stats)
+
+
 class CustomToolset(SimpleToolset):
+    def __init__(
+        self,
+        tools: Iterable[ToolType] | None = None,
+        *,
+        result_cache: ToolResultCache | None = None,
+    ):
+        super().__init__(tools)
+        self._result_cache = result_cache
+
+    @property
+    def result_cache(self) -> ToolResultCache | None:
+        return self._result_cache
+
+    def __isub__(self, tool: ToolType) -> Self:
+        """Remove a tool from the toolset, unless another tool has replaced it since."""
+        if self._tool_dict.get(tool.name) is tool:
+            del self._tool_dict[tool.name]
+        return self
+
     @override
     def handle(self, tool_call: ToolCall) -> HandleResult:
         token = current_tool_call.set(tool_call)
         try:
-            return super().handle(tool_call)
+            cache = self._result_cache
+            tool = self._tool_dict.get(tool_call.function.name)
+            if cache is None or tool is None:
+                return super().handle(tool_call)
+            if isinstance(tool, CallableTool2) and isinstance(tool, PureTool):
+                return asyncio.create_task(self._call_pure(cache, tool, tool_call))
+
+            # any other tool may write files
+            cache.begin_write()
+            result = super().handle(tool_call)
+            if isinstance(result, ToolResult):
+                cache.end_write()
+            else:
+                result.add_done_callback(lambda _: cache.end_write())
+            return result
         finally:
             current_tool_call.reset(token)
+
+    async def _call_pure(
+        self, cache: ToolResultCache, tool: CallableTool2[Any], tool_call: ToolCall
+    ) -> ToolResult:
+        try:
+            arguments = json.loads(tool_call.function.arguments or "{}")
+        except json.JSONDecodeError as e:
+            return ToolResult(tool_call.id, ToolParseError(str(e)))
+
+        try:
+            params = tool.params.model_validate(arguments)
+        except ValidationError:
+            # let the tool report the error
+            return await self._call(tool, tool_call.id, arguments)
+        assert isinstance(tool, PureTool)
+        if (paths := tool.cache_paths(params)) is None:
+            return await self._call(tool, tool_call.id, arguments)
+
+        key = (tool.name, params.model_dump_json())
+        fingerprint = _fingerprint(paths)
+        if (cached := cache.get(key, fingerprint)) is not None:
+            return ToolResult(tool_call.id, cached)
+
+        generation = cache.generation
+        start = time.perf_counter()
+        result = await self._call(tool, tool_call.id, arguments)
+        if isinstance(result.result, ToolOk):
+            cache.put(
+                key,
+                fingerprint,
+                result.result,
+                generation=generation,
+                elapsed=time.perf_counter() - start,
+            )
+        return result
+
+    @staticmethod
+    async def _call(tool: CallableTool2[Any], tool_call_id: str, arguments: Any) -> ToolResult:
+        try:
+            return ToolResult(tool_call_id, await tool.call(arguments))
+        except Exception as e:
+            return ToolResult(tool_call_id, ToolRuntimeError(str(e)))
@@ -8,9 +8,17 @@ from kosong.tooling import CallableTool2, ToolReturnType
 from pydantic import BaseModel, Field
 
 from kimi_cli.soul.approval import Approval
-from kimi_cli.tools.utils import ToolRejectedError, ToolResultBuilder, load_desc
+from kimi_cli.tools.bash.worker import ShellWorkerPool
+from kimi_cli.tools.utils import (
+    ToolOutputStreamer,
+    ToolRejectedError,
+    ToolResultBuilder,
+    load_desc,
+)
+from kimi_cli.utils.logging import logger
 
 MAX_TIMEOUT = 5 * 60
+_DISCARD_CHUNK_SIZE = 1 << 16
 
 
 class Params(BaseModel):
@@ -28,16 +36,33 @@ class Params(BaseModel):
 
 _NAME = "CMD" if platform.system() == "Windows" else "Bash"
 _DESC_FILE = "cmd.md" if platform.system() == "Windows" else "bash.md"
+_FRESH_SHELL = (
+    "Each shell tool call will be executed in a fresh shell environment. The shell variables, "
+    "current working directory changes, and the shell history is not preserved between calls."
+)
+_WARM_SHELL = (
+    "Shell tool calls are usually executed in the same shell, so the shell variables and "
+    "current working directory changes of a call are kept for the next one. Do not rely on it: "
+    "a call may run in another shell, e.g. when several calls run at the same time."
+)
 
 
 class Bash(CallableTool2[Params]):
     name: str = _NAME
-    description: str = load_desc(Path(__file__).parent / _DESC_FILE, {})
+    description: str = load_desc(Path(__file__).parent / _DESC_FILE, {"SHELL_STATE": _FRESH_SHELL})
     params: type[Params] = Params
 
-    def __init__(self, approval: Approval, **kwargs: Any):
+    def __init__(
+        self, approval: Approval, shell_pool: ShellWorkerPool | None = None, **kwargs: Any
+    ):
+        if shell_pool is not None:
+            kwargs.setdefault(
+                "description",
+                load_desc(Path(__file__).parent / _DESC_FILE, {"SHELL_STATE": _WARM_SHELL}),
+            )
         super().__init__(**kwargs)
         self._approval = approval
+        self._shell_pool = shell_pool
 
     @override
     async def __call__(self, params: Params) -> ToolReturnType:
@@ -50,18 +75,16 @@ class Bash(CallableTool2[Params]):
         ):
             return ToolRejectedError()
 
-        def stdout_cb(line: bytes):
-            line_str = line.decode(encoding="utf-8", errors="replace")
-            builder.write(line_str)
+        streamer = ToolOutputStreamer()
 
-        def stderr_cb(line: bytes):
+        def output_cb(line: bytes) -> bool:
             line_str = line.decode(encoding="utf-8", errors="replace")
             builder.write(line_str)
+            streamer.write(line_str)
+            return not builder.is_full
 
         try:
-            exitcode = await _stream_subprocess(
-                params.command, stdout_cb, stderr_cb, params.timeout
-            )
+            exitcode = await self._run(params.command, output_cb, params.timeout)
 
             if exitcode == 0:
                 return builder.ok("Command executed successfully.")
@@ -75,21 +98,53 @@ class Bash(CallableTool2[Params]):
                 f"Command killed by timeout ({params.timeout}s)",
                 brief=f"Killed by timeout ({params.timeout}s)",
             )
+        finally:
+            streamer.close()
+
+    async def _run(self, command: str, output_cb: Callable[[bytes], bool], timeout: int) -> int:
+        worker = await self._shell_pool.acquire() if self._shell_pool is not None else None
+        if worker is None:
+            return await _stream_subprocess(command, output_cb, output_cb, timeout)
+        assert self._shell_pool is not None
+        try:
+            return await worker.run(command, output_cb, output_cb, timeout)
+        except ConnectionError as e:
+            # the worker died while idle
+            logger.warning(
+                "Shell worker is gone, running the command in a new shell: {error}", error=e
+            )
+            worker.kill()
+            return await _stream_subprocess(command, output_cb, output_cb, timeout)
+        finally:
+            self._shell_pool.release(worker)
 
 
 async def _stream_subprocess(
     command: str,
-    stdout_cb: Callable[[bytes], None],
-    stderr_cb: Callable[[bytes], None],
+    stdout_cb: Callable[[bytes], bool],
+    stderr_cb: Callable[[bytes], bool],
     timeout: int,
 ) -> int:
-    async def _read_stream(stream: asyncio.StreamReader, cb: Callable[[bytes], None]):
+    """
+    Run a shell command, feeding its output line by line to the callbacks.
+    Once a callback returns False, the rest of that stream is read and dropped without decoding.
+    """
+
+    async def _read_stream(stream: asyncio.StreamReader, cb: Callable[[bytes], bool]):
         while True:
-            line = await stream.readline()
-            if line:
-                cb(line)
-            else:
+            try:
+                line = await stream.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                # a line longer than the buffer limit, pass it on in pieces
+                line = await stream.read(e.consumed)
+            if not line:
+                return
+            if not cb(line):
                 break
+        while await stream.read(_DISCARD_CHUNK_SIZE):
+            pass
 
     # FIXME: if the event loop is cancelled, an exception may be raised when the process finishes
     process = await asyncio.create_subprocess_shell(
@@ -110,4 +165,5 @@ async def _stream_subprocess(
         return await process.wait()
     except TimeoutError:
         process.kill()
+        await process.wait()
         raise
@@ -0,0 +1,230 @@
+import asyncio
+import contextlib
+import os
+import shutil
+import signal
+import uuid
+from collections.abc import Callable
+
+from kimi_cli.utils.logging import logger
+
+_STREAM_LIMIT = 1 << 16
+_DISCARD_CHUNK_SIZE = 1 << 16
+
+# Reads a command up to a line with the sentinel, evaluates it, then writes the sentinel along
+# with the exit code to the original stdout, and the sentinel alone to the original stderr, so
+# that the end of the output of the command is known on both streams.
+_WORKER_SCRIPT = r"""
+readonly __kimi_sentinel=$1
+exec 8>&1 9>&2
+while :; do
+    __kimi_command=
+    __kimi_ready=
+    while IFS= builtin read -r __kimi_line; do
+        if [[ $__kimi_line == "$__kimi_sentinel" ]]; then
+            __kimi_ready=1
+            break
+        fi
+        __kimi_command+=$__kimi_line$'\n'
+    done
+    [[ -n $__kimi_ready ]] || exit 0
+    eval "$__kimi_command" </dev/null
+    builtin printf '%s %d\n' "$__kimi_sentinel" "$?" >&8
+    builtin printf '%s\n' "$__kimi_sentinel" >&9
+done
+"""
+
+
+class ShellWorker:
+    """
+    A bash process that runs commands one after another, so that running a command costs neither
+    spawning a shell nor setting up its pipes. The working directory, variables and functions
+    of a command are kept for the next one, like in an interactive shell.
+
+    A worker whose command timed out, was cancelled or exited the shell is dead, see `alive`.
+    """
+
+    def __init__(self, process: asyncio.subprocess.Process, sentinel: bytes):
+        self._process = process
+        self._sentinel = sentinel
+        self._killed = False
+
+    @staticmethod
+    async def start(shell: str) -> "ShellWorker":
+        sentinel = f"__kimi_done_{uuid.uuid4().hex}__"
+        process = await asyncio.create_subprocess_exec(
+            shell,
+            "--noprofile",
+            "--norc",
+            "-c",
+            _WORKER_SCRIPT,
+            "kimi-shell",
+            sentinel,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            limit=_STREAM_LIMIT,
+            # the commands and their children share the process group of the worker,
+            # so that all of them are killed along with it
+            start_new_session=True,
+        )
+        return ShellWorker(process, sentinel.encode())
+
+    @property
+    def alive(self) -> bool:
+        return not self._killed and self._process.returncode is None
+
+    async def run(
+        self,
+        command: str,
+        stdout_cb: Callable[[bytes], bool],
+        stderr_cb: Callable[[bytes], bool],
+        timeout: float,
+    ) -> int:
+        """
+        Run a command, feeding its output line by line to the callbacks, and return its exit code.
+        Once a callback returns False, the rest of that stream is read and dropped.
+
+        Raises:
+            TimeoutError: If the command does not finish in time. The worker is killed.
+            ConnectionError: If the worker died before the command was sent.
+        """
+        process = self._process
+        assert process.stdin is not None, "stdin is None"
+        assert process.stdout is not None, "stdout is None"
+        assert process.stderr is not None, "stderr is None"
+
+        process.stdin.write(command.encode("utf-8") + b"\n" + self._sentinel + b"\n")
+        await process.stdin.drain()
+
+        try:
+            exitcode, _ = await asyncio.wait_for(
+                asyncio.gather(
+                    self._read_stream(process.stdout, stdout_cb, with_exitcode=True),
+                    self._read_stream(process.stderr, stderr_cb, with_exitcode=False),
+                ),
+                timeout,
+            )
+        except TimeoutError:
+            # the command may still be running, and its output would mix with the next one's
+            self.kill()
+            await process.wait()
+            raise
+        except BaseException:
+            self.kill()
+            raise
+        if exitcode is None:
+            # the command exited the shell
+            return await process.wait()
+        return exitcode
+
+    async def _read_stream(
+        self, stream: asyncio.StreamReader, cb: Callable[[bytes], bool], *, with_exitcode: bool
+    ) -> int | None:
+        """Read the output of the current command up to the sentinel, `None` if there is none."""
+        while True:
+            try:
+                line = await stream.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                line = e.partial
+            except asyncio.LimitOverrunError as e:
+                # a line longer than the buffer limit, pass it on in pieces, but keep its end
+                # in the buffer as it may contain the sentinel
+                line = await stream.readexactly(max(e.consumed - len(self._sentinel), 1))
+            if not line:
+                return None
+            end = line.rfind(self._sentinel) if line.endswith(b"\n") else -1
+            if end >= 0:
+                if end > 0:
+                    cb(line[:end])
+                return int(line[end + len(self._sentinel) :]) if with_exitcode else 0
+            if not cb(line):
+                break
+
+        # drop the rest of the output in chunks, without splitting it into lines
+        pending = b""
+        while chunk := await stream.read(_DISCARD_CHUNK_SIZE):
+            pending += chunk
+            start = pending.find(self._sentinel)
+            if start < 0:
+                pending = pending[-len(self._sentinel) :]
+                continue
+            pending = pending[start:]
+            if (end := pending.find(b"\n")) >= 0:
+                return int(pending[len(self._sentinel) : end]) if with_exitcode else 0
+        return None
+
+    def kill(self):
+        if not self.alive:
+            return
+        self._killed = True
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(self._process.pid, signal.SIGKILL)
+
+    async def close(self):
+        if self._process.stdin is not None:
+            self._process.stdin.close()
+        self.kill()
+        await self._process.wait()
+
+
+class ShellWorkerPool:
+    """
+    Warm shell workers shared by the Bash tools of a runtime.
+
+    A command is run by the idle worker that was used last, so that consecutive commands of an
+    agent usually share the state of one shell. Commands running at the same time get different
+    workers, started on demand up to `max_workers`. When none is available, or bash is not
+    installed, `acquire` returns `None` and the command is expected to run in a new shell.
+    Dead workers are dropped and replaced by new ones when needed.
+    """
+
+    def __init__(self, max_workers: int = 4, shell: str = "bash"):
+        self._max_workers = max_workers
+        self._shell = shutil.which(shell)
+        self._idle: list[ShellWorker] = []
+        self._workers: set[ShellWorker] = set()
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def acquire(self) -> ShellWorker | None:
+        if self._shell is None:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # the workers of a previous event loop cannot be used anymore
+            for worker in self._workers:
+                worker.kill()
+            self._idle.clear()
+            self._workers.clear()
+            self._loop = loop
+
+        while self._idle:
+            worker = self._idle.pop()
+            if worker.alive:
+                return worker
+            self._workers.discard(worker)
+        self._workers = {worker for worker in self._workers if worker.alive}
+        if len(self._workers) >= self._max_workers:
+            return None
+        try:
+            worker = await ShellWorker.start(self._shell)
+        except OSError as e:
+            logger.warning("Failed to start a shell worker: {error}", error=e)
+            return None
+        self._workers.add(worker)
+        return worker
+
+    def release(self, worker: ShellWorker):
+        if worker.alive and worker in self._workers:
+            self._idle.append(worker)
+        else:
+            self._workers.discard(worker)
+
+    async def close(self):
+        workers, self._workers = self._workers, set()
+        self._idle.clear()
+        if self._loop is not asyncio.get_running_loop():
+            for worker in workers:
+                worker.kill()
+            return
+        await asyncio.gather(*(worker.close() for worker in workers))
@@ -1,17 +1,24 @@
 """Glob tool implementation."""
 
 import asyncio
+import fnmatch
+import os
+import re
+from collections.abc import Iterator
 from pathlib import Path
-from typing import Any, override
+from typing import Any, NamedTuple, override
 
-import aiofiles.os
 from kosong.tooling import CallableTool2, ToolError, ToolOk, ToolReturnType
 from pydantic import BaseModel, Field
 
 from kimi_cli.soul.runtime import BuiltinSystemPromptArgs
 from kimi_cli.tools.utils import load_desc
+from kimi_cli.utils.gitignore import GitIgnore
+from kimi_cli.utils.path import is_ignored_name
 
 MAX_MATCHES = 1000
+MAX_SCANNED_ENTRIES = 100_000
+"""Files and directories scanned before giving up, the total is then only a lower bound."""
 
 
 class Params(BaseModel):
@@ -34,6 +41,7 @@ class Glob(CallableTool2[Params]):
         Path(__file__).parent / "glob.md",
         {
             "MAX_MATCHES": str(MAX_MATCHES),
+            "MAX_SCANNED_ENTRIES": str(MAX_SCANNED_ENTRIES),
         },
     )
     params: type[Params] = Params
@@ -42,21 +50,27 @@ class Glob(CallableTool2[Params]):
         super().__init__(**kwargs)
         self._work_dir = builtin_args.KIMI_WORK_DIR
 
-    async def _validate_pattern(self, pattern: str) -> ToolError | None:
-        """Validate that the pattern is safe to use."""
-        if pattern.startswith("**"):
-            # TODO: give a `ls -la` result as the output
-            ls_result = await aiofiles.os.listdir(self._work_dir)
+    def cache_paths(self, params: Params) -> list[Path] | None:
+        dir_path = Path(params.directory) if params.directory else self._work_dir
+        return [dir_path] if dir_path.is_absolute() else None
+
+    def _validate_pattern(self, pattern: str) -> ToolError | None:
+        """Validate that the pattern is relative to the directory to search."""
+        if os.path.isabs(pattern) or pattern.startswith(("/", "\\")):
+            return ToolError(
+                message=(
+                    f"Pattern `{pattern}` is an absolute path. Patterns must be relative, "
+                    "use `directory` to choose where to search."
+                ),
+                brief="Invalid pattern",
+            )
+        if ".." in re.split(r"[/\\]", pattern):
             return ToolError(
-                output="\n".join(ls_result),
                 message=(
-                    f"Pattern `{pattern}` starts with '**' which is not allowed. "
-                    "This would recursively search all directories and may include large "
-                    "directories like `node_modules`. Use more specific patterns instead. "
-                    "For your convenience, a list of all files and directories in the "
-                    "top level of the working directory is provided below."
+                    f"Pattern `{pattern}` contains `..`. Use `directory` to choose where to "
+                    "search instead."
                 ),
-                brief="Unsafe pattern",
+                brief="Invalid pattern",
             )
         return None
 
@@ -80,7 +94,7 @@ class Glob(CallableTool2[Params]):
     async def __call__(self, params: Params) -> ToolReturnType:
         try:
             # Validate pattern safety
-            pattern_error = await self._validate_pattern(params.pattern)
+            pattern_error = self._validate_pattern(params.pattern)
             if pattern_error:
                 return pattern_error
 
@@ -111,39 +125,243 @@ class Glob(CallableTool2[Params]):
                     brief="Invalid directory",
                 )
 
-            def _glob(pattern: str) -> list[Path]:
-                return list(dir_path.glob(pattern))
-
-            # Perform the glob search - users can use ** directly in pattern
-            matches = await asyncio.to_thread(_glob, params.pattern)
-
-            # Filter out directories if not requested
-            if not params.include_dirs:
-                matches = [p for p in matches if p.is_file()]
-
-            # Sort for consistent output
-            matches.sort()
-
-            # Limit matches
-            message = (
-                f"Found {len(matches)} matches for pattern `{params.pattern}`."
-                if len(matches) > 0
-                else f"No matches found for pattern `{params.pattern}`."
+            result = await asyncio.to_thread(
+                _glob, dir_path, params.pattern, params.include_dirs, self._work_dir
             )
-            if len(matches) > MAX_MATCHES:
-                matches = matches[:MAX_MATCHES]
+
+            if not result.matches:
+                message = f"No matches found for pattern `{params.pattern}`."
+            elif result.complete:
+                message = f"Found {result.n_matches} matches for pattern `{params.pattern}`."
+            else:
+                message = (
+                    f"Found at least {result.n_matches} matches for pattern `{params.pattern}`."
+                )
+            if result.n_matches > MAX_MATCHES:
                 message += (
                     f" Only the first {MAX_MATCHES} matches are returned. "
                     "You may want to use a more specific pattern."
                 )
+            if not result.complete:
+                message += (
+                    f" The search stopped after scanning {MAX_SCANNED_ENTRIES} files and "
+                    "directories, narrow down the pattern or the directory to search the rest."
+                )
 
-            return ToolOk(
-                output="\n".join(str(p.relative_to(dir_path)) for p in matches),
-                message=message,
-            )
+            return ToolOk(output="\n".join(result.matches), message=message)
 
         except Exception as e:
             return ToolError(
                 message=f"Failed to search for pattern {params.pattern}. Error: {e}",
                 brief="Glob failed",
             )
+
+
+class _GlobResult(NamedTuple):
+    matches: list[str]
+    """The first `MAX_MATCHES` matches, relative to the searched directory and sorted."""
+    n_matches: int
+    complete: bool
+    """Whether the whole tree was scanned, otherwise `n_matches` is only a lower bound."""
+
+
+_RECURSIVE = "**"
+_MAGIC_CHARS = re.compile(r"[*?[]")
+_SEPARATORS = re.compile(r"[/\\]" if os.name == "nt" else "/")
+
+type _Segment = str | re.Pattern[str]
+"""A literal name, `_RECURSIVE`, or a compiled wildcard."""
+type _State = tuple[int, int]
+"""Index of a pattern and of its next segment to match."""
+type _Frame = tuple[Iterator[os.DirEntry[str]], frozenset[_State], tuple[GitIgnore, ...]]
+"""Remaining entries of a directory, with the states and `.gitignore` rules applying to them."""
+
+
+def _expand_braces(pattern: str) -> list[str]:
+    """Expand `{a,b}` alternatives, which `fnmatch` does not support."""
+    depth = 0
+    start = 0
+    for i, c in enumerate(pattern):
+        if c == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif c == "}" and depth > 0:
+            depth -= 1
+            if depth > 0:
+                continue
+            options: list[str] = []
+            option_start = start + 1
+            nested = 0
+            for j in range(start + 1, i):
+                if pattern[j] == "{":
+                    nested += 1
+                elif pattern[j] == "}":
+                    nested -= 1
+                elif pattern[j] == "," and nested == 0:
+                    options.append(pattern[option_start:j])
+                    option_start = j + 1
+            if not options:
+                # a lone `{name}` is literal
+                return [pattern[: i + 1] + rest for rest in _expand_braces(pattern[i + 1 :])]
+            options.append(pattern[option_start:i])
+            return [
+                expanded
+                for option in options
+                for expanded in _expand_braces(pattern[:start] + option + pattern[i + 1 :])
+            ]
+    return [pattern]
+
+
+def _compile_pattern(pattern: str) -> list[_Segment]:
+    segments: list[_Segment] = []
+    for part in _SEPARATORS.split(pattern):
+        if part in ("", "."):
+            continue
+        if part == _RECURSIVE:
+            if not segments or segments[-1] != _RECURSIVE:
+                segments.append(part)
+        elif _MAGIC_CHARS.search(part):
+            flags = re.IGNORECASE if os.name == "nt" else 0
+            segments.append(re.compile(fnmatch.translate(part), flags))
+        else:
+            segments.append(part)
+    return segments
+
+
+def _is_ignored(
+    entry: os.DirEntry[str], gitignores: tuple[GitIgnore, ...], sep_is_slash: bool
+) -> bool:
+    if is_ignored_name(entry.name):
+        return True
+    is_dir = entry.is_dir(follow_symlinks=False)
+    # the rules of deeper `.gitignore` files take precedence
+    for gitignore in reversed(gitignores):
+        rel_path = entry.path[len(gitignore.base) + 1 :]
+        if not sep_is_slash:
+            rel_path = rel_path.replace(os.sep, "/")
+        ignored = gitignore.match(rel_path, is_dir)
+        if ignored is not None:
+            return ignored
+    return False
+
+
+def _glob(root: Path, pattern: str, include_dirs: bool, work_dir: Path) -> _GlobResult:
+    """
+    Walk `root` with `os.scandir`, in sorted order, descending only into directories that can
+    still match the pattern.
+
+    Entries ignored by `.gitignore` files or by `is_ignored_name` are pruned from what `**`
+    walks into, but never when a segment of the pattern other than `**` matches them. Matching
+    stops at `MAX_SCANNED_ENTRIES` scanned entries.
+    """
+    patterns = [_compile_pattern(p) for p in _expand_braces(pattern)]
+    sep_is_slash = os.sep == "/"
+    root_str = os.path.join(root, "")
+
+    def close(states: set[_State]) -> frozenset[_State]:
+        # `**` also matches zero directories
+        closed = set(states)
+        for index, position in states:
+            segments = patterns[index]
+            while position < len(segments) and segments[position] == _RECURSIVE:
+                position += 1
+                closed.add((index, position))
+        return frozenset(
+            (index, position) for index, position in closed if position < len(patterns[index])
+        )
+
+    gitignores: list[GitIgnore] = []
+    if root.is_relative_to(work_dir):
+        ancestor = work_dir
+        for part in (None, *root.relative_to(work_dir).parts[:-1]):
+            if part is not None:
+                ancestor = ancestor / part
+            if ancestor != root and (gitignore := GitIgnore.load(str(ancestor))):
+                gitignores.append(gitignore)
+
+    matches: list[str] = []
+    n_matches = 0
+    n_scanned = 0
+
+    def scan(directory: str) -> list[os.DirEntry[str]] | None:
+        nonlocal n_scanned
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            return []
+        n_scanned += len(entries)
+        return entries if n_scanned <= MAX_SCANNED_ENTRIES else None
+
+    def enter(
+        directory: str, states: frozenset[_State], parents: tuple[GitIgnore, ...]
+    ) -> _Frame | None:
+        entries = scan(directory)
+        if entries is None:
+            return None
+        if any(entry.name == ".gitignore" for entry in entries) and (
+            gitignore := GitIgnore.load(directory)
+        ):
+            parents = (*parents, gitignore)
+        return iter(entries), states, parents
+
+    first = enter(
+        str(root), close({(index, 0) for index in range(len(patterns))}), tuple(gitignores)
+    )
+    if first is None:
+        return _GlobResult(matches, n_matches, complete=False)
+    stack: list[_Frame] = [first]
+    while stack:
+        entries, states, parents = stack[-1]
+        entry = next(entries, None)
+        if entry is None:
+            stack.pop()
+            continue
+
+        name = entry.name
+        matched = False
+        explicit = False
+        child_states: set[_State] = set()
+        recursive_matched = False
+        recursive_states: set[_State] = set()
+        for index, position in states:
+            segments = patterns[index]
+            segment = segments[position]
+            is_last = position + 1 == len(segments)
+            if segment == _RECURSIVE:
+                # `**` does not follow symlinks, so that it never loops
+                if is_last:
+                    recursive_matched = True
+                if entry.is_dir(follow_symlinks=False):
+                    recursive_states.add((index, position))
+            elif segment == name if isinstance(segment, str) else segment.match(name):
+                explicit = explicit or isinstance(segment, str)
+                if is_last:
+                    matched = True
+                elif entry.is_dir():
+                    child_states.add((index, position + 1))
+        # the ignore rules only prune what `**` walks into, never what a segment names
+        if (
+            (recursive_states or (recursive_matched and not matched))
+            and not explicit
+            and _is_ignored(entry, parents, sep_is_slash)
+        ):
+            recursive_matched = False
+            recursive_states.clear()
+        matched = matched or recursive_matched
+        child_states |= recursive_states
+        if not matched and not child_states:
+            continue
+
+        if matched and (include_dirs or entry.is_file()):
+            n_matches += 1
+            if len(matches) < MAX_MATCHES:
+                matches.append(entry.path[len(root_str) :])
+        if child_states and (closed := close(child_states)):
+            frame = enter(entry.path, closed, parents)
+            if frame is None:
+                return _GlobResult(matches, n_matches, complete=False)
+            stack.append(frame)
+
+    return _GlobResult(matches, n_matches, complete=True)
@@ -1,22 +1,25 @@
 import asyncio
+import base64
+import contextlib
+import json
 import platform
 import shutil
 import stat
 import tarfile
 import tempfile
 import zipfile
+from collections.abc import Callable
 from pathlib import Path
-from typing import override
+from typing import Any, NamedTuple, override
 
 import aiohttp
-import ripgrepy  # pyright: ignore[reportMissingTypeStubs]
 from kosong.tooling import CallableTool2, ToolError, ToolOk, ToolReturnType
 from pydantic import BaseModel, Field
 
 import kimi_cli
 from kimi_cli.share import get_share_dir
-from kimi_cli.tools.utils import load_desc
-from kimi_cli.utils.aiohttp import new_client_session
+from kimi_cli.tools.utils import DEFAULT_MAX_CHARS, load_desc, truncate_line
+from kimi_cli.utils.aiohttp import SharedClientSession
 from kimi_cli.utils.logging import logger
 
 
@@ -158,7 +161,7 @@ def _detect_target() -> str | None:
     return f"{arch}-{os_name}"
 
 
-async def _download_and_install_rg(bin_name: str) -> Path:
+async def _download_and_install_rg(bin_name: str, http_session: SharedClientSession) -> Path:
     target = _detect_target()
     if not target:
         raise RuntimeError("Unsupported platform for ripgrep download")
@@ -173,53 +176,52 @@ async def _download_and_install_rg(bin_name: str) -> Path:
     share_bin_dir.mkdir(parents=True, exist_ok=True)
     destination = share_bin_dir / bin_name
 
-    async with new_client_session() as session:
-        with tempfile.TemporaryDirectory(prefix="kimi-rg-") as tmpdir:
-            tar_path = Path(tmpdir) / filename
+    with tempfile.TemporaryDirectory(prefix="kimi-rg-") as tmpdir:
+        tar_path = Path(tmpdir) / filename
 
-            try:
-                async with session.get(url) as resp:
-                    resp.raise_for_status()
-                    with open(tar_path, "wb") as fh:
-                        async for chunk in resp.content.iter_chunked(1024 * 64):
-                            if chunk:
-                                fh.write(chunk)
-            except (aiohttp.ClientError, TimeoutError) as exc:
-                raise RuntimeError("Failed to download ripgrep binary") from exc
+        try:
+            async with http_session.session.get(url) as resp:
+                resp.raise_for_status()
+                with open(tar_path, "wb") as fh:
+                    async for chunk in resp.content.iter_chunked(1024 * 64):
+                        if chunk:
+                            fh.write(chunk)
+        except (aiohttp.ClientError, TimeoutError) as exc:
+            raise RuntimeError("Failed to download ripgrep binary") from exc
 
-            try:
-                if is_windows:
-                    with zipfile.ZipFile(tar_path, "r") as zf:
-                        member_name = next(
-                            (name for name in zf.namelist() if Path(name).name == bin_name),
-                            None,
-                        )
-                        if not member_name:
-                            raise RuntimeError("Ripgrep binary not found in archive")
-                        with zf.open(member_name) as source, open(destination, "wb") as dest_fh:
-                            shutil.copyfileobj(source, dest_fh)
-                else:
-                    with tarfile.open(tar_path, "r:gz") as tar:
-                        member = next(
-                            (m for m in tar.getmembers() if Path(m.name).name == bin_name),
-                            None,
-                        )
-                        if not member:
-                            raise RuntimeError("Ripgrep binary not found in archive")
-                        extracted = tar.extractfile(member)
-                        if not extracted:
-                            raise RuntimeError("Failed to extract ripgrep binary")
-                        with open(destination, "wb") as dest_fh:
-                            shutil.copyfileobj(extracted, dest_fh)
-            except (zipfile.BadZipFile, tarfile.TarError, OSError) as exc:
-                raise RuntimeError("Failed to extract ripgrep archive") from exc
+        try:
+            if is_windows:
+                with zipfile.ZipFile(tar_path, "r") as zf:
+                    member_name = next(
+                        (name for name in zf.namelist() if Path(name).name == bin_name),
+                        None,
+                    )
+                    if not member_name:
+                        raise RuntimeError("Ripgrep binary not found in archive")
+                    with zf.open(member_name) as source, open(destination, "wb") as dest_fh:
+                        shutil.copyfileobj(source, dest_fh)
+            else:
+                with tarfile.open(tar_path, "r:gz") as tar:
+                    member = next(
+                        (m for m in tar.getmembers() if Path(m.name).name == bin_name),
+                        None,
+                    )
+                    if not member:
+                        raise RuntimeError("Ripgrep binary not found in archive")
+                    extracted = tar.extractfile(member)
+                    if not extracted:
+                        raise RuntimeError("Failed to extract ripgrep binary")
+                    with open(destination, "wb") as dest_fh:
+                        shutil.copyfileobj(extracted, dest_fh)
+        except (zipfile.BadZipFile, tarfile.TarError, OSError) as exc:
+            raise RuntimeError("Failed to extract ripgrep archive") from exc
 
     destination.chmod(destination.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
     logger.info("Installed ripgrep to {destination}", destination=destination)
     return destination
 
 
-async def _ensure_rg_path() -> str:
+async def _ensure_rg_path(http_session: SharedClientSession) -> str:
     bin_name = _rg_binary_name()
     existing = _find_existing_rg(bin_name)
     if existing:
@@ -230,7 +232,7 @@ async def _ensure_rg_path() -> str:
         if existing:
             return str(existing)
 
-        downloaded = await _download_and_install_rg(bin_name)
+        downloaded = await _download_and_install_rg(bin_name, http_session)
         return str(downloaded)
 
 
@@ -239,64 +241,222 @@ class Grep(CallableTool2[Params]):
     description: str = load_desc(Path(__file__).parent / "grep.md")
     params: type[Params] = Params
 
+    def __init__(self, http_session: SharedClientSession, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._http_session = http_session
+
+    def cache_paths(self, params: Params) -> list[Path] | None:
+        return [Path(params.path)]
+
     @override
     async def __call__(self, params: Params) -> ToolReturnType:
         try:
-            # Initialize ripgrep with pattern and path
-            rg_path = await _ensure_rg_path()
+            rg_path = await _ensure_rg_path(self._http_session)
             logger.debug("Using ripgrep binary: {rg_bin}", rg_bin=rg_path)
-            rg = ripgrepy.Ripgrepy(params.pattern, params.path, rg_path=rg_path)
-
-            # Apply search options
-            if params.ignore_case:
-                rg = rg.ignore_case()
-            if params.multiline:
-                rg = rg.multiline().multiline_dotall()
-
-            # Content display options (only for content mode)
-            if params.output_mode == "content":
-                if params.before_context is not None:
-                    rg = rg.before_context(params.before_context)
-                if params.after_context is not None:
-                    rg = rg.after_context(params.after_context)
-                if params.context is not None:
-                    rg = rg.context(params.context)
-                if params.line_number:
-                    rg = rg.line_number()
-
-            # File filtering options
-            if params.glob:
-                rg = rg.glob(params.glob)
-            if params.type:
-                rg = rg.type_(params.type)
-
-            # Set output mode
-            if params.output_mode == "files_with_matches":
-                rg = rg.files_with_matches()
-            elif params.output_mode == "count_matches":
-                rg = rg.count_matches()
-
-            # Execute search
-            result = rg.run()
-
-            # Get results
-            output = result.as_string
-
-            # Apply head limit if specified
-            if params.head_limit is not None:
-                lines = output.split("\n")
-                if len(lines) > params.head_limit:
-                    lines = lines[: params.head_limit]
-                    output = "\n".join(lines)
-                    if params.output_mode in ["content", "files_with_matches", "count_matches"]:
-                        output += f"\n... (results truncated to {params.head_limit} lines)"
-
-            if not output:
-                return ToolOk(output="", message="No matches found")
-            return ToolOk(output=output)
-
+            result = await _run_rg(
+                [rg_path, *_build_rg_args(params)],
+                _get_renderer(params),
+                head_limit=params.head_limit,
+                max_chars=MAX_OUTPUT_CHARS,
+            )
         except Exception as e:
             return ToolError(
                 message=f"Failed to grep. Error: {str(e)}",
                 brief="Failed to grep",
             )
+
+        if not result.lines:
+            if result.returncode == 2:
+                return ToolError(
+                    message=f"Failed to grep. Error: {result.stderr.strip()}",
+                    brief="Failed to grep",
+                )
+            return ToolOk(output="", message="No matches found")
+
+        output = "\n".join(result.lines)
+        match result.truncated:
+            case "head_limit":
+                output += f"\n... (results truncated to {params.head_limit} lines)"
+            case "max_chars":
+                output += f"\n... (results truncated to {MAX_OUTPUT_CHARS} characters)"
+            case None:
+                output += "\n"
+        return ToolOk(output=output)
+
+
+MAX_OUTPUT_CHARS = DEFAULT_MAX_CHARS
+"""Budget of the output, beyond which ripgrep is stopped."""
+_RG_STREAM_LIMIT = 1 << 20
+"""Longest output record of ripgrep to parse, way beyond `MAX_OUTPUT_CHARS` anyway."""
+
+
+def _build_rg_args(params: Params) -> list[str]:
+    args: list[str] = []
+    if params.ignore_case:
+        args.append("--ignore-case")
+    if params.multiline:
+        args += ["--multiline", "--multiline-dotall"]
+
+    if params.output_mode == "content":
+        # structured output, rendered back to what ripgrep prints by itself
+        args.append("--json")
+        if params.before_context is not None:
+            args += ["--before-context", str(params.before_context)]
+        if params.after_context is not None:
+            args += ["--after-context", str(params.after_context)]
+        if params.context is not None:
+            args += ["--context", str(params.context)]
+    elif params.output_mode == "files_with_matches":
+        # ripgrep refuses `--json` along with these
+        args.append("--files-with-matches")
+    elif params.output_mode == "count_matches":
+        args.append("--count-matches")
+
+    if params.glob:
+        args += ["--glob", params.glob]
+    if params.type:
+        args += ["--type", params.type]
+
+    args += ["--regexp", params.pattern, "--", params.path]
+    return args
+
+
+type _Renderer = Callable[[bytes], list[str]]
+"""Turn a record printed by ripgrep into output lines."""
+
+
+def _get_renderer(params: Params) -> _Renderer:
+    if params.output_mode != "content":
+        return lambda record: [record.rstrip(b"\n").decode("utf-8", errors="replace")]
+    context = any(
+        n for n in (params.before_context, params.after_context, params.context) if n is not None
+    )
+    return _JSONRenderer(
+        with_filename=not Path(params.path).is_file(),
+        line_number=params.line_number,
+        context=context,
+    )
+
+
+class _JSONRenderer:
+    """Render the `--json` messages of ripgrep the way it prints matches by itself."""
+
+    def __init__(self, *, with_filename: bool, line_number: bool, context: bool):
+        self._with_filename = with_filename
+        self._line_number = line_number
+        self._context = context
+        self._last_path: str | None = None
+        self._last_line_number = 0
+
+    def __call__(self, record: bytes) -> list[str]:
+        message = json.loads(record)
+        kind = message["type"]
+        if kind not in ("match", "context"):
+            return []
+        data = message["data"]
+        path = _decode_json_data(data["path"])
+        text = _decode_json_data(data["lines"])
+        if text.endswith("\n"):
+            text = text[:-1]
+        first_line_number: int = data["line_number"] or 0
+
+        lines: list[str] = []
+        # ripgrep separates groups of lines that are not adjacent
+        if (
+            self._context
+            and self._last_path is not None
+            and (path != self._last_path or first_line_number > self._last_line_number + 1)
+        ):
+            lines.append("--")
+        separator = ":" if kind == "match" else "-"
+        for i, line in enumerate(text.split("\n")):
+            prefix = ""
+            if self._with_filename:
+                prefix += f"{path}{separator}"
+            if self._line_number:
+                prefix += f"{first_line_number + i}{separator}"
+            lines.append(prefix + line)
+            self._last_line_number = first_line_number + i
+        self._last_path = path
+        return lines
+
+
+def _decode_json_data(data: dict[str, Any]) -> str:
+    # ripgrep falls back to base64 for anything that is not valid UTF-8
+    if "text" in data:
+        return data["text"]
+    return base64.b64decode(data["bytes"]).decode("utf-8", errors="replace")
+
+
+class _RgResult(NamedTuple):
+    lines: list[str]
+    truncated: str | None
+    """`head_limit` or `max_chars` if ripgrep was stopped before it finished."""
+    returncode: int | None
+    stderr: str
+
+
+async def _run_rg(
+    command: list[str],
+    render: _Renderer,
+    *,
+    head_limit: int | None,
+    max_chars: int,
+) -> _RgResult:
+    """
+    Run ripgrep and collect its output as it comes.
+    Ripgrep is killed as soon as the output reaches `head_limit` lines or `max_chars`
+    characters, or when the caller is cancelled.
+    """
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        limit=_RG_STREAM_LIMIT,
+    )
+    assert process.stdout is not None, "stdout is None"
+    assert process.stderr is not None, "stderr is None"
+    stderr_task = asyncio.create_task(process.stderr.read())
+
+    lines: list[str] = []
+    n_chars = 0
+    truncated: str | None = None
+    finished = False
+    try:
+        while truncated is None:
+            try:
+                record = await process.stdout.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                record = e.partial
+            except asyncio.LimitOverrunError:
+                truncated = "max_chars"
+                break
+            if not record:
+                finished = True
+                break
+            for line in render(record):
+                if head_limit is not None and len(lines) >= head_limit:
+                    truncated = "head_limit"
+                    break
+                if n_chars + len(line) + 1 > max_chars:
+                    if not lines:
+                        lines.append(truncate_line(line, max_chars))
+                    truncated = "max_chars"
+                    break
+                lines.append(line)
+                n_chars += len(line) + 1
+    finally:
+        if not finished:
+            # we have enough, or the search is cancelled
+            with contextlib.suppress(ProcessLookupError):
+                process.kill()
+        returncode = await process.wait()
+        stderr = await stderr_task
+
+    logger.debug(
+        "ripgrep exited with {returncode}, {n_lines} lines, truncated: {truncated}",
+        returncode=returncode,
+        n_lines=len(lines),
+        truncated=truncated,
+    )
+    return _RgResult(lines, truncated, returncode, stderr.decode("utf-8", errors="replace"))
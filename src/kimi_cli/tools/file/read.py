@@ -1,7 +1,13 @@
+import asyncio
+import bisect
+import io
+import mmap
+import os
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, override
 
-import aiofiles
 from kosong.tooling import CallableTool2, ToolError, ToolOk, ToolReturnType
 from pydantic import BaseModel, Field
 
@@ -11,6 +17,13 @@ from kimi_cli.tools.utils import load_desc, truncate_line
 MAX_LINES = 1000
 MAX_LINE_LENGTH = 2000
 MAX_BYTES = 100 << 10  # 100KB
+INDEX_BLOCK_SIZE = 1 << 20
+"""Bytes scanned between two checkpoints of a line index."""
+MMAP_MIN_SIZE = 64 << 20
+"""Files at least this large are memory-mapped instead of read through a buffer."""
+MAX_CACHED_INDEXES = 64
+_MAX_DECODED_BYTES = 4 * (MAX_LINE_LENGTH + 1)
+"""Bytes of a line decoded at most, enough for it to be truncated the same way."""
 
 
 class Params(BaseModel):
@@ -52,6 +65,10 @@ class ReadFile(CallableTool2[Params]):
 
         self._work_dir = builtin_args.KIMI_WORK_DIR
 
+    def cache_paths(self, params: Params) -> list[Path] | None:
+        p = Path(params.path)
+        return [p] if p.is_absolute() else None
+
     @override
     async def __call__(self, params: Params) -> ToolReturnType:
         # TODO: checks:
@@ -88,25 +105,23 @@ class ReadFile(CallableTool2[Params]):
             truncated_line_numbers: list[int] = []
             max_lines_reached = False
             max_bytes_reached = False
-            async with aiofiles.open(p, encoding="utf-8", errors="replace") as f:
-                current_line_no = 0
-                async for line in f:
-                    current_line_no += 1
-                    if current_line_no < params.line_offset:
-                        continue
-                    truncated = truncate_line(line, MAX_LINE_LENGTH)
-                    if truncated != line:
-                        truncated_line_numbers.append(current_line_no)
-                    lines.append(truncated)
-                    n_bytes += len(truncated.encode("utf-8"))
-                    if len(lines) >= params.n_lines:
-                        break
-                    if len(lines) >= MAX_LINES:
-                        max_lines_reached = True
-                        break
-                    if n_bytes >= MAX_BYTES:
-                        max_bytes_reached = True
-                        break
+            raw_lines = await asyncio.to_thread(
+                _read_lines, p, params.line_offset, min(params.n_lines, MAX_LINES)
+            )
+            for current_line_no, line in enumerate(raw_lines, params.line_offset):
+                truncated = truncate_line(line, MAX_LINE_LENGTH)
+                if truncated != line:
+                    truncated_line_numbers.append(current_line_no)
+                lines.append(truncated)
+                n_bytes += len(truncated.encode("utf-8"))
+                if len(lines) >= params.n_lines:
+                    break
+                if len(lines) >= MAX_LINES:
+                    max_lines_reached = True
+                    break
+                if n_bytes >= MAX_BYTES:
+                    max_bytes_reached = True
+                    break
 
             # Format output with line numbers like `cat -n`
             lines_with_no: list[str] = []
@@ -138,3 +153,136 @@ class ReadFile(CallableTool2[Params]):
                 message=f"Failed to read {params.path}. Error: {e}",
                 brief="Failed to read file",
             )
+
+
+type _BinaryFile = io.BufferedReader | mmap.mmap
+
+
+class _LineIndex:
+    """
+    Sparse index of the line starts of a file, extended as far as reads need it.
+
+    A checkpoint is recorded at the first line start after every `INDEX_BLOCK_SIZE` bytes, so
+    that any line is reached by seeking to a checkpoint and skipping less than two blocks.
+    """
+
+    def __init__(self, size: int, mtime_ns: int):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets: list[int] = [0]
+        self.line_numbers: list[int] = [0]
+        """0-based number of the line starting at the offset of the same position."""
+        self.universal_newlines = False
+        """Whether the file has bare `\\r` line breaks, which the index does not handle."""
+        self._scanned = 0
+        self._n_newlines = 0
+        self._lock = threading.Lock()
+
+    def find_line(self, f: _BinaryFile, line: int) -> int | None:
+        """Get the byte offset of a 0-based line, or `None` if the file has fewer lines."""
+        with self._lock:
+            self._extend(f, line)
+            if self.universal_newlines or self._n_newlines < line:
+                return None
+            i = bisect.bisect_right(self.line_numbers, line) - 1
+            offset, n_skip = self.offsets[i], line - self.line_numbers[i]
+        while n_skip > 0:
+            f.seek(offset)
+            block = f.read(INDEX_BLOCK_SIZE)
+            if not block:
+                return None
+            parts = block.split(b"\n", n_skip)
+            if len(parts) <= n_skip:
+                n_skip -= len(parts) - 1
+                offset += len(block)
+            else:
+                offset += len(block) - len(parts[-1])
+                n_skip = 0
+        return offset
+
+    def _extend(self, f: _BinaryFile, line: int) -> None:
+        while self._n_newlines < line and self._scanned < self.size:
+            f.seek(self._scanned)
+            block = f.read(INDEX_BLOCK_SIZE)
+            if not block:
+                break
+            if block.endswith(b"\r"):
+                # keep `\r\n` within the block
+                block += f.read(1)
+            if b"\r" in block and block.count(b"\r") != block.count(b"\r\n"):
+                self.universal_newlines = True
+                return
+            if n_newlines := block.count(b"\n"):
+                self._n_newlines += n_newlines
+                self.offsets.append(self._scanned + block.rfind(b"\n") + 1)
+                self.line_numbers.append(self._n_newlines)
+            self._scanned += len(block)
+
+
+_line_indexes: OrderedDict[str, _LineIndex] = OrderedDict()
+_line_indexes_lock = threading.Lock()
+
+
+def _get_line_index(path: Path, stat: os.stat_result) -> _LineIndex:
+    key = str(path)
+    with _line_indexes_lock:
+        index = _line_indexes.get(key)
+        if index is None or (index.size, index.mtime_ns) != (stat.st_size, stat.st_mtime_ns):
+            index = _LineIndex(stat.st_size, stat.st_mtime_ns)
+            _line_indexes[key] = index
+        _line_indexes.move_to_end(key)
+        while len(_line_indexes) > MAX_CACHED_INDEXES:
+            _line_indexes.popitem(last=False)
+        return index
+
+
+def _decode_line(raw: bytes) -> str:
+    if raw.endswith(b"\r\n"):
+        raw, ending = raw[:-2], "\n"
+    elif raw.endswith(b"\n"):
+        raw, ending = raw[:-1], "\n"
+    else:
+        ending = ""
+    return raw[:_MAX_DECODED_BYTES].decode("utf-8", errors="replace") + ending
+
+
+def _read_lines(path: Path, line_offset: int, n_lines: int) -> list[str]:
+    """Read `n_lines` lines from the 1-based `line_offset`, with `\\n` line breaks."""
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        # special files like those in `/proc` report no size
+        if stat.st_size > 0:
+            index = _get_line_index(path, stat)
+            if stat.st_size >= MMAP_MIN_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    lines = _read_indexed_lines(mm, index, line_offset, n_lines)
+            else:
+                lines = _read_indexed_lines(f, index, line_offset, n_lines)
+            if not index.universal_newlines:
+                return lines
+
+        f.seek(0)
+        lines = []
+        with io.TextIOWrapper(f, encoding="utf-8", errors="replace") as text:
+            for line_no, line in enumerate(text, 1):
+                if line_no >= line_offset:
+                    lines.append(line)
+                    if len(lines) >= n_lines:
+                        break
+        return lines
+
+
+def _read_indexed_lines(
+    f: _BinaryFile, index: _LineIndex, line_offset: int, n_lines: int
+) -> list[str]:
+    offset = index.find_line(f, line_offset - 1)
+    if offset is None:
+        return []
+    f.seek(offset)
+    lines: list[str] = []
+    while len(lines) < n_lines and (raw := f.readline()):
+        if b"\r" in (raw[:-2] if raw.endswith(b"\r\n") else raw):
+            index.universal_newlines = True
+            return []
+        lines.append(_decode_line(raw))
+    return lines
@@ -1,5 +1,13 @@
-from typing import Any
+import asyncio
+import json
+import time
+import weakref
+from collections.abc import Awaitable, Callable
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Literal, NamedTuple
 
+import anyio
 import fastmcp
 import mcp
 from fastmcp.client.client import CallToolResult
@@ -7,9 +15,290 @@ from fastmcp.client.transports import ClientTransport
 from kosong.message import AudioURLPart, ContentPart, ImageURLPart, TextPart
 from kosong.tooling import CallableTool, ToolOk, ToolReturnType
 
+from kimi_cli.config import MCPConfig
+from kimi_cli.share import get_share_dir
+from kimi_cli.utils.logging import logger
+
+_NOT_SENT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError)
+"""Errors raised before a request reaches the server, after which it is safe to retry."""
+
+
+class MCPConnection[T: ClientTransport]:
+    """
+    A long-lived connection to an MCP server, shared by all of its tools.
+
+    The session is opened once and kept open, calls run concurrently over it. A connection idle
+    for longer than `health_check_interval` is pinged before being used again, and a connection
+    found closed is reopened. A call is only retried when it never reached the server.
+    """
+
+    def __init__(self, client: fastmcp.Client[T], options: MCPConfig):
+        self._client = client
+        self.options = options
+        self._lock = asyncio.Lock()
+        self._epoch = 0
+        """Incremented on every (re)connection."""
+        self._connected = False
+        self._last_used = 0.0
+
+    @property
+    def client(self) -> fastmcp.Client[T]:
+        return self._client
+
+    async def connect(self):
+        async with self._lock:
+            if not self._connected:
+                await self._open()
+
+    async def close(self):
+        async with self._lock:
+            if self._connected:
+                self._connected = False
+                await self._client.close()
+
+    async def list_tools(self) -> list[mcp.Tool]:
+        return await self._run(lambda: self._client.list_tools())
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> CallToolResult:
+        timeout = self.options.tool_call_timeout
+        return await self._run(lambda: self._client.call_tool(name, arguments, timeout=timeout))
+
+    async def _run[R](self, request: Callable[[], Awaitable[R]]) -> R:
+        epoch = await self._ensure_healthy()
+        try:
+            result = await request()
+        except _NOT_SENT_ERRORS:
+            logger.warning("MCP connection closed, reconnecting: {client}", client=self._client)
+            await self._reconnect(epoch)
+            result = await request()
+        self._last_used = time.monotonic()
+        return result
+
+    async def _ensure_healthy(self) -> int:
+        async with self._lock:
+            if not self._connected or not self._client.is_connected():
+                await self._open()
+            elif time.monotonic() - self._last_used > self.options.health_check_interval:
+                try:
+                    with anyio.fail_after(self.options.health_check_timeout):
+                        await self._client.ping()
+                except Exception as e:
+                    logger.warning(
+                        "MCP health check failed, reconnecting: {client}, error: {error}",
+                        client=self._client,
+                        error=e,
+                    )
+                    await self._client.close()
+                    await self._open()
+                self._last_used = time.monotonic()
+            return self._epoch
+
+    async def _reconnect(self, epoch: int):
+        async with self._lock:
+            # another call may have reconnected already
+            if epoch == self._epoch:
+                await self._client.close()
+                await self._open()
+
+    async def _open(self):
+        self._connected = False
+        try:
+            await self._client.__aenter__()
+        except BaseException:
+            await self._abandon_opening()
+            raise
+        self._connected = True
+        self._epoch += 1
+        self._last_used = time.monotonic()
+
+    async def _abandon_opening(self):
+        # fastmcp leaves the session of an interrupted connection waiting for the server, and
+        # closing the client would wait for it too
+        session_task = self._client._session_state.session_task  # pyright: ignore[reportPrivateUsage]
+        if session_task is not None and not session_task.done():
+            session_task.cancel()
+            await asyncio.wait([session_task])
+        await self._client.transport.close()
+
+
+_connections: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, MCPConnection[Any]]
+] = weakref.WeakKeyDictionary()
+"""Connections of each event loop, keyed by the server configuration."""
+
+
+def _config_key(mcp_config: dict[str, Any]) -> str:
+    return json.dumps(mcp_config, sort_keys=True, default=str)
+
+
+def _pooled_connection(mcp_config: dict[str, Any], options: MCPConfig) -> MCPConnection[Any]:
+    connections = _connections.setdefault(asyncio.get_running_loop(), {})
+    key = _config_key(mcp_config)
+    connection = connections.get(key)
+    if connection is None:
+        connection = MCPConnection(fastmcp.Client(mcp_config), options)
+        connections[key] = connection
+    connection.options = options
+    return connection
+
+
+async def get_mcp_connection(mcp_config: dict[str, Any], options: MCPConfig) -> MCPConnection[Any]:
+    """Get the connection to the MCP server(s) of a configuration, opening it if needed."""
+    connection = _pooled_connection(mcp_config, options)
+    try:
+        await connection.connect()
+    except BaseException:
+        _connections[asyncio.get_running_loop()].pop(_config_key(mcp_config), None)
+        raise
+    return connection
+
+
+_background_tasks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, set[asyncio.Task[None]]] = (
+    weakref.WeakKeyDictionary()
+)
+"""Manifest validations of each event loop, cancelled with the connections."""
+
+
+async def close_mcp_connections():
+    """Close the MCP connections of the running event loop."""
+    loop = asyncio.get_running_loop()
+    tasks = _background_tasks.pop(loop, set())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    connections = _connections.pop(loop, {})
+    for connection in connections.values():
+        try:
+            await connection.close()
+        except Exception as e:
+            logger.warning("Failed to close MCP connection: {error}", error=e)
+
+
+MANIFEST_VERSION = 1
+
+
+def _manifest_path(manifest_dir: Path, mcp_config: dict[str, Any]) -> Path:
+    digest = sha256(_config_key(mcp_config).encode("utf-8")).hexdigest()
+    return manifest_dir / f"{digest}.json"
+
+
+def _load_manifest(path: Path) -> list[mcp.Tool] | None:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+        if manifest.get("version") != MANIFEST_VERSION:
+            return None
+        return [mcp.Tool.model_validate(tool) for tool in manifest["tools"]]
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring invalid MCP manifest {path}: {error}", path=path, error=e)
+        return None
+
+
+def _save_manifest(path: Path, tools: list[mcp.Tool]):
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "tools": [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools],
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+        tmp_path.replace(path)
+    except OSError as e:
+        logger.warning("Failed to save MCP manifest {path}: {error}", path=path, error=e)
+
+
+class MCPDiscovery(NamedTuple):
+    """The tools of the MCP server(s) of a configuration."""
+
+    name: str
+    """Names of the servers."""
+    connection: MCPConnection[Any] | None
+    """`None` if the discovery failed."""
+    tools: list[mcp.Tool]
+    source: Literal["manifest", "server"]
+    """Whether the tools come from the manifest cached by a previous start, or the server."""
+    elapsed: float
+    error: str | None = None
+
+
+async def discover_mcp_tools(
+    mcp_config: dict[str, Any],
+    options: MCPConfig,
+    *,
+    manifest_dir: Path | None = None,
+    on_update: Callable[[MCPConnection[Any], list[mcp.Tool]], None] | None = None,
+) -> MCPDiscovery:
+    """
+    Discover the tools of the MCP server(s) of a configuration, within `discovery_timeout`.
+
+    The tools listed are saved to a manifest keyed by the configuration. On the next discovery
+    the manifest is returned at once, and the server is listed in the background: the manifest is
+    refreshed and `on_update` is called if its tools changed.
+    """
+    start = time.monotonic()
+    name = ", ".join(mcp_config.get("mcpServers", {})) or "MCP"
+    path = _manifest_path(manifest_dir or get_share_dir() / "mcp-manifests", mcp_config)
+
+    cached = _load_manifest(path)
+    if cached is not None:
+        connection = _pooled_connection(mcp_config, options)
+        task = asyncio.create_task(
+            _validate_manifest(name, connection, path, cached, options, on_update)
+        )
+        tasks = _background_tasks.setdefault(asyncio.get_running_loop(), set())
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        return MCPDiscovery(name, connection, cached, "manifest", time.monotonic() - start)
+
+    try:
+        async with asyncio.timeout(options.discovery_timeout):
+            connection = await get_mcp_connection(mcp_config, options)
+            tools = await connection.list_tools()
+    except Exception as e:
+        error = "timed out" if isinstance(e, TimeoutError) else str(e) or type(e).__name__
+        return MCPDiscovery(name, None, [], "server", time.monotonic() - start, error)
+    _save_manifest(path, tools)
+    return MCPDiscovery(name, connection, tools, "server", time.monotonic() - start)
+
+
+async def _validate_manifest(
+    name: str,
+    connection: MCPConnection[Any],
+    path: Path,
+    cached: list[mcp.Tool],
+    options: MCPConfig,
+    on_update: Callable[[MCPConnection[Any], list[mcp.Tool]], None] | None,
+):
+    start = time.monotonic()
+    try:
+        async with asyncio.timeout(options.discovery_timeout):
+            tools = await connection.list_tools()
+    except Exception as e:
+        logger.warning(
+            "Failed to validate the MCP manifest of {name} against the server: {error}",
+            name=name,
+            error=e,
+        )
+        # discover the server again on the next start rather than trusting the manifest
+        path.unlink(missing_ok=True)
+        return
+    logger.info(
+        "Validated the MCP manifest of {name} in {elapsed:.3f}s",
+        name=name,
+        elapsed=time.monotonic() - start,
+    )
+    if tools == cached:
+        return
+    logger.info("The tools of MCP server {name} changed, updating its manifest", name=name)
+    _save_manifest(path, tools)
+    if on_update is not None:
+        on_update(connection, tools)
+
 
 class MCPTool[T: ClientTransport](CallableTool):
-    def __init__(self, mcp_tool: mcp.Tool, client: fastmcp.Client[T], **kwargs: Any):
+    def __init__(self, mcp_tool: mcp.Tool, connection: MCPConnection[T], **kwargs: Any):
         super().__init__(
             name=mcp_tool.name,
             description=mcp_tool.description or "",
@@ -17,12 +306,11 @@ class MCPTool[T: ClientTransport](CallableTool):
             **kwargs,
         )
         self._mcp_tool = mcp_tool
-        self._client = client
+        self._connection = connection
 
     async def __call__(self, *args: Any, **kwargs: Any) -> ToolReturnType:
-        async with self._client as client:
-            result = await client.call_tool(self._mcp_tool.name, kwargs, timeout=20)
-            return convert_tool_result(result)
+        result = await self._connection.call_tool(self._mcp_tool.name, kwargs)
+        return convert_tool_result(result)
 
 
 def convert_tool_result(result: CallToolResult) -> ToolReturnType:
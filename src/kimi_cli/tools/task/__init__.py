@@ -1,11 +1,13 @@
 import asyncio
+import time
 from pathlib import Path
 from typing import Any, override
 
-from kosong.tooling import CallableTool2, ToolError, ToolOk, ToolReturnType
+from kosong.message import ToolCall, ToolCallPart
+from kosong.tooling import CallableTool2, ToolError, ToolOk, ToolResult, ToolReturnType
 from pydantic import BaseModel, Field
 
-from kimi_cli.agentspec import ResolvedAgentSpec, SubagentSpec
+from kimi_cli.agentspec import ResolvedAgentSpec
 from kimi_cli.soul import MaxStepsReached, get_wire_or_none, run_soul
 from kimi_cli.soul.agent import Agent, load_agent
 from kimi_cli.soul.context import Context
@@ -16,7 +18,7 @@ from kimi_cli.tools.utils import load_desc
 from kimi_cli.utils.message import message_extract_text
 from kimi_cli.utils.path import next_available_rotation
 from kimi_cli.wire import WireUISide
-from kimi_cli.wire.message import ApprovalRequest, SubagentEvent, WireMessage
+from kimi_cli.wire.message import ApprovalRequest, Event, SubagentEvent, WireMessage
 
 # Maximum continuation attempts for task summary
 MAX_CONTINUE_ATTEMPTS = 1
@@ -44,6 +46,13 @@ class Params(BaseModel):
             "because the subagent cannot see anything in your context."
         )
     )
+    batch: list[str] = Field(
+        default_factory=list,
+        description=(
+            "More tasks for the same kind of subagent, each run by a subagent of its own "
+            "in parallel with `prompt`. Results are returned in order."
+        ),
+    )
 
 
 class Task(CallableTool2[Params]):
@@ -66,55 +75,84 @@ class Task(CallableTool2[Params]):
 
         self._runtime = runtime
         self._session = runtime.session
+        self._subagent_specs = agent_spec.subagents
         self._subagents: dict[str, Agent] = {}
-
-        try:
-            loop = asyncio.get_running_loop()
-            self._load_task = loop.create_task(self._load_subagents(agent_spec.subagents))
-        except RuntimeError:
-            # In case there's no running event loop, e.g., during synchronous tests
-            self._load_task = None
-            asyncio.run(self._load_subagents(agent_spec.subagents))
-
-    async def _load_subagents(self, subagent_specs: dict[str, SubagentSpec]) -> None:
-        """Load all subagents specified in the agent spec."""
-        for name, spec in subagent_specs.items():
-            agent = await load_agent(spec.path, self._runtime, mcp_configs=[])
-            self._subagents[name] = agent
+        """Subagents loaded so far, each on the first task given to it."""
+        self._subagent_lock = asyncio.Lock()
+        self._scheduler = asyncio.Semaphore(runtime.config.loop_control.max_concurrent_subagents)
+        """Bounds the number of subagents running at once, across all calls of this tool."""
+        self._history_file_lock = asyncio.Lock()
+
+    async def _get_subagent(self, name: str) -> Agent | None:
+        """Get a subagent by name, loading it on first use."""
+        if name in self._subagents:
+            return self._subagents[name]
+        spec = self._subagent_specs.get(name)
+        if spec is None:
+            return None
+        async with self._subagent_lock:
+            if name not in self._subagents:
+                self._subagents[name] = await load_agent(spec.path, self._runtime, mcp_configs=[])
+        return self._subagents[name]
 
     async def _get_subagent_history_file(self) -> Path:
         """Generate a unique history file path for subagent."""
         main_history_file = self._session.history_file
         subagent_base_name = f"{main_history_file.stem}_sub"
         main_history_file.parent.mkdir(parents=True, exist_ok=True)  # just in case
-        sub_history_file = await next_available_rotation(
-            main_history_file.parent / f"{subagent_base_name}{main_history_file.suffix}"
-        )
-        assert sub_history_file is not None
+        # subagents may start concurrently, so the file is created to claim the name
+        async with self._history_file_lock:
+            sub_history_file = await next_available_rotation(
+                main_history_file.parent / f"{subagent_base_name}{main_history_file.suffix}"
+            )
+            assert sub_history_file is not None
+            sub_history_file.touch(exist_ok=False)
         return sub_history_file
 
     @override
     async def __call__(self, params: Params) -> ToolReturnType:
-        if self._load_task is not None:
-            await self._load_task
-            self._load_task = None
-
-        if params.subagent_name not in self._subagents:
+        agent = await self._get_subagent(params.subagent_name)
+        if agent is None:
             return ToolError(
                 message=f"Subagent not found: {params.subagent_name}",
                 brief="Subagent not found",
             )
-        agent = self._subagents[params.subagent_name]
-        try:
-            result = await self._run_subagent(agent, params.prompt)
+        if not params.batch:
+            result, _ = await self._schedule(agent, params.prompt, batched=False)
             return result
-        except Exception as e:
-            return ToolError(
-                message=f"Failed to run subagent: {e}",
-                brief="Failed to run subagent",
-            )
 
-    async def _run_subagent(self, agent: Agent, prompt: str) -> ToolReturnType:
+        prompts = [params.prompt, *params.batch]
+        results = await asyncio.gather(
+            *(self._schedule(agent, prompt, batched=True) for prompt in prompts)
+        )
+        sections: list[str] = []
+        for i, (result, elapsed) in enumerate(results, start=1):
+            if isinstance(result, ToolOk):
+                sections.append(f"## Task {i} (finished in {elapsed:.1f}s)\n\n{result.output}")
+            else:
+                sections.append(f"## Task {i} (failed after {elapsed:.1f}s)\n\n{result.message}")
+        n_ok = sum(isinstance(result, ToolOk) for result, _ in results)
+        brief = f"{n_ok}/{len(prompts)} tasks succeeded"
+        if n_ok == 0:
+            return ToolError(message="\n\n".join(sections), brief=brief)
+        return ToolOk(output="\n\n".join(sections), brief=brief)
+
+    async def _schedule(
+        self, agent: Agent, prompt: str, *, batched: bool
+    ) -> tuple[ToolReturnType, float]:
+        """Run a subagent once a slot is free, and time it."""
+        async with self._scheduler:
+            start = time.perf_counter()
+            try:
+                result = await self._run_subagent(agent, prompt, batched=batched)
+            except Exception as e:
+                result = ToolError(
+                    message=f"Failed to run subagent: {e}",
+                    brief="Failed to run subagent",
+                )
+            return result, time.perf_counter() - start
+
+    async def _run_subagent(self, agent: Agent, prompt: str, *, batched: bool) -> ToolReturnType:
         """Run subagent with optional continuation for task summary."""
         super_wire = get_wire_or_none()
         assert super_wire is not None
@@ -122,16 +160,20 @@ class Task(CallableTool2[Params]):
         assert current_tool_call is not None
         current_tool_call_id = current_tool_call.id
 
+        # subagents of a batch share the tool call in the UI, where the argument parts of
+        # their tool calls could not be told apart
+        tool_call_buffer = _ToolCallBuffer() if batched else None
+
         def _super_wire_send(msg: WireMessage) -> None:
             if isinstance(msg, ApprovalRequest):
                 super_wire.soul_side.send(msg)
                 return
 
-            event = SubagentEvent(
-                task_tool_call_id=current_tool_call_id,
-                event=msg,
-            )
-            super_wire.soul_side.send(event)
+            events = [msg] if tool_call_buffer is None else tool_call_buffer.feed(msg)
+            for event in events:
+                super_wire.soul_side.send(
+                    SubagentEvent(task_tool_call_id=current_tool_call_id, event=event)
+                )
 
         async def _ui_loop_fn(wire: WireUISide) -> None:
             while True:
@@ -139,37 +181,69 @@ class Task(CallableTool2[Params]):
                 _super_wire_send(msg)
 
         subagent_history_file = await self._get_subagent_history_file()
-        context = Context(file_backend=subagent_history_file)
+        context = Context(
+            file_backend=subagent_history_file, fsync=self._runtime.config.history.fsync
+        )
         soul = KimiSoul(agent, runtime=self._runtime, context=context)
 
         try:
-            await run_soul(soul, prompt, _ui_loop_fn, asyncio.Event())
-        except MaxStepsReached as e:
-            return ToolError(
-                message=(
-                    f"Max steps {e.n_steps} reached when running subagent. "
-                    "Please try splitting the task into smaller subtasks."
-                ),
-                brief="Max steps reached",
-            )
-
-        _error_msg = (
-            "The subagent seemed not to run properly. Maybe you have to do the task yourself."
-        )
-
-        # Check if the subagent context is valid
-        if len(context.history) == 0 or context.history[-1].role != "assistant":
-            return ToolError(message=_error_msg, brief="Failed to run subagent")
-
-        final_response = message_extract_text(context.history[-1])
+            try:
+                await run_soul(soul, prompt, _ui_loop_fn, asyncio.Event())
+            except MaxStepsReached as e:
+                return ToolError(
+                    message=(
+                        f"Max steps {e.n_steps} reached when running subagent. "
+                        "Please try splitting the task into smaller subtasks."
+                    ),
+                    brief="Max steps reached",
+                )
 
-        # Check if response is too brief, if so, run again with continuation prompt
-        n_attempts_remaining = MAX_CONTINUE_ATTEMPTS
-        if len(final_response) < 200 and n_attempts_remaining > 0:
-            await run_soul(soul, CONTINUE_PROMPT, _ui_loop_fn, asyncio.Event())
+            _error_msg = (
+                "The subagent seemed not to run properly. Maybe you have to do the task yourself."
+            )
 
+            # Check if the subagent context is valid
             if len(context.history) == 0 or context.history[-1].role != "assistant":
                 return ToolError(message=_error_msg, brief="Failed to run subagent")
+
             final_response = message_extract_text(context.history[-1])
 
-        return ToolOk(output=final_response)
+            # Check if response is too brief, if so, run again with continuation prompt
+            n_attempts_remaining = MAX_CONTINUE_ATTEMPTS
+            if len(final_response) < 200 and n_attempts_remaining > 0:
+                await run_soul(soul, CONTINUE_PROMPT, _ui_loop_fn, asyncio.Event())
+
+                if len(context.history) == 0 or context.history[-1].role != "assistant":
+                    return ToolError(message=_error_msg, brief="Failed to run subagent")
+                final_response = message_extract_text(context.history[-1])
+
+            return ToolOk(output=final_response)
+        finally:
+            await context.close()
+
+
+class _ToolCallBuffer:
+    """Hold back the tool calls of a subagent until they are complete."""
+
+    def __init__(self):
+        self._pending: dict[str, ToolCall] = {}
+        self._last: ToolCall | None = None
+
+    def feed(self, event: Event) -> list[Event]:
+        """Take an event of the subagent and return the events to forward."""
+        match event:
+            case ToolCall():
+                self._last = event.model_copy(deep=True)
+                self._pending[event.id] = self._last
+                return []
+            case ToolCallPart():
+                if self._last is not None:
+                    arguments = self._last.function.arguments or ""
+                    self._last.function.arguments = arguments + (event.arguments_part or "")
+                return []
+            case ToolResult():
+                if tool_call := self._pending.pop(event.tool_call_id, None):
+                    return [tool_call, event]
+                return [event]
+            case _:
+                return [event]
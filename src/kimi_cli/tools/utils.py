@@ -1,9 +1,14 @@
+import asyncio
 import re
 import string
 from pathlib import Path
 
 from kosong.tooling import ToolError, ToolOk
 
+from kimi_cli.soul import get_wire_or_none
+from kimi_cli.soul.toolset import get_current_tool_call_or_none
+from kimi_cli.wire.message import ToolOutputChunk
+
 
 def load_desc(path: Path, substitutions: dict[str, str] | None = None) -> str:
     """Load a tool description from a file, with optional substitutions."""
@@ -148,3 +153,57 @@ class ToolRejectedError(ToolError):
             ),
             brief="Rejected by user",
         )
+
+
+class ToolOutputStreamer:
+    """
+    Stream the output of a running tool to the wire, for the UI to show it live.
+
+    Output written within `FLUSH_INTERVAL` seconds is sent as one `ToolOutputChunk`. While the
+    UI side is more than `MAX_WIRE_BACKLOG` messages behind, output is held back and merged into
+    the next chunk, so a slow UI costs neither wire messages nor time of the tool.
+    Outside of a tool call, e.g. when a tool is called directly, nothing is sent.
+    """
+
+    FLUSH_INTERVAL = 0.1
+    MAX_WIRE_BACKLOG = 64
+
+    def __init__(self):
+        tool_call = get_current_tool_call_or_none()
+        self._wire = get_wire_or_none() if tool_call is not None else None
+        self._tool_call_id = tool_call.id if tool_call is not None else ""
+        self._pending: list[str] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def write(self, text: str) -> None:
+        if self._wire is None or not text:
+            return
+        self._pending.append(text)
+        if self._flush_handle is None:
+            self._schedule_flush()
+
+    def close(self) -> None:
+        """Send the output held back so far. Must be called before returning the result."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._send()
+
+    def _schedule_flush(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._flush_handle = loop.call_later(self.FLUSH_INTERVAL, self._flush)
+
+    def _flush(self) -> None:
+        assert self._wire is not None
+        if self._wire.soul_side.n_pending > self.MAX_WIRE_BACKLOG:
+            self._schedule_flush()
+            return
+        self._flush_handle = None
+        self._send()
+
+    def _send(self) -> None:
+        if self._wire is None or not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+        self._wire.soul_side.send(ToolOutputChunk(tool_call_id=self._tool_call_id, text=text))
@@ -1,4 +1,5 @@
 from .fetch import FetchURL
+from .http import HttpRequest
 from .search import SearchWeb
 
-__all__ = ("SearchWeb", "FetchURL")
+__all__ = ("SearchWeb", "FetchURL", "HttpRequest")
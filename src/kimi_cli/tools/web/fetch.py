@@ -1,51 +1,141 @@
+import asyncio
+import contextlib
+import json
+import re
+import time
+from hashlib import sha256
 from pathlib import Path
-from typing import override
+from typing import Any, NamedTuple, override
 
 import aiohttp
-import trafilatura
 from kosong.tooling import CallableTool2, ToolReturnType
 from pydantic import BaseModel, Field
 
+from kimi_cli.share import get_share_dir
 from kimi_cli.tools.utils import ToolResultBuilder, load_desc
-from kimi_cli.utils.aiohttp import new_client_session
+from kimi_cli.utils.aiohttp import SharedClientSession
+from kimi_cli.utils.logging import logger
+from kimi_cli.utils.trafilatura import extract_in_pool
+
+MAX_BODY_BYTES = 10 << 20
+"""Bytes of a response body read at most, the rest is ignored."""
+CACHE_TTL = 300.0
+"""Seconds a cached response is used without revalidation, unless the server says otherwise."""
+MAX_CACHE_ENTRIES = 256
+
+_USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+_MAX_AGE = re.compile(r"max-age=(\d+)")
 
 
 class Params(BaseModel):
     url: str = Field(description="The URL to fetch content from.")
 
 
+class _CacheEntry(NamedTuple):
+    url: str
+    etag: str | None
+    last_modified: str | None
+    charset: str | None
+    truncated: bool
+    fetched_at: float
+    """Wall clock time of the last fetch or revalidation."""
+    ttl: float
+
+
+class _Page(NamedTuple):
+    body: bytes
+    charset: str | None
+    truncated: bool
+
+
+class HTTPCache:
+    """
+    Responses of successful fetches stored on disk, keyed by URL.
+
+    A response is used as is for `ttl` seconds after it was fetched, taken from the
+    `Cache-Control: max-age` of the response or `CACHE_TTL`. After that it is revalidated with
+    its `ETag` and `Last-Modified` validators. Responses with `Cache-Control: no-store` are never
+    stored. Only the `MAX_CACHE_ENTRIES` most recently fetched responses are kept.
+    """
+
+    def __init__(self, directory: Path):
+        self._directory = directory
+
+    def get(self, url: str) -> tuple[_CacheEntry, bytes] | None:
+        meta_path, body_path = self._paths(url)
+        try:
+            entry = _CacheEntry(**json.loads(meta_path.read_text(encoding="utf-8")))
+            body = body_path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring invalid cache entry of {url}: {error}", url=url, error=e)
+            return None
+        # the hash of a URL may collide, however unlikely
+        return (entry, body) if entry.url == url else None
+
+    def put(self, entry: _CacheEntry, body: bytes | None = None):
+        """Store an entry, along with its body unless it is unchanged."""
+        meta_path, body_path = self._paths(entry.url)
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            if body is not None:
+                tmp_path = body_path.with_suffix(".tmp")
+                tmp_path.write_bytes(body)
+                tmp_path.replace(body_path)
+            meta_path.write_text(json.dumps(entry._asdict()), encoding="utf-8")
+            if body is not None:
+                self._prune()
+        except OSError as e:
+            logger.warning("Failed to cache the response of {url}: {error}", url=entry.url, error=e)
+
+    def _paths(self, url: str) -> tuple[Path, Path]:
+        digest = sha256(url.encode("utf-8")).hexdigest()
+        return self._directory / f"{digest}.json", self._directory / f"{digest}.body"
+
+    def _prune(self):
+        meta_paths = list(self._directory.glob("*.json"))
+        if len(meta_paths) <= MAX_CACHE_ENTRIES:
+            return
+        meta_paths.sort(key=lambda path: path.stat().st_mtime)
+        for meta_path in meta_paths[: len(meta_paths) - MAX_CACHE_ENTRIES]:
+            meta_path.unlink(missing_ok=True)
+            meta_path.with_suffix(".body").unlink(missing_ok=True)
+
+
 class FetchURL(CallableTool2[Params]):
     name: str = "FetchURL"
     description: str = load_desc(Path(__file__).parent / "fetch.md", {})
     params: type[Params] = Params
 
+    def __init__(
+        self,
+        http_session: SharedClientSession,
+        *,
+        cache_dir: Path | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self._http_session = http_session
+        self._cache = HTTPCache(cache_dir or get_share_dir() / "fetch-cache")
+
     @override
     async def __call__(self, params: Params) -> ToolReturnType:
         builder = ToolResultBuilder(max_line_length=None)
 
         try:
-            async with (
-                new_client_session() as session,
-                session.get(
-                    params.url,
-                    headers={
-                        "User-Agent": (
-                            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                            "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                        ),
-                    },
-                ) as response,
-            ):
-                if response.status >= 400:
-                    return builder.error(
-                        (
-                            f"Failed to fetch URL. Status: {response.status}. "
-                            f"This may indicate the page is not accessible or the server is down."
-                        ),
-                        brief=f"HTTP {response.status} error",
-                    )
-
-                html = await response.text()
+            page = await self._fetch(params.url)
+        except _HTTPError as e:
+            return builder.error(
+                (
+                    f"Failed to fetch URL. Status: {e.status}. "
+                    f"This may indicate the page is not accessible or the server is down."
+                ),
+                brief=f"HTTP {e.status} error",
+            )
         except aiohttp.ClientError as e:
             return builder.error(
                 (
@@ -55,20 +145,18 @@ class FetchURL(CallableTool2[Params]):
                 brief="Network error",
             )
 
-        if not html:
+        if not page.body:
             return builder.ok(
                 "The response body is empty.",
                 brief="Empty response body",
             )
 
-        extracted_text = trafilatura.extract(
-            html,
-            include_comments=True,
-            include_tables=True,
-            include_formatting=False,
-            output_format="txt",
-            with_metadata=True,
-        )
+        html: str | bytes = page.body
+        if page.charset is not None:
+            # with an unknown charset, let trafilatura detect the encoding
+            with contextlib.suppress(LookupError):
+                html = page.body.decode(page.charset, errors="replace")
+        extracted_text = await extract_in_pool(html)
 
         if not extracted_text:
             return builder.error(
@@ -81,15 +169,91 @@ class FetchURL(CallableTool2[Params]):
             )
 
         builder.write(extracted_text)
-        return builder.ok("The returned content is the main text content extracted from the page.")
+        message = "The returned content is the main text content extracted from the page."
+        if page.truncated:
+            message += (
+                f" The page is larger than {MAX_BODY_BYTES >> 20} MB, "
+                "only its beginning was extracted."
+            )
+        return builder.ok(message)
+
+    async def _fetch(self, url: str) -> _Page:
+        cached = await asyncio.to_thread(self._cache.get, url)
+        headers = {"User-Agent": _USER_AGENT}
+        if cached is not None:
+            entry, body = cached
+            if time.time() - entry.fetched_at < entry.ttl:
+                logger.debug("Using the cached response of {url}", url=url)
+                return _Page(body, entry.charset, entry.truncated)
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        async with self._http_session.session.get(url, headers=headers) as response:
+            if response.status == 304 and cached is not None:
+                logger.debug("The cached response of {url} is still valid", url=url)
+                entry, body = cached
+                ttl = _cache_ttl(response.headers.get("Cache-Control"))
+                if ttl is not None:
+                    entry = entry._replace(fetched_at=time.time(), ttl=ttl)
+                    await asyncio.to_thread(self._cache.put, entry)
+                return _Page(body, entry.charset, entry.truncated)
+            if response.status >= 400:
+                raise _HTTPError(response.status)
+
+            chunks: list[bytes] = []
+            size = 0
+            async for chunk in response.content.iter_chunked(64 << 10):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > MAX_BODY_BYTES:
+                    break
+            body = b"".join(chunks)
+            page = _Page(body[:MAX_BODY_BYTES], response.charset, len(body) > MAX_BODY_BYTES)
+
+            ttl = _cache_ttl(response.headers.get("Cache-Control"))
+            if response.status == 200 and ttl is not None:
+                entry = _CacheEntry(
+                    url=url,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                    charset=page.charset,
+                    truncated=page.truncated,
+                    fetched_at=time.time(),
+                    ttl=ttl,
+                )
+                await asyncio.to_thread(self._cache.put, entry, page.body)
+            return page
+
+
+class _HTTPError(Exception):
+    def __init__(self, status: int):
+        super().__init__(status)
+        self.status = status
+
+
+def _cache_ttl(cache_control: str | None) -> float | None:
+    """Seconds a response may be used without revalidation, `None` if it must not be stored."""
+    if cache_control is None:
+        return CACHE_TTL
+    directives = cache_control.lower()
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    if (match := _MAX_AGE.search(directives)) is not None:
+        return float(match.group(1))
+    return CACHE_TTL
 
 
 if __name__ == "__main__":
-    import asyncio
 
     async def main():
-        fetch_url_tool = FetchURL()
+        http_session = SharedClientSession()
+        fetch_url_tool = FetchURL(http_session)
         result = await fetch_url_tool(Params(url="https://trafilatura.readthedocs.io/en/latest/"))
         print(result)
+        await http_session.close()
 
     asyncio.run(main())
@@ -0,0 +1,319 @@
+import asyncio
+import re
+import time
+from collections import Counter
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, NamedTuple, override
+
+import aiohttp
+from kosong.tooling import CallableTool2, ToolReturnType
+from pydantic import BaseModel, Field
+
+from kimi_cli.soul.approval import Approval
+from kimi_cli.tools.utils import ToolRejectedError, ToolResultBuilder, load_desc
+from kimi_cli.tools.web.fetch import MAX_BODY_BYTES
+from kimi_cli.utils.aiohttp import SharedClientSession
+
+MAX_TIMEOUT = 5 * 60
+MAX_CONCURRENCY = 32
+MAX_BATCH_SIZE = 1000
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+"""Methods sent without approval, as they are not supposed to change anything on the server."""
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+
+
+class BatchRange(BaseModel):
+    name: str = Field(description="The name of the placeholder to fill with the numbers.")
+    start: int = Field(description="The first number.")
+    stop: int = Field(description="The last number, inclusive.")
+    step: int = Field(description="The difference between two numbers.", default=1, ge=1)
+
+
+class Params(BaseModel):
+    url: str = Field(
+        description=(
+            "The URL to request. In a batch, `{{name}}` placeholders are replaced "
+            "by the values of each request."
+        )
+    )
+    method: str = Field(
+        description="The HTTP method of the request.", default="GET", pattern=r"^[A-Za-z]+$"
+    )
+    headers: dict[str, str] = Field(
+        description="The headers of the request. Placeholders are replaced in a batch.",
+        default_factory=dict,
+    )
+    body: str | None = Field(
+        description="The body of the request. Placeholders are replaced in a batch.",
+        default=None,
+    )
+    follow_redirects: bool = Field(
+        description="Whether to follow redirects, instead of returning the redirect response.",
+        default=False,
+    )
+    verify_tls: bool = Field(
+        description="Whether to verify TLS certificates. Disable for self-signed certificates.",
+        default=True,
+    )
+    timeout: float = Field(
+        description="The timeout in seconds of each request.",
+        default=30,
+        gt=0,
+        le=MAX_TIMEOUT,
+    )
+    batch: list[dict[str, str]] | None = Field(
+        description=(
+            "Send one request per item, with the placeholders replaced by the values of the item, "
+            'e.g. `[{"user": "admin"}, {"user": "guest"}]`.'
+        ),
+        default=None,
+    )
+    batch_range: BatchRange | None = Field(
+        description="Send one request per number of a range, e.g. to enumerate IDs.",
+        default=None,
+    )
+    concurrency: int = Field(
+        description="The number of requests of a batch sent at the same time.",
+        default=16,
+        ge=1,
+        le=MAX_CONCURRENCY,
+    )
+
+
+class _Response(NamedTuple):
+    status: int
+    reason: str | None
+    headers: list[tuple[str, str]]
+    body: bytes
+    charset: str | None
+    truncated: bool
+
+    @property
+    def digest(self) -> str:
+        return sha256(self.body).hexdigest()[:8]
+
+
+class _Outcome(NamedTuple):
+    """A response of a batch, summarized so that its body is not kept, or the error instead."""
+
+    label: str
+    signature: str
+    """The status, length and hash of the body of the response, or the error."""
+    location: str | None = None
+    failed: bool = False
+
+    @staticmethod
+    def of_response(label: str, response: _Response) -> "_Outcome":
+        size = f"{len(response.body)}{'+' if response.truncated else ''} bytes"
+        return _Outcome(
+            label,
+            f"{response.status}  {size}  {response.digest}",
+            location=dict(response.headers).get("Location"),
+        )
+
+    @staticmethod
+    def of_error(label: str, error: str) -> "_Outcome":
+        return _Outcome(label, f"error: {error}", failed=True)
+
+
+class HttpRequest(CallableTool2[Params]):
+    name: str = "HttpRequest"
+    description: str = load_desc(
+        Path(__file__).parent / "http.md",
+        {"MAX_BATCH_SIZE": str(MAX_BATCH_SIZE), "MAX_CONCURRENCY": str(MAX_CONCURRENCY)},
+    )
+    params: type[Params] = Params
+
+    def __init__(self, http_session: SharedClientSession, approval: Approval, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._http_session = http_session
+        self._approval = approval
+
+    @override
+    async def __call__(self, params: Params) -> ToolReturnType:
+        builder = ToolResultBuilder()
+        method = params.method.upper()
+
+        if params.batch is not None and params.batch_range is not None:
+            return builder.error(
+                "Only one of `batch` and `batch_range` can be given.", brief="Invalid batch"
+            )
+        items = _batch_items(params)
+        if items is not None:
+            if not items:
+                return builder.error("The batch is empty.", brief="Empty batch")
+            if len(items) > MAX_BATCH_SIZE:
+                return builder.error(
+                    f"The batch has more than {MAX_BATCH_SIZE} requests. "
+                    "Split it into several calls.",
+                    brief="Batch too large",
+                )
+            templates = [params.url, params.body or "", *params.headers.values()]
+            missing = {
+                name
+                for template in templates
+                for name in _PLACEHOLDER.findall(template)
+                if any(name not in item for item in items)
+            }
+            if missing:
+                return builder.error(
+                    f"Placeholders without values in some items of the batch: "
+                    f"{', '.join(sorted(missing))}.",
+                    brief="Missing placeholder values",
+                )
+
+        if method not in SAFE_METHODS:
+            count = f" ({len(items)} requests)" if items is not None else ""
+            if not await self._approval.request(
+                self.name,
+                "send HTTP request",
+                f"Send `{method} {params.url}`{count}",
+            ):
+                return ToolRejectedError()
+
+        try:
+            if items is None:
+                return await self._single(method, params, builder)
+            return await self._batch(method, params, items, builder)
+        finally:
+            self._http_session.save_cookies()
+
+    async def _single(
+        self, method: str, params: Params, builder: ToolResultBuilder
+    ) -> ToolReturnType:
+        try:
+            response = await self._send(method, params, {})
+        except TimeoutError:
+            return builder.error(
+                f"The request timed out after {params.timeout} seconds.", brief="Timed out"
+            )
+        except aiohttp.ClientError as e:
+            return builder.error(
+                f"The request failed: {_describe_error(e)}.", brief="Network error"
+            )
+
+        builder.write(f"HTTP {response.status} {response.reason or ''}".rstrip() + "\n")
+        for name, value in response.headers:
+            builder.write(f"{name}: {value}\n")
+        builder.write("\n")
+        text = _decode(response)
+        if text is not None:
+            builder.write(text)
+        elif response.body:
+            builder.write(f"<binary body, sha256 {response.digest}>")
+
+        message = f"Status {response.status}, {len(response.body)} bytes."
+        if response.truncated:
+            message += f" The body is larger than {MAX_BODY_BYTES >> 20} MB and was truncated."
+        return builder.ok(message, brief=f"HTTP {response.status}")
+
+    async def _batch(
+        self,
+        method: str,
+        params: Params,
+        items: list[dict[str, str]],
+        builder: ToolResultBuilder,
+    ) -> ToolReturnType:
+        semaphore = asyncio.Semaphore(params.concurrency)
+
+        async def send(values: dict[str, str]) -> _Outcome:
+            label = " ".join(f"{name}={value}" for name, value in values.items())
+            async with semaphore:
+                try:
+                    return _Outcome.of_response(label, await self._send(method, params, values))
+                except TimeoutError:
+                    return _Outcome.of_error(label, "timed out")
+                except aiohttp.ClientError as e:
+                    return _Outcome.of_error(label, _describe_error(e))
+
+        started = time.monotonic()
+        outcomes = await asyncio.gather(*(send(item) for item in items))
+        elapsed = time.monotonic() - started
+
+        counts = Counter(outcome.signature for outcome in outcomes)
+        baseline, _ = counts.most_common(1)[0]
+        builder.write(
+            f"Sent {len(outcomes)} requests, {params.concurrency} at a time, in {elapsed:.2f}s.\n"
+        )
+        builder.write("\nResponses by status, length and hash of the body:\n")
+        for signature, count in counts.most_common():
+            builder.write(f"{count:>6} × {signature}\n")
+        if len(counts) > 1:
+            builder.write("\nResponses that differ from the most common one:\n")
+            for outcome in outcomes:
+                if outcome.signature == baseline:
+                    continue
+                line = f"{outcome.label}  {outcome.signature}"
+                if outcome.location:
+                    line += f"  -> {outcome.location}"
+                builder.write(line + "\n")
+
+        errors = sum(1 for outcome in outcomes if outcome.failed)
+        message = f"{len(outcomes)} requests, {len(counts)} distinct responses"
+        if errors:
+            message += f", {errors} failed"
+        return builder.ok(message + ".", brief=f"{len(outcomes)} requests")
+
+    async def _send(self, method: str, params: Params, values: dict[str, str]) -> _Response:
+        url = _fill(params.url, values)
+        headers = {name: _fill(value, values) for name, value in params.headers.items()}
+        body = _fill(params.body, values) if params.body is not None else None
+        async with self._http_session.session.request(
+            method,
+            url,
+            headers=headers,
+            data=body.encode("utf-8") if body is not None else None,
+            allow_redirects=params.follow_redirects,
+            ssl=params.verify_tls,
+            timeout=aiohttp.ClientTimeout(total=params.timeout),
+        ) as response:
+            chunks: list[bytes] = []
+            size = 0
+            async for chunk in response.content.iter_chunked(64 << 10):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size > MAX_BODY_BYTES:
+                    break
+            body_bytes = b"".join(chunks)
+            return _Response(
+                status=response.status,
+                reason=response.reason,
+                headers=list(response.headers.items()),
+                body=body_bytes[:MAX_BODY_BYTES],
+                charset=response.charset,
+                truncated=size > MAX_BODY_BYTES,
+            )
+
+
+def _batch_items(params: Params) -> list[dict[str, str]] | None:
+    if params.batch is not None:
+        return params.batch
+    if params.batch_range is not None:
+        r = params.batch_range
+        # bounded, so that a huge range is rejected without being built
+        numbers = range(r.start, r.stop + 1, r.step)[: MAX_BATCH_SIZE + 1]
+        return [{r.name: str(number)} for number in numbers]
+    return None
+
+
+def _fill(template: str, values: dict[str, str]) -> str:
+    if not values:
+        return template
+    return _PLACEHOLDER.sub(lambda match: values.get(match.group(1), match.group(0)), template)
+
+
+def _decode(response: _Response) -> str | None:
+    """The body as text, `None` if it looks binary."""
+    if b"\0" in response.body[:1024]:
+        return None
+    try:
+        return response.body.decode(response.charset or "utf-8", errors="replace")
+    except LookupError:
+        return response.body.decode("utf-8", errors="replace")
+
+
+def _describe_error(error: aiohttp.ClientError) -> str:
+    return str(error) or type(error).__name__
@@ -9,7 +9,7 @@ from kimi_cli.constant import USER_AGENT
 from kimi_cli.soul.toolset import get_current_tool_call_or_none
 from kimi_cli.tools import SkipThisTool
 from kimi_cli.tools.utils import ToolResultBuilder, load_desc
-from kimi_cli.utils.aiohttp import new_client_session
+from kimi_cli.utils.aiohttp import SharedClientSession
 
 
 class Params(BaseModel):
@@ -40,13 +40,14 @@ class SearchWeb(CallableTool2[Params]):
     description: str = load_desc(Path(__file__).parent / "search.md", {})
     params: type[Params] = Params
 
-    def __init__(self, config: Config, **kwargs: Any):
+    def __init__(self, config: Config, http_session: SharedClientSession, **kwargs: Any):
         super().__init__(**kwargs)
         if config.services.moonshot_search is None:
             raise SkipThisTool()
         self._base_url = config.services.moonshot_search.base_url
         self._api_key = config.services.moonshot_search.api_key.get_secret_value()
         self._custom_headers = config.services.moonshot_search.custom_headers or {}
+        self._http_session = http_session
 
     @override
     async def __call__(self, params: Params) -> ToolReturnType:
@@ -61,24 +62,21 @@ class SearchWeb(CallableTool2[Params]):
         tool_call = get_current_tool_call_or_none()
         assert tool_call is not None, "Tool call is expected to be set"
 
-        async with (
-            new_client_session() as session,
-            session.post(
-                self._base_url,
-                headers={
-                    "User-Agent": USER_AGENT,
-                    "Authorization": f"Bearer {self._api_key}",
-                    "X-Msh-Tool-Call-Id": tool_call.id,
-                    **self._custom_headers,
-                },
-                json={
-                    "text_query": params.query,
-                    "limit": params.limit,
-                    "enable_page_crawling": params.include_content,
-                    "timeout_seconds": 30,
-                },
-            ) as response,
-        ):
+        async with self._http_session.session.post(
+            self._base_url,
+            headers={
+                "User-Agent": USER_AGENT,
+                "Authorization": f"Bearer {self._api_key}",
+                "X-Msh-Tool-Call-Id": tool_call.id,
+                **self._custom_headers,
+            },
+            json={
+                "text_query": params.query,
+                "limit": params.limit,
+                "enable_page_crawling": params.include_content,
+                "timeout_seconds": 30,
+            },
+        ) as response:
             if response.status != 200:
                 return builder.error(
                     (
@@ -27,8 +27,12 @@ from kimi_cli.wire.message import (
     StepBegin,
     StepInterrupted,
     SubagentEvent,
+    ToolOutputChunk,
+    WireMessage,
 )
 
+MAX_STREAMED_OUTPUT_CHARS = 8192
+
 
 class _ToolCallState:
     """Manages the state of a single tool call for streaming updates."""
@@ -42,6 +46,8 @@ class _ToolCallState:
 
         self.tool_call = tool_call
         self.args = tool_call.function.arguments or ""
+        self.output = ""
+        """Tail of the output streamed while the tool is running."""
         self.lexer = streamingjson.Lexer()
         if tool_call.function.arguments is not None:
             self.lexer.append_string(tool_call.function.arguments)
@@ -51,6 +57,10 @@ class _ToolCallState:
         self.args += args_part
         self.lexer.append_string(args_part)
 
+    def append_output(self, text: str):
+        """Append streamed output, keeping only its tail."""
+        self.output = (self.output + text)[-MAX_STREAMED_OUTPUT_CHARS:]
+
     def get_title(self) -> str:
         """Get the current title with subtitle if available."""
         tool_name = self.tool_call.function.name
@@ -72,9 +82,13 @@ class _RunState:
 class ACPAgent:
     """Implementation of the ACP Agent protocol."""
 
-    def __init__(self, soul: Soul, connection: acp.AgentSideConnection):
+    def __init__(
+        self, soul: Soul, connection: acp.AgentSideConnection, *, text_window: float = 0.0
+    ):
         self.soul = soul
         self.connection = connection
+        self.text_window = text_window
+        """Seconds to wait for more text after a text delta, to send it in the same chunk."""
         self.session_id: str | None = None
         self.run_state: _RunState | None = None
 
@@ -178,8 +192,14 @@ class ACPAgent:
             self.run_state.cancel_event.set()
 
     async def _stream_events(self, wire: WireUISide):
+        pending: WireMessage | None = None
         while True:
-            msg = await wire.receive()
+            if pending is None:
+                msg = await wire.receive()
+            else:
+                msg, pending = pending, None
+            if self.text_window > 0 and isinstance(msg, TextPart | ThinkPart):
+                msg, pending = await self._gather_text(wire, msg)
 
             assert self.run_state is not None
             if isinstance(msg, ThinkPart) and not self.run_state.in_thinking:
@@ -211,6 +231,8 @@ class ACPAgent:
                     await self._send_tool_call(msg)
                 case ToolCallPart():
                     await self._send_tool_call_part(msg)
+                case ToolOutputChunk():
+                    await self._send_tool_output(msg)
                 case ToolResult():
                     await self._send_tool_result(msg)
                 case SubagentEvent():
@@ -218,6 +240,25 @@ class ACPAgent:
                 case ApprovalRequest():
                     await self._handle_approval_request(msg)
 
+    async def _gather_text(
+        self, wire: WireUISide, part: TextPart | ThinkPart
+    ) -> tuple[TextPart | ThinkPart, WireMessage | None]:
+        """
+        Merge the deltas of the same kind streamed within the text window after `part`.
+        Return the merged part, along with the first message that followed it, if any.
+        """
+        await asyncio.sleep(self.text_window)
+        texts = [part.text if isinstance(part, TextPart) else part.think]
+        while (msg := wire.receive_nowait()) is not None:
+            match part, msg:
+                case TextPart(), TextPart(text=text):
+                    texts.append(text)
+                case ThinkPart(), ThinkPart(think=think):
+                    texts.append(think)
+                case _:
+                    return _with_text(part, "".join(texts)), msg
+        return _with_text(part, "".join(texts)), None
+
     async def _send_text(self, text: str):
         """Send text chunk to client."""
         if not self.session_id:
@@ -293,6 +334,34 @@ class ACPAgent:
         )
         logger.debug("Sent tool call update: {delta}", delta=part.arguments_part[:50])
 
+    async def _send_tool_output(self, chunk: ToolOutputChunk):
+        """Send the output of a running tool so far."""
+        assert self.run_state is not None
+        if not self.session_id:
+            return
+
+        state = self.run_state.tool_calls.get(chunk.tool_call_id)
+        if state is None:
+            return
+        state.append_output(chunk.text)
+
+        update = acp.schema.ToolCallProgress(
+            sessionUpdate="tool_call_update",
+            toolCallId=state.acp_tool_call_id,
+            status="in_progress",
+            content=[
+                acp.schema.ContentToolCallContent(
+                    type="content",
+                    content=acp.schema.TextContentBlock(
+                        type="text", text=f"```\n{state.output}\n```"
+                    ),
+                )
+            ],
+        )
+        await self.connection.sessionUpdate(
+            acp.SessionNotification(sessionId=self.session_id, update=update)
+        )
+
     async def _send_tool_result(self, result: ToolResult):
         """Send tool result to client."""
         assert self.run_state is not None
@@ -442,11 +511,18 @@ def _tool_result_to_acp_content(
     return content
 
 
+def _with_text(part: TextPart | ThinkPart, text: str) -> TextPart | ThinkPart:
+    if isinstance(part, TextPart):
+        return part.model_copy(update={"text": text})
+    return part.model_copy(update={"think": text})
+
+
 class ACPServer:
     """ACP server using the official acp library."""
 
-    def __init__(self, soul: Soul):
+    def __init__(self, soul: Soul, *, text_window: float = 0.0):
         self.soul = soul
+        self.text_window = text_window
 
     async def run(self) -> bool:
         """Run the ACP server."""
@@ -457,7 +533,7 @@ class ACPServer:
 
         # Create connection - the library handles all JSON-RPC details!
         _ = acp.AgentSideConnection(
-            lambda conn: ACPAgent(self.soul, conn),
+            lambda conn: ACPAgent(self.soul, conn, text_window=self.text_window),
             writer,
             reader,
         )
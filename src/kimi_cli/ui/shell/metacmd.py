@@ -209,6 +209,7 @@ async def init(app: "ShellApp", args: list[str]):
         tmp_context = Context(file_backend=Path(temp_dir) / "context.jsonl")
         app.soul = KimiSoul(soul_bak._agent, soul_bak._runtime, context=tmp_context)
         ok = await app._run_soul_command(prompts.INIT, thinking=False)
+        await tmp_context.close()
 
         if ok:
             console.print(
@@ -228,6 +229,7 @@ async def init(app: "ShellApp", args: list[str]):
     await app.soul._context.append_message(
         Message(role="user", content=[system_message])
     )
+    await app.soul._context.flush()
 
 
 @meta_command(aliases=["reset"], kimi_soul_only=True)
@@ -19,7 +19,7 @@ from kimi_cli.soul import StatusSnapshot
 from kimi_cli.tools import extract_key_argument
 from kimi_cli.ui.shell.console import console
 from kimi_cli.ui.shell.keyboard import KeyEvent, listen_for_keyboard
-from kimi_cli.utils.rich.markdown import Markdown
+from kimi_cli.utils.rich.markdown import Markdown, MarkdownStream
 from kimi_cli.wire import WireUISide
 from kimi_cli.wire.message import (
     ApprovalRequest,
@@ -30,10 +30,13 @@ from kimi_cli.wire.message import (
     StepBegin,
     StepInterrupted,
     SubagentEvent,
+    ToolOutputChunk,
     WireMessage,
 )
 
 MAX_SUBAGENT_TOOL_CALLS_TO_SHOW = 4
+MAX_OUTPUT_LINES_TO_SHOW = 5
+MAX_OUTPUT_CHARS_TO_KEEP = 4096
 
 
 async def visualize(
@@ -58,22 +61,29 @@ class _ContentBlock:
     def __init__(self, is_think: bool):
         self.is_think = is_think
         self._spinner = Spinner("dots", "Thinking..." if is_think else "Composing...")
-        self.raw_text = ""
+        self._markdown = MarkdownStream(style="grey50 italic" if is_think else "")
+        self._has_bullet = False
 
     def compose(self) -> RenderableType:
         return self._spinner
 
-    def compose_final(self) -> RenderableType:
-        return _with_bullet(
-            Markdown(
-                self.raw_text,
-                style="grey50 italic" if self.is_think else "",
-            ),
-            bullet_style="grey50",
-        )
+    def compose_final(self) -> RenderableType | None:
+        """The rest of the content, after the complete blocks returned by `append`."""
+        if (renderable := self._markdown.finish()) is None:
+            return None
+        return self._with_bullet(renderable)
+
+    def append(self, content: str) -> RenderableType | None:
+        """Append streamed content, returning the blocks of it that are complete, if any."""
+        if (renderable := self._markdown.append(content)) is None:
+            return None
+        return self._with_bullet(renderable)
 
-    def append(self, content: str) -> None:
-        self.raw_text += content
+    def _with_bullet(self, renderable: RenderableType) -> RenderableType:
+        # the blocks printed after the first one only get the indent
+        bullet = Text("") if self._has_bullet else None
+        self._has_bullet = True
+        return _with_bullet(renderable, bullet_style="grey50", bullet=bullet)
 
 
 class _ToolCallBlock:
@@ -89,6 +99,8 @@ class _ToolCallBlock:
 
         self._argument = extract_key_argument(self._lexer, self._tool_name)
         self._result: ToolReturnType | None = None
+        self._output = ""
+        """Tail of the output streamed while the tool is running."""
 
         self._ongoing_subagent_tool_calls: dict[str, ToolCall] = {}
         self._last_subagent_tool_call: ToolCall | None = None
@@ -120,6 +132,12 @@ class _ToolCallBlock:
                 bullet=self._spinning_dots,
             )
 
+    def append_output(self, text: str):
+        if self.finished:
+            return
+        self._output = (self._output + text)[-MAX_OUTPUT_CHARS_TO_KEEP:]
+        self._renderable = self._compose()
+
     def finish(self, result: ToolReturnType):
         self._result = result
         self._renderable = self._compose()
@@ -183,6 +201,12 @@ class _ToolCallBlock:
                 )
             )
 
+        if not self.finished and self._output:
+            output_lines = self._output.rstrip("\n").splitlines()[-MAX_OUTPUT_LINES_TO_SHOW:]
+            lines.append(
+                Text("\n".join(output_lines), style="grey50", no_wrap=True, overflow="ellipsis")
+            )
+
         if self._result is not None and self._result.brief:
             lines.append(
                 Markdown(
@@ -265,8 +289,10 @@ class _StatusBlock:
     def render(self) -> RenderableType:
         return self.text
 
-    def update(self, status: StatusSnapshot) -> None:
+    def update(self, status: StatusSnapshot, tokens_pruned: int | None = None) -> None:
         self.text.plain = f"context: {status.context_usage:.1%}"
+        if tokens_pruned:
+            self.text.plain += f" (pruned {tokens_pruned:,} tokens of old tool outputs)"
 
 
 @asynccontextmanager
@@ -376,14 +402,16 @@ class _LiveView:
             case CompactionEnd():
                 self._compacting_spinner = None
                 self.refresh_soon()
-            case StatusUpdate(status=status):
-                self._status_block.update(status)
+            case StatusUpdate(status=status, tokens_pruned=tokens_pruned):
+                self._status_block.update(status, tokens_pruned)
             case ContentPart():
                 self.append_content(msg)
             case ToolCall():
                 self.append_tool_call(msg)
             case ToolCallPart():
                 self.append_tool_call_part(msg)
+            case ToolOutputChunk():
+                self.append_tool_output(msg)
             case ToolResult():
                 self.append_tool_result(msg)
             case ApprovalRequest():
@@ -454,7 +482,8 @@ class _LiveView:
     def flush_content(self) -> None:
         """Flush the current content block."""
         if self._current_content_block is not None:
-            console.print(self._current_content_block.compose_final())
+            if (renderable := self._current_content_block.compose_final()) is not None:
+                console.print(renderable)
             self._current_content_block = None
             self.refresh_soon()
 
@@ -485,7 +514,9 @@ class _LiveView:
                     self.flush_content()
                     self._current_content_block = _ContentBlock(is_think)
                     self.refresh_soon()
-                self._current_content_block.append(text)
+                if (renderable := self._current_content_block.append(text)) is not None:
+                    # print the complete blocks above the live view, rendering each of them once
+                    console.print(renderable)
             case _:
                 # TODO: support more content part types
                 pass
@@ -504,6 +535,11 @@ class _LiveView:
         self._last_tool_call_block.append_args_part(part.arguments_part)
         self.refresh_soon()
 
+    def append_tool_output(self, chunk: ToolOutputChunk) -> None:
+        if block := self._tool_call_blocks.get(chunk.tool_call_id):
+            block.append_output(chunk.text)
+            self.refresh_soon()
+
     def append_tool_result(self, result: ToolResult) -> None:
         if block := self._tool_call_blocks.get(result.tool_call_id):
             block.finish(result.result)
@@ -1,14 +1,13 @@
 import asyncio
 import contextlib
-import json
 from collections.abc import Awaitable, Callable
 from typing import Any, Literal
 
 import acp  # pyright: ignore[reportMissingTypeStubs]
 from kosong.chat_provider import ChatProviderError
-from pydantic import ValidationError
 
 from kimi_cli.soul import LLMNotSet, LLMNotSupported, MaxStepsReached, RunCancelled, Soul, run_soul
+from kimi_cli.soul.kimisoul import KimiSoul
 from kimi_cli.utils.logging import logger
 from kimi_cli.wire import WireUISide
 from kimi_cli.wire.message import (
@@ -20,26 +19,39 @@ from kimi_cli.wire.message import (
 )
 
 from .jsonrpc import (
-    JSONRPC_MESSAGE_ADAPTER,
     JSONRPC_VERSION,
     JSONRPCErrorResponse,
+    JSONRPCMessage,
     JSONRPCRequest,
     JSONRPCSuccessResponse,
+    decode_jsonrpc_line,
+    encode_jsonrpc,
+    encode_jsonrpc_batch,
 )
 
 _ResultKind = Literal["ok", "error"]
 
 
+type SessionOpener = Callable[[str | None], Awaitable[tuple[str, Soul] | None]]
+"""
+Opens a new session when given `None`, else the existing session with the given ID, and returns
+its ID along with its soul, or `None` if there is no such session.
+"""
+
+
 class _SoulRunner:
     def __init__(
         self,
         soul: Soul,
         send_event: Callable[[Event], Awaitable[None]],
         request_approval: Callable[[ApprovalRequest], Awaitable[ApprovalResponse]],
+        slots: asyncio.Semaphore | None = None,
     ):
         self._soul = soul
         self._send_event = send_event
         self._request_approval = request_approval
+        self._slots = slots
+        """Shared by the runners of all sessions, to cap the runs executed at the same time."""
         self._cancel_event: asyncio.Event | None = None
         self._task: asyncio.Task[tuple[_ResultKind, Any]] | None = None
 
@@ -72,14 +84,56 @@ class _SoulRunner:
             self._task = None
             self._cancel_event = None
 
+    async def close(self) -> None:
+        """Stop the run, if any, and release the resources of the soul, e.g. its history file."""
+        await self.shutdown()
+        if isinstance(self._soul, KimiSoul):
+            await self._soul.close()
+
     async def _run(self, user_input: str) -> tuple[_ResultKind, Any]:
         assert self._cancel_event is not None
+        if self._slots is None:
+            return await self._run_soul(user_input, self._cancel_event)
+        if not await self._acquire_slot(self._slots, self._cancel_event):
+            return ("ok", {"status": "cancelled"})
+        try:
+            return await self._run_soul(user_input, self._cancel_event)
+        finally:
+            self._slots.release()
+
+    @staticmethod
+    async def _acquire_slot(slots: asyncio.Semaphore, cancel_event: asyncio.Event) -> bool:
+        """Wait for a free slot, unless the run is cancelled first."""
+        if cancel_event.is_set():
+            return False
+        acquire_task = asyncio.create_task(slots.acquire())
+        cancel_event_task = asyncio.create_task(cancel_event.wait())
+        acquired = False
+        try:
+            await asyncio.wait(
+                [acquire_task, cancel_event_task],
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            acquired = acquire_task.done()
+        finally:
+            cancel_event_task.cancel()
+            if not acquired and not acquire_task.cancel():
+                # acquired while this task was being cancelled
+                slots.release()
+        if acquired and cancel_event.is_set():
+            slots.release()
+            return False
+        return acquired
+
+    async def _run_soul(
+        self, user_input: str, cancel_event: asyncio.Event
+    ) -> tuple[_ResultKind, Any]:
         try:
             await run_soul(
                 self._soul,
                 user_input,
                 self._ui_loop,
-                self._cancel_event,
+                cancel_event,
             )
         except LLMNotSet:
             return ("error", (-32001, "LLM is not configured"))
@@ -110,29 +164,71 @@ class _SoulRunner:
 
 
 class WireServer:
-    def __init__(self, soul: Soul):
+    """
+    A JSON-RPC server on stdio that hosts sessions, each with a soul.
+
+    The soul given on creation is the default session, the target of the requests that name none.
+    More sessions are created, attached to or closed with the `session/*` methods, if the server
+    is given a way to open them. The runs of different sessions are executed at the same time, up
+    to `max_concurrent_runs` of them, and each can be interrupted on its own. The events and
+    approval requests sent to the client name the session they come from.
+
+    Messages are written to the client one per line, unless `batch_size` is more than 1. Then
+    the messages queued at the time, and those that follow within `batch_window` seconds, are
+    written as one JSON-RPC batch, up to `batch_size` of them. Batches are accepted from the
+    client either way.
+    """
+
+    def __init__(
+        self,
+        soul: Soul,
+        *,
+        session_id: str = "default",
+        open_session: SessionOpener | None = None,
+        max_concurrent_runs: int = 4,
+        batch_size: int = 1,
+        batch_window: float = 0.0,
+    ):
         self._reader: asyncio.StreamReader | None = None
         self._writer: asyncio.StreamWriter | None = None
         self._write_task: asyncio.Task[None] | None = None
         self._send_queue: asyncio.Queue[dict[str, Any]] = asyncio.Queue()
         self._pending_requests: dict[str, ApprovalRequest] = {}
-        self._runner = _SoulRunner(
-            soul,
-            send_event=self._send_event,
-            request_approval=self._request_approval,
-        )
+        self._request_tasks: set[asyncio.Task[None]] = set()
+        self._open_session = open_session
+        self._slots = asyncio.Semaphore(max_concurrent_runs)
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._default_session_id = session_id
+        self._runners: dict[str, _SoulRunner] = {}
+        self._add_session(session_id, soul)
 
     async def run(self) -> bool:
         logger.info("Starting Wire server on stdio")
 
-        self._reader, self._writer = await acp.stdio_streams()
+        reader, writer = await acp.stdio_streams()
+        await self.serve(reader, writer)
+        return True
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve the client on the given streams until it closes its end."""
+        self._reader, self._writer = reader, writer
         self._write_task = asyncio.create_task(self._write_loop())
         try:
             await self._read_loop()
         finally:
             await self._shutdown()
 
-        return True
+    def _add_session(self, session_id: str, soul: Soul) -> _SoulRunner:
+        async def send_event(event: Event) -> None:
+            await self._send_event(session_id, event)
+
+        async def request_approval(request: ApprovalRequest) -> ApprovalResponse:
+            return await self._request_approval(session_id, request)
+
+        runner = _SoulRunner(soul, send_event, request_approval, self._slots)
+        self._runners[session_id] = runner
+        return runner
 
     async def _read_loop(self) -> None:
         assert self._reader is not None
@@ -144,32 +240,29 @@ class WireServer:
                 break
 
             try:
-                payload = json.loads(line.decode("utf-8"))
-            except json.JSONDecodeError:
+                messages = decode_jsonrpc_line(line)
+            except ValueError:
                 logger.warning("Invalid JSON line: {line}", line=line)
                 continue
 
-            await self._dispatch(payload)
-
-    async def _dispatch(self, payload: dict[str, Any]) -> None:
-        version = payload.get("jsonrpc")
-        if version != JSONRPC_VERSION:
-            logger.warning("Unexpected jsonrpc version: {version}", version=version)
-            return
-
-        try:
-            message = JSONRPC_MESSAGE_ADAPTER.validate_python(payload)
-        except ValidationError as e:
-            logger.warning(
-                "Ignoring malformed JSON-RPC payload: {message}; error={error}",
-                message=payload,
-                error=str(e),
-            )
-            return
-
+            for message in messages:
+                if isinstance(message, ValueError):
+                    logger.warning(
+                        "Ignoring malformed JSON-RPC payload: {line}; error={error}",
+                        line=line,
+                        error=str(message),
+                    )
+                    continue
+                await self._dispatch(message)
+
+    async def _dispatch(self, message: JSONRPCMessage) -> None:
         match message:
             case JSONRPCRequest():
-                await self._handle_request(message)
+                # handled in a task of its own, so that the requests and the responses that
+                # follow, e.g. to interrupt the run or to answer its approval requests, are read
+                task = asyncio.create_task(self._handle_request(message))
+                self._request_tasks.add(task)
+                task.add_done_callback(self._request_tasks.discard)
             case JSONRPCSuccessResponse() | JSONRPCErrorResponse():
                 await self._handle_response(message)
 
@@ -178,14 +271,27 @@ class WireServer:
         msg_id = message.id
         params = message.params
 
-        if method == "run":
-            await self._handle_run(msg_id, params)
-        elif method == "interrupt":
-            await self._handle_interrupt(msg_id)
-        else:
-            logger.warning("Unknown method: {method}", method=method)
-            if msg_id is not None:
+        try:
+            if method == "run":
+                await self._handle_run(msg_id, params)
+            elif method == "interrupt":
+                await self._handle_interrupt(msg_id, params)
+            elif method == "session/create":
+                await self._handle_session_open(msg_id, None)
+            elif method == "session/attach":
+                session_id = params.get("session_id")
+                if not isinstance(session_id, str):
+                    await self._send_error(msg_id, -32602, "`session_id` must be a string")
+                    return
+                await self._handle_session_open(msg_id, session_id)
+            elif method == "session/close":
+                await self._handle_session_close(msg_id, params)
+            else:
+                logger.warning("Unknown method: {method}", method=method)
                 await self._send_error(msg_id, -32601, f"Unknown method: {method}")
+        except Exception:
+            logger.exception("Failed to handle request {method}:", method=method)
+            await self._send_error(msg_id, -32603, f"Internal error handling {method}")
 
     async def _handle_response(
         self,
@@ -210,12 +316,23 @@ class WireServer:
         finally:
             self._pending_requests.pop(msg_id, None)
 
+    async def _get_runner(self, msg_id: Any, params: dict[str, Any]) -> _SoulRunner | None:
+        """Get the runner of the session named by the params, sending an error if there is none."""
+        session_id = params.get("session_id", self._default_session_id)
+        runner = self._runners.get(session_id) if isinstance(session_id, str) else None
+        if runner is None:
+            await self._send_error(msg_id, -32004, f"Session not found: {session_id}")
+        return runner
+
     async def _handle_run(self, msg_id: Any, params: dict[str, Any]) -> None:
         if msg_id is None:
             logger.warning("Run notification ignored")
             return
 
-        if self._runner.is_running:
+        runner = await self._get_runner(msg_id, params)
+        if runner is None:
+            return
+        if runner.is_running:
             await self._send_error(msg_id, -32000, "Run already in progress")
             return
 
@@ -227,7 +344,7 @@ class WireServer:
             return
 
         try:
-            kind, payload = await self._runner.run(user_input)
+            kind, payload = await runner.run(user_input)
         except RuntimeError:
             await self._send_error(msg_id, -32000, "Run already in progress")
             return
@@ -238,26 +355,70 @@ class WireServer:
         else:
             await self._send_response(msg_id, payload)
 
-    async def _handle_interrupt(self, msg_id: Any) -> None:
-        if not self._runner.is_running:
-            if msg_id is not None:
-                await self._send_response(msg_id, {"status": "idle"})
+    async def _handle_interrupt(self, msg_id: Any, params: dict[str, Any]) -> None:
+        runner = await self._get_runner(msg_id, params)
+        if runner is None:
+            return
+        if not runner.is_running:
+            await self._send_response(msg_id, {"status": "idle"})
             return
 
-        await self._runner.interrupt()
-        if msg_id is not None:
-            await self._send_response(msg_id, {"status": "ok"})
+        await runner.interrupt()
+        await self._send_response(msg_id, {"status": "ok"})
 
-    async def _send_event(self, event: Event) -> None:
-        await self._send_notification("event", serialize_event(event))
+    async def _handle_session_open(self, msg_id: Any, session_id: str | None) -> None:
+        if session_id is not None and (runner := self._runners.get(session_id)) is not None:
+            status = "running" if runner.is_running else "idle"
+            await self._send_response(msg_id, {"session_id": session_id, "status": status})
+            return
+        if self._open_session is None:
+            await self._send_error(msg_id, -32005, "Sessions cannot be opened by this server")
+            return
 
-    async def _request_approval(self, request: ApprovalRequest) -> ApprovalResponse:
+        try:
+            opened = await self._open_session(session_id)
+        except Exception as e:
+            logger.exception("Failed to open session:")
+            await self._send_error(msg_id, -32005, f"Failed to open session: {e}")
+            return
+        if opened is None:
+            await self._send_error(msg_id, -32004, f"Session not found: {session_id}")
+            return
+
+        session_id, soul = opened
+        # the session may have been attached to by another request in the meantime
+        runner = self._runners.get(session_id) or self._add_session(session_id, soul)
+        logger.info("Opened session: {session_id}", session_id=session_id)
+        status = "running" if runner.is_running else "idle"
+        await self._send_response(msg_id, {"session_id": session_id, "status": status})
+
+    async def _handle_session_close(self, msg_id: Any, params: dict[str, Any]) -> None:
+        session_id = params.get("session_id")
+        runner = self._runners.pop(session_id, None) if isinstance(session_id, str) else None
+        if runner is None:
+            await self._send_error(msg_id, -32004, f"Session not found: {session_id}")
+            return
+
+        await runner.close()
+        logger.info("Closed session: {session_id}", session_id=session_id)
+        await self._send_response(msg_id, {"status": "closed"})
+
+    async def _send_event(self, session_id: str, event: Event) -> None:
+        await self._send_notification("event", {**serialize_event(event), "session_id": session_id})
+
+    async def _request_approval(
+        self, session_id: str, request: ApprovalRequest
+    ) -> ApprovalResponse:
         self._pending_requests[request.id] = request
 
         await self._send_request(
             request.id,
             "request",
-            {"type": "approval", "payload": serialize_approval_request(request)},
+            {
+                "type": "approval",
+                "payload": serialize_approval_request(request),
+                "session_id": session_id,
+            },
         )
 
         try:
@@ -285,8 +446,11 @@ class WireServer:
                 except asyncio.QueueShutDown:
                     logger.debug("Send queue shut down, stopping Wire server write loop")
                     break
-                data = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
-                self._writer.write(data.encode("utf-8") + b"\n")
+                if self._batch_size > 1:
+                    data = encode_jsonrpc_batch(await self._collect_batch(payload))
+                else:
+                    data = encode_jsonrpc(payload)
+                self._writer.write(data + b"\n")
                 await self._writer.drain()
         except asyncio.CancelledError:
             raise
@@ -294,6 +458,22 @@ class WireServer:
             logger.exception("Wire server write loop error:")
             raise
 
+    async def _collect_batch(self, first: dict[str, Any]) -> list[bytes]:
+        """Encode the first message of a batch along with the ones that join it."""
+        batch = [encode_jsonrpc(first)]
+        waited = self._batch_window <= 0
+        while len(batch) < self._batch_size:
+            try:
+                batch.append(encode_jsonrpc(self._send_queue.get_nowait()))
+            except asyncio.QueueEmpty:
+                if waited:
+                    break
+                waited = True
+                await asyncio.sleep(self._batch_window)
+            except asyncio.QueueShutDown:
+                break
+        return batch
+
     async def _send_notification(self, method: str, params: Any) -> None:
         await self._enqueue_payload(
             {"jsonrpc": JSONRPC_VERSION, "method": method, "params": params}
@@ -305,9 +485,13 @@ class WireServer:
         )
 
     async def _send_response(self, msg_id: Any, result: Any) -> None:
+        if msg_id is None:
+            return
         await self._enqueue_payload({"jsonrpc": JSONRPC_VERSION, "id": msg_id, "result": result})
 
     async def _send_error(self, msg_id: Any, code: int, message: str) -> None:
+        if msg_id is None:
+            return
         await self._enqueue_payload(
             {"jsonrpc": JSONRPC_VERSION, "id": msg_id, "error": {"code": code, "message": message}}
         )
@@ -319,7 +503,11 @@ class WireServer:
             logger.debug("Send queue shut down; dropping payload: {payload}", payload=payload)
 
     async def _shutdown(self) -> None:
-        await self._runner.shutdown()
+        runners, self._runners = list(self._runners.values()), {}
+        await asyncio.gather(*(runner.close() for runner in runners))
+        for task in list(self._request_tasks):
+            task.cancel()
+        await asyncio.gather(*self._request_tasks, return_exceptions=True)
         self._send_queue.shutdown()
 
         if self._write_task is not None:
@@ -1,6 +1,7 @@
 from typing import Any, Literal
 
-from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+import pydantic_core
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError
 
 JSONRPC_VERSION = "2.0"
 
@@ -38,6 +39,47 @@ class JSONRPCErrorResponse(_ResponseBase):
 JSONRPCMessage = JSONRPCRequest | JSONRPCSuccessResponse | JSONRPCErrorResponse
 JSONRPC_MESSAGE_ADAPTER = TypeAdapter[JSONRPCMessage](JSONRPCMessage)
 
+
+def decode_jsonrpc_line(line: bytes) -> list[JSONRPCMessage | ValueError]:
+    """
+    Decode a line holding a JSON-RPC message, or a batch of them, parsing and validating it in
+    one pass for a single message. Each message that is not valid is replaced by the error.
+
+    Raises:
+        ValueError: When the line is not valid JSON, or a batch is not valid as a whole.
+    """
+    if not line.lstrip().startswith(b"["):
+        try:
+            return [JSONRPC_MESSAGE_ADAPTER.validate_json(line)]
+        except ValidationError as e:
+            if any(error["type"] == "json_invalid" for error in e.errors()):
+                raise ValueError(f"Invalid JSON: {line!r}") from e
+            return [e]
+
+    batch = pydantic_core.from_json(line)
+    if not isinstance(batch, list) or not batch:
+        raise ValueError(f"Invalid batch: {line!r}")
+    messages: list[JSONRPCMessage | ValueError] = []
+    for payload in batch:
+        try:
+            messages.append(JSONRPC_MESSAGE_ADAPTER.validate_python(payload))
+        except ValidationError as e:
+            messages.append(e)
+    return messages
+
+
+def encode_jsonrpc(payload: dict[str, Any]) -> bytes:
+    """Encode a JSON-RPC message, without escaping non-ASCII characters."""
+    return pydantic_core.to_json(payload)
+
+
+def encode_jsonrpc_batch(encoded: list[bytes]) -> bytes:
+    """Join messages encoded by `encode_jsonrpc` into a batch, or leave a single one as is."""
+    if len(encoded) == 1:
+        return encoded[0]
+    return b"[" + b",".join(encoded) + b"]"
+
+
 __all__ = [
     "JSONRPCRequest",
     "JSONRPCSuccessResponse",
@@ -45,4 +87,7 @@ __all__ = [
     "JSONRPCErrorResponse",
     "JSONRPCMessage",
     "JSONRPC_MESSAGE_ADAPTER",
+    "decode_jsonrpc_line",
+    "encode_jsonrpc",
+    "encode_jsonrpc_batch",
 ]
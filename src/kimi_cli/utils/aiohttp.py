@@ -1,10 +1,97 @@
+import asyncio
 import ssl
+from pathlib import Path
 
 import aiohttp
 import certifi
 
+from kimi_cli.utils.logging import logger
+
 _ssl_context = ssl.create_default_context(cafile=certifi.where())
 
 
 def new_client_session() -> aiohttp.ClientSession:
     return aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=_ssl_context))
+
+
+class SharedClientSession:
+    """
+    A client session shared by all the HTTP requests of a runtime, so that connections, DNS
+    lookups and TLS sessions are reused across tool calls.
+
+    The underlying session is created on first use in the running event loop, and must be
+    closed with `close`. Requests must not close the session, i.e. use `session.get(...)` but
+    not `async with session`.
+
+    Cookies set by responses are sent along with the later requests of the session. Cookies of IP
+    address hosts are kept too, as targets of security testing are often addressed that way. With
+    a `cookie_file`, cookies are loaded from the file when the session is created and saved to it
+    by `save_cookies` and `close`.
+    """
+
+    def __init__(
+        self,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 32,
+        dns_cache_ttl: int = 300,
+        keepalive_timeout: float = 30.0,
+        cookie_file: Path | None = None,
+    ):
+        self._limit = limit
+        self._limit_per_host = limit_per_host
+        self._dns_cache_ttl = dns_cache_ttl
+        self._keepalive_timeout = keepalive_timeout
+        self._cookie_file = cookie_file
+        self._session: aiohttp.ClientSession | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed or self._loop is not loop:
+            # the session of a previous event loop cannot be used, nor closed, anymore
+            self.save_cookies()
+            cookie_jar = aiohttp.CookieJar(unsafe=True)
+            if self._cookie_file is not None and self._cookie_file.exists():
+                try:
+                    cookie_jar.load(self._cookie_file)
+                except Exception as e:
+                    logger.warning(
+                        "Ignoring invalid cookie file {file}: {error}",
+                        file=self._cookie_file,
+                        error=e,
+                    )
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    ssl=_ssl_context,
+                    limit=self._limit,
+                    limit_per_host=self._limit_per_host,
+                    ttl_dns_cache=self._dns_cache_ttl,
+                    keepalive_timeout=self._keepalive_timeout,
+                ),
+                cookie_jar=cookie_jar,
+            )
+            self._loop = loop
+        return self._session
+
+    def save_cookies(self):
+        """Save the cookies of the session to the cookie file, if any."""
+        if self._cookie_file is None or self._session is None:
+            return
+        cookie_jar = self._session.cookie_jar
+        if not isinstance(cookie_jar, aiohttp.CookieJar):
+            return
+        try:
+            self._cookie_file.parent.mkdir(parents=True, exist_ok=True)
+            cookie_jar.save(self._cookie_file)
+        except OSError as e:
+            logger.warning(
+                "Failed to save cookies to {file}: {error}", file=self._cookie_file, error=e
+            )
+
+    async def close(self):
+        self.save_cookies()
+        session, self._session = self._session, None
+        if session is not None and self._loop is asyncio.get_running_loop():
+            await session.close()
@@ -0,0 +1,118 @@
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+from kimi_cli.utils.logging import logger
+
+
+class _Rule(NamedTuple):
+    regex: re.Pattern[str]
+    negated: bool
+    dir_only: bool
+
+
+class GitIgnore:
+    """
+    Rules of a `.gitignore` file, matched against paths relative to the directory holding it.
+
+    Supports comments, `!` negation, trailing `/` for directories, anchoring with a leading or
+    inner `/`, and `*`, `?`, `[...]` and `**` wildcards.
+    """
+
+    def __init__(self, base: str, lines: list[str]):
+        self.base = base
+        """The directory the rules are relative to."""
+        self._rules: list[_Rule] = []
+        for line in lines:
+            if rule := _parse_rule(line):
+                self._rules.append(rule)
+
+    @classmethod
+    def load(cls, directory: str) -> "GitIgnore | None":
+        """Load the `.gitignore` file of a directory, if there is a readable one."""
+        try:
+            text = Path(directory, ".gitignore").read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        gitignore = cls(directory, text.splitlines())
+        return gitignore if gitignore._rules else None
+
+    def match(self, rel_path: str, is_dir: bool) -> bool | None:
+        """
+        Match a `/`-separated path relative to `base`.
+
+        Returns:
+            `True` if the path is ignored, `False` if it is explicitly re-included by a negated
+            rule, and `None` if no rule matches.
+        """
+        for rule in reversed(self._rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.fullmatch(rel_path):
+                return not rule.negated
+        return None
+
+
+def _parse_rule(line: str) -> _Rule | None:
+    line = line.rstrip("\n\r")
+    # trailing spaces are ignored unless escaped
+    while line.endswith(" ") and not line.endswith("\\ "):
+        line = line[:-1]
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated or line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    line = line.lstrip("/")
+    try:
+        regex = re.compile(("" if anchored else "(?:.*/)?") + _translate(line))
+    except re.error:
+        logger.debug("Skipping invalid .gitignore pattern: {line}", line=line)
+        return None
+    return _Rule(regex, negated, dir_only)
+
+
+def _translate(pattern: str) -> str:
+    """Translate a gitignore pattern to a regex matching `/`-separated paths."""
+    parts: list[str] = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i) and (i == 0 or pattern[i - 1] == "/"):
+                if i + 2 == n:
+                    parts.append(".*")
+                    i += 2
+                    continue
+                if pattern[i + 2] == "/":
+                    parts.append("(?:.*/)?")
+                    i += 3
+                    continue
+            while i < n and pattern[i] == "*":
+                i += 1
+            parts.append("[^/]*")
+            continue
+        if c == "?":
+            parts.append("[^/]")
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+            if end == -1:
+                parts.append(re.escape(c))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body.replace('\\', '\\\\')}]")
+                i = end
+        elif c == "\\" and i + 1 < n:
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return "".join(parts)
@@ -3,6 +3,91 @@ from pathlib import Path
 
 import aiofiles.os
 
+_IGNORED_NAME_GROUPS: dict[str, tuple[str, ...]] = {
+    "vcs_metadata": (".DS_Store", ".bzr", ".git", ".hg", ".svn"),
+    "tooling_caches": (
+        ".build",
+        ".cache",
+        ".coverage",
+        ".fleet",
+        ".gradle",
+        ".idea",
+        ".ipynb_checkpoints",
+        ".pnpm-store",
+        ".pytest_cache",
+        ".pub-cache",
+        ".ruff_cache",
+        ".swiftpm",
+        ".tox",
+        ".venv",
+        ".vs",
+        ".vscode",
+        ".yarn",
+        ".yarn-cache",
+    ),
+    "js_frontend": (
+        ".next",
+        ".nuxt",
+        ".parcel-cache",
+        ".svelte-kit",
+        ".turbo",
+        ".vercel",
+        "node_modules",
+    ),
+    "python_packaging": (
+        "__pycache__",
+        "build",
+        "coverage",
+        "dist",
+        "htmlcov",
+        "pip-wheel-metadata",
+        "venv",
+    ),
+    "java_jvm": (".mvn", "out", "target"),
+    "dotnet_native": ("bin", "cmake-build-debug", "cmake-build-release", "obj"),
+    "bazel_buck": ("bazel-bin", "bazel-out", "bazel-testlogs", "buck-out"),
+    "misc_artifacts": (
+        ".dart_tool",
+        ".serverless",
+        ".stack-work",
+        ".terraform",
+        ".terragrunt-cache",
+        "DerivedData",
+        "Pods",
+        "deps",
+        "tmp",
+        "vendor",
+    ),
+}
+_IGNORED_NAMES = frozenset(name for group in _IGNORED_NAME_GROUPS.values() for name in group)
+_IGNORED_PATTERN_PARTS: tuple[str, ...] = (
+    r".*_cache$",
+    r".*-cache$",
+    r".*\.egg-info$",
+    r".*\.dist-info$",
+    r".*\.py[co]$",
+    r".*\.class$",
+    r".*\.sw[po]$",
+    r".*~$",
+    r".*\.(?:tmp|bak)$",
+)
+_IGNORED_PATTERNS = re.compile(
+    "|".join(f"(?:{part})" for part in _IGNORED_PATTERN_PARTS),
+    re.IGNORECASE,
+)
+
+
+def is_ignored_name(name: str) -> bool:
+    """
+    Check whether a file or directory name is VCS metadata, a cache or a build artifact, which
+    are skipped when listing or searching a project.
+    """
+    if not name:
+        return True
+    if name in _IGNORED_NAMES:
+        return True
+    return bool(_IGNORED_PATTERNS.fullmatch(name))
+
 
 async def next_available_rotation(path: Path) -> Path | None:
     """
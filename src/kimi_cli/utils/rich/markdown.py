@@ -2,12 +2,17 @@
 
 from __future__ import annotations
 
+import re
 import sys
+from collections import deque
 from collections.abc import Iterable, Mapping
-from typing import ClassVar, get_args
+from functools import lru_cache
+from typing import Any, ClassVar, get_args
 
 from markdown_it import MarkdownIt
 from markdown_it.token import Token
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
 from pygments.token import (
     Comment,
     Generic,
@@ -27,10 +32,19 @@ from pygments.token import (
 from pygments.token import (
     Token as PygmentsToken,
 )
+from pygments.util import ClassNotFound
 from rich import box
 from rich._loop import loop_first
 from rich._stack import Stack
-from rich.console import Console, ConsoleOptions, JustifyMethod, RenderResult
+from rich.console import (
+    Console,
+    ConsoleOptions,
+    Group,
+    JustifyMethod,
+    NewLine,
+    RenderableType,
+    RenderResult,
+)
 from rich.containers import Renderables
 from rich.jupyter import JupyterMixin
 from rich.rule import Rule
@@ -124,6 +138,35 @@ def _resolve_code_theme(theme: str) -> str | SyntaxTheme:
     return theme
 
 
+@lru_cache(maxsize=64)
+def _get_lexer(lexer_name: str) -> Lexer:
+    """Look up a lexer once, falling back to plain text like `Syntax` does."""
+    try:
+        return get_lexer_by_name(lexer_name, stripnl=False, ensurenl=True, tabsize=4)
+    except ClassNotFound:
+        return get_lexer_by_name("text", stripnl=False, ensurenl=True, tabsize=4)
+
+
+@lru_cache(maxsize=256)
+def _highlight(code: str, lexer_name: str, theme: str | SyntaxTheme, word_wrap: bool) -> Text:
+    """Highlight code without its background.
+
+    The result is shared by every render of the same code, so it must be copied before being
+    modified. Highlighting does not depend on the width, the text is only wrapped when rendered.
+    """
+    syntax = Syntax(
+        "",
+        _get_lexer(lexer_name),
+        theme=theme,
+        word_wrap=word_wrap,
+        background_color=None,
+        padding=0,
+    )
+    highlighted = syntax.highlight(code)
+    highlighted.rstrip()
+    return _strip_background(highlighted)
+
+
 def _strip_background(text: Text) -> Text:
     """Return a copy of ``text`` with all background colors removed."""
 
@@ -302,17 +345,7 @@ class CodeBlock(TextElement):
 
     def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
         code = str(self.text).rstrip()
-        syntax = Syntax(
-            code,
-            self.lexer_name,
-            theme=self.theme,
-            word_wrap=True,
-            background_color=None,
-            padding=0,
-        )
-        highlighted = syntax.highlight(code)
-        highlighted.rstrip()
-        stripped = _strip_background(highlighted)
+        stripped = _highlight(code, self.lexer_name, self.theme, word_wrap=True).copy()
         stripped.rstrip()
         yield stripped
 
@@ -635,9 +668,8 @@ class MarkdownContext:
         self.stack: Stack[MarkdownElement] = Stack()
         self._fallback_styles = fallback_styles
 
-        self._syntax: Syntax | None = None
-        if inline_code_lexer is not None:
-            self._syntax = Syntax("", inline_code_lexer, theme=inline_code_theme)
+        self._inline_code_lexer = inline_code_lexer
+        self._inline_code_theme = inline_code_theme
 
     @property
     def current_style(self) -> Style:
@@ -646,10 +678,10 @@ class MarkdownContext:
 
     def on_text(self, text: str, node_type: str) -> None:
         """Called when the parser visits text."""
-        if node_type in {"fence", "code_inline"} and self._syntax is not None:
-            highlighted = self._syntax.highlight(text)
-            highlighted.rstrip()
-            stripped = _strip_background(highlighted)
+        if node_type in {"fence", "code_inline"} and self._inline_code_lexer is not None:
+            stripped = _highlight(
+                text, self._inline_code_lexer, self._inline_code_theme, word_wrap=False
+            )
             combined = Text.assemble(stripped, style=self.style_stack.current)
             self.stack.top.on_text(self, combined)
         else:
@@ -681,6 +713,28 @@ class MarkdownContext:
         return style
 
 
+# parsing keeps no state in the parsers, so they are shared by all the renderables
+_PARSER = MarkdownIt().enable("strikethrough").enable("table")
+_BLOCK_SCANNER = MarkdownIt().enable("strikethrough").enable("table").disable("inline")
+"""Finds the top-level blocks, without parsing their inline content."""
+
+
+type _References = tuple[tuple[str, str, str], ...]
+"""Link reference definitions as normalized label, href and title."""
+
+
+@lru_cache(maxsize=128)
+def _parse(markup: str, references: _References = ()) -> list[Token]:
+    """Parse markup once for all the renderables of the same text, which must not modify it.
+
+    `references` are defined in addition to those in the markup, as if defined before it.
+    """
+    env = {
+        "references": {label: {"href": href, "title": title} for label, href, title in references}
+    }
+    return _PARSER.parse(markup, env)
+
+
 class Markdown(JupyterMixin):
     """A Markdown renderable.
 
@@ -727,16 +781,18 @@ class Markdown(JupyterMixin):
         hyperlinks: bool = True,
         inline_code_lexer: str | None = None,
         inline_code_theme: str | None = None,
+        _references: _References = (),
     ) -> None:
-        parser = MarkdownIt().enable("strikethrough").enable("table")
         self.markup = markup
-        self.parsed = parser.parse(markup)
+        self.parsed = _parse(markup, _references)
         self.code_theme = _resolve_code_theme(code_theme)
         self.justify: JustifyMethod | None = justify
         self.style = style
         self.hyperlinks = hyperlinks
         self.inline_code_lexer = inline_code_lexer
         self.inline_code_theme = _resolve_code_theme(inline_code_theme or code_theme)
+        # `Live` renders the same markdown on every refresh, with new options on resizes
+        self._rendered = deque[tuple[Console, ConsoleOptions, list[Segment]]](maxlen=4)
 
     def _flatten_tokens(self, tokens: Iterable[Token]) -> Iterable[Token]:
         """Flattens the token stream."""
@@ -749,7 +805,16 @@ class Markdown(JupyterMixin):
                 yield token
 
     def __rich_console__(self, console: Console, options: ConsoleOptions) -> RenderResult:
-        """Render markdown to the console."""
+        """Render markdown to the console, reusing a previous render with the same options."""
+        for rendered_console, rendered_options, segments in self._rendered:
+            if rendered_console is console and rendered_options == options:
+                yield from segments
+                return
+        segments = list(self._render(console, options))
+        self._rendered.append((console, options, segments))
+        yield from segments
+
+    def _render(self, console: Console, options: ConsoleOptions) -> Iterable[Segment]:
         style = console.get_style(self.style, default="none")
         options = options.update(height=None)
         context = MarkdownContext(
@@ -867,6 +932,126 @@ class Markdown(JupyterMixin):
                     new_line = element.new_line
 
 
+_FLAT_BLOCK_TYPES = {"paragraph_open", "heading_open", "fence", "code_block", "hr", "html_block"}
+"""Top-level blocks of markdown-it without nested block elements."""
+_REFERENCE_LINK = re.compile(r"(?<![\w\]])\[[^\[\]]+\]\[[^\[\]]*\]")
+"""
+A full or collapsed reference link, `[text][label]` or `[label][]`, left as text. Shortcut ones,
+`[label]`, are too common in prose, and so is indexing like `arr[i][j]`, which is not matched.
+"""
+_MAX_HELD_BLOCKS = 8
+"""Complete blocks held back after a reference link, beyond which it is rendered as text."""
+
+
+class MarkdownStream:
+    """Markdown streamed in chunks, rendered one top-level block at a time.
+
+    Only complete lines are scanned for blocks, and every top-level block but the last one of
+    them is final: the lines that come later cannot change how it is parsed. `append` returns
+    the blocks that became final, so that each of them is parsed and rendered once however long
+    the stream gets, and `finish` returns the last one. Printed one after another, they look
+    the same as the whole text rendered as a single `Markdown`.
+
+    Link reference definitions apply to the blocks after them, and a block with a reference link
+    whose label is not defined yet, like `[docs][d]` before `[d]: https://...`, is held back
+    with the blocks after it until the label is defined, the stream finishes or
+    `_MAX_HELD_BLOCKS` blocks follow it. Shortcut reference links like `[docs]` are not waited
+    for, as brackets in prose are common.
+
+    Args:
+        style (Union[str, Style], optional): Optional style to apply to markdown.
+    """
+
+    def __init__(self, style: str | Style = "none") -> None:
+        self.style = style
+        self._pending: list[str] = []
+        """Chunks after the blocks returned so far."""
+        self._pending_size = 0
+        self._scan_at = 0
+        self._started = False
+        self._after_rule = False
+        self._env: dict[str, Any] = {}
+        """Collects the link reference definitions of the scanned text."""
+        self._references: _References = ()
+
+    def append(self, text: str) -> RenderableType | None:
+        """Append a chunk, returning the blocks that it completed, if any."""
+        self._pending.append(text)
+        self._pending_size += len(text)
+        if "\n" not in text or self._pending_size < self._scan_at:
+            return None
+
+        pending = "".join(self._pending)
+        self._pending = [pending]
+        blocks = [
+            token
+            for token in _BLOCK_SCANNER.parse(pending[: pending.rfind("\n") + 1], self._env)
+            if token.level == 0 and token.nesting != -1 and token.map is not None
+        ]
+        self._references = tuple(
+            (label, reference["href"], reference["title"])
+            for label, reference in self._env.get("references", {}).items()
+        )
+        # scanning costs the size of the open block, so let it grow by half before the next scan
+        self._scan_at = self._pending_size * 3 // 2
+        if len(blocks) < 2:
+            return None
+
+        starts: list[int] = []
+        offset = 0
+        line = 0
+        for block in blocks:
+            assert block.map is not None
+            for _ in range(block.map[0] - line):
+                offset = pending.index("\n", offset) + 1
+            line = block.map[0]
+            starts.append(offset)
+        n_final = 0
+        while n_final < len(blocks) - 1 and (
+            len(blocks) - 1 - n_final > _MAX_HELD_BLOCKS
+            or not self._has_undefined_reference(pending[starts[n_final] : starts[n_final + 1]])
+        ):
+            n_final += 1
+        if n_final == 0:
+            return None
+
+        offset = starts[n_final]
+        self._pending = [pending[offset:]]
+        self._pending_size = len(pending) - offset
+        self._scan_at = self._pending_size * 3 // 2
+        return self._render(pending[:offset], ends_with_rule=blocks[n_final - 1].type == "hr")
+
+    def finish(self) -> RenderableType | None:
+        """Finish the stream, returning the last block, if any."""
+        pending = "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        if not pending.strip():
+            return None
+        return self._render(pending, ends_with_rule=False)
+
+    def _has_undefined_reference(self, markup: str) -> bool:
+        """Whether a reference link of the block is left as text, for a definition may follow."""
+        for token in _parse(markup, self._references):
+            if token.type == "inline" and token.children:
+                text = "".join(child.content for child in token.children if child.type == "text")
+                if _REFERENCE_LINK.search(text):
+                    return True
+        return False
+
+    def _render(self, markup: str, *, ends_with_rule: bool) -> RenderableType:
+        markdown = Markdown(markup, style=self.style, _references=self._references)
+        new_line = self._started
+        if self._after_rule:
+            # like `Markdown`, no blank line after a horizontal rule, unless the next block has
+            # nested elements, the last of which sets the blank line again when it is closed
+            first = next(token for token in _BLOCK_SCANNER.parse(markup) if token.level == 0)
+            new_line = first.type not in _FLAT_BLOCK_TYPES
+        self._started = True
+        self._after_rule = ends_with_rule
+        return Group(NewLine(), markdown) if new_line else markdown
+
+
 if __name__ == "__main__":
     import argparse
     import sys
@@ -0,0 +1,75 @@
+import asyncio
+import multiprocessing
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from hashlib import sha256
+
+import trafilatura
+
+from kimi_cli.utils.logging import logger
+
+MAX_WORKERS = 2
+MAX_CACHED_EXTRACTIONS = 128
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_extractions: OrderedDict[str, str | None] = OrderedDict()
+"""Text extracted from recent pages, keyed by the hash of the page."""
+
+
+def extract(html: str | bytes) -> str | None:
+    """Extract the main text content of an HTML page, along with its metadata."""
+    return trafilatura.extract(
+        html,
+        include_comments=True,
+        include_tables=True,
+        include_formatting=False,
+        output_format="txt",
+        with_metadata=True,
+    )
+
+
+async def extract_in_pool(html: str | bytes) -> str | None:
+    """
+    Extract the main text content of an HTML page in a worker process, so that parsing a large
+    page does not block the event loop. Results are cached by the hash of the page.
+    """
+    key = sha256(html.encode("utf-8") if isinstance(html, str) else html).hexdigest()
+    if key in _extractions:
+        _extractions.move_to_end(key)
+        return _extractions[key]
+
+    loop = asyncio.get_running_loop()
+    try:
+        text = await loop.run_in_executor(_get_pool(), extract, html)
+    except (BrokenProcessPool, OSError) as e:
+        # e.g. a worker was killed, or processes cannot be spawned here
+        logger.warning("Extraction worker failed, extracting in a thread: {error}", error=e)
+        _shutdown_pool()
+        text = await asyncio.to_thread(extract, html)
+
+    _extractions[key] = text
+    while len(_extractions) > MAX_CACHED_EXTRACTIONS:
+        _extractions.popitem(last=False)
+    return text
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # spawned workers only import this module, not the state of the parent process
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _shutdown_pool():
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -1,18 +1,64 @@
 import asyncio
+import time
+from collections import deque
+from typing import NamedTuple, cast
 
-from kosong.message import ContentPart, ToolCallPart
+from kosong.message import ContentPart, TextPart, ThinkPart, ToolCallPart
 
 from kimi_cli.utils.logging import logger
-from kimi_cli.wire.message import WireMessage
+from kimi_cli.wire.message import (
+    Event,
+    StatusUpdate,
+    SubagentEvent,
+    ToolOutputChunk,
+    WireMessage,
+)
+
+COALESCE_WINDOW = 0.05
+"""Seconds during which a queued delta keeps absorbing the deltas that follow it."""
+CAPACITY = 1024
+"""Messages queued before deltas are merged regardless of `COALESCE_WINDOW`."""
+
+
+class WireStats(NamedTuple):
+    """Counters of a wire, see `Wire.stats`."""
+
+    sent: int
+    """Messages sent by the soul side."""
+    received: int
+    """Messages received by the UI side, each of which may carry several merged ones."""
+    merged: int
+    """Messages merged into a queued one instead of being queued themselves."""
+    overflowed: int
+    """Messages queued beyond the capacity, as they could not be merged."""
+    depth: int
+    """Messages queued right now."""
+    max_depth: int
+    """Messages queued at most so far."""
+    send_rate: int
+    """Messages sent during the last whole second."""
+    receive_rate: int
+    """Messages received during the last whole second."""
 
 
 class Wire:
     """
     A channel for communication between the soul and the UI during a soul run.
+
+    Streamed deltas, i.e. text, think and tool call argument parts, tool output chunks, and
+    the subagent events wrapping them, are merged into the previous message of their stream, i.e.
+    of the main agent or of a subagent run, while it is queued, if it is a delta of the same kind
+    that was sent less than `coalesce_window` seconds before. So deltas of subagents running at
+    the same time are merged too, although they interleave.
+    A UI side that keeps up therefore receives every delta as soon as it is sent, while a slow
+    one receives fewer, larger messages. Status updates are merged likewise, the last one wins.
+
+    Once `capacity` messages are queued, deltas are merged regardless of their age. Other
+    messages are still queued, as none is ever dropped, and counted as overflowed.
     """
 
-    def __init__(self):
-        self._queue = asyncio.Queue[WireMessage]()
+    def __init__(self, *, coalesce_window: float = COALESCE_WINDOW, capacity: int = CAPACITY):
+        self._queue = _CoalescingQueue(coalesce_window, capacity)
         self._soul_side = WireSoulSide(self._queue)
         self._ui_side = WireUISide(self._queue)
 
@@ -24,8 +70,12 @@ class Wire:
     def ui_side(self) -> "WireUISide":
         return self._ui_side
 
+    @property
+    def stats(self) -> WireStats:
+        return self._queue.stats()
+
     def shutdown(self) -> None:
-        logger.debug("Shutting down wire")
+        logger.debug("Shutting down wire: {stats}", stats=self.stats)
         self._queue.shutdown()
 
 
@@ -34,11 +84,16 @@ class WireSoulSide:
     The soul side of a wire.
     """
 
-    def __init__(self, queue: asyncio.Queue[WireMessage]):
+    def __init__(self, queue: "_CoalescingQueue"):
         self._queue = queue
 
+    @property
+    def n_pending(self) -> int:
+        """Number of messages sent but not received by the UI side yet."""
+        return self._queue.qsize()
+
     def send(self, msg: WireMessage) -> None:
-        if not isinstance(msg, ContentPart | ToolCallPart):
+        if not isinstance(msg, ContentPart | ToolCallPart | ToolOutputChunk):
             logger.debug("Sending wire message: {msg}", msg=msg)
         try:
             self._queue.put_nowait(msg)
@@ -51,12 +106,12 @@ class WireUISide:
     The UI side of a wire.
     """
 
-    def __init__(self, queue: asyncio.Queue[WireMessage]):
+    def __init__(self, queue: "_CoalescingQueue"):
         self._queue = queue
 
     async def receive(self) -> WireMessage:
         msg = await self._queue.get()
-        if not isinstance(msg, ContentPart | ToolCallPart):
+        if not isinstance(msg, ContentPart | ToolCallPart | ToolOutputChunk):
             logger.debug("Receiving wire message: {msg}", msg=msg)
         return msg
 
@@ -68,6 +123,208 @@ class WireUISide:
             msg = self._queue.get_nowait()
         except asyncio.QueueEmpty:
             return None
-        if not isinstance(msg, ContentPart | ToolCallPart):
+        if not isinstance(msg, ContentPart | ToolCallPart | ToolOutputChunk):
             logger.debug("Receiving wire message: {msg}", msg=msg)
         return msg
+
+
+class _Entry:
+    """A queued message, along with the messages merged into it, which are joined on receipt."""
+
+    __slots__ = ("messages", "stream", "sent_at")
+
+    def __init__(self, msg: WireMessage, stream: str | None, sent_at: float):
+        self.messages: list[WireMessage] = [msg]
+        self.stream = stream
+        self.sent_at = sent_at
+
+
+class _RateMeter:
+    """Counts events per whole second of the monotonic clock."""
+
+    def __init__(self):
+        self._second = 0
+        self._count = 0
+        self._last_count = 0
+
+    def mark(self, now: float) -> None:
+        second = int(now)
+        if second != self._second:
+            self._last_count = self._count if second == self._second + 1 else 0
+            self._second = second
+            self._count = 0
+        self._count += 1
+
+    def rate(self, now: float) -> int:
+        second = int(now)
+        if second == self._second:
+            return self._last_count
+        return self._count if second == self._second + 1 else 0
+
+
+class _CoalescingQueue:
+    """An `asyncio.Queue` of wire messages that merges deltas, as described in `Wire`."""
+
+    def __init__(self, coalesce_window: float, capacity: int):
+        self._coalesce_window = coalesce_window
+        self._capacity = capacity
+        self._entries: deque[_Entry] = deque()
+        self._tails: dict[str | None, _Entry] = {}
+        """The last queued entry of each stream."""
+        self._not_empty = asyncio.Event()
+        self._shutdown = False
+        self._sent = 0
+        self._received = 0
+        self._merged = 0
+        self._overflowed = 0
+        self._max_depth = 0
+        self._send_rate = _RateMeter()
+        self._receive_rate = _RateMeter()
+
+    def qsize(self) -> int:
+        return len(self._entries)
+
+    def put_nowait(self, msg: WireMessage) -> None:
+        if self._shutdown:
+            raise asyncio.QueueShutDown
+        now = time.monotonic()
+        self._sent += 1
+        self._send_rate.mark(now)
+
+        full = len(self._entries) >= self._capacity
+        stream = _stream(msg)
+        tail = self._tails.get(stream)
+        if (
+            tail is not None
+            and (full or now - tail.sent_at < self._coalesce_window)
+            and _can_merge(tail.messages[-1], msg)
+        ):
+            tail.messages.append(msg)
+            self._merged += 1
+            return
+        if full:
+            if not self._overflowed:
+                logger.warning(
+                    "Wire is full with {capacity} messages, the UI side is too slow",
+                    capacity=self._capacity,
+                )
+            self._overflowed += 1
+
+        entry = _Entry(msg, stream, now)
+        self._entries.append(entry)
+        self._tails[stream] = entry
+        self._max_depth = max(self._max_depth, len(self._entries))
+        self._not_empty.set()
+
+    async def get(self) -> WireMessage:
+        while not self._entries:
+            if self._shutdown:
+                raise asyncio.QueueShutDown
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        return self._pop()
+
+    def get_nowait(self) -> WireMessage:
+        if not self._entries:
+            raise asyncio.QueueEmpty
+        return self._pop()
+
+    def shutdown(self) -> None:
+        """Stop accepting messages, the queued ones can still be received."""
+        self._shutdown = True
+        self._not_empty.set()
+
+    def stats(self) -> WireStats:
+        now = time.monotonic()
+        return WireStats(
+            sent=self._sent,
+            received=self._received,
+            merged=self._merged,
+            overflowed=self._overflowed,
+            depth=len(self._entries),
+            max_depth=self._max_depth,
+            send_rate=self._send_rate.rate(now),
+            receive_rate=self._receive_rate.rate(now),
+        )
+
+    def _pop(self) -> WireMessage:
+        entry = self._entries.popleft()
+        if self._tails.get(entry.stream) is entry:
+            del self._tails[entry.stream]
+        self._received += 1
+        self._receive_rate.mark(time.monotonic())
+        if len(entry.messages) == 1:
+            return entry.messages[0]
+        # only events are ever merged
+        return _join(cast(list[Event], entry.messages))
+
+
+def _stream(msg: WireMessage) -> str | None:
+    """
+    The stream of a message, i.e. the subagent run it comes from, or `None` for the main agent.
+    Messages of different streams do not depend on each other, unlike those of a stream.
+    """
+    return msg.task_tool_call_id if isinstance(msg, SubagentEvent) else None
+
+
+def _can_merge(last: WireMessage, msg: WireMessage) -> bool:
+    """Whether `msg` can be merged into a queued message ending with `last`."""
+    match last, msg:
+        case TextPart(), TextPart():
+            return type(last) is type(msg)
+        case ThinkPart(), ThinkPart():
+            # nothing follows a signature
+            return type(last) is type(msg) and not last.encrypted
+        case ToolCallPart(), ToolCallPart():
+            return True
+        case ToolOutputChunk(), ToolOutputChunk():
+            return last.tool_call_id == msg.tool_call_id
+        case SubagentEvent(), SubagentEvent():
+            return last.task_tool_call_id == msg.task_tool_call_id and _can_merge(
+                last.event, msg.event
+            )
+        case StatusUpdate(), StatusUpdate():
+            return last.tokens_pruned is None and msg.tokens_pruned is None
+        case _:
+            return False
+
+
+def _join(messages: list[Event]) -> Event:
+    """Merge messages accepted by `_can_merge` into one, without modifying them."""
+    first, last = messages[0], messages[-1]
+    match first:
+        case TextPart():
+            return first.model_copy(update={"text": "".join(_texts(messages))})
+        case ThinkPart():
+            assert isinstance(last, ThinkPart)
+            return first.model_copy(
+                update={"think": "".join(_texts(messages)), "encrypted": last.encrypted}
+            )
+        case ToolCallPart():
+            parts = [m.arguments_part for m in messages if isinstance(m, ToolCallPart)]
+            if all(part is None for part in parts):
+                return first
+            return first.model_copy(
+                update={"arguments_part": "".join(part or "" for part in parts)}
+            )
+        case ToolOutputChunk():
+            return first._replace(text="".join(_texts(messages)))
+        case SubagentEvent():
+            events: list[Event] = [m.event for m in messages if isinstance(m, SubagentEvent)]
+            return first._replace(event=_join(events))
+        case _:
+            # status updates, the last one wins
+            return last
+
+
+def _texts(messages: list[Event]) -> list[str]:
+    texts: list[str] = []
+    for msg in messages:
+        match msg:
+            case TextPart(text=text) | ToolOutputChunk(text=text):
+                texts.append(text)
+            case ThinkPart(think=think):
+                texts.append(think)
+            case _:
+                pass
+    return texts
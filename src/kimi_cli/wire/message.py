@@ -1,10 +1,10 @@
 import asyncio
 import uuid
-from collections.abc import Sequence
+from collections.abc import Callable, Sequence
 from enum import Enum
 from typing import TYPE_CHECKING, Any, NamedTuple
 
-from kosong.message import ContentPart, ToolCall, ToolCallPart
+from kosong.message import ContentPart, TextPart, ThinkPart, ToolCall, ToolCallPart
 from kosong.tooling import ToolOk, ToolResult
 
 if TYPE_CHECKING:
@@ -23,7 +23,8 @@ class CompactionBegin:
     """
     Indicates that a compaction just began.
     This event must be sent during a step, which means, between `StepBegin` and `StepInterrupted`.
-    And, there must be a `CompactionEnd` directly following this event.
+    And, there must be a `CompactionEnd` following this event, with at most `StatusUpdate` events
+    in between.
     """
 
     pass
@@ -32,7 +33,8 @@ class CompactionBegin:
 class CompactionEnd:
     """
     Indicates that a compaction just ended.
-    This event must be sent directly after a `CompactionBegin` event.
+    This event must be sent after a `CompactionBegin` event, with at most `StatusUpdate` events
+    in between.
     """
 
     pass
@@ -40,6 +42,18 @@ class CompactionEnd:
 
 class StatusUpdate(NamedTuple):
     status: "StatusSnapshot"
+    tokens_pruned: int | None = None
+    """Tokens freed by pruning stale tool outputs, if this update follows a pruning pass."""
+
+
+class ToolOutputChunk(NamedTuple):
+    """
+    A piece of the output of a running tool, for the UI to show it live.
+    Chunks of a tool call come before its `ToolResult`, which still carries the whole output.
+    """
+
+    tool_call_id: str
+    text: str
 
 
 class SubagentEvent(NamedTuple):
@@ -48,7 +62,15 @@ class SubagentEvent(NamedTuple):
 
 
 type ControlFlowEvent = StepBegin | StepInterrupted | CompactionBegin | CompactionEnd | StatusUpdate
-type Event = ControlFlowEvent | ContentPart | ToolCall | ToolCallPart | ToolResult | SubagentEvent
+type Event = (
+    ControlFlowEvent
+    | ContentPart
+    | ToolCall
+    | ToolCallPart
+    | ToolOutputChunk
+    | ToolResult
+    | SubagentEvent
+)
 
 
 class ApprovalResponse(Enum):
@@ -101,6 +123,9 @@ def serialize_event(event: Event) -> dict[str, Any]:
     """
     Convert an event message into a JSON-serializable dictionary.
     """
+    serializer = _EVENT_SERIALIZERS.get(type(event))
+    if serializer is not None:
+        return serializer(event)
     match event:
         case StepBegin():
             return {"type": "step_begin", "payload": {"n": event.n}}
@@ -111,10 +136,10 @@ def serialize_event(event: Event) -> dict[str, Any]:
         case CompactionEnd():
             return {"type": "compaction_end"}
         case StatusUpdate():
-            return {
-                "type": "status_update",
-                "payload": {"context_usage": event.status.context_usage},
-            }
+            payload: dict[str, Any] = {"context_usage": event.status.context_usage}
+            if event.tokens_pruned is not None:
+                payload["tokens_pruned"] = event.tokens_pruned
+            return {"type": "status_update", "payload": payload}
         case ContentPart():
             return {
                 "type": "content_part",
@@ -125,24 +150,47 @@ def serialize_event(event: Event) -> dict[str, Any]:
                 "type": "tool_call",
                 "payload": event.model_dump(mode="json", exclude_none=True),
             }
-        case ToolCallPart():
-            return {
-                "type": "tool_call_part",
-                "payload": event.model_dump(mode="json", exclude_none=True),
-            }
         case ToolResult():
             return {
                 "type": "tool_result",
                 "payload": serialize_tool_result(event),
             }
-        case SubagentEvent():
-            return {
-                "type": "subagent_event",
-                "payload": {
-                    "task_tool_call_id": event.task_tool_call_id,
-                    "event": serialize_event(event.event),
-                },
-            }
+    # the other events, e.g. the streamed deltas, are serialized by `_EVENT_SERIALIZERS`
+    raise TypeError(f"Unknown event type: {type(event).__name__}")
+
+
+def _serialize_think_part(part: ThinkPart) -> dict[str, Any]:
+    payload = {"type": "think", "think": part.think}
+    if part.encrypted is not None:
+        payload["encrypted"] = part.encrypted
+    return {"type": "content_part", "payload": payload}
+
+
+def _serialize_tool_call_part(part: ToolCallPart) -> dict[str, Any]:
+    payload = {} if part.arguments_part is None else {"arguments_part": part.arguments_part}
+    return {"type": "tool_call_part", "payload": payload}
+
+
+_EVENT_SERIALIZERS: dict[type, Callable[[Any], dict[str, Any]]] = {
+    TextPart: lambda part: {"type": "content_part", "payload": {"type": "text", "text": part.text}},
+    ThinkPart: _serialize_think_part,
+    ToolCallPart: _serialize_tool_call_part,
+    ToolOutputChunk: lambda chunk: {
+        "type": "tool_output",
+        "payload": {"tool_call_id": chunk.tool_call_id, "text": chunk.text},
+    },
+    SubagentEvent: lambda event: {
+        "type": "subagent_event",
+        "payload": {
+            "task_tool_call_id": event.task_tool_call_id,
+            "event": serialize_event(event.event),
+        },
+    },
+}
+"""
+Serializers of the events streamed the most, by exact type, giving the same result as the
+generic path without dumping pydantic models.
+"""
 
 
 def serialize_approval_request(request: ApprovalRequest) -> dict[str, Any]:
@@ -2,11 +2,12 @@
 
 import platform
 import tempfile
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
 from contextlib import contextmanager
 from pathlib import Path
 
 import pytest
+import pytest_asyncio
 from kosong.chat_provider.mock import MockChatProvider
 from pydantic import SecretStr
 
@@ -29,7 +30,9 @@ from kimi_cli.tools.task import Task
 from kimi_cli.tools.think import Think
 from kimi_cli.tools.todo import SetTodoList
 from kimi_cli.tools.web.fetch import FetchURL
+from kimi_cli.tools.web.http import HttpRequest
 from kimi_cli.tools.web.search import SearchWeb
+from kimi_cli.utils.aiohttp import SharedClientSession
 
 
 @pytest.fixture
@@ -100,6 +103,14 @@ def approval() -> Approval:
     return Approval(yolo=True)
 
 
+@pytest_asyncio.fixture
+async def http_session() -> AsyncGenerator[SharedClientSession]:
+    """Create a SharedClientSession instance."""
+    http_session = SharedClientSession()
+    yield http_session
+    await http_session.close()
+
+
 @pytest.fixture
 def runtime(
     config: Config,
@@ -108,6 +119,7 @@ def runtime(
     denwa_renji: DenwaRenji,
     session: Session,
     approval: Approval,
+    http_session: SharedClientSession,
 ) -> Runtime:
     """Create a Runtime instance."""
     return Runtime(
@@ -117,6 +129,7 @@ def runtime(
         denwa_renji=denwa_renji,
         session=session,
         approval=approval,
+        http_session=http_session,
     )
 
 
@@ -186,9 +199,9 @@ def glob_tool(builtin_args: BuiltinSystemPromptArgs) -> Glob:
 
 
 @pytest.fixture
-def grep_tool() -> Grep:
+def grep_tool(http_session: SharedClientSession) -> Grep:
     """Create a Grep tool instance."""
-    return Grep()
+    return Grep(http_session)
 
 
 @pytest.fixture
@@ -219,15 +232,24 @@ def patch_file_tool(
 
 
 @pytest.fixture
-def search_web_tool(config: Config) -> SearchWeb:
+def search_web_tool(config: Config, http_session: SharedClientSession) -> SearchWeb:
     """Create a SearchWeb tool instance."""
-    return SearchWeb(config)
+    return SearchWeb(config, http_session)
 
 
 @pytest.fixture
-def fetch_url_tool() -> FetchURL:
+def fetch_url_tool(http_session: SharedClientSession, temp_share_dir: Path) -> FetchURL:
     """Create a FetchURL tool instance."""
-    return FetchURL()
+    return FetchURL(http_session, cache_dir=temp_share_dir / "fetch-cache")
+
+
+@pytest.fixture
+def http_request_tool(
+    http_session: SharedClientSession, approval: Approval
+) -> Generator[HttpRequest]:
+    """Create a HttpRequest tool instance."""
+    with tool_call_context("HttpRequest"):
+        yield HttpRequest(http_session, approval)
 
 
 # misc fixtures
@@ -124,6 +124,33 @@ def test_load_agent_spec_nonexistent_file():
         load_agent_spec(nonexistent)
 
 
+def test_load_agent_spec_cached_copy(agent_file: Path):
+    """Test that a cached spec is handed out as an independent copy."""
+    spec = load_agent_spec(agent_file)
+    spec.tools.append("kimi_cli.tools.bash:Bash")
+
+    cached = load_agent_spec(agent_file)
+    assert cached.tools == snapshot(["kimi_cli.tools.think:Think"])
+
+
+def test_load_agent_spec_reloads_changed_base(agent_file_extending: Path):
+    """Test that a cached spec is read again once a file it extends changes."""
+    assert load_agent_spec(agent_file_extending).tools == snapshot(["kimi_cli.tools.think:Think"])
+
+    base_agent = agent_file_extending.parent / "base.yaml"
+    base_agent.write_text("""
+version: 1
+agent:
+  name: "Base Agent"
+  system_prompt_path: ./system.md
+  tools: ["kimi_cli.tools.think:Think", "kimi_cli.tools.bash:Bash"]
+""")
+
+    assert load_agent_spec(agent_file_extending).tools == snapshot(
+        ["kimi_cli.tools.think:Think", "kimi_cli.tools.bash:Bash"]
+    )
+
+
 # Fixtures for test files
 
 
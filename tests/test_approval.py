@@ -0,0 +1,48 @@
+"""Tests for approval request routing."""
+
+import asyncio
+
+import pytest
+from kosong.message import ToolCall
+
+from kimi_cli.soul.approval import Approval
+from kimi_cli.soul.toolset import current_tool_call
+from kimi_cli.wire.message import ApprovalResponse
+
+
+async def _request(approval: Approval, tool_call_id: str) -> bool:
+    current_tool_call.set(
+        ToolCall(id=tool_call_id, function=ToolCall.FunctionBody(name="Bash", arguments="{}"))
+    )
+    return await approval.request("Bash", "run command", tool_call_id)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_souls_fetch_only_their_own_requests():
+    approval = Approval()
+
+    async def _soul(tool_call_id: str, response: ApprovalResponse) -> bool:
+        with approval.routing():
+            tool_task = asyncio.create_task(_request(approval, tool_call_id))
+            request = await asyncio.wait_for(approval.fetch_request(), timeout=1)
+            assert request.tool_call_id == tool_call_id
+            request.resolve(response)
+            return await tool_task
+
+    assert await asyncio.gather(
+        _soul("main", ApprovalResponse.APPROVE),
+        _soul("sub", ApprovalResponse.REJECT),
+    ) == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_requests_outside_routing_use_the_shared_queue():
+    approval = Approval()
+    tool_task = asyncio.create_task(_request(approval, "call"))
+    request = await asyncio.wait_for(approval.fetch_request(), timeout=1)
+    request.resolve(ApprovalResponse.APPROVE_FOR_SESSION)
+    assert await tool_task
+
+    # approvals for the session are shared by all routes
+    with approval.routing():
+        assert await _request(approval, "another")
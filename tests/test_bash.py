@@ -1,20 +1,41 @@
 """Tests for the shell tool."""
 
+import asyncio
 import platform
+from collections.abc import AsyncGenerator
 from pathlib import Path
 
 import pytest
+import pytest_asyncio
 from inline_snapshot import snapshot
 from kosong.tooling import ToolError, ToolOk
 
+from kimi_cli.soul import _current_wire
+from kimi_cli.soul.approval import Approval
 from kimi_cli.tools.bash import Bash, Params
+from kimi_cli.tools.bash.worker import ShellWorkerPool
 from kimi_cli.tools.utils import DEFAULT_MAX_CHARS
+from kimi_cli.wire import Wire
+from kimi_cli.wire.message import ToolOutputChunk
 
 pytestmark = pytest.mark.skipif(
     platform.system() == "Windows", reason="Bash tool tests are disabled on Windows."
 )
 
 
+@pytest_asyncio.fixture(params=["one-shot", "warm"])
+async def bash_tool(
+    request: pytest.FixtureRequest, bash_tool: Bash, approval: Approval
+) -> AsyncGenerator[Bash]:
+    """Run the tests with a new shell per command, and with warm shell workers."""
+    if request.param == "one-shot":
+        yield bash_tool
+        return
+    shell_pool = ShellWorkerPool(max_workers=2)
+    yield Bash(approval, shell_pool)
+    await shell_pool.close()
+
+
 @pytest.mark.asyncio
 async def test_simple_command(bash_tool: Bash):
     """Test executing a simple command."""
@@ -200,6 +221,47 @@ async def test_output_truncation_on_failure(bash_tool: Bash):
     assert "Command failed with exit code:" in result.message
 
 
+@pytest.mark.asyncio
+async def test_line_longer_than_stream_limit(bash_tool: Bash):
+    """Test that a single line longer than the stream buffer limit is truncated, not fatal."""
+    result = await bash_tool(Params(command="python3 -c \"print('X' * 200_000)\""))
+
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert len(result.output) <= DEFAULT_MAX_CHARS
+    assert "Output is truncated" in result.message
+
+
+@pytest.mark.asyncio
+async def test_output_beyond_limit_is_discarded(bash_tool: Bash):
+    """Test that output past the limit is drained without being kept."""
+    result = await bash_tool(Params(command="yes | head -c 20000000"))
+
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert len(result.output) == DEFAULT_MAX_CHARS
+
+
+@pytest.mark.asyncio
+async def test_output_streamed_to_wire(bash_tool: Bash):
+    """Test that output is streamed to the wire while the command runs."""
+    wire = Wire()
+    token = _current_wire.set(wire)
+    try:
+        result = await bash_tool(Params(command="echo one; sleep 0.5; echo two"))
+    finally:
+        _current_wire.reset(token)
+
+    chunks: list[ToolOutputChunk] = []
+    while (msg := wire.ui_side.receive_nowait()) is not None:
+        assert isinstance(msg, ToolOutputChunk)
+        chunks.append(msg)
+    assert [chunk.text for chunk in chunks] == snapshot(["one\n", "two\n"])
+    assert all(chunk.tool_call_id == "test" for chunk in chunks)
+    assert isinstance(result, ToolOk)
+    assert result.output == "".join(chunk.text for chunk in chunks)
+
+
 @pytest.mark.asyncio
 async def test_timeout_parameter_validation_bounds(bash_tool: Bash):
     """Test timeout parameter validation (bounds checking)."""
@@ -215,3 +277,43 @@ async def test_timeout_parameter_validation_bounds(bash_tool: Bash):
 
     with pytest.raises(ValueError, match="timeout"):
         Params(command="echo test", timeout=MAX_TIMEOUT + 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bash_tool", ["warm"], indirect=True)
+async def test_warm_shell_keeps_state(bash_tool: Bash, temp_work_dir: Path):
+    """Test that the working directory and variables are kept between commands."""
+    (temp_work_dir / "sub").mkdir()
+    await bash_tool(Params(command=f"cd {temp_work_dir / 'sub'} && export KIMI_TEST_VAR=1"))
+    result = await bash_tool(Params(command="pwd; echo $KIMI_TEST_VAR; printf partial"))
+    assert result == ToolOk(
+        output=f"{temp_work_dir / 'sub'}\n1\npartial", message="Command executed successfully."
+    )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bash_tool", ["warm"], indirect=True)
+async def test_warm_shell_restarts(bash_tool: Bash):
+    """Test that a worker killed by a timeout or exited by a command is replaced."""
+    await bash_tool(Params(command="export KIMI_TEST_VAR=1"))
+    result = await bash_tool(Params(command="sleep 5", timeout=1))
+    assert isinstance(result, ToolError)
+    assert result.brief == "Killed by timeout (1s)"
+
+    result = await bash_tool(Params(command="echo ${KIMI_TEST_VAR:-unset}; exit 3"))
+    assert isinstance(result, ToolError)
+    assert result.output == "unset\n"
+    assert result.message == "Command failed with exit code: 3."
+
+    result = await bash_tool(Params(command="echo ok"))
+    assert result == ToolOk(output="ok\n", message="Command executed successfully.")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bash_tool", ["warm"], indirect=True)
+async def test_warm_shell_concurrent_commands(bash_tool: Bash):
+    """Test that commands beyond the pool size run in new shells at the same time."""
+    results = await asyncio.gather(
+        *(bash_tool(Params(command=f"sleep 0.3; echo {i}")) for i in range(4))
+    )
+    assert [result.output for result in results] == ["0\n", "1\n", "2\n", "3\n"]
@@ -0,0 +1,154 @@
+"""Tests for context compaction."""
+
+import copy
+from collections.abc import Sequence
+from typing import Self
+
+import pytest
+from kosong.chat_provider import ThinkingEffort
+from kosong.chat_provider.mock import MockStreamedMessage
+from kosong.message import Message, TextPart
+from kosong.tooling import Tool
+
+from kimi_cli.llm import LLM
+from kimi_cli.soul.compaction import SimpleCompaction, TieredCompaction
+
+
+class _RecordingChatProvider:
+    """Answer every request with a numbered summary and record the prompts."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.prompts: list[str] = []
+
+    @property
+    def model_name(self) -> str:
+        return "recording"
+
+    async def generate(
+        self, system_prompt: str, tools: Sequence[Tool], history: Sequence[Message]
+    ) -> MockStreamedMessage:
+        content = history[-1].content
+        assert isinstance(content, str)
+        self.prompts.append(content)
+        return MockStreamedMessage([TextPart(text=f"summary {len(self.prompts)}")])
+
+    def with_thinking(self, effort: ThinkingEffort) -> Self:
+        return copy.copy(self)
+
+
+def _turns(start: int, n: int) -> list[Message]:
+    messages: list[Message] = []
+    for i in range(start, start + n):
+        messages.append(Message(role="user", content=f"question {i} " + "q" * 2000))
+        messages.append(Message(role="assistant", content=f"answer {i} " + "a" * 2000))
+    return messages
+
+
+def _summaries(message: Message) -> list[str]:
+    assert message.role == "assistant" and isinstance(message.content, list)
+    return [p.text for p in message.content if isinstance(p, TextPart)][1:]
+
+
+@pytest.fixture
+def provider() -> _RecordingChatProvider:
+    return _RecordingChatProvider()
+
+
+@pytest.fixture
+def llm(provider: _RecordingChatProvider) -> LLM:
+    return LLM(chat_provider=provider, max_context_size=100_000, capabilities=set())  # pyright: ignore[reportArgumentType]
+
+
+@pytest.fixture
+def compaction() -> TieredCompaction:
+    compaction = TieredCompaction()
+    compaction.CHUNK_TOKENS = 3000  # about two turns per chunk
+    return compaction
+
+
+@pytest.mark.asyncio
+async def test_tiered_compaction_summarizes_in_chunks(
+    compaction: TieredCompaction, provider: _RecordingChatProvider, llm: LLM
+):
+    messages = _turns(0, 6)
+    compacted = await compaction.compact(messages, llm)
+
+    assert len(provider.prompts) == 3
+    # five turns before the preserved one, two turns per chunk
+    assert sorted(prompt.count("## Message") for prompt in provider.prompts) == [2, 4, 4]
+    assert "question 0 " in provider.prompts[0]
+    assert compacted[1:] == messages[-2:]
+    summaries = _summaries(compacted[0])
+    assert summaries[::2] == ["<system>Summary (tier 0)</system>"] * 3
+    assert sorted(summaries[1::2]) == ["summary 1", "summary 2", "summary 3"]
+
+
+@pytest.mark.asyncio
+async def test_tiered_compaction_reuses_earlier_summaries(
+    compaction: TieredCompaction, provider: _RecordingChatProvider, llm: LLM
+):
+    compacted = list(await compaction.compact(_turns(0, 3), llm))
+    assert len(provider.prompts) == 1
+
+    # only the new turns are summarized, by a fresh instance as after a restart
+    compacted = await TieredCompaction().compact([*compacted, *_turns(3, 2)], llm)
+    assert len(provider.prompts) == 2
+    assert "summary 1" not in provider.prompts[1]
+    assert "question 2 " in provider.prompts[1]
+    assert _summaries(compacted[0])[1::2] == ["summary 1", "summary 2"]
+
+
+@pytest.mark.asyncio
+async def test_tiered_compaction_merges_tiers(
+    compaction: TieredCompaction, provider: _RecordingChatProvider, llm: LLM
+):
+    compacted: list[Message] = []
+    for i in range(TieredCompaction.FAN_IN + 1):
+        compacted = list(await compaction.compact([*compacted, *_turns(i * 2, 2)], llm))
+
+    summaries = _summaries(compacted[0])
+    assert summaries[::2] == [
+        "<system>Summary (tier 1)</system>",
+        "<system>Summary (tier 0)</system>",
+    ]
+    merge_prompt = provider.prompts[-1]
+    assert merge_prompt.count("## Summary") == TieredCompaction.FAN_IN
+    assert summaries[1] == f"summary {len(provider.prompts)}"
+
+
+@pytest.mark.asyncio
+async def test_tiered_compaction_caches_summaries(
+    compaction: TieredCompaction, provider: _RecordingChatProvider, llm: LLM
+):
+    messages = _turns(0, 6)
+    first = await compaction.compact(messages, llm)
+    second = await compaction.compact(messages, llm)
+    assert len(provider.prompts) == 3
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_tiered_compaction_reads_simple_compaction_output(
+    compaction: TieredCompaction, provider: _RecordingChatProvider, llm: LLM
+):
+    compacted = list(await SimpleCompaction().compact(_turns(0, 3), llm))
+    compacted = await compaction.compact([*compacted, *_turns(3, 2)], llm)
+    assert len(provider.prompts) == 2
+    assert _summaries(compacted[0])[1::2] == ["summary 1", "summary 2"]
+
+
+@pytest.mark.asyncio
+async def test_tiered_compaction_truncates_huge_messages(
+    compaction: TieredCompaction, provider: _RecordingChatProvider, llm: LLM
+):
+    messages = [
+        Message(role="user", content="run it"),
+        Message(role="tool", content="x" * 1_000_000, tool_call_id="1"),
+        *_turns(0, 1),
+    ]
+    await compaction.compact(messages, llm)
+    assert len(provider.prompts) == 2
+    assert all(len(prompt) < 20_000 for prompt in provider.prompts)
+    assert "characters omitted" in provider.prompts[1]
@@ -29,9 +29,30 @@ def test_default_config_dump():
   "providers": {},
   "loop_control": {
     "max_steps_per_run": 100,
-    "max_retries_per_step": 3
+    "max_retries_per_step": 3,
+    "max_concurrent_subagents": 4,
+    "compaction": "tiered"
   },
-  "services": {}
+  "services": {},
+  "history": {
+    "format": "jsonl",
+    "fsync": "never"
+  },
+  "mcp": {
+    "tool_call_timeout": 20.0,
+    "health_check_interval": 60.0,
+    "health_check_timeout": 5.0,
+    "discovery_timeout": 10.0
+  },
+  "bash": {
+    "persistent": false,
+    "max_workers": 4
+  },
+  "wire": {
+    "max_concurrent_runs": 4,
+    "batch_size": 1,
+    "batch_window": 0.0
+  }
 }\
 """
     )
@@ -0,0 +1,212 @@
+"""Tests for the context history storage."""
+
+import json
+from pathlib import Path
+
+import pytest
+from kosong.message import Message
+
+from kimi_cli.soul.context import Context
+from kimi_cli.soul.tokens import TokenEstimator
+
+
+def _read_records(path: Path) -> list[dict]:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line]
+
+
+@pytest.mark.asyncio
+async def test_append_is_buffered_until_flush(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    context = Context(history_file)
+
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(Message(role="user", content="Hello"))
+    await context.update_token_count(42)
+    assert not history_file.exists() or history_file.read_text() == ""
+
+    await context.flush()
+    assert _read_records(history_file) == [
+        {"role": "_checkpoint", "id": 0},
+        {"role": "user", "content": "Hello"},
+        {"role": "_usage", "token_count": 42},
+    ]
+    await context.close()
+
+
+@pytest.mark.asyncio
+async def test_fsync_always_writes_through(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    context = Context(history_file, fsync="always")
+
+    await context.append_message(Message(role="user", content="Hello"))
+    assert _read_records(history_file) == [{"role": "user", "content": "Hello"}]
+    await context.close()
+
+
+@pytest.mark.asyncio
+async def test_restore_after_close(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    context = Context(history_file)
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(
+        [Message(role="user", content="Hello"), Message(role="assistant", content="Hi")]
+    )
+    await context.update_token_count(10)
+    await context.close()
+
+    restored = Context(history_file)
+    assert await restored.restore()
+    assert list(restored.history) == list(context.history)
+    assert restored.token_count == 10
+    assert restored.n_checkpoints == 1
+
+
+@pytest.mark.asyncio
+async def test_revert_to_flushes_pending_records(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    context = Context(history_file)
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(Message(role="user", content="first"))
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(Message(role="user", content="second"))
+
+    await context.revert_to(1)
+    assert [m.content for m in context.history] == ["first"]
+    assert context.n_checkpoints == 1
+
+    await context.append_message(Message(role="user", content="third"))
+    await context.close()
+    assert [r.get("content") for r in _read_records(history_file)] == [None, "first", "third"]
+
+
+@pytest.mark.asyncio
+async def test_revert_to_restores_token_count_and_truncates_in_place(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    context = Context(history_file)
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(Message(role="user", content="first"))
+    await context.update_token_count(10)
+    await context.flush()
+    size_before_second = history_file.stat().st_size
+    await context.checkpoint(add_user_message=True)
+    await context.append_message(Message(role="user", content="second"))
+    await context.update_token_count(20)
+    await context.flush()
+
+    await context.revert_to(1)
+    assert context.token_count == 10
+    assert len(context.history) == 1
+    assert history_file.stat().st_size == size_before_second
+    assert list(tmp_path.iterdir()) == [history_file]
+    await context.close()
+
+
+@pytest.mark.asyncio
+async def test_revert_to_after_restore(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    context = Context(history_file)
+    for i in range(3):
+        await context.checkpoint(add_user_message=False)
+        await context.append_message(Message(role="user", content=f"message {i}"))
+        await context.update_token_count(i)
+    await context.close()
+
+    restored = Context(history_file)
+    assert await restored.restore()
+    await restored.revert_to(2)
+    await restored.close()
+    assert [m.content for m in restored.history] == ["message 0", "message 1"]
+    assert restored.token_count == 1
+
+    reread = Context(history_file)
+    assert await reread.restore()
+    assert list(reread.history) == list(restored.history)
+    assert reread.n_checkpoints == 2
+    assert reread.token_count == 1
+
+    with pytest.raises(ValueError):
+        await reread.revert_to(2)
+
+
+@pytest.mark.asyncio
+async def test_restore_validates_messages_lazily(tmp_path: Path):
+    history_file = tmp_path / "history.jsonl"
+    history_file.write_text(
+        '{"role": "_checkpoint", "id": 0}\n'
+        '{"role":"user","content":"Hello"}\n'
+        '{"role": "_usage", "token_count": 7}\n'
+        '{"role": "_checkpoint", "id": 1}\n'
+        '{"role":"user","content":{"not": "valid"}}\n',
+        encoding="utf-8",
+    )
+
+    context = Context(history_file)
+    assert await context.restore()
+    assert len(context.history) == 2
+    assert context.n_checkpoints == 2
+    # the message after the last usage is estimated from its size
+    assert context.token_count > 7
+    assert context.history[0].content == "Hello"
+    with pytest.raises(ValueError):
+        _ = context.history[1]
+
+    # reverting drops the invalid message without ever parsing it
+    await context.revert_to(1)
+    assert context.token_count == 7
+    await context.append_message(Message(role="assistant", content="Hi"))
+    assert [m.content for m in context.history] == ["Hello", "Hi"]
+    await context.close()
+
+    # revert while the kept messages are still unparsed
+    context = Context(history_file)
+    assert await context.restore()
+    await context.checkpoint(add_user_message=True)
+    await context.revert_to(1)
+    assert [m.content for m in context.history] == ["Hello", "Hi"]
+    await context.close()
+
+
+@pytest.mark.asyncio
+async def test_append_message_estimates_token_count(tmp_path: Path):
+    context = Context(tmp_path / "history.jsonl")
+    await context.update_token_count(1000)
+
+    # a huge tool output is counted right away, before the next LLM call
+    await context.append_message(Message(role="tool", content="x" * 350_000, tool_call_id="1"))
+    assert context.token_count == 1000 + 100_000 + TokenEstimator.MESSAGE_OVERHEAD
+    await context.close()
+
+    # restored from the file, the message after the last usage is still counted
+    restored = Context(tmp_path / "history.jsonl")
+    assert await restored.restore()
+    assert restored.token_count > 1000 + 100_000
+
+
+@pytest.mark.asyncio
+async def test_update_token_count_calibrates_estimator(tmp_path: Path):
+    estimator = TokenEstimator()
+    context = Context(tmp_path / "history.jsonl", token_estimator=estimator)
+    message = Message(role="tool", content="x" * 8000, tool_call_id="1")
+
+    # no calibration without a previous usage to compare with
+    await context.append_message(message)
+    await context.update_token_count(1000)
+    assert estimator.bytes_per_token == TokenEstimator.DEFAULT_BYTES_PER_TOKEN
+
+    # the real tokenizer takes 8 bytes per token, the estimate converges to it
+    usage = 1000
+    for _ in range(10):
+        await context.append_message(message)
+        usage += 1000 + TokenEstimator.MESSAGE_OVERHEAD
+        await context.update_token_count(usage)
+        assert context.token_count == usage
+    assert abs(estimator.estimate([message]) - 1000 - TokenEstimator.MESSAGE_OVERHEAD) <= 2
+
+    # a revert drops the baseline, the next usage is not compared with it
+    ratio = estimator.bytes_per_token
+    await context.checkpoint(add_user_message=False)
+    await context.revert_to(0)
+    await context.append_message(message)
+    await context.update_token_count(10)
+    assert estimator.bytes_per_token == ratio
+    await context.close()
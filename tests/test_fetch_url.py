@@ -2,7 +2,11 @@
 
 """Tests for WebFetch tool."""
 
+from collections.abc import AsyncGenerator
+
 import pytest
+import pytest_asyncio
+from aiohttp import web
 from inline_snapshot import snapshot
 from kosong.tooling import ToolError, ToolOk
 
@@ -94,3 +98,76 @@ async def test_fetch_url_javascript_driven_site(fetch_url_tool: FetchURL) -> Non
     # If it fails, should indicate extraction issues
     if isinstance(result, ToolError):
         assert "failed to extract meaningful content" in result.message.lower()
+
+
+_PAGE = (
+    "<html><head><title>Local page</title></head><body><article>"
+    + "<p>This paragraph is long enough to be kept as the main content of the page.</p>" * 20
+    + "</article></body></html>"
+)
+
+
+@pytest_asyncio.fixture
+async def local_server() -> AsyncGenerator[tuple[str, list[web.Request]]]:
+    """Serve `_PAGE` with an ETag, honoring `If-None-Match` and a `cache` query parameter."""
+    requests: list[web.Request] = []
+
+    async def handle(request: web.Request) -> web.Response:
+        requests.append(request)
+        headers = {"ETag": '"v1"', "Cache-Control": request.query.get("cache", "no-cache")}
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers=headers)
+        return web.Response(text=_PAGE, content_type="text/html", headers=headers)
+
+    app = web.Application()
+    app.router.add_get("/", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    yield f"http://{host}:{port}/", requests
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_fetch_url_cache(
+    fetch_url_tool: FetchURL, local_server: tuple[str, list[web.Request]]
+) -> None:
+    """Test that responses are cached and revalidated."""
+    url, requests = local_server
+
+    first = await fetch_url_tool(Params(url=url))
+    assert isinstance(first, ToolOk)
+    assert isinstance(first.output, str)
+    assert "This paragraph is long enough" in first.output
+
+    # `no-cache` responses are revalidated every time
+    assert await fetch_url_tool(Params(url=url)) == first
+    assert [r.headers.get("If-None-Match") for r in requests] == [None, '"v1"']
+
+    # fresh responses are used without a request
+    fresh_url = f"{url}?cache=max-age=60"
+    assert await fetch_url_tool(Params(url=fresh_url)) == first
+    assert await fetch_url_tool(Params(url=fresh_url)) == first
+    assert len(requests) == 3
+
+    no_store_url = f"{url}?cache=no-store"
+    await fetch_url_tool(Params(url=no_store_url))
+    await fetch_url_tool(Params(url=no_store_url))
+    assert [r.headers.get("If-None-Match") for r in requests[3:]] == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_fetch_url_size_limit(
+    fetch_url_tool: FetchURL,
+    local_server: tuple[str, list[web.Request]],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Test that only the beginning of large pages is read."""
+    url, _ = local_server
+    monkeypatch.setattr("kimi_cli.tools.web.fetch.MAX_BODY_BYTES", len(_PAGE) // 2)
+
+    result = await fetch_url_tool(Params(url=url))
+    assert isinstance(result, ToolOk)
+    assert "only its beginning was extracted" in result.message
@@ -55,13 +55,22 @@ async def test_glob_multiple_matches(glob_tool: Glob, test_files: Path):
 
 
 @pytest.mark.asyncio
-async def test_glob_recursive_pattern_prohibited(glob_tool: Glob, test_files: Path):
-    """Test that recursive glob pattern starting with **/ is prohibited."""
+async def test_glob_recursive_pattern_from_root(glob_tool: Glob, test_files: Path):
+    """Test recursive glob pattern starting with **/."""
     result = await glob_tool(Params(pattern="**/*.py", directory=str(test_files)))
 
-    assert isinstance(result, ToolError)
-    assert "starts with '**' which is not allowed" in result.message
-    assert "Unsafe pattern" in result.brief
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert result.output.replace("\\", "/").split("\n") == [
+        "setup.py",
+        "src/main/app.py",
+        "src/main/config.py",
+        "src/main.py",
+        "src/test/test_app.py",
+        "src/test/test_config.py",
+        "src/utils.py",
+    ]
+    assert "Found 7 matches" in result.message
 
 
 @pytest.mark.asyncio
@@ -219,24 +228,101 @@ async def test_glob_max_matches_limit(glob_tool: Glob, temp_work_dir: Path):
 
 
 @pytest.mark.asyncio
-async def test_glob_enhanced_double_star_validation(glob_tool: Glob, temp_work_dir: Path):
-    """Test enhanced ** pattern validation with directory listing."""
-    # Create some top-level files and directories for listing
-    (temp_work_dir / "file1.txt").write_text("content1")
-    (temp_work_dir / "file2.py").write_text("content2")
-    (temp_work_dir / "src").mkdir()
-    (temp_work_dir / "docs").mkdir()
+async def test_glob_double_star_skips_ignored(glob_tool: Glob, temp_work_dir: Path):
+    """Test that ** skips ignored directories, unless named explicitly, but not matched files."""
+    for name in [
+        "app.js",
+        "node_modules/react/index.js",
+        ".git/hooks/hook.js",
+        "dist/bundle.js",
+        "generated/api.js",
+        "lib/generated/api.js",
+        "lib/util.js",
+        "lib/util.min.js",
+        "lib/keep.min.js",
+    ]:
+        (temp_work_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (temp_work_dir / name).write_text("content")
+    (temp_work_dir / ".gitignore").write_text("/generated/\n*.min.js\n!keep.min.js\n")
+    (temp_work_dir / "lib" / ".gitignore").write_text("generated\n")
+
+    result = await glob_tool(Params(pattern="**/*.js", directory=str(temp_work_dir)))
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert result.output.replace("\\", "/").split("\n") == [
+        "app.js",
+        "lib/keep.min.js",
+        "lib/util.js",
+        "lib/util.min.js",
+    ]
+
+    # rules of `.gitignore` files above the searched directory apply as well
+    lib_dir = str(temp_work_dir / "lib")
+    result = await glob_tool(Params(pattern="**/*.js", directory=lib_dir))
+    assert isinstance(result, ToolOk)
+    assert result.output == "keep.min.js\nutil.js\nutil.min.js"
+
+    result = await glob_tool(Params(pattern="node_modules/**/*.js", directory=str(temp_work_dir)))
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert result.output.replace("\\", "/") == "node_modules/react/index.js"
+
+
+@pytest.mark.asyncio
+async def test_glob_wildcards_match_ignored_names(glob_tool: Glob, temp_work_dir: Path):
+    """Test that wildcards find temp, backup, compiled and build files that exist."""
+    for name in ["a.bak", "b.pyc", "src/X.class", "notes~"]:
+        (temp_work_dir / name).parent.mkdir(parents=True, exist_ok=True)
+        (temp_work_dir / name).write_text("content")
+
+    for pattern, expected in [
+        ("*.bak", "a.bak"),
+        ("*.pyc", "b.pyc"),
+        ("**/*.class", "src/X.class"),
+        ("*~", "notes~"),
+    ]:
+        result = await glob_tool(Params(pattern=pattern, directory=str(temp_work_dir)))
+        assert isinstance(result, ToolOk)
+        assert isinstance(result.output, str)
+        assert result.output.replace("\\", "/") == expected
+
+
+@pytest.mark.asyncio
+async def test_glob_stops_after_scanning_limit(
+    glob_tool: Glob, temp_work_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    """Test that glob stops scanning a huge tree and reports a lower bound."""
+    monkeypatch.setattr("kimi_cli.tools.file.glob.MAX_SCANNED_ENTRIES", 100)
+    for i in range(10):
+        for j in range(20):
+            (temp_work_dir / f"dir_{i}").mkdir(exist_ok=True)
+            (temp_work_dir / f"dir_{i}" / f"file_{j:02}.txt").write_text("content")
 
     result = await glob_tool(Params(pattern="**/*.txt", directory=str(temp_work_dir)))
 
-    assert isinstance(result, ToolError)
-    assert "starts with '**' which is not allowed" in result.message
-    assert "Use more specific patterns instead" in result.message
-    # Should include directory listing
-    assert "file1.txt" in result.output
-    assert "file2.py" in result.output
-    assert "src" in result.output
-    assert "docs" in result.output
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    output_lines = result.output.replace("\\", "/").split("\n")
+    assert output_lines[:2] == ["dir_0/file_00.txt", "dir_0/file_01.txt"]
+    assert len(output_lines) == 80
+    assert "Found at least 80 matches" in result.message
+    assert "The search stopped after scanning 100 files and directories" in result.message
+
+
+@pytest.mark.asyncio
+async def test_glob_brace_expansion(glob_tool: Glob, test_files: Path):
+    """Test {a,b} alternatives in patterns."""
+    result = await glob_tool(
+        Params(pattern="{*.md,src/main/{app,config}.py}", directory=str(test_files))
+    )
+
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert result.output.replace("\\", "/").split("\n") == [
+        "README.md",
+        "src/main/app.py",
+        "src/main/config.py",
+    ]
 
 
 @pytest.mark.asyncio
@@ -289,8 +375,10 @@ async def test_glob_wildcard_with_double_star_patterns(glob_tool: Glob, test_fil
     # Test pattern with ** in the middle
     result = await glob_tool(Params(pattern="**/main/*.py", directory=str(test_files)))
 
-    assert isinstance(result, ToolError)
-    assert "starts with '**' which is not allowed" in result.message
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    output = result.output.replace("\\", "/")  # Normalize for Windows paths
+    assert output == "src/main/app.py\nsrc/main/config.py"
 
     # Test pattern with ** not at the beginning
     result = await glob_tool(Params(pattern="src/**/test_*.py", directory=str(test_files)))
@@ -315,5 +403,13 @@ async def test_glob_pattern_edge_cases(glob_tool: Glob, test_files: Path):
 
     # Test pattern that starts with **/
     result = await glob_tool(Params(pattern="**/*.txt", directory=str(test_files)))
+    assert isinstance(result, ToolOk)
+    assert "No matches found" in result.message
+
+    # Test patterns escaping the directory
+    result = await glob_tool(Params(pattern="/etc/*", directory=str(test_files)))
+    assert isinstance(result, ToolError)
+    assert "is an absolute path" in result.message
+    result = await glob_tool(Params(pattern="../*", directory=str(test_files)))
     assert isinstance(result, ToolError)
-    assert "starts with '**' which is not allowed" in result.message
+    assert "contains `..`" in result.message
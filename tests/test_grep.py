@@ -1,12 +1,17 @@
 """Tests for the grep tool."""
 
+import asyncio
+import json
+import sys
 import tempfile
+import time
 from pathlib import Path
 
 import pytest
+from inline_snapshot import snapshot
 from kosong.tooling import ToolError, ToolOk
 
-from kimi_cli.tools.file.grep import Grep, Params
+from kimi_cli.tools.file.grep import Grep, Params, _JSONRenderer, _run_rg
 
 
 @pytest.fixture
@@ -365,3 +370,70 @@ async def test_grep_before_after_context(grep_tool: Grep, temp_test_files):
     assert "constructor()" in result.output
     assert "this.message" in result.output
     assert "}" not in result.output
+
+
+def test_json_renderer_matches_ripgrep_format():
+    """Test rendering `--json` messages like the plain output of ripgrep."""
+    render = _JSONRenderer(with_filename=True, line_number=True, context=True)
+
+    def message(kind: str, path: str, line_number: int, text: str) -> bytes:
+        data = {"path": {"text": path}, "lines": {"text": text}, "line_number": line_number}
+        return json.dumps({"type": kind, "data": data}).encode()
+
+    lines: list[str] = []
+    for record in [
+        json.dumps({"type": "begin", "data": {"path": {"text": "a.py"}}}).encode(),
+        message("context", "a.py", 1, "import os\n"),
+        message("match", "a.py", 2, "def f():\n"),
+        message("match", "a.py", 10, "def g():\n    pass\n"),
+        json.dumps({"type": "end", "data": {"path": {"text": "a.py"}}}).encode(),
+        message("match", "b.py", 11, "def h():\n"),
+    ]:
+        lines += render(record)
+    assert lines == snapshot(
+        [
+            "a.py-1-import os",
+            "a.py:2:def f():",
+            "--",
+            "a.py:10:def g():",
+            "a.py:11:    pass",
+            "--",
+            "b.py:11:def h():",
+        ]
+    )
+
+
+def _plain(record: bytes) -> list[str]:
+    return [record.decode().rstrip("\n")]
+
+
+_ENDLESS_OUTPUT = [sys.executable, "-c", "while True: print('y' * 10)"]
+
+
+@pytest.mark.asyncio
+async def test_run_rg_stops_at_head_limit():
+    """Test that the search process is killed once enough lines are collected."""
+    result = await _run_rg(_ENDLESS_OUTPUT, _plain, head_limit=3, max_chars=10_000)
+    assert result.lines == ["y" * 10] * 3
+    assert result.truncated == "head_limit"
+
+
+@pytest.mark.asyncio
+async def test_run_rg_stops_at_max_chars():
+    """Test that the search process is killed once the output budget is spent."""
+    result = await _run_rg(_ENDLESS_OUTPUT, _plain, head_limit=None, max_chars=100)
+    assert result.lines == ["y" * 10] * 9
+    assert result.truncated == "max_chars"
+
+
+@pytest.mark.asyncio
+async def test_run_rg_cancellation():
+    """Test that cancelling a search does not wait for the search process."""
+    command = [sys.executable, "-c", "import time; time.sleep(60)"]
+    task = asyncio.create_task(_run_rg(command, _plain, head_limit=None, max_chars=100))
+    await asyncio.sleep(0.5)
+    start = time.monotonic()
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert time.monotonic() - start < 5
@@ -0,0 +1,130 @@
+"""Tests for the history file formats."""
+
+import base64
+import threading
+from pathlib import Path
+
+import pytest
+from kosong.message import ImageURLPart, Message, TextPart
+
+from kimi_cli.soul.context import Context
+from kimi_cli.soul.storage import (
+    JSONLStorage,
+    Marker,
+    PackedStorage,
+    convert_history,
+    get_history_file,
+    iter_history_records,
+)
+
+IMAGE_URL = "data:image/png;base64," + base64.b64encode(bytes(range(256)) * 64).decode()
+
+
+def _image_message(text: str) -> Message:
+    return Message(
+        role="user",
+        content=[TextPart(text=text), ImageURLPart(image_url=ImageURLPart.ImageURL(url=IMAGE_URL))],
+    )
+
+
+async def _write_history(history_file: Path) -> list[Message]:
+    context = Context(history_file)
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(_image_message("first"))
+    await context.update_token_count(10)
+    await context.checkpoint(add_user_message=False)
+    await context.append_message(
+        [Message(role="assistant", content="x" * 1000), _image_message("second")]
+    )
+    await context.update_token_count(20)
+    await context.close()
+    return list(context.history)
+
+
+@pytest.mark.asyncio
+async def test_packed_round_trip_and_dedup(tmp_path: Path):
+    history_file = tmp_path / "history.kpack"
+    messages = await _write_history(history_file)
+
+    # the image is stored once, outside of the history file
+    blobs = list((tmp_path / "blobs").iterdir())
+    assert len(blobs) == 1
+    assert history_file.stat().st_size < len(IMAGE_URL)
+
+    restored = Context(history_file)
+    assert await restored.restore()
+    assert list(restored.history) == messages
+    assert restored.token_count == 20
+    assert restored.n_checkpoints == 2
+
+    await restored.revert_to(1)
+    await restored.close()
+    reread = Context(history_file)
+    assert await reread.restore()
+    assert list(reread.history) == messages[:1]
+    assert reread.token_count == 10
+
+
+def test_packed_persists_blobs_encoded_meanwhile(tmp_path: Path):
+    """Test that blobs of messages encoded while the writer thread persists are not lost."""
+    storage = PackedStorage(tmp_path / "blobs")
+    records: list[bytes] = []
+    done = threading.Event()
+
+    def encode() -> None:
+        for i in range(200):
+            text = f"{i:04}" * PackedStorage.BLOB_MIN_SIZE
+            records.append(storage.encode_message(Message(role="user", content=text)))
+        done.set()
+
+    encoder = threading.Thread(target=encode)
+    encoder.start()
+    while not done.is_set():
+        storage.persist(fsync=False)
+    encoder.join()
+    storage.persist(fsync=False)
+
+    for i, record in enumerate(records):
+        assert storage.decode_message(record).content == f"{i:04}" * PackedStorage.BLOB_MIN_SIZE
+
+
+@pytest.mark.asyncio
+async def test_packed_ignores_torn_write(tmp_path: Path):
+    history_file = tmp_path / "history.kpack"
+    messages = await _write_history(history_file)
+    with open(history_file, "ab") as f:
+        f.write(PackedStorage(tmp_path / "blobs").encode_marker(Marker("_usage", 30))[:-3])
+
+    restored = Context(history_file)
+    assert await restored.restore()
+    assert list(restored.history) == messages
+    assert restored.token_count == 20
+
+
+@pytest.mark.asyncio
+async def test_convert_history_both_ways(tmp_path: Path):
+    jsonl_file = tmp_path / "history.jsonl"
+    await _write_history(jsonl_file)
+    records = list(iter_history_records(jsonl_file))
+    assert len(records) == 7
+
+    packed_file = tmp_path / "converted.kpack"
+    assert convert_history(jsonl_file, packed_file) == len(records)
+    assert list(iter_history_records(packed_file)) == records
+    assert packed_file.stat().st_size < jsonl_file.stat().st_size
+
+    back_file = tmp_path / "back.jsonl"
+    assert convert_history(packed_file, back_file) == len(records)
+    assert back_file.read_bytes() == jsonl_file.read_bytes()
+
+
+def test_get_history_file_keeps_existing_format(tmp_path: Path):
+    history_file = tmp_path / "session.jsonl"
+    assert get_history_file(history_file, "packed") == tmp_path / "session.kpack"
+    assert get_history_file(history_file, "jsonl") == history_file
+
+    history_file.touch()
+    assert get_history_file(history_file, "packed") == tmp_path / "session.kpack"
+
+    history_file.write_bytes(JSONLStorage().encode_marker(Marker("_checkpoint", 0)))
+    assert get_history_file(history_file, "packed") == history_file
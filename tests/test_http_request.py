@@ -0,0 +1,123 @@
+"""Tests for the HttpRequest tool."""
+
+from collections.abc import AsyncGenerator
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from kosong.tooling import ToolError, ToolOk
+
+from kimi_cli.soul.approval import Approval
+from kimi_cli.tools.web.http import BatchRange, HttpRequest, Params
+from kimi_cli.utils.aiohttp import SharedClientSession
+
+
+@pytest_asyncio.fixture
+async def local_server() -> AsyncGenerator[str]:
+    """Serve a login endpoint, and items of which only some exist."""
+
+    async def login(request: web.Request) -> web.Response:
+        response = web.Response(text="welcome")
+        response.set_cookie("session", (await request.text()) or "anonymous")
+        return response
+
+    async def item(request: web.Request) -> web.Response:
+        item_id = int(request.match_info["id"])
+        if item_id == 7:
+            raise web.HTTPFound("/login")
+        if item_id % 5 != 0:
+            return web.Response(status=404, text="not found")
+        return web.Response(text=f"item {item_id} of {request.cookies.get('session')}")
+
+    app = web.Application()
+    app.router.add_post("/login", login)
+    app.router.add_get("/items/{id}", item)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = runner.addresses[0][:2]
+    yield f"http://{host}:{port}"
+    await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_http_request_cookies(http_request_tool: HttpRequest, local_server: str) -> None:
+    """Test that cookies set by a response are sent along with later requests."""
+    login = await http_request_tool(Params(url=f"{local_server}/login", method="post", body="bob"))
+    assert isinstance(login, ToolOk)
+    assert isinstance(login.output, str)
+    assert login.output.startswith("HTTP 200 OK\n")
+    assert "Set-Cookie: session=bob" in login.output
+    assert login.output.endswith("\n\nwelcome")
+
+    result = await http_request_tool(Params(url=f"{local_server}/items/5"))
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert result.output.endswith("item 5 of bob")
+
+
+@pytest.mark.asyncio
+async def test_http_request_batch(http_request_tool: HttpRequest, local_server: str) -> None:
+    """Test that a batch summarizes the responses that differ from the most common one."""
+    result = await http_request_tool(
+        Params(
+            url=f"{local_server}/items/{{{{id}}}}",
+            batch_range=BatchRange(name="id", start=1, stop=20),
+            concurrency=4,
+        )
+    )
+    assert isinstance(result, ToolOk)
+    assert result.message == "20 requests, 6 distinct responses."
+    assert isinstance(result.output, str)
+    summary = result.output.split("\n\n")
+    assert summary[1].splitlines()[1].startswith("    15 × 404  9 bytes  ")
+    differing = summary[2].splitlines()[1:]
+    assert [line.split()[:2] for line in differing] == [
+        ["id=5", "200"],
+        ["id=7", "302"],
+        ["id=10", "200"],
+        ["id=15", "200"],
+        ["id=20", "200"],
+    ]
+    assert differing[1].endswith("-> /login")
+
+
+@pytest.mark.asyncio
+async def test_http_request_batch_errors(http_request_tool: HttpRequest, local_server: str) -> None:
+    """Test that invalid batches are rejected before sending anything."""
+    missing = await http_request_tool(
+        Params(url=f"{local_server}/items/{{{{id}}}}", batch=[{"id": "1"}, {"other": "2"}])
+    )
+    assert isinstance(missing, ToolError)
+    assert missing.message == "Placeholders without values in some items of the batch: id."
+
+    too_large = await http_request_tool(
+        Params(
+            url=f"{local_server}/items/{{{{id}}}}",
+            batch_range=BatchRange(name="id", start=0, stop=10**9),
+        )
+    )
+    assert isinstance(too_large, ToolError)
+    assert too_large.brief == "Batch too large"
+
+
+@pytest.mark.asyncio
+async def test_http_request_cookie_file(local_server: str, tmp_path: Path) -> None:
+    """Test that cookies are kept across client sessions with a cookie file."""
+    cookie_file = tmp_path / "session.cookies"
+    http_session = SharedClientSession(cookie_file=cookie_file)
+    async with http_session.session.post(f"{local_server}/login", data=b"alice"):
+        pass
+    await http_session.close()
+    assert cookie_file.exists()
+
+    http_session = SharedClientSession(cookie_file=cookie_file)
+    result = await HttpRequest(http_session, Approval(yolo=True))(
+        Params(url=f"{local_server}/items/10")
+    )
+    await http_session.close()
+    assert isinstance(result, ToolOk)
+    assert isinstance(result.output, str)
+    assert result.output.endswith("item 10 of alice")
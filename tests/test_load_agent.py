@@ -9,11 +9,13 @@ import pytest
 
 from kimi_cli.config import Config
 from kimi_cli.session import Session
-from kimi_cli.soul.agent import _load_system_prompt, _load_tools, load_agent
+from kimi_cli.soul.agent import _load_system_prompt, _load_tool, _load_tools, load_agent
 from kimi_cli.soul.approval import Approval
 from kimi_cli.soul.denwarenji import DenwaRenji
 from kimi_cli.soul.runtime import BuiltinSystemPromptArgs, Runtime
 from kimi_cli.soul.toolset import CustomToolset
+from kimi_cli.tools.bash import Bash
+from kimi_cli.tools.bash.worker import ShellWorkerPool
 
 
 def test_load_system_prompt(system_prompt_file: Path, builtin_args: BuiltinSystemPromptArgs):
@@ -68,6 +70,34 @@ def test_load_tools_invalid(runtime: Runtime):
     assert "kimi_cli.tools.nonexistent:Tool" in bad_tools
 
 
+def test_load_tool_reuses_instance_with_same_dependencies():
+    """Test that a tool is built once for the very same dependencies."""
+    approval = Approval()
+    tool = _load_tool("kimi_cli.tools.bash:Bash", {Approval: approval})
+    assert tool is not None
+    assert _load_tool("kimi_cli.tools.bash:Bash", {Approval: approval}) is tool
+
+    # another runtime gets tools of its own
+    other = _load_tool("kimi_cli.tools.bash:Bash", {Approval: Approval()})
+    assert other is not None
+    assert other is not tool
+
+
+def test_load_tool_optional_dependency():
+    """Test that an optional dependency is injected when provided, and defaulted otherwise."""
+    approval = Approval()
+    shell_pool = ShellWorkerPool()
+    tool = _load_tool("kimi_cli.tools.bash:Bash", {Approval: approval})
+    assert isinstance(tool, Bash)
+    assert tool._shell_pool is None  # pyright: ignore[reportPrivateUsage]
+
+    tool = _load_tool(
+        "kimi_cli.tools.bash:Bash", {Approval: approval, ShellWorkerPool | None: shell_pool}
+    )
+    assert isinstance(tool, Bash)
+    assert tool._shell_pool is shell_pool  # pyright: ignore[reportPrivateUsage]
+
+
 @pytest.mark.asyncio
 async def test_load_agent_invalid_tools(agent_file_invalid_tools: Path, runtime: Runtime):
     """Test loading agent with invalid tools raises ValueError."""
@@ -0,0 +1,47 @@
+"""Tests for the caches of the markdown renderer."""
+
+from rich.console import Console
+
+from kimi_cli.utils.rich import markdown
+from kimi_cli.utils.rich.markdown import Markdown
+
+DOCUMENT = """\
+Some `code` and a block:
+
+```python
+def f(x):
+    return x * 2  # doubled
+```
+
+```no-such-language
+plain text
+```
+"""
+
+
+def _render(console: Console, md: Markdown, width: int) -> str:
+    with console.capture() as capture:
+        console.print(md, width=width)
+    return capture.get()
+
+
+def test_markdown_caches_render_like_uncached():
+    """Test that renders with warm caches are the same as the first ones, at any width."""
+    console = Console(color_system="truecolor", force_terminal=True)
+    markdown._highlight.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    first = {width: _render(console, Markdown(DOCUMENT), width) for width in [20, 80]}
+    assert markdown._highlight.cache_info().hits == 2  # pyright: ignore[reportPrivateUsage]
+
+    md = Markdown(DOCUMENT)
+    assert md.parsed is Markdown(DOCUMENT).parsed
+    for width in [20, 80, 20]:
+        assert _render(console, md, width) == first[width]
+    # a width already rendered by the same markdown is not rendered again
+    assert markdown._highlight.cache_info().hits == 6  # pyright: ignore[reportPrivateUsage]
+    assert "def" in first[80] and "plain text" in first[80]
+
+
+def test_markdown_reuses_lexers():
+    get_lexer = markdown._get_lexer  # pyright: ignore[reportPrivateUsage]
+    assert get_lexer("python") is get_lexer("python")
+    assert get_lexer("no-such-language").name == "Text only"
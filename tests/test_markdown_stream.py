@@ -0,0 +1,109 @@
+"""Tests for rendering streamed markdown one block at a time."""
+
+import re
+
+from rich.console import Console, RenderableType
+
+from kimi_cli.utils.rich.markdown import Markdown, MarkdownStream
+
+DOCUMENT = """\
+# Title
+
+A paragraph that goes
+on lazily, then a list:
+
+1. first
+
+2. second
+   continued
+
+Setext heading
+---
+
+```python
+def f():
+
+    return 1
+```
+
+---
+> quoted
+> text
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+***
+After a rule
+
+***
+- item
+- item
+
+Last line"""
+
+
+def _render(*renderables: RenderableType) -> str:
+    console = Console(width=60, color_system="truecolor", force_terminal=True, record=True)
+    with console.capture() as capture:
+        for renderable in renderables:
+            console.print(renderable)
+    # hyperlinks get random IDs
+    return re.sub(r"id=\d+;", "", capture.get())
+
+
+def _stream(document: str, size: int) -> tuple[list[RenderableType], RenderableType | None]:
+    stream = MarkdownStream(style="italic")
+    blocks: list[RenderableType] = []
+    for i in range(0, len(document), size):
+        if (renderable := stream.append(document[i : i + size])) is not None:
+            blocks.append(renderable)
+    return blocks, stream.finish()
+
+
+def test_markdown_stream_renders_like_markdown():
+    """Test that the blocks streamed token by token look like the whole text rendered at once."""
+    for size in [1, 3, 7, 1000]:
+        blocks, last = _stream(DOCUMENT, size)
+        if size < len(DOCUMENT):
+            assert blocks, "complete blocks are returned before the end of the stream"
+        assert last is not None
+        assert _render(*blocks, last) == _render(Markdown(DOCUMENT, style="italic"))
+
+
+def test_markdown_stream_resolves_reference_links():
+    """Test that reference links are resolved, whether they are defined before or after."""
+    for document in [
+        "See [docs][d] here.\n\nMore text.\n\n[d]: https://example.com\n\nEnd.\n",
+        "[d]: https://example.com\n\nSee [docs][d] here.\n\nMore text.\n\nEnd.\n",
+        "A [label] never defined.\n\nMore text.\n\nEnd.\n",
+    ]:
+        expected = _render(Markdown(document, style="italic"))
+        assert "[docs]" not in expected
+        for size in [1, 5]:
+            blocks, last = _stream(document, size)
+            assert last is not None
+            assert _render(*blocks, last) == expected
+
+
+def test_markdown_stream_does_not_hold_back_bracketed_prose():
+    """Test that brackets in prose, or a reference never defined, do not hold back the stream."""
+    paragraphs = [
+        "Set `x` to arr[i] and matrix[i][j], see [RFC 9110] and [optional] parts.",
+        "Then [docs][never] is a reference link that is never defined.",
+        *(f"Paragraph {i} with arr[{i}]." for i in range(20)),
+    ]
+    for separator in ["\n\n", "\n\n[d]: https://example.com\n\n"]:
+        document = separator.join(paragraphs)
+        blocks, last = _stream(document, 4)
+        assert last is not None
+        # only the paragraphs after the last complete line are left for the end
+        assert "Paragraph 17" in _render(*blocks)
+        assert _render(*blocks, last) == _render(Markdown(document, style="italic"))
+
+
+def test_markdown_stream_returns_nothing_for_blank_text():
+    stream = MarkdownStream()
+    assert stream.append("\n\n") is None
+    assert stream.finish() is None
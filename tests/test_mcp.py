@@ -0,0 +1,209 @@
+"""Tests for the pooled MCP connections and the discovery of MCP tools."""
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+import fastmcp
+import mcp
+import pytest
+from fastmcp import FastMCP
+from kosong.message import TextPart
+from kosong.tooling import ToolReturnType
+
+from kimi_cli.config import MCPConfig
+from kimi_cli.soul.agent import _load_mcp_tools  # pyright: ignore[reportPrivateUsage]
+from kimi_cli.soul.toolset import CustomToolset
+from kimi_cli.tools.mcp import (
+    MCPConnection,
+    MCPTool,
+    close_mcp_connections,
+    discover_mcp_tools,
+)
+
+
+def _make_server() -> tuple[FastMCP, list[int]]:
+    server = FastMCP("test")
+    calls: list[int] = []
+
+    @server.tool
+    async def echo(text: str) -> str:
+        """Echo the text after a while."""
+        calls.append(len(calls))
+        await asyncio.sleep(0.2)
+        return text
+
+    return server, calls
+
+
+def _text(result: ToolReturnType) -> str:
+    [part] = result.output
+    assert isinstance(part, TextPart)
+    return part.text
+
+
+@pytest.mark.asyncio
+async def test_calls_share_one_session():
+    server, calls = _make_server()
+    connection = MCPConnection(fastmcp.Client(server), MCPConfig())
+    try:
+        await connection.connect()
+        [tool] = await connection.list_tools()
+        echo = MCPTool(tool, connection)
+        session = connection.client.session
+
+        start = time.monotonic()
+        results = await asyncio.gather(*(echo(text=str(i)) for i in range(5)))
+        # the calls were in flight at the same time
+        assert time.monotonic() - start < 0.2 * 5
+        assert [_text(result) for result in results] == ["0", "1", "2", "3", "4"]
+        assert connection.client.session is session
+        assert len(calls) == 5
+    finally:
+        await connection.close()
+    assert not connection.client.is_connected()
+
+
+@pytest.mark.asyncio
+async def test_closed_connection_is_reopened():
+    server, _ = _make_server()
+    connection = MCPConnection(fastmcp.Client(server), MCPConfig(health_check_interval=0))
+    try:
+        [tool] = await connection.list_tools()
+        echo = MCPTool(tool, connection)
+        assert _text(await echo(text="first")) == "first"
+
+        # e.g. the server went away
+        await connection.client.close()
+        assert _text(await echo(text="second")) == "second"
+        assert connection.client.is_connected()
+    finally:
+        await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_tool_call_timeout():
+    server, _ = _make_server()
+    connection = MCPConnection(fastmcp.Client(server), MCPConfig(tool_call_timeout=0.05))
+    try:
+        [tool] = await connection.list_tools()
+        with pytest.raises(Exception, match="[Tt]imed out"):
+            await MCPTool(tool, connection)(text="slow")
+        # the connection is still usable
+        assert len(await connection.list_tools()) == 1
+    finally:
+        await connection.close()
+
+
+_STDIO_SERVER = """\
+from fastmcp import FastMCP
+
+server = FastMCP("stub")
+
+
+@server.tool
+def echo(text: str) -> str:
+    return text
+
+
+server.run(show_banner=False)
+"""
+
+
+@pytest.mark.asyncio
+async def test_discovery_uses_the_cached_manifest(tmp_path: Path):
+    script = tmp_path / "server.py"
+    script.write_text(_STDIO_SERVER)
+    config = {"mcpServers": {"stub": {"command": sys.executable, "args": [str(script)]}}}
+    manifest_dir = tmp_path / "manifests"
+    try:
+        discovery = await discover_mcp_tools(config, MCPConfig(), manifest_dir=manifest_dir)
+        assert (discovery.name, discovery.source, discovery.error) == ("stub", "server", None)
+        assert [tool.name for tool in discovery.tools] == ["echo"]
+        [manifest] = manifest_dir.iterdir()
+    finally:
+        await close_mcp_connections()
+
+    # pretend the server had another tool when the manifest was saved
+    data = json.loads(manifest.read_text())
+    data["tools"].append({**data["tools"][0], "name": "removed"})
+    manifest.write_text(json.dumps(data))
+
+    updated = asyncio.Event()
+    updates: list[list[str]] = []
+
+    def on_update(connection: MCPConnection[Any], tools: list[mcp.Tool]):
+        updates.append([tool.name for tool in tools])
+        updated.set()
+
+    try:
+        discovery = await discover_mcp_tools(
+            config, MCPConfig(), manifest_dir=manifest_dir, on_update=on_update
+        )
+        assert discovery.source == "manifest"
+        assert [tool.name for tool in discovery.tools] == ["echo", "removed"]
+        assert discovery.connection is not None
+        # the tools are usable before the server is validated
+        [echo, _] = [MCPTool(tool, discovery.connection) for tool in discovery.tools]
+        assert _text(await echo(text="hi")) == "hi"
+
+        await asyncio.wait_for(updated.wait(), timeout=30)
+        assert updates == [["echo"]]
+        assert [tool["name"] for tool in json.loads(manifest.read_text())["tools"]] == ["echo"]
+    finally:
+        await close_mcp_connections()
+
+
+@pytest.mark.asyncio
+async def test_agent_drops_tools_removed_from_the_server(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    script = tmp_path / "server.py"
+    script.write_text(_STDIO_SERVER)
+    config = {"mcpServers": {"stub": {"command": sys.executable, "args": [str(script)]}}}
+    monkeypatch.setattr("kimi_cli.tools.mcp.get_share_dir", lambda: tmp_path)
+
+    async def load() -> CustomToolset:
+        toolset = CustomToolset()
+        await _load_mcp_tools(toolset, [config], exclude_tools=set(), options=MCPConfig())
+        return toolset
+
+    try:
+        await load()
+    finally:
+        await close_mcp_connections()
+    [manifest] = (tmp_path / "mcp-manifests").iterdir()
+    data = json.loads(manifest.read_text())
+    data["tools"].append({**data["tools"][0], "name": "removed"})
+    manifest.write_text(json.dumps(data))
+
+    try:
+        toolset = await load()
+        assert [tool.name for tool in toolset.tools] == ["echo", "removed"]
+        async with asyncio.timeout(30):
+            while [tool.name for tool in toolset.tools] != ["echo"]:
+                await asyncio.sleep(0.05)
+    finally:
+        await close_mcp_connections()
+
+
+@pytest.mark.asyncio
+async def test_discovery_deadline(tmp_path: Path):
+    config = {
+        "mcpServers": {
+            "hung": {"command": sys.executable, "args": ["-c", "import time; time.sleep(60)"]}
+        }
+    }
+    start = time.monotonic()
+    try:
+        discovery = await discover_mcp_tools(
+            config, MCPConfig(discovery_timeout=0.5), manifest_dir=tmp_path
+        )
+    finally:
+        await close_mcp_connections()
+    assert time.monotonic() - start < 10
+    assert (discovery.connection, discovery.error) == (None, "timed out")
+    assert not list(tmp_path.iterdir())
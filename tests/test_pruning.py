@@ -0,0 +1,85 @@
+"""Tests for pruning stale tool outputs."""
+
+from hashlib import sha256
+
+from kosong.message import ImageURLPart, Message, TextPart
+
+from kimi_cli.soul import StatusSnapshot
+from kimi_cli.soul.pruning import ToolOutputPruning
+from kimi_cli.wire.message import StatusUpdate, serialize_event
+
+
+def _step(i: int, output: str) -> list[Message]:
+    return [
+        Message(role="assistant", content=f"step {i}"),
+        Message(role="tool", content=output, tool_call_id=f"call_{i}"),
+    ]
+
+
+def test_prune_stale_tool_outputs():
+    big = "".join(f"line {i}\n" for i in range(1000))
+    messages = [Message(role="user", content="go")]
+    for i in range(5):
+        messages.extend(_step(i, big if i != 1 else "short"))
+
+    result = ToolOutputPruning().prune(messages)
+
+    # the last three steps are kept, and so are short outputs
+    assert result.messages[3:5] == messages[3:5]
+    assert result.messages[5:] == messages[5:]
+    assert [e.tool_call_id for e in result.elided] == ["call_0"]
+    assert result.elided[0].sha256 == sha256(big.encode()).hexdigest()
+    assert result.elided[0].n_chars == len(big)
+    assert result.tokens_saved > 0
+
+    pruned = result.messages[2].content
+    assert isinstance(pruned, str)
+    assert f"{len(big)} characters, sha256 {result.elided[0].sha256[:16]}" in pruned
+    assert pruned.count("\n") < 200
+    assert "line 0\n" in pruned and "line 999\n" in pruned
+    assert "line 500\n" not in pruned
+
+    # pruning is idempotent
+    again = ToolOutputPruning().prune(result.messages)
+    assert again.elided == []
+    assert again.messages == result.messages
+
+
+def test_prune_media_parts():
+    output = Message(
+        role="tool",
+        content=[
+            TextPart(text="x" * 5000),
+            ImageURLPart(image_url=ImageURLPart.ImageURL(url="data:image/png;base64,AAAA")),
+        ],
+        tool_call_id="call_0",
+    )
+    messages = [Message(role="assistant", content="step 0"), output]
+    messages.extend(m for i in range(1, 4) for m in _step(i, "ok"))
+
+    result = ToolOutputPruning().prune(messages)
+    content = result.messages[1].content
+    assert isinstance(content, list)
+    assert all(isinstance(part, TextPart) for part in content)
+    assert content[1] == TextPart(text="<system>image_url from an earlier step elided</system>")
+    assert len(result.elided) == 1
+
+
+def test_nothing_to_prune_in_short_history():
+    messages = [Message(role="user", content="go"), *_step(0, "x" * 10_000)]
+    result = ToolOutputPruning().prune(messages)
+    assert result.messages == messages
+    assert result.elided == []
+    assert result.tokens_saved == 0
+
+
+def test_status_update_reports_tokens_pruned():
+    status = StatusSnapshot(context_usage=0.5)
+    assert serialize_event(StatusUpdate(status=status)) == {
+        "type": "status_update",
+        "payload": {"context_usage": 0.5},
+    }
+    assert serialize_event(StatusUpdate(status=status, tokens_pruned=1234)) == {
+        "type": "status_update",
+        "payload": {"context_usage": 0.5, "tokens_pruned": 1234},
+    }
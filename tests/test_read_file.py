@@ -310,3 +310,50 @@ async def test_max_bytes_boundary(read_file_tool: ReadFile, temp_work_dir: Path)
 
     assert isinstance(result, ToolOk)
     assert f"Max {MAX_BYTES} bytes reached" in result.message
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mmap_min_size", [1, 1 << 30], ids=["mmap", "buffered"])
+async def test_read_far_window_with_line_index(
+    read_file_tool: ReadFile,
+    temp_work_dir: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    mmap_min_size: int,
+):
+    """Test reading windows deep in a file through the sparse line index."""
+    monkeypatch.setattr("kimi_cli.tools.file.read.INDEX_BLOCK_SIZE", 256)
+    monkeypatch.setattr("kimi_cli.tools.file.read.MMAP_MIN_SIZE", mmap_min_size)
+    log_file = temp_work_dir / "app.log"
+    log_file.write_text("".join(f"entry {i}\r\n" for i in range(1, 10001)))
+
+    result = await read_file_tool(Params(path=str(log_file), line_offset=9000, n_lines=2))
+    assert result == snapshot(
+        ToolOk(
+            output="""\
+  9000	entry 9000
+  9001	entry 9001
+""",
+            message="2 lines read from file starting from line 9000.",
+        )
+    )
+    result = await read_file_tool(Params(path=str(log_file), line_offset=10000))
+    assert isinstance(result, ToolOk)
+    assert result.output == " 10000\tentry 10000\n"
+    assert "End of file reached" in result.message
+
+    # the index is rebuilt once the file changes
+    log_file.write_text("".join(f"changed {i}\n" for i in range(1, 10001)))
+    result = await read_file_tool(Params(path=str(log_file), line_offset=9000, n_lines=1))
+    assert isinstance(result, ToolOk)
+    assert result.output == "  9000\tchanged 9000\n"
+
+
+@pytest.mark.asyncio
+async def test_read_bare_carriage_returns(read_file_tool: ReadFile, temp_work_dir: Path):
+    """Test that bare carriage returns still break lines."""
+    old_mac_file = temp_work_dir / "old_mac.txt"
+    old_mac_file.write_bytes(b"first\rsecond\rthird")
+
+    result = await read_file_tool(Params(path=str(old_mac_file), line_offset=2))
+    assert isinstance(result, ToolOk)
+    assert result.output == "     2\tsecond\n     3\tthird"
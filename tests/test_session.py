@@ -1,3 +1,4 @@
+import shutil
 from pathlib import Path
 
 import pytest
@@ -51,3 +52,33 @@ def test_session_continue_uses_last_completed_session(tmp_path: Path, isolated_s
     resumed = Session.continue_(work_dir)
     assert resumed is not None
     assert resumed.id == session2.id
+
+
+def test_session_load_by_id(tmp_path: Path, isolated_share_dir: Path):
+    work_dir = tmp_path / "project"
+    work_dir.mkdir()
+
+    session = Session.create(work_dir)
+    assert Session.load(work_dir, session.id) is None  # no history yet
+    session.history_file.parent.mkdir(parents=True, exist_ok=True)
+    session.history_file.with_suffix(".cookies").write_text("{}")
+    assert Session.load(work_dir, session.id) is None  # only the cookie jar
+    session.history_file.write_text("{}\n")
+
+    loaded = Session.load(work_dir, session.id)
+    assert loaded == session
+    assert Session.load(work_dir, "missing") is None
+    assert Session.load(tmp_path / "elsewhere", session.id) is None
+
+    packed = Session.create(work_dir)
+    packed.history_file.with_suffix(".kpack").write_bytes(b"")
+    assert Session.load(work_dir, packed.id) == packed
+
+
+def test_session_load_without_sessions_dir(tmp_path: Path, isolated_share_dir: Path):
+    work_dir = tmp_path / "project"
+    work_dir.mkdir()
+    session = Session.create(work_dir)
+    shutil.rmtree(session.history_file.parent)
+
+    assert Session.load(work_dir, session.id) is None
@@ -0,0 +1,114 @@
+"""Tests for running batches of subagents and forwarding their events."""
+
+import asyncio
+import re
+from collections.abc import Sequence
+
+import pytest
+from kosong.chat_provider.mock import MockChatProvider, MockStreamedMessage
+from kosong.message import Message, TextPart, ToolCall, ToolCallPart
+from kosong.tooling import Tool, ToolOk, ToolResult
+
+from kimi_cli.agentspec import ResolvedAgentSpec
+from kimi_cli.llm import LLM
+from kimi_cli.soul import _current_wire  # pyright: ignore[reportPrivateUsage]
+from kimi_cli.soul.runtime import Runtime
+from kimi_cli.tools.task import Params, Task, _ToolCallBuffer
+from kimi_cli.utils.message import message_extract_text
+from kimi_cli.wire import Wire
+from tests.conftest import tool_call_context
+
+
+class _Script:
+    """Counts the requests in flight, shared by the copies of a chat provider."""
+
+    def __init__(self):
+        self.running = 0
+        self.peak = 0
+
+
+class _ScriptedChatProvider(MockChatProvider):
+    """Answers every prompt with a summary naming it, after a while."""
+
+    def __init__(self, script: _Script):
+        super().__init__([])
+        self._script = script
+
+    async def generate(
+        self,
+        system_prompt: str,
+        tools: Sequence[Tool],
+        history: Sequence[Message],
+    ) -> MockStreamedMessage:
+        self._script.running += 1
+        self._script.peak = max(self._script.peak, self._script.running)
+        try:
+            # the later prompts finish first
+            prompt = message_extract_text(history[-1])
+            await asyncio.sleep(0.05 * (10 - int(prompt.removeprefix("prompt "))))
+        finally:
+            self._script.running -= 1
+        # long enough not to be asked to continue
+        return MockStreamedMessage([TextPart(text=f"Summary of {prompt}. " + "Details. " * 30)])
+
+
+@pytest.mark.asyncio
+async def test_batch_is_capped_and_returned_in_order(
+    agent_spec: ResolvedAgentSpec, runtime: Runtime
+):
+    script = _Script()
+    config = runtime.config.model_copy(deep=True)
+    config.loop_control.max_concurrent_subagents = 2
+    runtime = runtime._replace(
+        config=config,
+        llm=LLM(
+            chat_provider=_ScriptedChatProvider(script),
+            max_context_size=100_000,
+            capabilities=set(),
+        ),
+        global_exclude_tools=None,
+    )
+    task = Task(agent_spec, runtime)
+    prompts = [f"prompt {i}" for i in range(6)]
+
+    token = _current_wire.set(Wire())
+    try:
+        with tool_call_context("Task"):
+            result = await task(
+                Params(
+                    description="batch",
+                    subagent_name="coder",
+                    prompt=prompts[0],
+                    batch=prompts[1:],
+                )
+            )
+    finally:
+        _current_wire.reset(token)
+
+    assert isinstance(result, ToolOk)
+    assert result.brief == "6/6 tasks succeeded"
+    assert isinstance(result.output, str)
+    assert re.findall(r"## Task (\d+) \(finished|Summary of (prompt \d+)", result.output) == [
+        match for i, prompt in enumerate(prompts, start=1) for match in [(str(i), ""), ("", prompt)]
+    ]
+    assert script.peak == 2
+
+
+def test_tool_calls_are_forwarded_once_complete():
+    buffer = _ToolCallBuffer()
+    tool_call = ToolCall(id="1", function=ToolCall.FunctionBody(name="Bash", arguments='{"com'))
+    result = ToolResult(tool_call_id="1", result=ToolOk(output="ok"))
+
+    assert buffer.feed(tool_call) == []
+    assert buffer.feed(ToolCallPart(arguments_part='mand": "ls"}')) == []
+    assert buffer.feed(TextPart(text="thinking")) == [TextPart(text="thinking")]
+
+    forwarded = buffer.feed(result)
+    assert forwarded[1] is result
+    complete = forwarded[0]
+    assert isinstance(complete, ToolCall)
+    assert complete.function.arguments == '{"command": "ls"}'
+    # the event seen by the subagent itself is left untouched
+    assert tool_call.function.arguments == '{"com'
+
+    assert buffer.feed(result) == [result]
@@ -1,5 +1,6 @@
 # ruff: noqa
 
+import asyncio
 import platform
 from pathlib import Path
 from inline_snapshot import snapshot
@@ -8,6 +9,11 @@ from kimi_cli.tools.task import Task
 
 
 def test_task_subagents(task_tool: Task, temp_work_dir: Path):
+    # subagents are loaded on first use
+    assert task_tool._subagents == {}
+    for name in task_tool._subagent_specs:
+        asyncio.run(task_tool._get_subagent(name))
+
     subagents = [
         (
             agent.name,
@@ -16,6 +16,7 @@ from kimi_cli.tools.task import Task
 from kimi_cli.tools.think import Think
 from kimi_cli.tools.todo import SetTodoList
 from kimi_cli.tools.web.fetch import FetchURL
+from kimi_cli.tools.web.http import HttpRequest
 from kimi_cli.tools.web.search import SearchWeb
 
 
@@ -46,6 +47,8 @@ Examples:
 - When you need to analyze a huge codebase (> hundreds of thousands of lines), you can spawn multiple subagents each exploring on a different part of the codebase and gather the summarized results.
 - When you need to search the web for multiple queries, you can spawn multiple subagents for better efficiency.
 
+When the subtasks are for the same subagent, you can also put the prompts of the other subtasks in `batch` of a single Task call. All of them run in parallel, and the results come back together, in order, with the time each subagent took.
+
 **Available Subagents:**
 
 - `coder`: Good at general software engineering tasks.
@@ -157,6 +160,7 @@ Read content from a file.
 - A `<system>` tag will be given before the read file content.
 - Content will be returned with a line number before each line like `cat -n` format.
 - Use `line_offset` and `n_lines` parameters when you only need to read a part of the file.
+- Reading a part deep into a large file is fast, so page through big logs or dumps with `line_offset` instead of reading them via the Bash tool.
 - The maximum number of lines that can be read at once is 1000.
 - Any lines longer than 2000 characters will be truncated, ending with "...".
 - The system will notify you when there is any limitation hit when reading the file.
@@ -182,13 +186,18 @@ Find files and directories using glob patterns. This tool supports standard glob
 
 **Example patterns:**
 - `*.py` - All Python files in current directory
+- `**/*.py` - All Python files in the whole directory tree
 - `src/**/*.js` - All JavaScript files in src directory recursively
 - `test_*.py` - Python test files starting with "test_"
 - `*.config.{js,ts}` - Config files with .js or .ts extension
 
-**Bad example patterns:**
-- `**`, `**/*.py` - Any pattern starting with '**' will be rejected. Because it would recursively search all directories and subdirectories, which is very likely to yield large result that exceeds your context size. Always use more specific patterns like `src/**/*.py` instead.
-- `node_modules/**/*.js` - Although this does not start with '**', it would still highly possible to yield large result because `node_modules` is well-known to contain too many directories and files. Avoid recursively searching in such directories, other examples include `venv`, `.venv`, `__pycache__`, `target`. If you really need to search in a dependency, use more specific patterns like `node_modules/react/src/*` instead.
+**Ignored files:**
+- `**` does not walk into directories ignored by `.gitignore`, version control metadata, caches and build or dependency directories like `node_modules`, `.venv`, `__pycache__` and `target`, so that recursive patterns like `**/*.py` stay fast and focused on the project itself. Files matched by the last part of the pattern, e.g. `*.pyc`, are always returned.
+- To search inside such a directory, name it explicitly in the pattern, e.g. `node_modules/react/src/*.js`. Prefer specific patterns there, as dependencies may contain a huge number of files.
+
+**Limits:**
+- At most 1000 matches are returned, in sorted order.
+- The search stops after scanning 100000 files and directories. The number of matches is then a lower bound; use a more specific pattern or directory to search the rest.
 """
     )
 
@@ -202,6 +211,7 @@ A powerful search tool based-on ripgrep.
 **Tips:**
 - ALWAYS use Grep tool instead of running `grep` or `rg` command with Bash tool.
 - Use the ripgrep pattern syntax, not grep syntax. E.g. you need to escape braces like `\\\\{` to search for `{`.
+- The output is limited to about 50,000 characters. Narrow down the search with `path`, `glob`, `type` or `head_limit` if it gets truncated.
 """
     )
 
@@ -262,3 +272,22 @@ def test_fetch_url_description(fetch_url_tool: FetchURL):
     assert fetch_url_tool.base.description == snapshot(
         "Fetch a web page from a URL and extract main text content from it.\n"
     )
+
+
+def test_http_request_description(http_request_tool: HttpRequest):
+    """Test the description of HttpRequest tool."""
+    assert http_request_tool.base.description == snapshot("""\
+Send HTTP requests over a pool of keep-alive connections, with cookies kept for the whole session.
+
+Use it to probe web applications and APIs, e.g. to inspect the status, headers and body of a response, or to enumerate IDs, paths and parameters. Requests with methods other than GET, HEAD and OPTIONS require approval.
+
+**Batch mode:**
+- Put `{{name}}` placeholders in the URL, headers or body, and give their values with `batch` (one item per request) or `batch_range` (one number per request).
+- Up to 1000 requests are sent, `concurrency` (at most 32) at a time.
+- Instead of the bodies, the output groups the responses by status, length and hash of the body, then lists the requests whose response differs from the most common one.
+
+**Tips:**
+- ALWAYS use this tool instead of running `curl` in a loop with Bash tool. One batch replaces hundreds of `curl` commands.
+- Cookies set by responses, e.g. by a login, are sent along with later requests to the same host.
+- Redirects are not followed by default, so that the `Location` of a redirect can be inspected.
+""")
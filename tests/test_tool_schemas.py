@@ -14,6 +14,7 @@ from kimi_cli.tools.task import Task
 from kimi_cli.tools.think import Think
 from kimi_cli.tools.todo import SetTodoList
 from kimi_cli.tools.web.fetch import FetchURL
+from kimi_cli.tools.web.http import HttpRequest
 from kimi_cli.tools.web.search import SearchWeb
 
 
@@ -34,6 +35,11 @@ def test_task_params_schema(task_tool: Task):
                     "description": "The task for the subagent to perform. You must provide a detailed prompt with all necessary background information because the subagent cannot see anything in your context.",
                     "type": "string",
                 },
+                "batch": {
+                    "description": "More tasks for the same kind of subagent, each run by a subagent of its own in parallel with `prompt`. Results are returned in order.",
+                    "items": {"type": "string"},
+                    "type": "array",
+                },
             },
             "required": ["description", "subagent_name", "prompt"],
             "type": "object",
@@ -390,3 +396,95 @@ def test_fetch_url_params_schema(fetch_url_tool: FetchURL):
             "type": "object",
         }
     )
+
+
+def test_http_request_params_schema(http_request_tool: HttpRequest):
+    """Test the schema of HttpRequest tool parameters."""
+    assert http_request_tool.base.parameters == snapshot(
+        {
+            "$defs": {
+                "BatchRange": {
+                    "properties": {
+                        "name": {
+                            "description": "The name of the placeholder to fill with the numbers.",
+                            "type": "string",
+                        },
+                        "start": {"description": "The first number.", "type": "integer"},
+                        "stop": {"description": "The last number, inclusive.", "type": "integer"},
+                        "step": {
+                            "default": 1,
+                            "description": "The difference between two numbers.",
+                            "minimum": 1,
+                            "type": "integer",
+                        },
+                    },
+                    "required": ["name", "start", "stop"],
+                    "type": "object",
+                }
+            },
+            "properties": {
+                "url": {
+                    "description": "The URL to request. In a batch, `{{name}}` placeholders are replaced by the values of each request.",
+                    "type": "string",
+                },
+                "method": {
+                    "default": "GET",
+                    "description": "The HTTP method of the request.",
+                    "pattern": "^[A-Za-z]+$",
+                    "type": "string",
+                },
+                "headers": {
+                    "additionalProperties": {"type": "string"},
+                    "description": "The headers of the request. Placeholders are replaced in a batch.",
+                    "type": "object",
+                },
+                "body": {
+                    "anyOf": [{"type": "string"}, {"type": "null"}],
+                    "default": None,
+                    "description": "The body of the request. Placeholders are replaced in a batch.",
+                },
+                "follow_redirects": {
+                    "default": False,
+                    "description": "Whether to follow redirects, instead of returning the redirect response.",
+                    "type": "boolean",
+                },
+                "verify_tls": {
+                    "default": True,
+                    "description": "Whether to verify TLS certificates. Disable for self-signed certificates.",
+                    "type": "boolean",
+                },
+                "timeout": {
+                    "default": 30,
+                    "description": "The timeout in seconds of each request.",
+                    "exclusiveMinimum": 0,
+                    "maximum": 300,
+                    "type": "number",
+                },
+                "batch": {
+                    "anyOf": [
+                        {
+                            "items": {"additionalProperties": {"type": "string"}, "type": "object"},
+                            "type": "array",
+                        },
+                        {"type": "null"},
+                    ],
+                    "default": None,
+                    "description": 'Send one request per item, with the placeholders replaced by the values of the item, e.g. `[{"user": "admin"}, {"user": "guest"}]`.',
+                },
+                "batch_range": {
+                    "anyOf": [{"$ref": "#/$defs/BatchRange"}, {"type": "null"}],
+                    "default": None,
+                    "description": "Send one request per number of a range, e.g. to enumerate IDs.",
+                },
+                "concurrency": {
+                    "default": 16,
+                    "description": "The number of requests of a batch sent at the same time.",
+                    "maximum": 32,
+                    "minimum": 1,
+                    "type": "integer",
+                },
+            },
+            "required": ["url"],
+            "type": "object",
+        }
+    )
@@ -0,0 +1,126 @@
+"""Tests for caching the results of pure tools in the toolset."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+from kosong.message import ToolCall
+from kosong.tooling import CallableTool2, ToolOk, ToolResult, ToolReturnType
+from pydantic import BaseModel, ConfigDict, Field
+
+from kimi_cli.soul.toolset import CustomToolset, ToolResultCache
+from kimi_cli.tools.file.glob import Glob
+from kimi_cli.tools.file.read import ReadFile
+from kimi_cli.tools.file.write import WriteFile
+from kimi_cli.tools.think import Think
+
+
+async def _call(toolset: CustomToolset, name: str, **arguments: object) -> ToolOk:
+    tool_call = ToolCall(
+        id="test", function=ToolCall.FunctionBody(name=name, arguments=json.dumps(arguments))
+    )
+    result = toolset.handle(tool_call)
+    if not isinstance(result, ToolResult):
+        result = await result
+    assert isinstance(result.result, ToolOk)
+    return result.result
+
+
+@pytest.mark.asyncio
+async def test_pure_tool_results_are_cached(
+    read_file_tool: ReadFile, write_file_tool: WriteFile, temp_work_dir: Path
+):
+    sample_file = temp_work_dir / "sample.txt"
+    sample_file.write_text("first\n")
+    cache = ToolResultCache()
+    toolset = CustomToolset([read_file_tool, write_file_tool], result_cache=cache)
+
+    first = await _call(toolset, "ReadFile", path=str(sample_file))
+    # parameters are compared once normalized
+    second = await _call(toolset, "ReadFile", line_offset=1, path=str(sample_file))
+    assert second is first
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.saved_chars == len("     1\tfirst\n")
+
+    # a change to the file is caught by its fingerprint
+    sample_file.write_text("second, longer\n")
+    assert await _call(toolset, "ReadFile", path=str(sample_file)) != first
+    assert cache.stats.misses == 2
+
+    # tools that may write invalidate everything
+    await _call(toolset, "WriteFile", path=str(temp_work_dir / "other.txt"), content="x")
+    assert cache.stats.invalidations == 1
+    await _call(toolset, "ReadFile", path=str(sample_file))
+    assert cache.stats.misses == 3
+
+
+@pytest.mark.asyncio
+async def test_cache_is_shared_by_toolsets(read_file_tool: ReadFile, temp_work_dir: Path):
+    sample_file = temp_work_dir / "sample.txt"
+    sample_file.write_text("content\n")
+    cache = ToolResultCache()
+    main_toolset = CustomToolset([read_file_tool], result_cache=cache)
+    subagent_toolset = CustomToolset([read_file_tool], result_cache=cache)
+
+    await _call(main_toolset, "ReadFile", path=str(sample_file))
+    await _call(subagent_toolset, "ReadFile", path=str(sample_file))
+    assert cache.stats.hits == 1
+
+
+@pytest.mark.asyncio
+async def test_directory_results_expire(
+    glob_tool: Glob, temp_work_dir: Path, monkeypatch: pytest.MonkeyPatch
+):
+    (temp_work_dir / "src").mkdir()
+    (temp_work_dir / "src" / "main.py").write_text("")
+    cache = ToolResultCache()
+    toolset = CustomToolset([glob_tool], result_cache=cache)
+
+    first = await _call(toolset, "Glob", pattern="**/*.py")
+    # a nested file does not change the fingerprint of the directory searched
+    (temp_work_dir / "src" / "utils.py").write_text("")
+    assert await _call(toolset, "Glob", pattern="**/*.py") is first
+
+    monkeypatch.setattr(ToolResultCache, "MAX_DIRECTORY_AGE", 0.0)
+    result = await _call(toolset, "Glob", pattern="**/*.py")
+    assert isinstance(result.output, str)
+    assert result.output.splitlines() == ["src/main.py", "src/utils.py"]
+
+
+class _GatedParams(BaseModel):
+    key: str
+
+
+class _GatedRead(CallableTool2[_GatedParams]):
+    name: str = "GatedRead"
+    description: str = "Return the key once the gate opens."
+    params: type[_GatedParams] = _GatedParams
+    gate: asyncio.Event = Field(default_factory=asyncio.Event)
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    def cache_paths(self, params: _GatedParams) -> list[Path]:
+        return []
+
+    async def __call__(self, params: _GatedParams) -> ToolReturnType:
+        await self.gate.wait()
+        return ToolOk(output=params.key)
+
+
+@pytest.mark.asyncio
+async def test_results_of_calls_racing_a_write_are_not_cached(think_tool: Think):
+    gated_read = _GatedRead()
+    cache = ToolResultCache()
+    toolset = CustomToolset([gated_read, think_tool], result_cache=cache)
+
+    read = asyncio.create_task(_call(toolset, "GatedRead", key="a"))
+    await asyncio.sleep(0.01)
+    await _call(toolset, "Think", thought="writes nothing, but may as well")
+    gated_read.gate.set()
+    await read
+    await _call(toolset, "GatedRead", key="a")
+    assert cache.stats.hits == 0
+    await _call(toolset, "GatedRead", key="a")
+    assert cache.stats.hits == 1
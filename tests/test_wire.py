@@ -0,0 +1,171 @@
+"""Tests for the wire between the soul and the UI."""
+
+import asyncio
+
+import pytest
+from inline_snapshot import snapshot
+from kosong.message import TextPart, ThinkPart, ToolCall, ToolCallPart
+
+from kimi_cli.wire import Wire
+from kimi_cli.wire.message import (
+    StepBegin,
+    SubagentEvent,
+    ToolOutputChunk,
+    WireMessage,
+    serialize_event,
+)
+
+
+def _drain(wire: Wire) -> list[WireMessage]:
+    messages: list[WireMessage] = []
+    while (msg := wire.ui_side.receive_nowait()) is not None:
+        messages.append(msg)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_wire_merges_adjacent_deltas():
+    """Test that queued deltas of the same kind are merged, without modifying them."""
+    wire = Wire(coalesce_window=60)
+    first = TextPart(text="Hel")
+    tool_call = ToolCall(id="1", function=ToolCall.FunctionBody(name="Bash", arguments=None))
+    for msg in [
+        ThinkPart(think="hm"),
+        ThinkPart(think="m", encrypted="sig"),
+        ThinkPart(think="after the signature"),
+        first,
+        TextPart(text="lo"),
+        tool_call,
+        ToolCallPart(arguments_part='{"command": '),
+        ToolCallPart(arguments_part='"ls"}'),
+        ToolOutputChunk(tool_call_id="1", text="a\n"),
+        ToolOutputChunk(tool_call_id="1", text="b\n"),
+        ToolOutputChunk(tool_call_id="2", text="c\n"),
+        SubagentEvent(task_tool_call_id="t", event=TextPart(text="sub")),
+        SubagentEvent(task_tool_call_id="t", event=TextPart(text="agent")),
+        StepBegin(n=2),
+        StepBegin(n=3),
+    ]:
+        wire.soul_side.send(msg)
+
+    assert _drain(wire) == snapshot(
+        [
+            ThinkPart(think="hmm", encrypted="sig"),
+            ThinkPart(think="after the signature"),
+            TextPart(text="Hello"),
+            ToolCall(id="1", function=ToolCall.FunctionBody(name="Bash", arguments=None)),
+            ToolCallPart(arguments_part='{"command": "ls"}'),
+            ToolOutputChunk(tool_call_id="1", text="a\nb\n"),
+            ToolOutputChunk(tool_call_id="2", text="c\n"),
+            SubagentEvent(task_tool_call_id="t", event=TextPart(text="subagent")),
+            StepBegin(n=2),
+            StepBegin(n=3),
+        ]
+    )
+    assert first == TextPart(text="Hel")
+    assert wire.stats.sent == 15
+    assert wire.stats.received == 10
+    assert wire.stats.merged == 5
+
+
+@pytest.mark.asyncio
+async def test_wire_merges_interleaved_subagent_deltas():
+    """Test that deltas of concurrent subagents are merged within each subagent's stream."""
+    wire = Wire(coalesce_window=60)
+    for text in ["a", "b", "c"]:
+        for task in ["t1", "t2"]:
+            wire.soul_side.send(SubagentEvent(task_tool_call_id=task, event=TextPart(text=text)))
+    wire.soul_side.send(SubagentEvent(task_tool_call_id="t1", event=StepBegin(n=2)))
+    wire.soul_side.send(SubagentEvent(task_tool_call_id="t2", event=TextPart(text="d")))
+    wire.soul_side.send(SubagentEvent(task_tool_call_id="t1", event=TextPart(text="e")))
+
+    assert _drain(wire) == [
+        SubagentEvent(task_tool_call_id="t1", event=TextPart(text="abc")),
+        SubagentEvent(task_tool_call_id="t2", event=TextPart(text="abcd")),
+        SubagentEvent(task_tool_call_id="t1", event=StepBegin(n=2)),
+        SubagentEvent(task_tool_call_id="t1", event=TextPart(text="e")),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_wire_delivers_deltas_to_a_waiting_receiver():
+    """Test that a receiver that keeps up gets every delta, and that a slow one gets them merged."""
+    wire = Wire(coalesce_window=60)
+    receiver = asyncio.create_task(wire.ui_side.receive())
+    await asyncio.sleep(0)
+    wire.soul_side.send(TextPart(text="a"))
+    assert await receiver == TextPart(text="a")
+
+    wire.soul_side.send(TextPart(text="b"))
+    wire.soul_side.send(TextPart(text="c"))
+    assert await wire.ui_side.receive() == TextPart(text="bc")
+
+
+@pytest.mark.asyncio
+async def test_wire_coalesce_window():
+    """Test that deltas are not merged into a queued message older than the window."""
+    wire = Wire(coalesce_window=0)
+    wire.soul_side.send(TextPart(text="a"))
+    wire.soul_side.send(TextPart(text="b"))
+    assert _drain(wire) == [TextPart(text="a"), TextPart(text="b")]
+
+
+@pytest.mark.asyncio
+async def test_wire_capacity():
+    """Test that a full wire merges deltas regardless of their age, and never drops messages."""
+    wire = Wire(coalesce_window=0, capacity=2)
+    for msg in [
+        TextPart(text="a"),
+        TextPart(text="b"),
+        TextPart(text="c"),
+        StepBegin(n=1),
+        TextPart(text="d"),
+    ]:
+        wire.soul_side.send(msg)
+    assert wire.stats.depth == 4
+    assert wire.stats.overflowed == 2
+    assert _drain(wire) == [
+        TextPart(text="a"),
+        TextPart(text="bc"),
+        StepBegin(n=1),
+        TextPart(text="d"),
+    ]
+    assert wire.stats.max_depth == 4
+    assert wire.stats.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_wire_shutdown():
+    """Test that queued messages can be received after a shutdown, and nothing is sent."""
+    wire = Wire()
+    wire.soul_side.send(StepBegin(n=1))
+    wire.shutdown()
+    wire.soul_side.send(StepBegin(n=2))
+    assert await wire.ui_side.receive() == StepBegin(n=1)
+    with pytest.raises(asyncio.QueueShutDown):
+        await wire.ui_side.receive()
+
+
+def test_serialize_streamed_events():
+    """Test that the events serialized without dumping their models are serialized as before."""
+    for event in [
+        TextPart(text="Hi"),
+        ThinkPart(think="hm"),
+        ThinkPart(think="", encrypted="sig"),
+        ToolCallPart(arguments_part='{"a"'),
+        ToolCallPart(arguments_part=None),
+    ]:
+        payload = event.model_dump(mode="json", exclude_none=True)
+        kind = "tool_call_part" if isinstance(event, ToolCallPart) else "content_part"
+        assert serialize_event(event) == {"type": kind, "payload": payload}
+
+    chunk = ToolOutputChunk(tool_call_id="1", text="a\n")
+    assert serialize_event(SubagentEvent(task_tool_call_id="t", event=chunk)) == snapshot(
+        {
+            "type": "subagent_event",
+            "payload": {
+                "task_tool_call_id": "t",
+                "event": {"type": "tool_output", "payload": {"tool_call_id": "1", "text": "a\n"}},
+            },
+        }
+    )
@@ -0,0 +1,327 @@
+"""Tests for the JSON-RPC server of the wire UI, hosting several sessions."""
+
+import asyncio
+import contextlib
+import json
+import socket
+from collections.abc import AsyncGenerator, Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+import aiohttp
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from kosong.chat_provider.mock import MockChatProvider, MockStreamedMessage
+from kosong.message import Message, TextPart
+from kosong.tooling import Tool
+
+from kimi_cli.llm import LLM
+from kimi_cli.soul import Soul
+from kimi_cli.soul.agent import Agent
+from kimi_cli.soul.context import Context
+from kimi_cli.soul.kimisoul import KimiSoul
+from kimi_cli.soul.runtime import Runtime
+from kimi_cli.soul.toolset import CustomToolset
+from kimi_cli.ui.wire import WireServer
+
+
+class _Gate:
+    """Holds back the replies of a chat provider, counting the requests waiting for it."""
+
+    def __init__(self):
+        self.event = asyncio.Event()
+        self.waiting = 0
+
+    def open(self) -> None:
+        self.event.set()
+
+
+class _GatedChatProvider(MockChatProvider):
+    """Replies to every request once the gate is open, shared by its copies."""
+
+    def __init__(self, gate: _Gate):
+        super().__init__([TextPart(text="done")])
+        self._gate = gate
+
+    async def generate(
+        self,
+        system_prompt: str,
+        tools: Sequence[Tool],
+        history: Sequence[Message],
+    ) -> MockStreamedMessage:
+        self._gate.waiting += 1
+        try:
+            await self._gate.event.wait()
+        finally:
+            self._gate.waiting -= 1
+        return await super().generate(system_prompt, tools, history)
+
+
+class _Client:
+    """The client end of a wire server, collecting the events of each session."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._responses: dict[str, asyncio.Future[dict[str, Any]]] = {}
+        self.events: dict[str, list[str]] = {}
+        self.n_batches = 0
+        self._read_task = asyncio.create_task(self._read_loop())
+
+    async def _read_loop(self) -> None:
+        while line := await self._reader.readline():
+            batch = json.loads(line)
+            if isinstance(batch, list):
+                self.n_batches += 1
+            for payload in batch if isinstance(batch, list) else [batch]:
+                if payload.get("method") == "event":
+                    params = payload["params"]
+                    self.events.setdefault(params["session_id"], []).append(params["type"])
+                elif "id" in payload and (future := self._responses.pop(payload["id"], None)):
+                    future.set_result(payload)
+
+    def send(self, method: str, **params: Any) -> asyncio.Future[dict[str, Any]]:
+        return self.send_batch([(method, params)])[0]
+
+    def send_batch(
+        self, requests: list[tuple[str, dict[str, Any]]]
+    ) -> list[asyncio.Future[dict[str, Any]]]:
+        """Send requests in one line, as a batch unless there is a single one."""
+        payloads: list[dict[str, Any]] = []
+        futures: list[asyncio.Future[dict[str, Any]]] = []
+        for method, params in requests:
+            self._next_id += 1
+            msg_id = str(self._next_id)
+            futures.append(future := asyncio.get_running_loop().create_future())
+            self._responses[msg_id] = future
+            payloads.append({"jsonrpc": "2.0", "id": msg_id, "method": method, "params": params})
+        self._writer.write(json.dumps(payloads if len(payloads) > 1 else payloads[0]).encode())
+        self._writer.write(b"\n")
+        return futures
+
+    async def request(self, method: str, **params: Any) -> dict[str, Any]:
+        return await asyncio.wait_for(self.send(method, **params), 5)
+
+    async def close(self) -> None:
+        self._writer.close()
+        self._read_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._read_task
+
+
+@pytest.fixture
+def gate() -> _Gate:
+    return _Gate()
+
+
+@pytest.fixture
+def make_soul(runtime: Runtime, gate: _Gate, temp_share_dir: Path) -> Callable[[str], Soul]:
+    llm = LLM(chat_provider=_GatedChatProvider(gate), max_context_size=100_000, capabilities=set())
+
+    def make_soul(session_id: str) -> Soul:
+        session = runtime.session._replace(
+            id=session_id, history_file=temp_share_dir / f"{session_id}.jsonl"
+        )
+        session_runtime = runtime._replace(llm=llm).for_session(session)
+        agent = Agent(name="test", system_prompt="", toolset=CustomToolset())
+        return KimiSoul(agent, session_runtime, context=Context(session.history_file))
+
+    return make_soul
+
+
+async def _serve(server: WireServer) -> AsyncGenerator[_Client]:
+    server_sock, client_sock = socket.socketpair()
+    server_streams = await asyncio.open_connection(sock=server_sock)
+    client = _Client(*await asyncio.open_connection(sock=client_sock))
+    serve_task = asyncio.create_task(server.serve(*server_streams))
+    yield client
+    await client.close()
+    await asyncio.wait_for(serve_task, 5)
+
+
+@pytest_asyncio.fixture
+async def client(make_soul: Callable[[str], Soul]) -> AsyncGenerator[_Client]:
+    """A client of a server with two concurrent runs at most, that can open new sessions."""
+    opened = 0
+
+    async def open_session(session_id: str | None) -> tuple[str, Soul] | None:
+        nonlocal opened
+        if session_id is not None:
+            return None  # nothing persisted
+        opened += 1
+        return f"s{opened}", make_soul(f"s{opened}")
+
+    server = WireServer(
+        make_soul("main"), session_id="main", open_session=open_session, max_concurrent_runs=2
+    )
+    async for client in _serve(server):
+        yield client
+
+
+async def _wait_until(condition: Callable[[], bool]) -> None:
+    async with asyncio.timeout(5):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_wire_server_runs_sessions_concurrently(client: _Client, gate: _Gate):
+    """Test that the runs of different sessions are executed at the same time."""
+    created = await client.request("session/create")
+    assert created["result"] == {"session_id": "s1", "status": "idle"}
+
+    runs = [client.send("run", input="hi"), client.send("run", input="hi", session_id="s1")]
+    await _wait_until(lambda: gate.waiting == 2)
+    busy = await client.request("run", input="again", session_id="s1")
+    assert busy["error"]["message"] == "Run already in progress"
+    attached = await client.request("session/attach", session_id="s1")
+    assert attached["result"] == {"session_id": "s1", "status": "running"}
+
+    gate.open()
+    for run in runs:
+        assert (await asyncio.wait_for(run, 5))["result"] == {"status": "finished"}
+    assert set(client.events) == {"main", "s1"}
+    assert client.events["main"] == client.events["s1"]
+
+
+@pytest.mark.asyncio
+async def test_wire_server_caps_concurrent_runs(client: _Client, gate: _Gate):
+    """Test that runs beyond the cap wait for a slot, and can be interrupted while waiting."""
+    for _ in range(3):
+        await client.request("session/create")
+    runs = [client.send("run", input="hi", session_id=f"s{i}") for i in range(1, 4)]
+    await _wait_until(lambda: gate.waiting == 2)
+    await asyncio.sleep(0.05)
+    assert gate.waiting == 2
+    assert "s3" not in client.events
+
+    interrupted = await client.request("interrupt", session_id="s3")
+    assert interrupted["result"] == {"status": "ok"}
+    assert (await asyncio.wait_for(runs[2], 5))["result"] == {"status": "cancelled"}
+    assert "s3" not in client.events
+
+    # the slot of an interrupted run is freed for the next one
+    await client.request("interrupt", session_id="s1")
+    assert (await asyncio.wait_for(runs[0], 5))["result"] == {"status": "cancelled"}
+    run = client.send("run", input="hi", session_id="s3")
+    await _wait_until(lambda: gate.waiting == 2)
+
+    gate.open()
+    assert (await asyncio.wait_for(runs[1], 5))["result"] == {"status": "finished"}
+    assert (await asyncio.wait_for(run, 5))["result"] == {"status": "finished"}
+
+
+@pytest.mark.asyncio
+async def test_wire_server_closes_sessions(client: _Client, gate: _Gate):
+    """Test that closing a session stops its run, and that unknown sessions are reported."""
+    await client.request("session/create")
+    run = client.send("run", input="hi", session_id="s1")
+    await _wait_until(lambda: gate.waiting == 1)
+
+    closed = await client.request("session/close", session_id="s1")
+    assert closed["result"] == {"status": "closed"}
+    await _wait_until(lambda: gate.waiting == 0)
+    for response in [
+        await client.request("run", input="hi", session_id="s1"),
+        await client.request("interrupt", session_id="s1"),
+        await client.request("session/close", session_id="s1"),
+        await client.request("session/attach", session_id="s1"),
+    ]:
+        assert response["error"] == {"code": -32004, "message": "Session not found: s1"}
+    assert not run.done()  # a closed session sends nothing more
+
+    idle = await client.request("interrupt")
+    assert idle["result"] == {"status": "idle"}
+
+
+@pytest.mark.asyncio
+async def test_wire_server_closes_session_history(make_soul: Callable[[str], Soul], gate: _Gate):
+    """Test that the history file of a closed session is released."""
+    gate.open()
+    soul = make_soul("s1")
+    assert isinstance(soul, KimiSoul)
+    writer = soul.context._writer  # pyright: ignore[reportPrivateUsage]
+
+    async def open_session(session_id: str | None) -> tuple[str, Soul] | None:
+        return "s1", soul
+
+    server = WireServer(make_soul("main"), session_id="main", open_session=open_session)
+    async for client in _serve(server):
+        await client.request("session/create")
+        finished = await client.request("run", input="hi", session_id="s1")
+        assert finished["result"] == {"status": "finished"}
+        assert writer._file is not None  # pyright: ignore[reportPrivateUsage]
+
+        await client.request("session/close", session_id="s1")
+        assert writer._file is None  # pyright: ignore[reportPrivateUsage]
+
+
+@pytest.mark.asyncio
+async def test_sessions_keep_their_own_cookies(runtime: Runtime, temp_share_dir: Path):
+    """Test that sessions neither send nor save the cookies of one another."""
+
+    async def whoami(request: web.Request) -> web.Response:
+        response = web.Response(text=request.cookies.get("user", "nobody"))
+        if user := request.query.get("login"):
+            response.set_cookie("user", user)
+        return response
+
+    app = web.Application()
+    app.router.add_get("/", whoami)
+    app_runner = web.AppRunner(app)
+    await app_runner.setup()
+    site = web.TCPSite(app_runner, "127.0.0.1", 0)
+    await site.start()
+    host, port = app_runner.addresses[0][:2]
+
+    sessions = [
+        runtime.session._replace(id=session_id, history_file=temp_share_dir / f"{session_id}.jsonl")
+        for session_id in ["s1", "s2"]
+    ]
+    runtimes = [runtime.for_session(session) for session in sessions]
+
+    async def get(session_runtime: Runtime, query: str = "") -> str:
+        assert session_runtime.http_session is not None
+        async with session_runtime.http_session.session.get(f"http://{host}:{port}/{query}") as r:
+            return await r.text()
+
+    try:
+        await get(runtimes[0], "?login=alice")
+        assert await get(runtimes[0]) == "alice"
+        assert await get(runtimes[1]) == "nobody"
+    finally:
+        for session_runtime in runtimes:
+            await session_runtime.close()
+        await app_runner.cleanup()
+
+    for session, n_cookies in zip(sessions, [1, 0], strict=True):
+        cookie_jar = aiohttp.CookieJar(unsafe=True)
+        cookie_jar.load(session.history_file.with_suffix(".cookies"))
+        assert len(cookie_jar) == n_cookies
+
+
+@pytest.mark.asyncio
+async def test_wire_server_without_session_opener(make_soul: Callable[[str], Soul]):
+    """Test that a server given a single soul serves it under the default session."""
+    async for client in _serve(WireServer(make_soul("main"))):
+        created = await client.request("session/create")
+        assert created["error"]["code"] == -32005
+        attached = await client.request("session/attach", session_id="default")
+        assert attached["result"] == {"session_id": "default", "status": "idle"}
+
+
+@pytest.mark.asyncio
+async def test_wire_server_batches(make_soul: Callable[[str], Soul], gate: _Gate):
+    """Test that messages are written in batches if enabled, and that batches are accepted."""
+    gate.open()
+    server = WireServer(make_soul("main"), batch_size=16, batch_window=0.05)
+    async for client in _serve(server):
+        client._writer.write(b'{"jsonrpc": "2.0", "id": "x", "method": "run", params: {}}\n')
+        client._writer.write(b'["not a message"]\n')
+        runs = client.send_batch([("run", {"input": "hi"}), ("interrupt", {"session_id": "s"})])
+        assert (await asyncio.wait_for(runs[0], 5))["result"] == {"status": "finished"}
+        assert (await asyncio.wait_for(runs[1], 5))["error"]["code"] == -32004
+        assert client.events["default"] == ["step_begin", "content_part", "status_update"]
+        assert client.n_batches > 0